@@ -0,0 +1,149 @@
+"""Benchmark the latency Home Assistant adds when bridging intercoms.
+
+A fake source device streams microphone frames in real time once it is
+told to listen and notes when each frame left. Fake sink devices note
+when frames arrive; matching them in order gives the end-to-end latency
+through the bridge (and the sink's mixer) over localhost websockets. With a one-frame jitter buffer
+this is the routing overhead; the default buffer adds its fixed delay.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_bridge
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import numpy as np
+import websockets
+
+from custom_components.smart_intercom.bridge import AudioBridge
+from custom_components.smart_intercom.const import (
+    AUDIO_CHUNK_SIZE,
+    BRIDGE_JITTER_FRAMES,
+    CMD_START_LISTEN,
+    CMD_START_STREAM,
+    CMD_STOP_LISTEN,
+    CMD_STOP_STREAM,
+)
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .bench_broadcast import SECRET, BenchCoordinator
+from .bench_playback import ExecutorHass
+
+SECONDS = 3
+FRAME_SECONDS = AUDIO_CHUNK_SIZE / 32000
+
+
+class FakeIntercom:
+    """Fake firmware: streams its microphone while listening, times arrivals."""
+
+    def __init__(self) -> None:
+        self.sent: list[float] = []
+        self.received: list[float] = []
+        self._stream: asyncio.Task | None = None
+
+    async def handler(self, ws) -> None:
+        await ws.send(json.dumps({"type": "auth_required"}))
+        try:
+            async for message in ws:
+                if isinstance(message, bytes):
+                    self.received.append(time.perf_counter())
+                    continue
+                cmd = json.loads(message).get("cmd")
+                if cmd == "auth":
+                    await ws.send(json.dumps({"type": "auth_success"}))
+                elif cmd in (CMD_START_LISTEN, CMD_START_STREAM):
+                    self._stream = asyncio.create_task(self._send_mic(ws))
+                elif cmd in (CMD_STOP_LISTEN, CMD_STOP_STREAM) and self._stream:
+                    self._stream.cancel()
+        finally:
+            if self._stream:
+                self._stream.cancel()
+
+    async def _send_mic(self, ws) -> None:
+        """Send frames at playback speed."""
+        frame = bytes(AUDIO_CHUNK_SIZE)
+        start = time.perf_counter()
+        index = 0
+        while True:
+            self.sent.append(time.perf_counter())
+            await ws.send(frame)
+            index += 1
+            await asyncio.sleep(max(0.0, start + index * FRAME_SECONDS - time.perf_counter()))
+
+
+class BridgeCoordinator(BenchCoordinator):
+    """Bench coordinator that also dispatches inbound audio."""
+
+    def __init__(self, hass: ExecutorHass, client: SmartIntercomClient) -> None:
+        super().__init__(hass, client)
+        self._audio_callbacks: list = []
+        client.on_audio = self.on_audio
+
+    def on_audio(self, data: bytes) -> None:
+        for callback in self._audio_callbacks:
+            callback(data)
+
+    def register_audio_callback(self, callback) -> None:
+        self._audio_callbacks.append(callback)
+
+    def unregister_audio_callback(self, callback) -> None:
+        self._audio_callbacks.remove(callback)
+
+
+async def run(targets: int, jitter_frames: int, hass: ExecutorHass) -> None:
+    """Bridge one fake device to several others and print latencies."""
+    fakes = [FakeIntercom() for _ in range(targets + 1)]
+    servers = [await websockets.serve(fake.handler, "127.0.0.1", 0) for fake in fakes]
+    coordinators = {}
+    for index, server in enumerate(servers):
+        client = SmartIntercomClient("127.0.0.1", server.sockets[0].getsockname()[1], SECRET)
+        coordinators[f"device_{index}"] = BridgeCoordinator(hass, client)
+        await client.connect()
+    while not all(c.client.connected for c in coordinators.values()):
+        await asyncio.sleep(0.01)
+
+    bridge = AudioBridge(
+        hass,
+        coordinators,
+        "device_0",
+        [f"device_{index}" for index in range(1, targets + 1)],
+        jitter_frames=jitter_frames,
+    )
+    await bridge.async_start()
+    await asyncio.sleep(SECONDS)
+    await bridge.async_stop()
+
+    sent = np.array(fakes[0].sent)
+    latencies = np.concatenate(
+        [np.array(fake.received) - sent[: len(fake.received)] for fake in fakes[1:]]
+    ) * 1000
+    loss = max(hop["loss"] for hop in bridge.metrics().values())
+    print(
+        f"{targets:>7} {jitter_frames:>7} {np.median(latencies):>9.2f}ms"
+        f" {np.percentile(latencies, 99):>9.2f}ms {latencies.max():>9.2f}ms"
+        f" {loss:>6.2%}"
+    )
+
+    for coordinator in coordinators.values():
+        await coordinator.client.disconnect()
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    hass = ExecutorHass()
+    print(f"end-to-end latency over {SECONDS}s, {FRAME_SECONDS * 1000:.0f} ms frames")
+    print(f"{'targets':>7} {'jitter':>7} {'p50':>11} {'p99':>11} {'max':>11} {'loss':>7}")
+    for jitter_frames in (1, BRIDGE_JITTER_FRAMES):
+        for targets in (1, 5, 10):
+            await run(targets, jitter_frames, hass)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,148 @@
+"""Benchmark synchronized broadcast to 1-20 fake devices on localhost.
+
+Every fake device runs the auth handshake and timestamps the audio
+frames it receives. For each fleet size the benchmark reports the time
+from the service call to the first frame, the spread of first-frame
+arrival between devices and the time for the whole broadcast.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_broadcast
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import websockets
+
+from custom_components.smart_intercom.broadcast import RESULT_OK, async_broadcast
+from custom_components.smart_intercom.const import STREAM_MODE_IDLE
+from custom_components.smart_intercom.mixer import AudioMixer
+from custom_components.smart_intercom.player import AudioPlayer
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .bench_playback import ExecutorHass, make_wav
+
+SECRET = "bench"
+CLIP_SECONDS = 2
+
+
+class FakeDevice:
+    """Minimal SmartIntercom firmware: auth, then swallow audio."""
+
+    def __init__(self) -> None:
+        self.first_frame: float | None = None
+        self.last_frame: float | None = None
+        self.frames = 0
+
+    async def handler(self, ws) -> None:
+        await ws.send(json.dumps({"type": "auth_required"}))
+        async for message in ws:
+            if isinstance(message, bytes):
+                now = time.perf_counter()
+                if self.first_frame is None:
+                    self.first_frame = now
+                self.last_frame = now
+                self.frames += 1
+                continue
+            data = json.loads(message)
+            if data.get("cmd") == "auth":
+                result = "auth_success" if data.get("key") == SECRET else "auth_failed"
+                await ws.send(json.dumps({"type": result}))
+
+
+class BenchCoordinator:
+    """Coordinator stand-in around a real client."""
+
+    def __init__(self, hass: ExecutorHass, client: SmartIntercomClient) -> None:
+        self.client = client
+        self.data = {"streaming_mode": STREAM_MODE_IDLE}
+        self.mixer = AudioMixer(hass, self)
+
+    @property
+    def audio_format(self):
+        return self.client.audio_format
+
+    async def async_send_command(self, cmd: str, **kwargs) -> bool:
+        return await self.client.send_command(cmd, **kwargs)
+
+    async def async_send_audio(self, data: bytes) -> bool:
+        return await self.client.send_audio(data)
+
+    def set_streaming_mode(self, mode: str) -> None:
+        self.data["streaming_mode"] = mode
+
+    def async_update_listeners(self) -> None:
+        pass
+
+
+class BenchConfig:
+    """The parts of hass.config the player and cache use."""
+
+    def __init__(self, directory: str) -> None:
+        self.config_dir = directory
+
+    def path(self, *parts: str) -> str:
+        return os.path.join(self.config_dir, *parts)
+
+    def is_allowed_path(self, path: str) -> bool:
+        return True
+
+
+async def run(devices: int, hass: ExecutorHass, source: str) -> None:
+    """Broadcast the clip to a fleet of fake devices and print timings."""
+    fakes = [FakeDevice() for _ in range(devices)]
+    servers = [await websockets.serve(fake.handler, "127.0.0.1", 0) for fake in fakes]
+    clients = []
+    for server in servers:
+        port = server.sockets[0].getsockname()[1]
+        client = SmartIntercomClient("127.0.0.1", port, SECRET)
+        await client.connect()
+        clients.append(client)
+    while not all(client.connected for client in clients):
+        await asyncio.sleep(0.01)
+
+    players = {
+        f"device_{index}": AudioPlayer(hass, BenchCoordinator(hass, client))
+        for index, client in enumerate(clients)
+    }
+    start = time.perf_counter()
+    results = await async_broadcast(hass, players, source)
+    total = time.perf_counter() - start
+
+    firsts = [fake.first_frame for fake in fakes]
+    ok = sum(result == RESULT_OK for result in results.values())
+    print(
+        f"{devices:>7} {(min(firsts) - start) * 1000:>12.1f}ms"
+        f" {(max(firsts) - min(firsts)) * 1000:>10.2f}ms"
+        f" {total:>9.3f}s {ok:>4}/{devices}"
+    )
+
+    for client in clients:
+        await client.disconnect()
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    with tempfile.TemporaryDirectory() as directory:
+        hass = ExecutorHass()
+        hass.config = BenchConfig(directory)
+        source = os.path.join(directory, "announcement.wav")
+        with open(source, "wb") as wav_file:
+            wav_file.write(make_wav(CLIP_SECONDS))
+
+        print(f"{CLIP_SECONDS}s clip, decoded once and cached after the first run")
+        print(f"{'devices':>7} {'first frame':>14} {'spread':>12} {'total':>10} {'ok':>6}")
+        for devices in (1, 2, 5, 10, 20):
+            await run(devices, hass, source)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,173 @@
+"""Benchmark the control message codecs on every message of the protocol.
+
+For each command the client sends and each message type the device
+sends, with typical arguments, it reports the size on the wire and the
+time to encode and decode it with JSON and with the compact codec. The
+last rows time the client's handling of inbound messages (decoding and
+dispatch to the handler or on_message) with either codec.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_codec [--rounds 20000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+from typing import Any, Callable
+
+from custom_components.smart_intercom.codec import COMPACT_CODEC, JSON_CODEC
+from custom_components.smart_intercom.const import (
+    CMD_AUTH,
+    CMD_BLIT,
+    CMD_CLEAR_FIELD,
+    CMD_DOORBELL,
+    CMD_GET_ICONS,
+    CMD_SET_EXTERNAL_TEXT,
+    CMD_SET_FIELD,
+    CMD_SET_FORMAT,
+    CMD_SET_MIC_GAIN,
+    CMD_SET_SPEAKER_GAIN,
+    CMD_SET_TEXT,
+    CMD_START_ALARM,
+    CMD_START_LISTEN,
+    CMD_START_SPEAK,
+    CMD_START_STREAM,
+    CMD_STOP_ALARM,
+    CMD_STOP_LISTEN,
+    CMD_STOP_SPEAK,
+    CMD_STOP_STREAM,
+    CMD_UPDATE_DISPLAY,
+    CODEC_COMPACT,
+    FEATURE_FRAMEBUFFER,
+    FEATURE_UPDATE_DISPLAY,
+    MSG_AUDIO_FORMAT,
+    MSG_AUTH_FAILED,
+    MSG_AUTH_REQUIRED,
+    MSG_AUTH_SUCCESS,
+    MSG_ICON_LIST,
+)
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import DEFAULT_ICONS
+
+FORMAT = {"sample_rate": 16000, "bits": 16, "channels": 1, "frame_ms": 32}
+NARROWBAND = {"sample_rate": 8000, "bits": 8, "channels": 1, "frame_ms": 20}
+FIELD = {"index": 1, "icon": DEFAULT_ICONS[1], "text": "Ring"}
+
+# name -> message, the commands first
+MESSAGES: dict[str, dict[str, Any]] = {
+    CMD_AUTH: {"cmd": CMD_AUTH, "key": "SmartIntercom2026", "codecs": [CODEC_COMPACT]},
+    **{
+        cmd: {"cmd": cmd}
+        for cmd in (
+            CMD_START_STREAM,
+            CMD_STOP_STREAM,
+            CMD_START_LISTEN,
+            CMD_STOP_LISTEN,
+            CMD_START_SPEAK,
+            CMD_STOP_SPEAK,
+            CMD_DOORBELL,
+            CMD_START_ALARM,
+            CMD_STOP_ALARM,
+        )
+    },
+    CMD_SET_MIC_GAIN: {"cmd": CMD_SET_MIC_GAIN, "value": 1.5},
+    CMD_SET_SPEAKER_GAIN: {"cmd": CMD_SET_SPEAKER_GAIN, "value": 0.8},
+    CMD_SET_TEXT: {"cmd": CMD_SET_TEXT, "line1": "Front door", "line2": "Ring to call"},
+    CMD_SET_EXTERNAL_TEXT: {"cmd": CMD_SET_EXTERNAL_TEXT, "text": "Back at 6"},
+    CMD_SET_FIELD: {"cmd": CMD_SET_FIELD, **FIELD},
+    CMD_CLEAR_FIELD: {"cmd": CMD_CLEAR_FIELD, "index": 2},
+    CMD_GET_ICONS: {"cmd": CMD_GET_ICONS, "version": "1a2b3c4d"},
+    CMD_SET_FORMAT: {"cmd": CMD_SET_FORMAT, "formats": [FORMAT, NARROWBAND]},
+    CMD_UPDATE_DISPLAY: {
+        "cmd": CMD_UPDATE_DISPLAY,
+        "line2": "Ringing",
+        "fields": [FIELD, {"index": 2, "icon": "", "text": "21.5 C"}],
+    },
+    CMD_BLIT: {
+        "cmd": CMD_BLIT,
+        "rects": [{"x": 30, "page": 0, "width": 5, "pages": 1, "data": "fwgICH8="}],
+    },
+    MSG_AUTH_REQUIRED: {"type": MSG_AUTH_REQUIRED},
+    MSG_AUTH_SUCCESS: {
+        "type": MSG_AUTH_SUCCESS,
+        "features": [FEATURE_UPDATE_DISPLAY, FEATURE_FRAMEBUFFER],
+        "codec": CODEC_COMPACT,
+    },
+    MSG_AUTH_FAILED: {"type": MSG_AUTH_FAILED},
+    MSG_ICON_LIST: {"type": MSG_ICON_LIST, "version": "1a2b3c4d", "icons": DEFAULT_ICONS},
+    MSG_AUDIO_FORMAT: {"type": MSG_AUDIO_FORMAT, **FORMAT},
+}
+
+
+def best_us(function: Callable[[], Any], rounds: int) -> float:
+    """Return the time of one call in microseconds, best of three runs."""
+    runs = []
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            function()
+        runs.append((time.perf_counter() - start) / rounds * 1e6)
+    return min(runs)
+
+
+async def handle_us(codec, frames: list[str | bytes], rounds: int) -> float:
+    """Return the client's time to handle one inbound message, in microseconds."""
+    client = SmartIntercomClient("127.0.0.1", 0, "")
+    client.codec = codec
+    client.on_message = lambda data: None
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            await client._handle_message(frame)
+    return (time.perf_counter() - start) / rounds / len(frames) * 1e6
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20000)
+    args = parser.parse_args()
+    rounds = args.rounds
+
+    print(f"{'':<20} {'bytes':>13} {'encode us':>15} {'decode us':>15}")
+    print(
+        f"{'message':<20} {'json':>6} {'compact':>7} {'json':>7} {'compact':>7}"
+        f" {'json':>7} {'compact':>7}"
+    )
+    totals = [0, 0]
+    for name, message in MESSAGES.items():
+        row = []
+        for codec in (JSON_CODEC, COMPACT_CODEC):
+            frame = codec.encode(message)
+            if codec.decode(frame) != message:
+                raise SystemExit(f"{name}: {codec.name} does not round-trip")
+            row.append(
+                (
+                    len(frame.encode()) if isinstance(frame, str) else len(frame),
+                    best_us(lambda: codec.encode(message), rounds),
+                    best_us(lambda: codec.decode(frame), rounds),
+                )
+            )
+        (json_bytes, json_encode, json_decode), (bytes_, encode, decode) = row
+        totals[0] += json_bytes
+        totals[1] += bytes_
+        print(
+            f"{name:<20} {json_bytes:>6} {bytes_:>7} {json_encode:>7.2f} {encode:>7.2f}"
+            f" {json_decode:>7.2f} {decode:>7.2f}"
+        )
+    print(f"{'total':<20} {totals[0]:>6} {totals[1]:>7} ({totals[1] / totals[0]:.0%} of JSON)")
+
+    # Inbound handling: messages that go on to on_message, as in a session
+    inbound = [MESSAGES[MSG_ICON_LIST], {"type": "status", "value": 1}]
+    print()
+    for codec in (JSON_CODEC, COMPACT_CODEC):
+        frames = [codec.encode(message) for message in inbound]
+        per_message = asyncio.run(handle_us(codec, frames, rounds // 10))
+        print(f"handle inbound message, {codec.name}: {per_message:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
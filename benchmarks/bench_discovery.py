@@ -0,0 +1,110 @@
+"""Benchmark the subnet probe of the config flow on a loopback /24.
+
+Simulated intercoms listen on some addresses of 127.0.0.0/24 (half of
+them without GET /status, so they are recognised by their greeting),
+a web server that is not an intercom on another, and the remaining
+addresses behave like absent LAN hosts: their connection attempts are
+never answered, so each costs the full connect timeout. (On loopback
+a closed port would refuse at once, which no real network does.) The
+whole /24 is then scanned with several concurrency limits.
+
+Linux only: it binds 127.0.0.x addresses other than 127.0.0.1.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_discovery [--devices 4] [--port 8790]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import time
+
+import aiohttp
+from aiohttp import web
+
+from custom_components.smart_intercom.discovery import FINGERPRINT_STATUS, async_scan
+
+from .simulator import SimulatedIntercom
+
+SUBNET = "127.0.0"
+DEVICE_OFFSET = 10  # first device address: 127.0.0.10
+WEB_SERVER_HOST = f"{SUBNET}.200"
+SILENT_BACKLOG_FILL = 4  # pending connections that fill a listen(0) queue
+
+
+def silent_host(host: str, port: int) -> list[socket.socket]:
+    """Make host:port drop connection attempts like an absent host.
+
+    A listening socket that never accepts, with its queue already full,
+    leaves new SYNs unanswered. Returns the sockets to keep open.
+    """
+    listener = socket.socket()
+    listener.bind((host, port))
+    listener.listen(0)
+    sockets = [listener]
+    for _ in range(SILENT_BACKLOG_FILL):
+        client = socket.socket()
+        client.setblocking(False)
+        try:
+            client.connect((host, port))
+        except BlockingIOError:
+            pass
+        sockets.append(client)
+    return sockets
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+
+    devices = [
+        SimulatedIntercom(serve_status=index % 2 == 0) for index in range(args.devices)
+    ]
+    device_hosts = set()
+    for index, device in enumerate(devices):
+        host = f"{SUBNET}.{DEVICE_OFFSET + index}"
+        await device.async_start(host, args.port)
+        device_hosts.add(host)
+
+    app = web.Application()
+    app.router.add_get("/status", lambda request: web.Response(text="<html>router</html>"))
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, WEB_SERVER_HOST, args.port).start()
+
+    hosts = [f"{SUBNET}.{index}" for index in range(1, 255)]
+    sockets = []
+    for host in hosts:
+        if host not in device_hosts and host != WEB_SERVER_HOST:
+            sockets += silent_host(host, args.port)
+
+    print(
+        f"{len(hosts)} hosts: {args.devices} intercoms, 1 web server,"
+        f" {len(hosts) - args.devices - 1} silent"
+    )
+    print(f"{'concurrency':>11} {'time':>8} {'found':>6} {'by status':>10} {'by greeting':>12}")
+    async with aiohttp.ClientSession() as session:
+        for concurrency in (16, 64, 254):
+            start = time.perf_counter()
+            found = await async_scan(session, hosts, (args.port,), concurrency=concurrency)
+            elapsed = time.perf_counter() - start
+            by_status = sum(device.fingerprint == FINGERPRINT_STATUS for device in found)
+            print(
+                f"{concurrency:>11} {elapsed:>7.2f}s {len(found):>6} {by_status:>10}"
+                f" {len(found) - by_status:>12}"
+            )
+
+    for sock in sockets:
+        sock.close()
+    await runner.cleanup()
+    for device in devices:
+        await device.async_stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,130 @@
+"""Benchmark rendering the display in Home Assistant and what it sends.
+
+A sequence of display updates (the first frame, a line changed, the
+external text changed, a marquee field changed, a scroll step and an
+update that changes nothing) goes through the renderer. For each it
+reports the time to render the frame and find its dirty rectangles,
+and the bytes of the websocket messages sent:
+
+- blit: the dirty rectangles, as the coordinator sends them
+- full frame: the whole framebuffer in one rectangle, without diffing
+- commands: the update_display message of firmware that draws itself
+
+Every blit is applied to a second framebuffer, which must end up equal
+to the rendered frame. The icons are the simulator's.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_display [--rounds 1000]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from custom_components.smart_intercom.const import CMD_BLIT, CMD_UPDATE_DISPLAY, DISPLAY_WIDTH
+from custom_components.smart_intercom.display import DisplayState, display_changes
+from custom_components.smart_intercom.oled import PAGES, DisplayRenderer, blit, parse_xbm
+
+from .simulator import DEFAULT_ICONS, icon_xbm
+
+BELL, HOME, SUN = DEFAULT_ICONS[1], DEFAULT_ICONS[0], DEFAULT_ICONS[4]
+
+
+def message_bytes(cmd: str, **kwargs) -> int:
+    """Return the length of a command as sent on the websocket."""
+    return len(json.dumps({"cmd": cmd, **kwargs}))
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=1000)
+    args = parser.parse_args()
+
+    renderer = DisplayRenderer()
+    for path in DEFAULT_ICONS:
+        renderer.icons[path] = parse_xbm(icon_xbm(path))
+
+    base = (
+        DisplayState("Front door", "Idle", "Have a nice day")
+        .with_field(0, BELL, "Ring")
+        .with_field(1, HOME, "21.5 C")
+    )
+    updates = [
+        ("first frame", base),
+        ("line 2", DisplayState("Front door", "Ringing", base.external_text, base.fields)),
+        ("external text", DisplayState("Front door", "Ringing", "Parcel at the door", base.fields)),
+    ]
+    updates.append(("marquee field", updates[-1][1].with_field(1, HOME, "22.0 C")))
+    scrolling = updates[-1][1].with_field(2, SUN, "Sunny, 24 C in the afternoon, light wind")
+    updates.append(("field, scrolling", scrolling))
+    updates.append(("scroll step", scrolling))
+    updates.append(("unchanged", scrolling))
+
+    print(f"median of {args.rounds} renders")
+    print(
+        f"{'update':<17} {'render':>9} {'rects':>6} {'blit':>8} {'full frame':>11}"
+        f" {'commands':>9}"
+    )
+    device = np.zeros((PAGES, DISPLAY_WIDTH), np.uint8)
+    sent: DisplayState | None = None
+    totals = {"blit": 0, "full": 0, "commands": 0}
+    for name, display in updates:
+        if name == "scroll step":
+            renderer.advance()
+        times = []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            pages = renderer.render(display)
+            rects = renderer.dirty_rects(pages)
+            times.append(time.perf_counter() - start)
+        blit_bytes = message_bytes(CMD_BLIT, rects=rects) if rects else 0
+        # A renderer that has sent nothing sends the whole frame
+        full_bytes = message_bytes(CMD_BLIT, rects=DisplayRenderer().dirty_rects(pages))
+        if name == "scroll step":
+            # The firmware scrolls its own marquee: nothing to send
+            changes = {}
+        else:
+            changes = display_changes(sent, display)
+        command_bytes = message_bytes(CMD_UPDATE_DISPLAY, **changes) if changes else 0
+
+        blit(device, rects)
+        renderer.mark_sent(pages)
+        sent = display
+        if not np.array_equal(device, pages):
+            raise SystemExit(f"{name}: the blits did not reproduce the frame")
+
+        totals["blit"] += blit_bytes
+        totals["full"] += full_bytes
+        totals["commands"] += command_bytes
+        print(
+            f"{name:<17} {sorted(times)[len(times) // 2] * 1e6:>7.1f}us {len(rects):>6}"
+            f" {blit_bytes:>7}B {full_bytes:>10}B {command_bytes:>8}B"
+        )
+    print(
+        f"{'total':<17} {'':>9} {'':>6} {totals['blit']:>7}B {totals['full']:>10}B"
+        f" {totals['commands']:>8}B"
+    )
+
+    # The marquee scrolling frame after frame, as the coordinator sends it
+    start = time.perf_counter()
+    scroll_bytes = 0
+    for _ in range(args.rounds):
+        renderer.advance()
+        pages = renderer.render(scrolling)
+        rects = renderer.dirty_rects(pages)
+        renderer.mark_sent(pages)
+        scroll_bytes += message_bytes(CMD_BLIT, rects=rects) if rects else 0
+    elapsed = time.perf_counter() - start
+    print(
+        f"scrolling: {elapsed / args.rounds * 1e6:.1f} us and"
+        f" {scroll_bytes / args.rounds:.0f} B per frame"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Load-test the websocket client against a fleet of simulated intercoms.
+
+Connects one SmartIntercomClient per simulated device, as the
+integration does on setup, then has every device stream its microphone.
+Reports the time until all clients are authenticated and have an icon
+list, the share of audio frames delivered and the CPU per device.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_fleet --devices 200 [--latency 0.02 --jitter 0.01 --loss 0.01]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from custom_components.smart_intercom.const import (
+    CMD_GET_ICONS,
+    CMD_START_LISTEN,
+    CMD_STOP_LISTEN,
+    MSG_ICON_LIST,
+)
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import DEFAULT_SECRET, LinkConditions, SimulatorFleet
+
+SECONDS = 5
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--loss", type=float, default=0.0)
+    args = parser.parse_args()
+
+    conditions = LinkConditions(latency=args.latency, jitter=args.jitter, loss=args.loss)
+    fleet = SimulatorFleet(args.devices, conditions=conditions)
+    ports = await fleet.async_start()
+
+    ready = asyncio.Semaphore(0)
+    frames = [0] * len(ports)
+
+    def on_message(data: dict) -> None:
+        if data.get("type") == MSG_ICON_LIST:
+            ready.release()
+
+    def on_audio(index: int, data: bytes) -> None:
+        frames[index] += 1
+
+    clients = []
+    start = time.perf_counter()
+    cpu = time.process_time()
+    for index, port in enumerate(ports):
+        client = SmartIntercomClient(
+            "127.0.0.1",
+            port,
+            DEFAULT_SECRET,
+            on_message=on_message,
+            on_audio=lambda data, index=index: on_audio(index, data),
+        )
+        client.on_connect = lambda client=client: asyncio.ensure_future(
+            client.send_command(CMD_GET_ICONS)
+        )
+        clients.append(client)
+    await asyncio.gather(*(client.connect() for client in clients))
+    for _ in clients:
+        await ready.acquire()
+    setup = time.perf_counter() - start
+    setup_cpu = time.process_time() - cpu
+
+    cpu = time.process_time()
+    await asyncio.gather(*(client.send_command(CMD_START_LISTEN) for client in clients))
+    await asyncio.sleep(SECONDS)
+    await asyncio.gather(*(client.send_command(CMD_STOP_LISTEN) for client in clients))
+    stream_cpu = time.process_time() - cpu
+
+    expected = SECONDS / clients[0].audio_format.frame_seconds
+    delivered = sum(frames) / (expected * len(clients))
+    print(f"{len(clients)} devices, {conditions}")
+    print(f"setup: {setup:.2f}s until all authenticated with icons ({setup_cpu:.2f}s CPU)")
+    print(
+        f"streaming: {delivered:.1%} of frames delivered in {SECONDS}s,"
+        f" {stream_cpu / SECONDS / len(clients):.3%} of a core per device (both ends)"
+    )
+
+    await asyncio.gather(*(client.disconnect() for client in clients))
+    await fleet.async_stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
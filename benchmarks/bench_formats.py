@@ -0,0 +1,134 @@
+"""Compare negotiated audio formats: bandwidth, latency and CPU per stream.
+
+A fake device accepts the first format the client offers, then both
+directions stream SECONDS of audio over a localhost websocket as fast as
+possible. For each format the benchmark reports the payload and wire
+bandwidth of one direction at real time, the packetization latency (a
+frame must be full before it is sent) and the CPU both ends spend per
+second of audio, as a share of one core.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_formats
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import numpy as np
+import websockets
+
+from custom_components.smart_intercom.audio_format import FORMAT_PRESETS, AudioFormat
+from custom_components.smart_intercom.const import CMD_SET_FORMAT
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .bench_broadcast import SECRET
+
+SECONDS = 10
+# Per-frame overhead beyond the payload: a masked websocket header for
+# frames under 64 KiB, plus TCP/IPv4 headers assuming one segment each
+WS_OVERHEAD = 2 + 2 + 4
+TCP_IP_OVERHEAD = 40
+
+
+class FakeDevice:
+    """Fake firmware: agrees to a format, counts audio, streams its mic."""
+
+    def __init__(self) -> None:
+        self.audio_format: AudioFormat | None = None
+        self.received = 0
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    async def handler(self, ws) -> None:
+        await ws.send(json.dumps({"type": "auth_required"}))
+        async for message in ws:
+            if isinstance(message, bytes):
+                self.received += len(message)
+                if self.received >= self.expected:
+                    self.done.set()
+                continue
+            data = json.loads(message)
+            if data.get("cmd") == "auth":
+                await ws.send(json.dumps({"type": "auth_success"}))
+            elif data.get("cmd") == CMD_SET_FORMAT:
+                self.audio_format = AudioFormat.from_dict(data["formats"][0])
+                await ws.send(json.dumps({"type": "audio_format", **data["formats"][0]}))
+            elif data.get("cmd") == "send_mic":
+                frame = bytes(self.audio_format.wire_frame_bytes)
+                for _ in range(data["frames"]):
+                    await ws.send(frame)
+
+
+async def run(name: str, audio_format: AudioFormat) -> None:
+    """Stream both ways in one format and print the figures."""
+    fake = FakeDevice()
+    server = await websockets.serve(fake.handler, "127.0.0.1", 0)
+    received = 0
+    all_received = asyncio.Event()
+    frames = SECONDS * 1000 // audio_format.frame_ms
+
+    def on_audio(data: bytes) -> None:
+        nonlocal received
+        received += len(data)
+        if received >= frames * audio_format.frame_bytes:
+            all_received.set()
+
+    client = SmartIntercomClient(
+        "127.0.0.1",
+        server.sockets[0].getsockname()[1],
+        SECRET,
+        on_audio=on_audio,
+        audio_formats=[audio_format, AudioFormat()],
+    )
+    await client.connect()
+    while not client.connected or client.audio_format != audio_format:
+        await asyncio.sleep(0.01)
+
+    pcm = np.random.default_rng(0).integers(
+        -20000, 20000, frames * audio_format.frame_samples, dtype=np.int16
+    ).tobytes()
+    fake.expected = frames * audio_format.wire_frame_bytes
+    cpu = time.process_time()
+    await client.send_audio(pcm)
+    await fake.done.wait()
+    await client.send_command("send_mic", frames=frames)
+    await all_received.wait()
+    cpu = time.process_time() - cpu
+
+    per_second = 1000 / audio_format.frame_ms
+    payload = audio_format.wire_byte_rate
+    wire = payload + per_second * (WS_OVERHEAD + TCP_IP_OVERHEAD)
+    print(
+        f"{name:<16} {audio_format.sample_rate:>6} {audio_format.bits:>4}"
+        f" {audio_format.frame_ms:>5}ms {payload * 8 / 1000:>8.1f}"
+        f" {wire * 8 / 1000:>8.1f} {per_second:>7.1f}"
+        f" {cpu / (2 * SECONDS):>8.3%}"
+    )
+
+    await client.disconnect()
+    server.close()
+    await server.wait_closed()
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    print(f"one direction at real time; CPU for both ends of {SECONDS}s each way")
+    print(
+        f"{'format':<16} {'rate':>6} {'bits':>4} {'frame':>7}"
+        f" {'kbit/s':>8} {'on wire':>8} {'msg/s':>7} {'CPU':>9}"
+    )
+    for name, audio_format in FORMAT_PRESETS.items():
+        await run(name, audio_format)
+    for frame_ms in (10, 20, 60):
+        base = FORMAT_PRESETS["wideband"]
+        await run(
+            "wideband",
+            AudioFormat(base.sample_rate, base.bits, base.channels, frame_ms),
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
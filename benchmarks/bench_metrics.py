@@ -0,0 +1,108 @@
+"""Benchmark the overhead of the performance metrics.
+
+Times the metric primitives, then the inbound audio path per frame
+(client message handling, the coordinator's ring buffer and three live
+stream subscribers) as shipped against the same work with the metric
+calls left out, and prints the share of the frame cost they add.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_metrics
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+import timeit
+
+from custom_components.smart_intercom.audio_format import DEFAULT_FORMAT
+from custom_components.smart_intercom.audio_stream import AudioStreamManager
+from custom_components.smart_intercom.const import METRICS_TIME_BUCKETS
+from custom_components.smart_intercom.metrics import Histogram, IntercomMetrics
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .suite import _AudioPath, _frame
+
+NUMBER = 200_000
+REPEAT = 5
+
+
+def best_ns(statement, number: int = NUMBER) -> float:
+    """Return the best time per call in nanoseconds."""
+    return min(timeit.repeat(statement, number=number, repeat=REPEAT)) / number * 1e9
+
+
+class _BarePath(_AudioPath):
+    """The inbound path as it was before metrics."""
+
+    def on_audio(self, audio_data: bytes) -> None:
+        self.audio_buffer.write(audio_data)
+        for callback in self._audio_callbacks:
+            callback(audio_data)
+
+
+def frame_path(path: _AudioPath, instrumented: bool):
+    """Return a callable handling one inbound frame like the listen loop.
+
+    The subscribers' queues are emptied after each frame, as their
+    consumers would.
+    """
+    client = SmartIntercomClient("127.0.0.1", 0, "", on_audio=path.on_audio)
+    for _ in range(3):
+        manager = AudioStreamManager(path if instrumented else None)
+        manager.start_streaming()
+        path._audio_callbacks.append(manager.on_audio_data)
+    managers = [callback.__self__ for callback in path._audio_callbacks]
+    frame = _frame()
+    audio_format = client.audio_format
+    on_audio = client.on_audio
+
+    def instrumented_call() -> None:
+        client.metrics.frames_in += 1
+        client.metrics.bytes_in += len(frame)
+        on_audio(audio_format.decode(frame))
+        for manager in managers:
+            manager._audio_queue.get_nowait()
+
+    def bare_call() -> None:
+        on_audio(audio_format.decode(frame))
+        for manager in managers:
+            manager._audio_queue.get_nowait()
+
+    return instrumented_call if instrumented else bare_call
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    metrics = IntercomMetrics()
+    histogram = Histogram(METRICS_TIME_BUCKETS)
+    clock = time.perf_counter
+
+    def counter() -> None:
+        metrics.frames_in += 1
+
+    def timed() -> None:
+        start = clock()
+        histogram.observe(clock() - start)
+
+    print(f"{'primitive':<28} {'ns':>8}")
+    print(f"{'counter increment':<28} {best_ns(counter):>8.1f}")
+    print(f"{'histogram observe':<28} {best_ns(lambda: histogram.observe(0.0003)):>8.1f}")
+    print(f"{'timed section (2 clocks)':<28} {best_ns(timed):>8.1f}")
+    print(f"{'as_dict (diagnostics)':<28} {best_ns(metrics.as_dict, 2000):>8.1f}")
+
+    # Alternate the two so machine noise hits both alike
+    calls = {"shipped": frame_path(_AudioPath(), True), "bare": frame_path(_BarePath(), False)}
+    runs: dict[str, list[float]] = {name: [] for name in calls}
+    for _ in range(4 * REPEAT):
+        for name, call in calls.items():
+            runs[name].append(timeit.timeit(call, number=20_000) / 20_000 * 1e9)
+    shipped, bare = min(runs["shipped"]), min(runs["bare"])
+    print(f"\ninbound frame, 3 subscribers: {bare:.0f} ns bare, {shipped:.0f} ns with metrics")
+    print(f"metrics overhead: {shipped - bare:.0f} ns per frame ({(shipped - bare) / bare:.1%})")
+    core = (shipped - bare) * 1e-9 / DEFAULT_FORMAT.frame_seconds
+    print(f"= {core:.5%} of a core per real-time stream")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
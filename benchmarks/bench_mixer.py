@@ -0,0 +1,53 @@
+"""Benchmark the outbound mixer: cost per frame by number of active sources.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_mixer
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+from custom_components.smart_intercom.audio_format import DEFAULT_FORMAT
+from custom_components.smart_intercom.const import MIXER_MAX_SOURCES
+from custom_components.smart_intercom.mixer import AudioMixer
+
+FRAMES = 2000
+QUEUED_FRAMES = 4  # what a paced writer typically keeps queued
+
+
+class IdleCoordinator:
+    """Coordinator stand-in; the benchmark calls mix() directly."""
+
+    audio_format = DEFAULT_FORMAT
+
+    class client:
+        connected = True
+
+
+def main() -> None:
+    """Run the benchmark."""
+    rng = np.random.default_rng(0)
+    frame_bytes = DEFAULT_FORMAT.frame_bytes
+    frame = rng.integers(-20000, 20000, frame_bytes // 2, dtype=np.int16).tobytes()
+
+    print(f"{'sources':>7} {'per frame':>12} {'real-time share':>16}")
+    for active in range(0, MIXER_MAX_SOURCES + 1, 2):
+        mixer = AudioMixer(None, IdleCoordinator())
+        sources = [mixer.open_source(priority % 3) for priority in range(active)]
+        elapsed = 0.0
+        for _ in range(FRAMES):
+            for source in sources:
+                while len(source._buffer) < QUEUED_FRAMES * frame_bytes:
+                    source._buffer += frame
+            start = time.perf_counter()
+            mixer.mix()
+            elapsed += time.perf_counter() - start
+        per_frame = elapsed / FRAMES
+        print(f"{active:>7} {per_frame * 1e6:>10.1f}us {per_frame / DEFAULT_FORMAT.frame_seconds:>15.3%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Benchmark how long changed settings take to apply to a running intercom.
+
+Each scenario flips one setting back and forth on a connected simulated
+intercom with 20 ms of latency and runs the entry's update listener, as
+saving the options flow does. It reports the time until the listener
+returns, the time until the change is in effect on the device (the new
+format negotiated, or the client authenticated again) and how many
+connections were made. The last row tears the client and coordinator
+down and builds them again, which is the least a reload costs; a real
+reload also recreates every entity.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_options [--rounds 10]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.smart_intercom import SmartIntercomCoordinator, async_update_entry
+from custom_components.smart_intercom.audio_format import preferred_formats
+from custom_components.smart_intercom.const import DOMAIN
+from custom_components.smart_intercom.options import IntercomOptions
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import DEFAULT_SECRET, LinkConditions, SimulatedIntercom
+
+LATENCY = 0.02
+ENTRY_ID = "bench"
+POLL = 0.001
+
+
+async def create(
+    hass: HomeAssistant, port: int, options: IntercomOptions
+) -> SmartIntercomCoordinator:
+    """Set up a client and coordinator as async_setup_entry does."""
+    client = SmartIntercomClient(
+        "127.0.0.1",
+        port,
+        DEFAULT_SECRET,
+        audio_formats=preferred_formats(options.audio_format, options.frame_ms),
+    )
+    coordinator = SmartIntercomCoordinator(hass, client, options.enable_audio)
+    client.on_message = coordinator.on_message
+    client.on_audio = coordinator.on_audio
+    client.on_connect = coordinator.on_connect
+    client.on_disconnect = coordinator.on_disconnect
+    await coordinator.async_apply_options(ENTRY_ID, options)
+    client.start()
+    return coordinator
+
+
+async def destroy(coordinator: SmartIntercomCoordinator) -> None:
+    """Stop a client and coordinator as async_unload_entry does."""
+    if coordinator.player is not None:
+        await coordinator.player.async_stop()
+    await coordinator.mixer.async_stop()
+    await coordinator.client.disconnect()
+    await coordinator.async_stop()
+
+
+async def wait_until(condition: Callable[[], bool]) -> None:
+    """Poll until condition holds."""
+    while not condition():
+        await asyncio.sleep(POLL)
+
+
+def synced(coordinator: SmartIntercomCoordinator) -> bool:
+    """Return True once connected and the state replay is done."""
+    task = coordinator._sync_task
+    return coordinator.client.connected and task is not None and task.done()
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    hass = HomeAssistant(tempfile.mkdtemp())
+    conditions = LinkConditions(latency=LATENCY)
+    devices = [SimulatedIntercom(conditions=conditions) for _ in range(2)]
+    ports = [await device.async_start() for device in devices]
+    entry = SimpleNamespace(
+        entry_id=ENTRY_ID,
+        data={"host": "127.0.0.1", "port": ports[0], "secret_key": DEFAULT_SECRET},
+        options=IntercomOptions().as_dict(),
+    )
+    coordinator = await create(hass, ports[0], IntercomOptions())
+    hass.data[DOMAIN] = {ENTRY_ID: coordinator}
+    await wait_until(lambda: synced(coordinator))
+
+    def sample_rate(rate: int) -> Callable[[], bool]:
+        return lambda: coordinator.client.audio_format.sample_rate == rate
+
+    def frame_ms(ms: int) -> Callable[[], bool]:
+        return lambda: coordinator.client.audio_format.frame_ms == ms
+
+    # name -> two (option changes, condition for the change to be in effect)
+    scenarios: dict[str, tuple[tuple[dict[str, Any], Callable[[], bool]], ...]] = {
+        "buffers": (
+            ({"buffer_seconds": 20, "stream_queue_frames": 200}, lambda: True),
+            ({"buffer_seconds": 10, "stream_queue_frames": 100}, lambda: True),
+        ),
+        "reconnect policy": (
+            ({"reconnect_delay": 1.0, "reconnect_max_delay": 10.0}, lambda: True),
+            ({"reconnect_delay": 5.0, "reconnect_max_delay": 60.0}, lambda: True),
+        ),
+        "sound detection": (
+            ({"sound_detection": False}, lambda: coordinator.sound_events is None),
+            ({"sound_detection": True}, lambda: coordinator.sound_events is not None),
+        ),
+        "audio format": (
+            ({"audio_format": "narrowband"}, sample_rate(8000)),
+            ({"audio_format": "wideband"}, sample_rate(16000)),
+        ),
+        "frame duration": (
+            ({"frame_ms": 20}, frame_ms(20)),
+            ({"frame_ms": 32}, frame_ms(32)),
+        ),
+    }
+
+    print(f"median of {args.rounds} changes; {LATENCY * 1000:.0f} ms latency")
+    print(f"{'change':<18} {'applied':>9} {'in effect':>11} {'connections':>12}")
+
+    async def run(name: str, change: Callable[[int], Callable[[], bool]]) -> None:
+        applied, effective = [], []
+        connects = coordinator.client.metrics.connects
+        for round_ in range(args.rounds):
+            start = time.perf_counter()
+            condition = change(round_)
+            await async_update_entry(hass, entry)
+            applied.append(time.perf_counter() - start)
+            await wait_until(condition)
+            effective.append(time.perf_counter() - start)
+        print(
+            f"{name:<18} {sorted(applied)[len(applied) // 2] * 1000:>7.2f}ms"
+            f" {sorted(effective)[len(effective) // 2] * 1000:>9.2f}ms"
+            f" {coordinator.client.metrics.connects - connects:>12}"
+        )
+
+    for name, steps in scenarios.items():
+
+        def change(round_: int, steps=steps) -> Callable[[], bool]:
+            changes, condition = steps[round_ % 2]
+            entry.options = {**entry.options, **changes}
+            return condition
+
+        await run(name, change)
+
+    def change_port(round_: int) -> Callable[[], bool]:
+        entry.data = {**entry.data, "port": ports[(round_ + 1) % 2]}
+        return lambda: synced(coordinator)
+
+    await run("port", change_port)
+
+    # The least a reload costs: a new client and coordinator
+    times = []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        await destroy(coordinator)
+        coordinator = await create(hass, entry.data["port"], IntercomOptions())
+        await wait_until(lambda: synced(coordinator))
+        times.append(time.perf_counter() - start)
+    print(
+        f"{'reload':<18} {'':>9} {sorted(times)[len(times) // 2] * 1000:>9.2f}ms"
+        f" {args.rounds:>12}"
+    )
+
+    await destroy(coordinator)
+    for device in devices:
+        await device.async_stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
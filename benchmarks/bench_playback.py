@@ -0,0 +1,147 @@
+"""Benchmark streaming WAV playback: time to first frame and peak memory.
+
+Also compares a cold announcement (decode + cache write) with cache hits
+from disk and from the in-memory hot tier.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_playback
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import tempfile
+import time
+import tracemalloc
+import wave
+
+import numpy as np
+
+from custom_components.smart_intercom.audio_cache import AnnouncementCache, cache_key
+from custom_components.smart_intercom.audio_stream import iter_device_pcm
+
+READ_SIZE = 4096
+
+
+def make_wav(seconds: float, rate: int = 44100, channels: int = 2) -> bytes:
+    """Return a 16-bit WAV file with a sine tone."""
+    t = np.arange(int(rate * seconds)) / rate
+    samples = (0.3 * 32767 * np.sin(2 * np.pi * 440 * t)).astype("<i2")
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(np.repeat(samples, channels).tobytes())
+    return buffer.getvalue()
+
+
+async def read_chunks(data: bytes):
+    """Yield the file like a reader in READ_SIZE pieces."""
+    view = memoryview(data)
+    for offset in range(0, len(view), READ_SIZE):
+        yield bytes(view[offset:offset + READ_SIZE])
+
+
+class UnpacedSink:
+    """Coordinator stand-in that records the first frame time."""
+
+    def __init__(self) -> None:
+        self.first_frame: float | None = None
+        self.frames = 0
+
+    async def async_send_audio(self, data: bytes) -> bool:
+        if self.first_frame is None:
+            self.first_frame = time.perf_counter()
+        self.frames += 1
+        return True
+
+
+async def measure(seconds: float) -> tuple[float, float, int]:
+    """Return time to first frame (ms), total conversion time (ms) and peak KiB.
+
+    Frames are consumed as fast as possible, without real-time pacing.
+    """
+    wav = make_wav(seconds)
+    sink = UnpacedSink()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    async for frame in iter_device_pcm(read_chunks(wav)):
+        await sink.async_send_audio(frame)
+    total = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (sink.first_frame - start) * 1000, total * 1000, peak // 1024
+
+
+class ExecutorHass:
+    """Minimal stand-in providing the executor helpers the cache uses."""
+
+    def __init__(self) -> None:
+        self.data: dict = {}
+
+    def async_add_executor_job(self, target, *args):
+        return asyncio.get_running_loop().run_in_executor(None, target, *args)
+
+    def async_create_task(self, coro):
+        return asyncio.get_running_loop().create_task(coro)
+
+    def async_create_background_task(self, coro, name):
+        return asyncio.get_running_loop().create_task(coro, name=name)
+
+
+async def drain(frames) -> tuple[float, float]:
+    """Consume frames; return time to first frame and total time in ms."""
+    start = time.perf_counter()
+    first = None
+    async for _ in frames:
+        if first is None:
+            first = time.perf_counter()
+    end = time.perf_counter()
+    return (first - start) * 1000, (end - start) * 1000
+
+
+async def measure_cache(seconds: float) -> None:
+    """Compare cold, disk-hit and hot-hit starts for one announcement."""
+    wav = make_wav(seconds)
+    with tempfile.TemporaryDirectory() as directory:
+        cache = AnnouncementCache(ExecutorHass(), directory, hot_bytes=0)
+        await cache.async_load()
+        key = cache_key("announcement")
+        cold = await drain(cache.async_store(key, iter_device_pcm(read_chunks(wav))))
+
+        start = time.perf_counter()
+        disk = await drain(await cache.async_open(key))
+        disk = ((time.perf_counter() - start) * 1000, disk[1])
+
+        cache._hot_max_bytes = 1 << 30
+        await drain(await cache.async_open(key))  # promote to the hot tier
+        cpu = time.process_time()
+        start = time.perf_counter()
+        hot = await drain(await cache.async_open(key))
+        hot = ((time.perf_counter() - start) * 1000, hot[1])
+        cpu = (time.process_time() - cpu) * 1000
+
+    print(
+        f"{seconds:>7}s  cold {cold[1]:>8.1f}ms  disk hit first frame {disk[0]:>6.2f}ms"
+        f"  hot hit first frame {hot[0]:>6.3f}ms ({cpu:.2f}ms CPU)"
+    )
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    print(f"{'clip':>8} {'first frame':>12} {'convert all':>12} {'peak mem':>10}")
+    for seconds in (1, 10, 60, 300):
+        first, total, peak = await measure(seconds)
+        print(f"{seconds:>7}s {first:>10.2f}ms {total:>10.1f}ms {peak:>8}KiB")
+    print("(the WAV file itself is held in memory by the benchmark and not counted)")
+    print()
+    print("announcement cache:")
+    for seconds in (2, 10):
+        await measure_cache(seconds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Benchmark the overhead of the sampling profiler.
+
+Times one sample of a typical stack, then runs the inbound audio path
+(client message handling, the coordinator's ring buffer and three live
+stream subscribers) flat out on the event loop, alternately with and
+without the profiler, and prints the throughput lost at several
+sampling intervals, the share of the core spent sampling, and the most
+frequent stacks of a profile.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_profiling [--seconds 2]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+from custom_components.smart_intercom.profiler import SamplingProfiler
+
+from .bench_metrics import frame_path
+from .suite import _AudioPath
+
+INTERVALS_MS = (10, 5, 1)
+ROUNDS = 3
+
+
+async def frames_per_second(call, seconds: float) -> float:
+    """Run the frame path for a while, yielding to the loop in between."""
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            call()
+        count += 100
+        await asyncio.sleep(0)
+    return count / seconds
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=2)
+    args = parser.parse_args()
+
+    probe = SamplingProfiler(0.01)
+    frame = sys._getframe()
+    sample_us = min(timeit.repeat(lambda: probe._sample(0, frame), number=10_000, repeat=5)) * 100
+    print(f"one sample: {sample_us:.2f} us")
+
+    call = frame_path(_AudioPath(), True)
+    path = os.path.join(tempfile.mkdtemp(), "bench.collapsed")
+    print(
+        f"\n{'interval':>8} {'bare/s':>10} {'profiled/s':>11} {'overhead':>9} {'samples':>8}"
+        f" {'other':>6} {'dropped':>8} {'sampling':>9}"
+    )
+    for interval in INTERVALS_MS:
+        bare, profiled = [], []
+        for _ in range(ROUNDS):
+            bare.append(await frames_per_second(call, args.seconds))
+            profiler = SamplingProfiler(interval / 1000)
+            profiler.start()
+            profiled.append(await frames_per_second(call, args.seconds))
+            profiler.stop()
+        best_bare, best_profiled = max(bare), max(profiled)
+        taken = profiler.samples + profiler.other + profiler.skipped
+        print(
+            f"{interval:>6}ms {best_bare:>10.0f} {best_profiled:>11.0f}"
+            f" {1 - best_profiled / best_bare:>9.1%} {profiler.samples:>8} {profiler.other:>6}"
+            f" {profiler.skipped:>8} {taken * sample_us / 1e6 / args.seconds:>9.2%}"
+        )
+    profiler.write(path)
+
+    print(f"\ntop stacks of {path} (us of loop CPU):")
+    with open(path, encoding="utf-8") as file:
+        for line in file.readlines()[:5]:
+            stack, count = line.rsplit(" ", 1)
+            print(f"{count.strip():>6}  ...{stack[-110:]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""Replay a session trace and measure the processing cost per recorded hour.
+
+Feeds the inbound messages of a trace (from the start_trace service)
+through a SmartIntercomClient whose audio goes into the coordinator's
+ring buffer and the sound event pipeline, in real time, at several
+times real time and as fast as possible. Without a trace file, one is
+first recorded from a simulated intercom streaming its microphone.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_replay [path/to/session.trace] [--seconds 10]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+from custom_components.smart_intercom.const import CMD_START_LISTEN, CMD_STOP_LISTEN
+from custom_components.smart_intercom.sound_events import SoundEventPipeline
+from custom_components.smart_intercom.trace import TraceWriter, async_replay, read_trace
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import DEFAULT_SECRET, SimulatedIntercom
+from .suite import _AudioPath
+
+SPEEDS = (1, 10, 0)  # 0: as fast as possible
+
+
+async def record(path: str, seconds: float) -> None:
+    """Record a trace of a simulated intercom streaming its microphone."""
+    device = SimulatedIntercom()
+    port = await device.async_start()
+    client = SmartIntercomClient("127.0.0.1", port, DEFAULT_SECRET)
+    client.trace = TraceWriter(path)
+    await client.connect()
+    while not client.connected:
+        await asyncio.sleep(0.01)
+    await client.send_command(CMD_START_LISTEN)
+    await asyncio.sleep(seconds)
+    await client.send_command(CMD_STOP_LISTEN)
+    await client.disconnect()
+    await client.trace.async_close()
+    await device.async_stop()
+
+
+async def replay(records: list, speed: float) -> None:
+    """Replay a trace once and print what it cost."""
+    path = _AudioPath()
+    pipeline = SoundEventPipeline()
+    events = []
+    path._audio_callbacks.append(lambda data: events.extend(pipeline.process(data)))
+    client = SmartIntercomClient("127.0.0.1", 0, DEFAULT_SECRET, on_audio=path.on_audio)
+    stats = await async_replay(client, records, speed)
+    label = f"{speed}x" if speed else "max"
+    print(
+        f"{label:>5} {stats.messages:>9} {stats.wall_seconds:>8.2f}s"
+        f" {stats.cpu_seconds:>8.2f}s {stats.cpu_per_hour:>10.1f}s {len(events):>7}"
+    )
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("trace", nargs="?")
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    path = args.trace
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "simulated.trace")
+        await record(path, args.seconds)
+    records = list(read_trace(path))
+    inbound = sum(not record.outbound for record in records)
+    print(f"{path}: {len(records)} records ({inbound} inbound), {records[-1].time:.1f}s")
+    print(f"{'speed':>5} {'messages':>9} {'wall':>9} {'CPU':>9} {'CPU/hour':>11} {'events':>7}")
+    for speed in SPEEDS:
+        await replay(records, speed)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
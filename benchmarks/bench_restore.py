@@ -0,0 +1,182 @@
+"""Benchmark restoring the desired display and gains of many devices.
+
+Stores a desired display and gains for every simulated device, then
+measures, for firmware with and without update_display:
+
+- load: restoring the state from storage at setup, which is all the
+  entities need to show it, before any connection
+- restart: from every client connecting at once until each device
+  shows the desired state
+- reboot: every device reboots (blank display, default gains) and the
+  clients reconnect together; from each authentication until the
+  device is consistent again
+
+along with the display and gain messages each device received per
+reconnect.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_restore [--devices 50]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from custom_components.smart_intercom import SmartIntercomCoordinator, websocket_client
+from custom_components.smart_intercom.const import (
+    CMD_CLEAR_FIELD,
+    CMD_SET_EXTERNAL_TEXT,
+    CMD_SET_FIELD,
+    CMD_SET_MIC_GAIN,
+    CMD_SET_SPEAKER_GAIN,
+    CMD_SET_TEXT,
+    CMD_UPDATE_DISPLAY,
+    STATE_STORAGE_KEY,
+    STATE_STORAGE_VERSION,
+)
+from custom_components.smart_intercom.display import DisplayState, MarqueeField
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import DEFAULT_SECRET, SimulatorFleet
+
+STATE_COMMANDS = (
+    CMD_UPDATE_DISPLAY,
+    CMD_SET_TEXT,
+    CMD_SET_EXTERNAL_TEXT,
+    CMD_SET_FIELD,
+    CMD_CLEAR_FIELD,
+    CMD_SET_MIC_GAIN,
+    CMD_SET_SPEAKER_GAIN,
+)
+RECONNECT_DELAY = 0.05  # instead of seconds, to time the restore itself
+POLL_SECONDS = 0.001
+
+
+def desired_state(index: int) -> dict:
+    """Return the stored state of one device."""
+    display = DisplayState(
+        f"Door {index}",
+        "Ring to call",
+        "Parcels at reception",
+        (
+            MarqueeField("/icons/10x10/home.xbm", f"Flat {index}"),
+            MarqueeField(),
+            MarqueeField("", "Back at 6"),
+        ),
+    )
+    return {"display": display.as_dict(), "mic_gain": 1.5, "speaker_gain": 0.8}
+
+
+def consistent(device, desired: dict) -> bool:
+    """Return True if a simulated device shows the desired state."""
+    display = desired["display"]
+    return (
+        device.state["display"]
+        == {key: display[key] for key in ("line1", "line2", "external_text")}
+        and device.state["fields"] == list(display["fields"])
+        and device.state["audio"]["mic_gain"] == desired["mic_gain"]
+        and device.state["audio"]["speaker_gain"] == desired["speaker_gain"]
+    )
+
+
+async def time_consistent(device, desired: dict, since) -> float:
+    """Wait until the device is consistent; return seconds since since()."""
+    while not consistent(device, desired):
+        await asyncio.sleep(POLL_SECONDS)
+    return time.perf_counter() - since()
+
+
+def summary(times: list[float]) -> str:
+    """Return p50, p95 and max in milliseconds."""
+    times = sorted(times)
+    return (
+        f"{times[len(times) // 2] * 1000:6.1f} {times[int(len(times) * 0.95)] * 1000:6.1f}"
+        f" {times[-1] * 1000:6.1f}"
+    )
+
+
+async def run(hass: HomeAssistant, devices: int, batch_display: bool) -> None:
+    """Restore, connect and reboot a fleet; print one row."""
+    fleet = SimulatorFleet(devices, batch_display=batch_display)
+    ports = await fleet.async_start()
+    clients: list[SmartIntercomClient] = []
+    coordinators: list[SmartIntercomCoordinator] = []
+    authenticated: dict[int, float] = {}
+    load_times = []
+    for index, port in enumerate(ports):
+        client = SmartIntercomClient("127.0.0.1", port, DEFAULT_SECRET)
+        coordinator = SmartIntercomCoordinator(hass, client, False)
+
+        def on_connect(index: int = index, coordinator=coordinator) -> None:
+            authenticated[index] = time.perf_counter()
+            coordinator.on_connect()
+
+        client.on_message = coordinator.on_message
+        client.on_connect = on_connect
+        client.on_disconnect = coordinator.on_disconnect
+        key = STATE_STORAGE_KEY.format(f"bench_restore_{batch_display}_{index}")
+        coordinator.state_store = Store(hass, STATE_STORAGE_VERSION, key)
+        await coordinator.state_store.async_save(desired_state(index))
+        start = time.perf_counter()
+        await coordinator.async_load_state()
+        load_times.append(time.perf_counter() - start)
+        clients.append(client)
+        coordinators.append(coordinator)
+    desired = [desired_state(index) for index in range(devices)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client.connect() for client in clients))
+    restart = await asyncio.gather(
+        *(
+            time_consistent(device, desired[index], lambda: start)
+            for index, device in enumerate(fleet.devices)
+        )
+    )
+
+    authenticated.clear()
+    for device in fleet.devices:
+        device.stats.commands.clear()
+    await asyncio.gather(*(device.async_reboot() for device in fleet.devices))
+    reboot = await asyncio.gather(
+        *(
+            time_consistent(device, desired[index], lambda index=index: authenticated[index])
+            for index, device in enumerate(fleet.devices)
+        )
+    )
+    messages = sum(
+        device.stats.commands[cmd] for device in fleet.devices for cmd in STATE_COMMANDS
+    ) / devices
+
+    for client, coordinator in zip(clients, coordinators):
+        await client.disconnect()
+        await coordinator.async_stop()
+    await fleet.async_stop()
+    label = "update_display" if batch_display else "single commands"
+    print(
+        f"{label:<16} {sum(load_times) / devices * 1e6:>7.0f}us {summary(restart)}"
+        f"   {summary(reboot)} {messages:>9.1f}"
+    )
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--devices", type=int, default=50)
+    args = parser.parse_args()
+
+    websocket_client.RECONNECT_DELAY = RECONNECT_DELAY
+    hass = HomeAssistant(tempfile.mkdtemp())
+    print(f"{args.devices} devices; times in ms (p50 p95 max)")
+    print(f"{'firmware':<16} {'load':>9} {'restart':>20}   {'reboot':>20} {'msgs/dev':>9}")
+    for batch_display in (True, False):
+        await run(hass, args.devices, batch_display)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+"""Benchmark display services on 1-20 simulated devices.
+
+Each round changes the first display line of every device, as one
+update_display call would: once awaiting the devices in turn, as the
+services used to, and once through async_run_on_devices, which runs
+them concurrently with a per-device timeout. Runs with a healthy fleet
+and with its first device stalled (it stops reading, so sends to it
+wait on full TCP buffers) report the time until the healthy devices
+are updated and the time for the whole call.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_services [--rounds 20] [--timeout 0.5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import replace
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.smart_intercom import (
+    SmartIntercomCoordinator,
+    async_run_on_devices,
+)
+from custom_components.smart_intercom.const import RESULT_OK, RESULT_TIMEOUT
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import DEFAULT_SECRET, SimulatorFleet
+
+FILL_FRAME = bytes(640)
+FILL_WAIT = 0.2  # seconds a send may wait before the buffers count as full
+
+
+async def fill_buffers(client: SmartIntercomClient) -> None:
+    """Send audio to a stalled device until sends wait on full buffers."""
+    while True:
+        try:
+            await asyncio.wait_for(client.send_audio(FILL_FRAME), FILL_WAIT)
+        except asyncio.TimeoutError:
+            return
+
+
+def median_ms(times: list[float]) -> float:
+    """Return the median in milliseconds."""
+    return sorted(times)[len(times) // 2] * 1000
+
+
+async def run(
+    hass: HomeAssistant, devices: int, stalled: bool, rounds: int, timeout: float
+) -> None:
+    """Time both ways of updating a fleet; print one row each."""
+    fleet = SimulatorFleet(devices)
+    ports = await fleet.async_start()
+    coordinators: dict[str, SmartIntercomCoordinator] = {}
+    for index, port in enumerate(ports):
+        client = SmartIntercomClient("127.0.0.1", port, DEFAULT_SECRET)
+        coordinator = SmartIntercomCoordinator(hass, client, False)
+        client.on_message = coordinator.on_message
+        client.on_connect = coordinator.on_connect
+        client.on_disconnect = coordinator.on_disconnect
+        coordinators[f"device_{index}"] = coordinator
+    await asyncio.gather(*(c.client.connect() for c in coordinators.values()))
+    while not all(c.client.connected for c in coordinators.values()):
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1)  # initial sync and icon fetch
+    healthy = list(coordinators.values())
+    if stalled:
+        fleet.devices[0].stall()
+        await fill_buffers(healthy.pop(0).client)
+
+    for label in ("sequential", "concurrent"):
+        healthy_times, call_times, timeouts = [], [], 0
+        for round_ in range(rounds):
+            done: dict[SmartIntercomCoordinator, float] = {}
+            text = f"{label} {round_}"
+
+            async def update(coordinator: SmartIntercomCoordinator) -> bool:
+                sent = await coordinator.async_update_display(
+                    replace(coordinator.display, line1=text)
+                )
+                done[coordinator] = time.perf_counter()
+                return sent
+
+            start = time.perf_counter()
+            if label == "sequential":
+                results = {}
+                for key, coordinator in coordinators.items():
+                    try:
+                        await asyncio.wait_for(update(coordinator), timeout)
+                        results[key] = RESULT_OK
+                    except asyncio.TimeoutError:
+                        results[key] = RESULT_TIMEOUT
+            else:
+                results = await async_run_on_devices(coordinators, update, timeout)
+            call_times.append(time.perf_counter() - start)
+            healthy_times.append(max(done[c] for c in healthy) - start)
+            timeouts += sum(result == RESULT_TIMEOUT for result in results.values())
+        print(
+            f"{devices:>7} {'yes' if stalled else 'no':>7} {label:<10}"
+            f" {median_ms(healthy_times):>10.2f}ms {median_ms(call_times):>9.2f}ms"
+            f" {timeouts / rounds:>9.1f}"
+        )
+
+    fleet.devices[0].stall(False)
+    for coordinator in coordinators.values():
+        await coordinator.client.disconnect()
+        await coordinator.async_stop()
+    await fleet.async_stop()
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    hass = HomeAssistant(tempfile.mkdtemp())
+    print(f"median of {args.rounds} rounds; {args.timeout}s timeout per device")
+    print(
+        f"{'devices':>7} {'stalled':>7} {'mode':<10} {'healthy done':>12}"
+        f" {'call':>11} {'timeouts':>9}"
+    )
+    for devices in (1, 20):
+        await run(hass, devices, False, args.rounds, args.timeout)
+    await run(hass, 20, True, args.rounds, args.timeout)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,81 @@
+"""Benchmark sound event detection throughput.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_sound_events --streams 32
+    python -m benchmarks.bench_sound_events recording1.wav recording2.wav
+
+Recorded files must be 16 kHz, 16-bit mono WAV.
+"""
+from __future__ import annotations
+
+import argparse
+import time
+import wave
+
+from custom_components.smart_intercom.sound_events import SoundEventPipeline
+
+from .synthetic import SAMPLE_RATE, door_scene
+
+BLOCK_BYTES = SAMPLE_RATE * 2 // 10  # 100 ms, as fed by SoundEventManager
+
+
+def load_wav(path: str) -> bytes:
+    """Read a 16 kHz mono 16-bit WAV file."""
+    with wave.open(path, "rb") as wav:
+        if (wav.getframerate(), wav.getnchannels(), wav.getsampwidth()) != (SAMPLE_RATE, 1, 2):
+            raise SystemExit(f"{path}: expected 16 kHz 16-bit mono")
+        return wav.readframes(wav.getnframes())
+
+
+def run(pcm: bytes, streams: int) -> tuple[float, list]:
+    """Feed the same audio through independent pipelines, interleaved.
+
+    Returns the elapsed time and the events detected on the first stream.
+    """
+    pipelines = [SoundEventPipeline() for _ in range(streams)]
+    first = pipelines[0]
+    events = []
+    start = time.perf_counter()
+    for offset in range(0, len(pcm), BLOCK_BYTES):
+        block = pcm[offset:offset + BLOCK_BYTES]
+        for pipeline in pipelines:
+            found = pipeline.process(block)
+            if pipeline is first:
+                events.extend(found)
+    return time.perf_counter() - start, events
+
+
+def report(name: str, pcm: bytes, streams: int, labels=None) -> None:
+    """Run one scenario and print its results."""
+    audio_seconds = len(pcm) / (2 * SAMPLE_RATE)
+    elapsed, events = run(pcm, streams)
+    realtime_factor = elapsed / (audio_seconds * streams)
+    print(f"{name}: {audio_seconds:.1f}s audio x {streams} streams in {elapsed:.3f}s")
+    print(f"  real-time factor per stream: {realtime_factor:.5f}")
+    print(f"  streams per core:            {1 / realtime_factor:.0f}")
+    print(f"  events per stream:           {len(events)}")
+    if labels is not None:
+        hits = sum(
+            any(e.event_type == label and abs(e.timestamp - t) < 0.15 for e in events)
+            for t, label in labels
+        )
+        print(f"  labelled events detected:    {hits}/{len(labels)}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("files", nargs="*", help="recorded 16 kHz mono WAV files")
+    parser.add_argument("--streams", type=int, default=16)
+    parser.add_argument("--repeats", type=int, default=6)
+    args = parser.parse_args()
+
+    pcm, labels = door_scene(repeats=args.repeats)
+    report("synthetic", pcm, args.streams, labels)
+    for path in args.files:
+        report(path, load_wav(path), args.streams)
+
+
+if __name__ == "__main__":
+    main()
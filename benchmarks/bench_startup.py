@@ -0,0 +1,154 @@
+"""Benchmark what the integration adds to Home Assistant's start-up.
+
+- import: a fresh interpreter first loads what Home Assistant has
+  loaded before any integration (aiohttp and the helpers used here),
+  then imports the integration under python -X importtime; reports
+  the milliseconds that import adds, the heaviest modules in it, and
+  whether websockets was pulled in. With --budget-ms the run exits with
+  status 1 when the import takes longer, for use as a CI check.
+- setup: per-entry setup of client and coordinator against simulated
+  intercoms with 20 ms of latency, a quarter of them offline, waiting
+  for the connection as setup used to and starting it in the background
+  as it does now.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_startup [--budget-ms 250] [--devices 8]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.smart_intercom import SmartIntercomCoordinator
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import DEFAULT_SECRET, LinkConditions, SimulatedIntercom
+
+PACKAGE = "custom_components.smart_intercom"
+PRELOAD = (
+    "aiohttp",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.device_registry",
+    "homeassistant.helpers.service",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+IMPORT_RUNS = 5
+LATENCY = 0.02
+OFFLINE_SHARE = 4  # every fourth device is offline
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def measure_import() -> tuple[float, dict[str, int]]:
+    """Import the integration once; return ms and self times in us by module."""
+    code = f"import {', '.join(PRELOAD)}; import {PACKAGE}"
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total = 0.0
+    modules: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if (match := IMPORT_LINE.match(line)) is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        modules[name] = int(self_us)
+        if name == PACKAGE and not indent:
+            total = int(cumulative_us) / 1000
+    return total, modules
+
+
+def report_import(budget_ms: float | None) -> bool:
+    """Print the import cost; return False if over budget."""
+    runs = [measure_import() for _ in range(IMPORT_RUNS)]
+    # The first run may compile bytecode: keep the fastest
+    total, modules = min(runs, key=lambda run: run[0])
+    print(f"import: {total:.1f} ms (best of {IMPORT_RUNS})")
+    print(f"  websockets imported: {'yes' if 'websockets' in modules else 'no'}")
+    heaviest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:10]
+    for name, self_us in heaviest:
+        print(f"  {self_us / 1000:>7.2f} ms  {name}")
+    if budget_ms is not None and total > budget_ms:
+        print(f"over budget: {total:.1f} ms > {budget_ms:.1f} ms")
+        return False
+    return True
+
+
+async def setup_entries(
+    hass: HomeAssistant, ports: list[int], wait: bool
+) -> tuple[list[float], list[SmartIntercomCoordinator]]:
+    """Set up one entry per port; return the setup times."""
+    times = []
+    coordinators = []
+    for port in ports:
+        start = time.perf_counter()
+        client = SmartIntercomClient("127.0.0.1", port, DEFAULT_SECRET)
+        coordinator = SmartIntercomCoordinator(hass, client, False)
+        client.on_message = coordinator.on_message
+        client.on_connect = coordinator.on_connect
+        client.on_disconnect = coordinator.on_disconnect
+        if wait:
+            await client.connect()
+        else:
+            client.start()
+        times.append(time.perf_counter() - start)
+        coordinators.append(coordinator)
+    return times, coordinators
+
+
+async def report_setup(devices: int) -> None:
+    """Print per-entry setup times, waiting for the connection or not."""
+    hass = HomeAssistant(tempfile.mkdtemp())
+    simulated = [
+        SimulatedIntercom(conditions=LinkConditions(latency=LATENCY))
+        for _ in range(devices)
+    ]
+    ports = []
+    for index, device in enumerate(simulated):
+        port = await device.async_start()
+        if index % OFFLINE_SHARE == OFFLINE_SHARE - 1:
+            # Nothing listens on the port any more
+            await device.async_stop()
+        ports.append(port)
+
+    print(f"setup: {devices} entries, {LATENCY * 1000:.0f} ms latency, 1 in {OFFLINE_SHARE} offline")
+    print(f"{'connection':<12} {'mean':>9} {'max':>9} {'total':>9}")
+    for wait in (True, False):
+        times, coordinators = await setup_entries(hass, ports, wait)
+        label = "awaited" if wait else "background"
+        print(
+            f"{label:<12} {sum(times) / len(times) * 1000:>7.2f}ms"
+            f" {max(times) * 1000:>7.2f}ms {sum(times) * 1000:>7.1f}ms"
+        )
+        for coordinator in coordinators:
+            await coordinator.client.disconnect()
+            await coordinator.async_stop()
+    for device in simulated:
+        await device.async_stop()
+
+
+async def main() -> int:
+    """Run the benchmark; return the exit status."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budget-ms", type=float, default=None)
+    parser.add_argument("--devices", type=int, default=8)
+    args = parser.parse_args()
+
+    within_budget = report_import(args.budget_ms)
+    print()
+    await report_setup(args.devices)
+    return 0 if within_budget else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,137 @@
+"""Benchmark websocket transport settings: CPU per stream and latency.
+
+Fake devices stream their microphone in real time to real clients over
+localhost websockets, at each frame duration and with permessage-deflate
+on (the library default) or off (the integration's transport profile).
+End-to-end latency is the frame duration (a frame is sent once full)
+plus the time from send to on_audio(); CPU covers both ends.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_transport
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import numpy as np
+import websockets
+
+from custom_components.smart_intercom.audio_format import AudioFormat
+from custom_components.smart_intercom.const import CMD_SET_FORMAT, CMD_START_LISTEN
+from custom_components.smart_intercom.transport import DEFAULT_TRANSPORT, TransportProfile
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .bench_broadcast import SECRET
+
+STREAMS = 10
+SECONDS = 3
+LIBRARY_DEFAULTS = TransportProfile(
+    compression="deflate", max_size=2**20, max_queue=16, write_limit=2**15
+)
+
+
+class FakeDevice:
+    """Fake firmware: agrees to a format and streams a noisy tone."""
+
+    def __init__(self) -> None:
+        self.sent: list[float] = []
+
+    async def handler(self, ws) -> None:
+        await ws.send(json.dumps({"type": "auth_required"}))
+        stream = None
+        audio_format = AudioFormat()
+        try:
+            async for message in ws:
+                data = json.loads(message)
+                if data.get("cmd") == "auth":
+                    await ws.send(json.dumps({"type": "auth_success"}))
+                elif data.get("cmd") == CMD_SET_FORMAT:
+                    await ws.send(json.dumps({"type": "audio_format", **data["formats"][0]}))
+                    audio_format = AudioFormat.from_dict(data["formats"][0])
+                elif data.get("cmd") == CMD_START_LISTEN:
+                    stream = asyncio.create_task(self._stream(ws, audio_format))
+        finally:
+            if stream:
+                stream.cancel()
+
+    async def _stream(self, ws, audio_format: AudioFormat) -> None:
+        """Send microphone frames at real-time pace."""
+        rng = np.random.default_rng(0)
+        t = np.arange(audio_format.sample_rate) / audio_format.sample_rate
+        second = (3000 * np.sin(2 * np.pi * 300 * t) + rng.normal(0, 500, t.size)).astype("<i2")
+        pcm = second.tobytes()
+        size = audio_format.frame_bytes
+        start = time.perf_counter()
+        index = 0
+        while True:
+            offset = (index * size) % (len(pcm) - size)
+            self.sent.append(time.perf_counter())
+            await ws.send(pcm[offset:offset + size])
+            index += 1
+            await asyncio.sleep(
+                max(0.0, start + index * audio_format.frame_seconds - time.perf_counter())
+            )
+
+
+async def run(frame_ms: int, label: str, transport: TransportProfile) -> None:
+    """Stream from a fleet of fake devices and print CPU and latency."""
+    audio_format = AudioFormat(frame_ms=frame_ms)
+    fakes = [FakeDevice() for _ in range(STREAMS)]
+    servers = [
+        await websockets.serve(fake.handler, "127.0.0.1", 0, compression=transport.compression)
+        for fake in fakes
+    ]
+    arrivals: list[list[float]] = [[] for _ in fakes]
+    clients = []
+    for index, server in enumerate(servers):
+        client = SmartIntercomClient(
+            "127.0.0.1",
+            server.sockets[0].getsockname()[1],
+            SECRET,
+            on_audio=lambda data, arrived=arrivals[index]: arrived.append(time.perf_counter()),
+            audio_formats=[audio_format],
+            transport=transport,
+        )
+        await client.connect()
+        clients.append(client)
+    while not all(c.connected and c.audio_format == audio_format for c in clients):
+        await asyncio.sleep(0.01)
+
+    cpu = time.process_time()
+    for client in clients:
+        await client.send_command(CMD_START_LISTEN)
+    await asyncio.sleep(SECONDS)
+    cpu = time.process_time() - cpu
+
+    transit = np.concatenate(
+        [
+            np.array(arrived) - np.array(fake.sent[: len(arrived)])
+            for fake, arrived in zip(fakes, arrivals)
+        ]
+    ) * 1000
+    print(
+        f"{frame_ms:>5}ms {label:<9} {cpu / SECONDS / STREAMS:>10.3%}"
+        f" {frame_ms + np.median(transit):>9.2f}ms {frame_ms + np.percentile(transit, 99):>9.2f}ms"
+    )
+
+    for client in clients:
+        await client.disconnect()
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+
+async def main() -> None:
+    """Run the benchmark."""
+    print(f"{STREAMS} streams for {SECONDS}s; CPU per stream as a share of one core")
+    print(f"{'frame':>7} {'transport':<9} {'CPU':>11} {'p50':>11} {'p99':>11}")
+    for frame_ms in (10, 20, 32, 60):
+        await run(frame_ms, "defaults", LIBRARY_DEFAULTS)
+        await run(frame_ms, "profile", DEFAULT_TRANSPORT)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
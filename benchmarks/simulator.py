@@ -0,0 +1,589 @@
+"""Simulated SmartIntercom devices for local testing and load generation.
+
+Each SimulatedIntercom serves what the ESP32 firmware serves on one
+port: GET /status, the icon files and the /audio_stream websocket with
+the auth handshake (agreeing on the compact codec when offered), the
+command set in const.py (blits go into a framebuffer), icon lists,
+format negotiation and real-time microphone audio (synthetic door sounds). Link conditions
+(latency, jitter, audio loss, a bandwidth cap and forced disconnects)
+apply to each connection in both directions. Hundreds of devices can
+run in one process.
+
+Run from the repository root, then add the printed host/port pairs as
+integrations (any secret key works with --secret):
+
+    python -m benchmarks.simulator --devices 3 --base-port 8700 --latency 0.02
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import lru_cache
+import random
+import time
+import zlib
+from typing import Any, Awaitable, Callable
+
+from aiohttp import WSMsgType, web
+import numpy as np
+
+from custom_components.smart_intercom.audio_format import DEFAULT_FORMAT, AudioFormat
+from custom_components.smart_intercom.codec import COMPACT_CODEC, JSON_CODEC, CodecError
+from custom_components.smart_intercom.const import (
+    CMD_AUTH,
+    CMD_BLIT,
+    CMD_CLEAR_FIELD,
+    CMD_DOORBELL,
+    CMD_GET_ICONS,
+    CMD_SET_EXTERNAL_TEXT,
+    CMD_SET_FIELD,
+    CMD_SET_FORMAT,
+    CMD_SET_MIC_GAIN,
+    CMD_SET_SPEAKER_GAIN,
+    CMD_SET_TEXT,
+    CMD_START_ALARM,
+    CMD_START_LISTEN,
+    CMD_START_SPEAK,
+    CMD_START_STREAM,
+    CMD_STOP_ALARM,
+    CMD_STOP_LISTEN,
+    CMD_STOP_SPEAK,
+    CMD_STOP_STREAM,
+    CMD_UPDATE_DISPLAY,
+    DISPLAY_HEIGHT,
+    DISPLAY_WIDTH,
+    FEATURE_FRAMEBUFFER,
+    FEATURE_UPDATE_DISPLAY,
+    MSG_AUDIO_FORMAT,
+    MSG_AUTH_FAILED,
+    MSG_AUTH_REQUIRED,
+    MSG_AUTH_SUCCESS,
+    MSG_ICON_LIST,
+    STREAM_MODE_FULL_DUPLEX,
+    STREAM_MODE_LISTEN,
+    STREAM_MODE_SPEAK,
+)
+
+from custom_components.smart_intercom.oled import PAGE_HEIGHT, blit
+
+from .synthetic import SAMPLE_RATE, door_scene
+
+DEFAULT_SECRET = "SmartIntercom2026"
+DEFAULT_ICONS = [
+    f"/icons/10x10/{name}.xbm"
+    for name in ("home", "bell", "lock", "unlock", "sun", "moon", "car", "mail")
+]
+ICON_SIZE = 10
+DOORBELL_SECONDS = 2.0
+
+# start command -> (streaming mode, stop command)
+STREAM_COMMANDS = {
+    CMD_START_STREAM: (STREAM_MODE_FULL_DUPLEX, CMD_STOP_STREAM),
+    CMD_START_LISTEN: (STREAM_MODE_LISTEN, CMD_STOP_LISTEN),
+    CMD_START_SPEAK: (STREAM_MODE_SPEAK, CMD_STOP_SPEAK),
+}
+
+
+@dataclass
+class LinkConditions:
+    """Network conditions applied to each connection, both ways."""
+
+    latency: float = 0.0  # one-way delay in seconds
+    jitter: float = 0.0  # extra random delay, up to this many seconds
+    loss: float = 0.0  # share of audio frames dropped
+    bandwidth: int | None = None  # bytes per second each way
+    disconnect_after: float | None = None  # seconds before a forced disconnect
+
+
+@dataclass
+class DeviceStats:
+    """What a simulated device saw."""
+
+    connections: int = 0
+    commands: Counter = field(default_factory=Counter)
+    frames_sent: int = 0
+    frames_dropped: int = 0
+    frames_received: int = 0
+    bytes_received: int = 0
+    command_bytes: Counter = field(default_factory=Counter)  # by command
+
+
+def mic_audio(audio_format: AudioFormat) -> bytes:
+    """Return the looped microphone signal on the wire, shared by all devices."""
+    # Framing doesn't change the signal, so link tuning adds no copies
+    return _mic_audio(audio_format.sample_rate, audio_format.bits, audio_format.channels)
+
+
+@lru_cache
+def _mic_audio(sample_rate: int, bits: int, channels: int) -> bytes:
+    samples = np.frombuffer(door_scene()[0], dtype="<i2")
+    if sample_rate != SAMPLE_RATE:
+        count = samples.size * sample_rate // SAMPLE_RATE
+        positions = np.arange(count) * SAMPLE_RATE / sample_rate
+        samples = np.interp(positions, np.arange(samples.size), samples).astype("<i2")
+    return AudioFormat(sample_rate, bits, channels).encode(samples.tobytes())
+
+
+@lru_cache
+def icon_xbm(path: str) -> bytes:
+    """Return an XBM file for an icon path: a frame around a pattern of its name."""
+    rng = random.Random(path)
+    pixels = np.zeros((ICON_SIZE, ICON_SIZE), bool)
+    pixels[[0, -1], :] = pixels[:, [0, -1]] = True
+    pixels[2:-2, 2:-2] = np.array(
+        [rng.random() < 0.5 for _ in range((ICON_SIZE - 4) ** 2)]
+    ).reshape(ICON_SIZE - 4, ICON_SIZE - 4)
+    data = np.packbits(pixels, axis=1, bitorder="little").reshape(-1)
+    name = path.rsplit("/", 1)[-1].split(".")[0]
+    return (
+        f"#define {name}_width {ICON_SIZE}\n#define {name}_height {ICON_SIZE}\n"
+        f"static unsigned char {name}_bits[] = {{\n"
+        + ", ".join(f"0x{value:02x}" for value in data)
+        + " };\n"
+    ).encode()
+
+
+def _boot_state() -> dict[str, Any]:
+    """Return the state of a freshly booted device."""
+    return {
+        "streaming": {"full_duplex": False, "listen": False, "speak": False},
+        "audio": {
+            "mic_gain": 1.0,
+            "speaker_gain": 1.0,
+            "alarm_active": False,
+            "doorbell_playing": False,
+        },
+        "display": {"line1": "", "line2": "", "external_text": ""},
+        "fields": [{"icon": "", "text": ""} for _ in range(3)],
+    }
+
+
+class _DelayLine:
+    """Deliver messages in order after latency, jitter and a bandwidth cap."""
+
+    def __init__(
+        self,
+        deliver: Callable[[Any], Awaitable[None]],
+        conditions: LinkConditions,
+        rng: random.Random,
+    ) -> None:
+        self._deliver = deliver
+        self._conditions = conditions
+        self._rng = rng
+        self._queue: asyncio.Queue[tuple[float, Any]] = asyncio.Queue()
+        self._last_due = 0.0
+        self._link_free = 0.0
+        self._task = asyncio.create_task(self._run())
+
+    def put(self, message: Any, size: int) -> None:
+        """Queue a message of size bytes."""
+        conditions = self._conditions
+        now = time.monotonic()
+        due = now + conditions.latency + conditions.jitter * self._rng.random()
+        if conditions.bandwidth:
+            self._link_free = max(self._link_free, now) + size / conditions.bandwidth
+            due = max(due, self._link_free + conditions.latency)
+        # TCP never reorders, so jitter can only hold messages back
+        self._last_due = max(self._last_due, due)
+        self._queue.put_nowait((self._last_due, message))
+
+    async def _run(self) -> None:
+        while True:
+            due, message = await self._queue.get()
+            if (delay := due - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+            await self._deliver(message)
+
+    def close(self) -> None:
+        self._task.cancel()
+
+
+class _Connection:
+    """One websocket client of a simulated device."""
+
+    def __init__(self, device: SimulatedIntercom, ws: web.WebSocketResponse) -> None:
+        self.device = device
+        self.ws = ws
+        self.authenticated = False
+        self.audio_format = DEFAULT_FORMAT
+        self.codec = JSON_CODEC
+        self.mic_task: asyncio.Task | None = None
+        conditions = device.conditions
+        self.outbound = _DelayLine(self._send, conditions, device.rng)
+        self.inbound = _DelayLine(self._receive, conditions, device.rng)
+
+    async def _send(self, message: str | bytes) -> None:
+        if self.ws.closed:
+            return
+        if isinstance(message, bytes):
+            await self.ws.send_bytes(message)
+        else:
+            await self.ws.send_str(message)
+
+    def send_message(self, data: dict) -> None:
+        message = self.codec.encode(data)
+        self.outbound.put(message, len(message))
+
+    def send_audio(self, frame: bytes) -> None:
+        stats = self.device.stats
+        if self.device.rng.random() < self.device.conditions.loss:
+            stats.frames_dropped += 1
+            return
+        stats.frames_sent += 1
+        if prefix := self.codec.audio_prefix:
+            frame = prefix + frame
+        self.outbound.put(frame, len(frame))
+
+    async def _receive(self, message: str | bytes) -> None:
+        if isinstance(message, bytes):
+            prefix = self.codec.audio_prefix
+            if not prefix or message[:1] == prefix:
+                if self.authenticated:
+                    self.device.stats.frames_received += 1
+                    self.device.stats.bytes_received += len(message) - len(prefix)
+                return
+        try:
+            data = self.codec.decode(message)
+        except CodecError:
+            return
+        self.device.stats.command_bytes[data.get("cmd", "")] += len(message)
+        await self.device.handle_command(self, data)
+
+    def close(self) -> None:
+        self.outbound.close()
+        self.inbound.close()
+        if self.mic_task is not None:
+            self.mic_task.cancel()
+
+
+class SimulatedIntercom:
+    """A fake ESP32 intercom on one HTTP/websocket port."""
+
+    def __init__(
+        self,
+        secret_key: str = DEFAULT_SECRET,
+        conditions: LinkConditions | None = None,
+        icons: list[str] | None = None,
+        negotiate_formats: bool = True,
+        version_icons: bool = True,
+        batch_display: bool = True,
+        serve_status: bool = True,
+        framebuffer: bool = True,
+        compact_codec: bool = True,
+        seed: int = 0,
+    ) -> None:
+        """Initialize the device.
+
+        With negotiate_formats off it behaves like firmware that only
+        speaks the default format and ignores set_format; with
+        version_icons off, like firmware that always lists every icon;
+        with batch_display off, like firmware without update_display;
+        with serve_status off, like firmware without GET /status; with
+        framebuffer off, like firmware that can't show rendered frames;
+        with compact_codec off, like firmware that only speaks JSON.
+        """
+        self.secret_key = secret_key
+        self.conditions = conditions or LinkConditions()
+        self.icons = DEFAULT_ICONS if icons is None else icons
+        self.negotiate_formats = negotiate_formats
+        self.version_icons = version_icons
+        self.batch_display = batch_display
+        self.serve_status = serve_status
+        self.framebuffer = framebuffer
+        self.compact_codec = compact_codec
+        # What blits drew, in the page layout of the display
+        self.pages = np.zeros((DISPLAY_HEIGHT // PAGE_HEIGHT, DISPLAY_WIDTH), np.uint8)
+        self.rng = random.Random(seed)
+        self.stats = DeviceStats()
+        self.state = _boot_state()
+        self.port: int | None = None
+        self._connections: set[_Connection] = set()
+        self._runner: web.AppRunner | None = None
+        self._doorbell_task: asyncio.Task | None = None
+        self._reading = asyncio.Event()
+        self._reading.set()
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start serving and return the port."""
+        app = web.Application()
+        if self.serve_status:
+            app.router.add_get("/status", self._handle_status)
+        app.router.add_get("/audio_stream", self._handle_audio_stream)
+        app.router.add_get("/icons/{name:.*}", self._handle_icon)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+        return self.port
+
+    async def async_stop(self) -> None:
+        """Drop every client and stop serving."""
+        await self.async_drop_connections()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def async_drop_connections(self) -> None:
+        """Close every websocket, as a device reboot or Wi-Fi drop would."""
+        for connection in list(self._connections):
+            await connection.ws.close()
+
+    async def async_reboot(self) -> None:
+        """Drop every connection and forget the display and gains."""
+        await self.async_drop_connections()
+        self.state = _boot_state()
+        self.pages[:] = 0
+
+    def stall(self, stalled: bool = True) -> None:
+        """Stop (or resume) reading from the clients, like a hung device.
+
+        Its TCP buffers fill up and, once they are full, sends to it wait.
+        """
+        if stalled:
+            self._reading.clear()
+        else:
+            self._reading.set()
+
+    def _set_mode(self, mode: str | None) -> None:
+        streaming = self.state["streaming"]
+        for key in streaming:
+            streaming[key] = key == mode
+
+    async def _handle_status(self, request: web.Request) -> web.Response:
+        if self.conditions.latency:
+            await asyncio.sleep(2 * self.conditions.latency)
+        return web.json_response(self.state)
+
+    async def _handle_icon(self, request: web.Request) -> web.Response:
+        if request.path not in self.icons:
+            raise web.HTTPNotFound
+        return web.Response(body=icon_xbm(request.path), content_type="image/x-xbitmap")
+
+    async def _handle_audio_stream(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse(max_msg_size=0)
+        await ws.prepare(request)
+        connection = _Connection(self, ws)
+        self._connections.add(connection)
+        self.stats.connections += 1
+        disconnect = None
+        if self.conditions.disconnect_after is not None:
+            disconnect = asyncio.get_running_loop().call_later(
+                self.conditions.disconnect_after,
+                lambda: asyncio.ensure_future(ws.close()),
+            )
+        connection.send_message({"type": MSG_AUTH_REQUIRED})
+        try:
+            async for message in ws:
+                await self._reading.wait()
+                if message.type in (WSMsgType.TEXT, WSMsgType.BINARY):
+                    connection.inbound.put(message.data, len(message.data))
+        finally:
+            if disconnect is not None:
+                disconnect.cancel()
+            connection.close()
+            self._connections.discard(connection)
+            if not self._connections:
+                self._set_mode(None)
+        return ws
+
+    def _set_field(self, data: dict) -> None:
+        """Set one marquee field from command data."""
+        index = int(data.get("index", 0))
+        if 0 <= index < len(self.state["fields"]):
+            self.state["fields"][index] = {
+                "icon": data.get("icon", ""),
+                "text": data.get("text", ""),
+            }
+
+    async def handle_command(self, connection: _Connection, data: dict) -> None:
+        """Apply one JSON command like the firmware does."""
+        cmd = data.get("cmd", "")
+        self.stats.commands[cmd] += 1
+        if cmd == CMD_AUTH:
+            connection.authenticated = data.get("key") == self.secret_key
+            if not connection.authenticated:
+                connection.send_message({"type": MSG_AUTH_FAILED})
+                return
+            features = [FEATURE_UPDATE_DISPLAY] if self.batch_display else []
+            if self.framebuffer:
+                features.append(FEATURE_FRAMEBUFFER)
+            if self.compact_codec and COMPACT_CODEC.name in data.get("codecs", ()):
+                connection.send_message(
+                    {"type": MSG_AUTH_SUCCESS, "features": features, "codec": COMPACT_CODEC.name}
+                )
+                # Everything after this answer uses the codec
+                connection.codec = COMPACT_CODEC
+            else:
+                connection.send_message({"type": MSG_AUTH_SUCCESS, "features": features})
+            return
+        if not connection.authenticated:
+            return
+
+        audio = self.state["audio"]
+        if cmd in STREAM_COMMANDS:
+            mode, _ = STREAM_COMMANDS[cmd]
+            self._set_mode(mode)
+            if mode != STREAM_MODE_SPEAK and connection.mic_task is None:
+                connection.mic_task = asyncio.create_task(self._stream_mic(connection))
+        elif cmd in (CMD_STOP_STREAM, CMD_STOP_LISTEN, CMD_STOP_SPEAK):
+            self._set_mode(None)
+            if connection.mic_task is not None:
+                connection.mic_task.cancel()
+                connection.mic_task = None
+        elif cmd == CMD_DOORBELL:
+            if self._doorbell_task is None or self._doorbell_task.done():
+                self._doorbell_task = asyncio.create_task(self._ring())
+        elif cmd in (CMD_START_ALARM, CMD_STOP_ALARM):
+            audio["alarm_active"] = cmd == CMD_START_ALARM
+        elif cmd == CMD_SET_MIC_GAIN:
+            audio["mic_gain"] = float(data.get("value", 1.0))
+        elif cmd == CMD_SET_SPEAKER_GAIN:
+            audio["speaker_gain"] = float(data.get("value", 1.0))
+        elif cmd == CMD_SET_TEXT:
+            self.state["display"]["line1"] = data.get("line1", "")
+            self.state["display"]["line2"] = data.get("line2", "")
+        elif cmd == CMD_SET_EXTERNAL_TEXT:
+            self.state["display"]["external_text"] = data.get("text", "")
+        elif cmd == CMD_SET_FIELD:
+            self._set_field(data)
+        elif cmd == CMD_CLEAR_FIELD:
+            self._set_field({"index": data.get("index", 0)})
+        elif cmd == CMD_UPDATE_DISPLAY and self.batch_display:
+            display = self.state["display"]
+            for key in ("line1", "line2", "external_text"):
+                if key in data:
+                    display[key] = data[key]
+            for field_data in data.get("fields", ()):
+                self._set_field(field_data)
+        elif cmd == CMD_BLIT and self.framebuffer:
+            blit(self.pages, data.get("rects", ()))
+        elif cmd == CMD_GET_ICONS:
+            if not self.version_icons:
+                connection.send_message({"type": MSG_ICON_LIST, "icons": self.icons})
+                return
+            listing = "\n".join(self.icons).encode()
+            version = f"{zlib.crc32(listing):08x}"
+            if data.get("version") == version:
+                connection.send_message(
+                    {"type": MSG_ICON_LIST, "version": version, "unchanged": True}
+                )
+            else:
+                connection.send_message(
+                    {"type": MSG_ICON_LIST, "version": version, "icons": self.icons}
+                )
+        elif cmd == CMD_SET_FORMAT and self.negotiate_formats:
+            for offered in data.get("formats", []):
+                if (audio_format := AudioFormat.from_dict(offered)) is not None:
+                    connection.audio_format = audio_format
+                    connection.send_message({"type": MSG_AUDIO_FORMAT, **audio_format.as_dict()})
+                    break
+
+    async def _ring(self) -> None:
+        self.state["audio"]["doorbell_playing"] = True
+        try:
+            await asyncio.sleep(DOORBELL_SECONDS)
+        finally:
+            self.state["audio"]["doorbell_playing"] = False
+
+    async def _stream_mic(self, connection: _Connection) -> None:
+        """Send microphone frames at real-time pace in the agreed format."""
+        loop = asyncio.get_running_loop()
+        audio_format = connection.audio_format
+        pcm = mic_audio(audio_format)
+        start = loop.time()
+        sent = 0.0
+        offset = 0
+        while True:
+            if connection.audio_format != audio_format:
+                # Renegotiated mid-stream (e.g. a new frame duration)
+                audio_format = connection.audio_format
+                pcm = mic_audio(audio_format)
+                offset = 0
+            size = audio_format.wire_frame_bytes
+            if offset + size > len(pcm):
+                offset = 0
+            connection.send_audio(pcm[offset:offset + size])
+            offset += size
+            sent += audio_format.frame_seconds
+            if (delay := start + sent - loop.time()) > 0:
+                await asyncio.sleep(delay)
+
+
+class SimulatorFleet:
+    """Many simulated devices in one process."""
+
+    def __init__(self, count: int, **kwargs: Any) -> None:
+        """Initialize the fleet; kwargs go to every SimulatedIntercom."""
+        seed = kwargs.pop("seed", 0)
+        self.devices = [SimulatedIntercom(seed=seed + index, **kwargs) for index in range(count)]
+
+    async def async_start(self, host: str = "127.0.0.1", base_port: int = 0) -> list[int]:
+        """Start every device, on consecutive ports or ephemeral ones."""
+        return [
+            await device.async_start(host, base_port + index if base_port else 0)
+            for index, device in enumerate(self.devices)
+        ]
+
+    async def async_stop(self) -> None:
+        """Stop every device."""
+        await asyncio.gather(*(device.async_stop() for device in self.devices))
+
+
+async def main() -> None:
+    """Run a fleet until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=1)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--base-port", type=int, default=0)
+    parser.add_argument("--secret", default=DEFAULT_SECRET)
+    parser.add_argument("--latency", type=float, default=0.0, help="one-way seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="share of audio frames")
+    parser.add_argument("--bandwidth", type=int, default=None, help="bytes per second")
+    parser.add_argument("--disconnect-after", type=float, default=None, help="seconds")
+    parser.add_argument("--no-formats", action="store_true", help="ignore set_format")
+    parser.add_argument("--no-icon-version", action="store_true", help="always list all icons")
+    parser.add_argument("--no-batch-display", action="store_true", help="ignore update_display")
+    parser.add_argument("--no-status", action="store_true", help="no GET /status")
+    parser.add_argument("--no-framebuffer", action="store_true", help="ignore blit")
+    parser.add_argument("--no-compact", action="store_true", help="only speak JSON")
+    args = parser.parse_args()
+
+    conditions = LinkConditions(
+        latency=args.latency,
+        jitter=args.jitter,
+        loss=args.loss,
+        bandwidth=args.bandwidth,
+        disconnect_after=args.disconnect_after,
+    )
+    fleet = SimulatorFleet(
+        args.devices,
+        secret_key=args.secret,
+        conditions=conditions,
+        negotiate_formats=not args.no_formats,
+        version_icons=not args.no_icon_version,
+        batch_display=not args.no_batch_display,
+        serve_status=not args.no_status,
+        framebuffer=not args.no_framebuffer,
+        compact_codec=not args.no_compact,
+    )
+    ports = await fleet.async_start(args.host, args.base_port)
+    print(f"{len(ports)} simulated intercoms on {args.host}, secret {args.secret!r}")
+    for port in ports:
+        print(f"  {args.host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fleet.async_stop()
+        for index, device in enumerate(fleet.devices):
+            print(f"device {index}: {device.stats}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
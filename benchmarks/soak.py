@@ -0,0 +1,318 @@
+"""Soak test: run the integration against simulated intercoms for many hours.
+
+Each device gets the real SmartIntercomClient and coordinator (with
+sound event detection) talking to a simulated intercom. Every cycle
+stands for a few minutes of device life, compressed: the connection is
+dropped by the device or closed by Home Assistant and re-established
+(with reconnect and probe intervals shortened), live audio streams to
+HTTP subscribers that come and go, and the streamed share of the cycle
+is pushed through the client as fast as it is processed.
+
+After every cycle the process RSS, tracemalloc's traced memory, the
+number of live asyncio tasks and the coordinators' audio callback
+lists are sampled. Once warmed up, none of them may keep growing: the
+run ends with a leak report (growth per simulated hour, the allocation
+sites and task kinds that grew) and exits with status 1 if a bound was
+exceeded.
+
+Run from the repository root in an environment with Home Assistant:
+
+    python -m benchmarks.soak --hours 24 [--devices 2 --cycle-minutes 5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass
+import gc
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import aiohttp
+from aiohttp import web
+from homeassistant.core import HomeAssistant
+
+from custom_components.smart_intercom import SmartIntercomCoordinator, websocket_client
+from custom_components.smart_intercom.audio_stream import audio_stream_handler
+from custom_components.smart_intercom.const import (
+    CMD_START_LISTEN,
+    CMD_STOP_LISTEN,
+    STREAM_MODE_IDLE,
+    STREAM_MODE_LISTEN,
+)
+from custom_components.smart_intercom.icons import IconCatalogue
+from custom_components.smart_intercom.sound_events import SoundEventManager
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import DEFAULT_SECRET, SimulatedIntercom, mic_audio
+
+TIME_COMPRESSION = 100  # reconnect and probe intervals are divided by this
+LIVE_SECONDS = 0.3  # real-time streaming per cycle
+STREAM_SHARE = 0.1  # share of every cycle the door audio is streamed
+SUBSCRIBERS = 3  # HTTP audio streams opened per cycle
+WARMUP_SHARE = 0.1  # share of cycles before growth is measured
+SETTLE_SECONDS = 0.05  # let finished tasks go before sampling
+
+# Allowed growth from the end of warm-up to the end of the run
+MAX_RSS_GROWTH_MIB = 16.0
+MAX_TRACED_GROWTH_KIB = 4096.0  # above one-off growth of interpreter caches
+MAX_TASK_GROWTH = 0
+MAX_CALLBACK_GROWTH = 0
+
+
+@dataclass
+class Sample:
+    """Resource usage after a cycle."""
+
+    hours: float
+    rss_mib: float
+    traced_kib: float
+    tasks: int
+    callbacks: int
+
+
+def rss_mib() -> float:
+    """Return the resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        # Peak rather than current, where /proc is missing
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+class SoakDevice:
+    """A simulated intercom with the integration's objects for it."""
+
+    def __init__(self, hass: HomeAssistant, index: int) -> None:
+        """Initialize the device."""
+        self.hass = hass
+        self.index = index
+        self.device = SimulatedIntercom(seed=index)
+        self.client: SmartIntercomClient | None = None
+        self.coordinator: SmartIntercomCoordinator | None = None
+        self._runner: web.AppRunner | None = None
+        self.stream_url = ""
+
+    async def async_start(self) -> None:
+        """Start the device, set up the integration side and connect."""
+        port = await self.device.async_start()
+        self.client = client = SmartIntercomClient("127.0.0.1", port, DEFAULT_SECRET)
+        self.coordinator = coordinator = SmartIntercomCoordinator(self.hass, client, True)
+        client.on_message = coordinator.on_message
+        client.on_audio = coordinator.on_audio
+        client.on_connect = coordinator.on_connect
+        client.on_disconnect = coordinator.on_disconnect
+        coordinator.sound_events = SoundEventManager(self.hass, f"soak{self.index}")
+        coordinator.register_audio_callback(coordinator.sound_events.on_audio_data)
+
+        app = web.Application()
+        app["coordinator"] = coordinator
+        app.router.add_get("/audio", audio_stream_handler)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.stream_url = f"http://127.0.0.1:{self._runner.addresses[0][1]}/audio"
+
+        await client.connect()
+        await self.async_wait_connected()
+
+    async def async_wait_connected(self, timeout: float = 10.0) -> None:
+        """Wait until the client is authenticated and has the icon list."""
+        deadline = time.monotonic() + timeout
+        while not (self.client.connected and self.coordinator.icons):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"device {self.index} did not reconnect")
+            await asyncio.sleep(0.005)
+
+    async def async_churn_connection(self, cycle: int) -> None:
+        """Lose the connection one way or another and get it back."""
+        self.coordinator.icons = IconCatalogue()
+        if cycle % 2:
+            # Device reboot or Wi-Fi drop: the client reconnects by itself
+            await self.device.async_drop_connections()
+        else:
+            # Home Assistant side closes and reopens the connection
+            await self.client.disconnect()
+            await self.client.connect()
+        await self.async_wait_connected()
+
+    async def async_run_cycle(
+        self, cycle: int, session: aiohttp.ClientSession, compressed_seconds: float
+    ) -> None:
+        """Churn the connection, stream live and push compressed audio."""
+        await self.async_churn_connection(cycle)
+        coordinator = self.coordinator
+
+        await coordinator.async_send_command(CMD_START_LISTEN)
+        coordinator.set_streaming_mode(STREAM_MODE_LISTEN)
+        subscribers = [
+            asyncio.ensure_future(self._subscribe(session, LIVE_SECONDS * (n + 1) / SUBSCRIBERS))
+            for n in range(SUBSCRIBERS)
+        ]
+        await asyncio.sleep(LIVE_SECONDS)
+        await self._push_audio(compressed_seconds)
+        await asyncio.gather(*subscribers)
+        await coordinator.async_send_command(CMD_STOP_LISTEN)
+        coordinator.set_streaming_mode(STREAM_MODE_IDLE)
+
+    async def _subscribe(self, session: aiohttp.ClientSession, seconds: float) -> None:
+        """Listen to the HTTP audio stream for a while, then hang up."""
+        deadline = time.monotonic() + seconds
+        async with session.get(self.stream_url) as response:
+            while time.monotonic() < deadline:
+                if not await response.content.read(4096):
+                    break
+
+    async def _push_audio(self, seconds: float) -> None:
+        """Feed door audio through the client as fast as it is handled."""
+        audio_format = self.client.audio_format
+        wire = mic_audio(audio_format)
+        size = audio_format.wire_frame_bytes
+        frames = int(seconds / audio_format.frame_seconds)
+        for index in range(frames):
+            offset = (index * size) % (len(wire) - size)
+            await self.client._handle_message(wire[offset:offset + size])
+            if index % 50 == 0:
+                await asyncio.sleep(0)
+
+    async def async_stop(self) -> None:
+        """Tear everything down, as unloading the entry does."""
+        await self.client.disconnect()
+        await self.coordinator.async_stop()
+        await self._runner.cleanup()
+        await self.device.async_stop()
+
+
+def sample(hours: float, devices: list[SoakDevice]) -> Sample:
+    """Measure resource usage now, without garbage waiting to be collected."""
+    gc.collect()
+    return Sample(
+        hours=hours,
+        rss_mib=rss_mib(),
+        traced_kib=tracemalloc.get_traced_memory()[0] / 1024,
+        tasks=len(asyncio.all_tasks()),
+        callbacks=sum(len(d.coordinator._audio_callbacks) for d in devices),
+    )
+
+
+def task_kinds() -> Counter:
+    """Count live tasks by the coroutine they run."""
+    return Counter(
+        getattr(task.get_coro(), "__qualname__", type(task.get_coro()).__name__)
+        for task in asyncio.all_tasks()
+    )
+
+
+def report(
+    samples: list[Sample],
+    warmup: int,
+    snapshots: tuple[tracemalloc.Snapshot, tracemalloc.Snapshot],
+    tasks: tuple[Counter, Counter],
+) -> bool:
+    """Print the leak report and return True if every bound held."""
+    start = samples[warmup:warmup + 5]
+    end = samples[-5:]
+    hours = samples[-1].hours - samples[warmup].hours or 1.0
+    limits = {
+        "rss_mib": MAX_RSS_GROWTH_MIB,
+        "traced_kib": MAX_TRACED_GROWTH_KIB,
+        "tasks": MAX_TASK_GROWTH,
+        "callbacks": MAX_CALLBACK_GROWTH,
+    }
+    ok = True
+    print(f"\n{'metric':<11} {'start':>10} {'end':>10} {'growth':>10} {'per hour':>10} {'limit':>8}")
+    for name, limit in limits.items():
+        # Lowest values, so a transient task or buffer is not a leak
+        before = min(getattr(s, name) for s in start)
+        after = min(getattr(s, name) for s in end)
+        growth = after - before
+        passed = growth <= limit
+        ok &= passed
+        print(
+            f"{name:<11} {before:>10.1f} {after:>10.1f} {growth:>+10.1f}"
+            f" {growth / hours:>+10.2f} {limit:>8g}  {'ok' if passed else 'LEAK'}"
+        )
+
+    print("\nlargest allocation growth since warm-up:")
+    own = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+    before, after = (snapshot.filter_traces(own) for snapshot in snapshots)
+    for stat in after.compare_to(before, "lineno")[:10]:
+        if stat.size_diff > 0:
+            print(f"  {stat.size_diff / 1024:>+9.1f} KiB {stat.count_diff:>+7} blocks  {stat.traceback}")
+
+    grown = tasks[1] - tasks[0]
+    print("\ntasks alive at the end and not after warm-up:")
+    for kind, count in grown.most_common(10):
+        print(f"  {count:>5}  {kind}")
+    if not grown:
+        print("  none")
+    return ok
+
+
+async def main() -> None:
+    """Run the soak test."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--devices", type=int, default=2)
+    parser.add_argument("--cycle-minutes", type=float, default=5)
+    args = parser.parse_args()
+
+    # Compress the client's timers along with the simulated time
+    websocket_client.RECONNECT_DELAY /= TIME_COMPRESSION
+    websocket_client.LINK_PROBE_INTERVAL /= TIME_COMPRESSION
+
+    tracemalloc.start()
+    hass = HomeAssistant(tempfile.mkdtemp())
+    devices = [SoakDevice(hass, index) for index in range(args.devices)]
+    for device in devices:
+        await device.async_start()
+
+    cycles = max(10, round(args.hours * 60 / args.cycle_minutes))
+    warmup = max(2, int(cycles * WARMUP_SHARE))
+    compressed_seconds = args.cycle_minutes * 60 * STREAM_SHARE
+    print(
+        f"{args.devices} devices, {cycles} cycles of {args.cycle_minutes:g} simulated minutes"
+        f" ({compressed_seconds:g}s of audio each)"
+    )
+
+    samples: list[Sample] = []
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        for cycle in range(cycles):
+            await asyncio.gather(
+                *(device.async_run_cycle(cycle, session, compressed_seconds) for device in devices)
+            )
+            await asyncio.sleep(SETTLE_SECONDS)
+            samples.append(sample((cycle + 1) * args.cycle_minutes / 60, devices))
+            if cycle + 1 == warmup:
+                warm_snapshot = tracemalloc.take_snapshot()
+                warm_tasks = task_kinds()
+            if (cycle + 1) % max(1, cycles // 10) == 0:
+                last = samples[-1]
+                print(
+                    f"  {last.hours:6.1f}h  rss {last.rss_mib:7.1f} MiB  traced {last.traced_kib:8.0f} KiB"
+                    f"  tasks {last.tasks:4}  callbacks {last.callbacks:3}"
+                    f"  ({time.perf_counter() - start:.0f}s)"
+                )
+    end_snapshot = tracemalloc.take_snapshot()
+    end_tasks = task_kinds()
+
+    ok = report(samples, warmup, (warm_snapshot, end_snapshot), (warm_tasks, end_tasks))
+    print(f"\n{samples[-1].hours:g} simulated hours in {time.perf_counter() - start:.0f}s")
+
+    for device in devices:
+        await device.async_stop()
+    print("no leaks found" if ok else "LEAKS FOUND")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,499 @@
+"""Benchmark suite for the audio hot paths, with JSON baselines.
+
+Microbenchmarks time single calls (WAV headers, the coordinator's
+inbound audio path, AudioStreamManager, 8-bit conversion, the mixer);
+scenarios run the websocket client against a local stand-in device:
+the receive loop flat out, send_audio, paced TextToSpeechSender output
+and real-time streams from many devices to a live-stream consumer.
+
+Every benchmark reports some of: frames/s, p50/p99 latency, allocation
+peak and retained memory (tracemalloc) and event-loop lag. Results can
+be saved as a JSON baseline and later runs compared against it; a
+metric that got worse by more than the threshold is a regression and
+makes the run exit with status 1.
+
+Run from the repository root:
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json [--threshold 0.15] [--only NAME ...]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from dataclasses import dataclass, field
+import json
+import platform
+import struct
+import sys
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable
+
+import numpy as np
+import websockets
+
+from custom_components.smart_intercom import SmartIntercomCoordinator
+from custom_components.smart_intercom.audio_format import DEFAULT_FORMAT, FORMAT_PRESETS
+from custom_components.smart_intercom.audio_stream import (
+    AudioRingBuffer,
+    AudioStreamManager,
+    TextToSpeechSender,
+    pcm_to_wav,
+    pcm_to_wav_header,
+)
+from custom_components.smart_intercom.const import (
+    AUDIO_BUFFER_SECONDS,
+    AUDIO_SEND_LEAD,
+    CMD_START_LISTEN,
+    MIXER_PRIORITY_ANNOUNCEMENT,
+)
+from custom_components.smart_intercom.metrics import IntercomMetrics
+from custom_components.smart_intercom.mixer import AudioMixer
+from custom_components.smart_intercom.websocket_client import SmartIntercomClient
+
+from .simulator import mic_audio
+
+SECRET = "bench"
+DEFAULT_THRESHOLD = 0.15
+LAG_INTERVAL = 0.005  # seconds between event-loop lag samples
+
+MICRO_REPEATS = 3  # microbenchmarks keep the best of several runs, like timeit
+
+# Metrics where a larger value is better; for all others smaller is better
+HIGHER_IS_BETTER = {"frames_per_s"}
+# Absolute changes below these (by unit suffix) are noise, not regressions
+NOISE_FLOOR = {"_us": 1.0, "_ms": 0.5, "_kib": 1.0}
+
+
+@dataclass
+class Benchmark:
+    """A registered benchmark."""
+
+    name: str
+    run: Callable[[], Awaitable[dict[str, float]]]
+    description: str = ""
+
+
+BENCHMARKS: dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, description: str = ""):
+    """Register a coroutine function as a benchmark."""
+
+    def register(run):
+        BENCHMARKS[name] = Benchmark(name, run, description)
+        return run
+
+    return register
+
+
+@dataclass
+class LoopLagMonitor:
+    """Sample how late the event loop wakes up a sleeping task."""
+
+    lags: list[float] = field(default_factory=list)
+    _task: asyncio.Task | None = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(LAG_INTERVAL)
+            self.lags.append(loop.time() - start - LAG_INTERVAL)
+
+    async def __aenter__(self) -> LoopLagMonitor:
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._task.cancel()
+
+    def metrics(self) -> dict[str, float]:
+        lags = np.array(self.lags or [0.0]) * 1000
+        return {"loop_lag_p99_ms": float(np.percentile(lags, 99)), "loop_lag_max_ms": float(lags.max())}
+
+
+def latency_metrics(seconds: list[float] | np.ndarray, unit: str = "us") -> dict[str, float]:
+    """Return p50/p99 of durations in seconds."""
+    scale = 1e6 if unit == "us" else 1e3
+    values = np.asarray(seconds) * scale
+    return {
+        f"p50_{unit}": float(np.percentile(values, 50)),
+        f"p99_{unit}": float(np.percentile(values, 99)),
+    }
+
+
+def allocation_metrics(call: Callable[[], Any], iterations: int) -> dict[str, float]:
+    """Run call under tracemalloc; return peak and retained KiB."""
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for _ in range(iterations):
+        call()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"alloc_peak_kib": (peak - before) / 1024, "alloc_retained_kib": (after - before) / 1024}
+
+
+def micro(call: Callable[[], Any], iterations: int, frames_per_call: int = 1) -> dict[str, float]:
+    """Time call one invocation at a time, then measure its allocations."""
+    for _ in range(min(iterations, 100)):
+        call()  # warm up
+    runs = []
+    timings = np.empty(iterations)
+    clock = time.perf_counter
+    for _ in range(MICRO_REPEATS):
+        start = clock()
+        for index in range(iterations):
+            began = clock()
+            call()
+            timings[index] = clock() - began
+        elapsed = clock() - start
+        runs.append({"frames_per_s": iterations * frames_per_call / elapsed, **latency_metrics(timings)})
+    best = {
+        metric: (max if metric in HIGHER_IS_BETTER else min)(run[metric] for run in runs)
+        for metric in runs[0]
+    }
+    return {**best, **allocation_metrics(call, iterations)}
+
+
+class _AudioPath:
+    """The coordinator state on_audio() touches, without Home Assistant."""
+
+    on_audio = SmartIntercomCoordinator.on_audio
+
+    def __init__(self) -> None:
+        self.audio_buffer = AudioRingBuffer(DEFAULT_FORMAT.seconds_to_bytes(AUDIO_BUFFER_SECONDS))
+        self._audio_callbacks: list = []
+        self.metrics = IntercomMetrics()
+
+
+def _audio(seconds: float) -> bytes:
+    """Return default-format door audio."""
+    return mic_audio(DEFAULT_FORMAT)[: DEFAULT_FORMAT.seconds_to_bytes(seconds)]
+
+
+def _frame() -> bytes:
+    """Return one default-format frame of door audio."""
+    return _audio(1)[DEFAULT_FORMAT.frame_bytes : 2 * DEFAULT_FORMAT.frame_bytes]
+
+
+@benchmark("wav_header", "pcm_to_wav_header() for a live stream")
+async def bench_wav_header() -> dict[str, float]:
+    return micro(pcm_to_wav_header, 20000)
+
+
+@benchmark("wav_encode_1s", "pcm_to_wav() of one second of audio")
+async def bench_wav_encode() -> dict[str, float]:
+    pcm = _audio(1)
+    return micro(lambda: pcm_to_wav(pcm), 2000)
+
+
+@benchmark("coordinator_on_audio", "inbound frame into the ring buffer and 3 subscribers")
+async def bench_on_audio() -> dict[str, float]:
+    path = _AudioPath()
+    managers = [AudioStreamManager(path) for _ in range(3)]
+    for manager in managers:
+        manager.start_streaming()
+        path._audio_callbacks.append(manager.on_audio_data)
+    frame = _frame()
+    return micro(lambda: path.on_audio(frame), 50000)
+
+
+@benchmark("stream_manager", "AudioStreamManager queue in and out")
+async def bench_stream_manager() -> dict[str, float]:
+    manager = AudioStreamManager(_AudioPath())
+    manager.start_streaming()
+    frame = _frame()
+    queue = manager._audio_queue
+
+    def call() -> None:
+        manager.on_audio_data(frame)
+        queue.get_nowait()
+
+    return micro(call, 50000)
+
+
+@benchmark("format_8bit", "8-bit wire encode and decode of one frame")
+async def bench_format_8bit() -> dict[str, float]:
+    audio_format = FORMAT_PRESETS["narrowband_8bit"]
+    frame = _frame()[: audio_format.frame_bytes]
+    return micro(lambda: audio_format.decode(audio_format.encode(frame)), 20000)
+
+
+@benchmark("mixer_4_sources", "one mixed frame from four sources")
+async def bench_mixer() -> dict[str, float]:
+    class Coordinator:
+        audio_format = DEFAULT_FORMAT
+
+        class client:
+            connected = True
+
+    mixer = AudioMixer(None, Coordinator())
+    sources = [mixer.open_source(MIXER_PRIORITY_ANNOUNCEMENT) for _ in range(4)]
+    frame = _frame()
+
+    def call() -> None:
+        for source in sources:
+            source._buffer += frame
+        mixer.mix()
+
+    return micro(call, 10000)
+
+
+class StandInDevice:
+    """Websocket stand-in: auth, timestamped audio on request, counts audio."""
+
+    def __init__(self, frames: int, paced: bool) -> None:
+        self.frames = frames
+        self.paced = paced
+        self.received = 0
+
+    async def handler(self, ws) -> None:
+        await ws.send(json.dumps({"type": "auth_required"}))
+        async for message in ws:
+            if isinstance(message, bytes):
+                self.received += 1
+                continue
+            cmd = json.loads(message).get("cmd")
+            if cmd == "auth":
+                await ws.send(json.dumps({"type": "auth_success"}))
+            elif cmd == CMD_START_LISTEN:
+                asyncio.ensure_future(self._stream(ws))
+
+    async def _stream(self, ws) -> None:
+        """Send frames whose first 8 bytes are the send time."""
+        padding = bytes(DEFAULT_FORMAT.frame_bytes - 8)
+        start = time.perf_counter()
+        for index in range(self.frames):
+            await ws.send(struct.pack("<d", time.perf_counter()) + padding)
+            if self.paced:
+                due = start + (index + 1) * DEFAULT_FORMAT.frame_seconds
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+
+
+async def _connect(devices: list[StandInDevice], on_audio=None):
+    """Serve stand-ins and connect a client to each."""
+    servers = [await websockets.serve(device.handler, "127.0.0.1", 0) for device in devices]
+    clients = []
+    for index, server in enumerate(servers):
+        client = SmartIntercomClient(
+            "127.0.0.1",
+            server.sockets[0].getsockname()[1],
+            SECRET,
+            on_audio=on_audio(index) if on_audio else None,
+        )
+        await client.connect()
+        clients.append(client)
+    while not all(client.connected for client in clients):
+        await asyncio.sleep(0.01)
+    return servers, clients
+
+
+async def _close(servers, clients) -> None:
+    for client in clients:
+        await client.disconnect()
+    for server in servers:
+        server.close()
+        await server.wait_closed()
+
+
+@benchmark("listen_loop", "client receive loop flat out, into on_audio()")
+async def bench_listen_loop() -> dict[str, float]:
+    # Flat out, latency would only measure the sender's backlog
+    frames = 20000
+    device = StandInDevice(frames, paced=False)
+    path = _AudioPath()
+    received = 0
+    done = asyncio.Event()
+
+    def on_audio(_index):
+        def callback(data: bytes) -> None:
+            nonlocal received
+            path.on_audio(data)
+            received += 1
+            if received == frames:
+                done.set()
+
+        return callback
+
+    servers, clients = await _connect([device], on_audio)
+    tracemalloc.start()
+    async with LoopLagMonitor() as lag:
+        start = time.perf_counter()
+        await clients[0].send_command(CMD_START_LISTEN)
+        await done.wait()
+        elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await _close(servers, clients)
+    return {
+        "frames_per_s": frames / elapsed,
+        "alloc_peak_kib": peak / 1024,
+        **lag.metrics(),
+    }
+
+
+@benchmark("send_audio", "client send_audio() of 10 s chunks")
+async def bench_send_audio() -> dict[str, float]:
+    device = StandInDevice(0, paced=False)
+    servers, clients = await _connect([device])
+    chunk = _audio(10)
+    per_chunk = len(chunk) // DEFAULT_FORMAT.frame_bytes
+    timings = []
+    async with LoopLagMonitor() as lag:
+        start = time.perf_counter()
+        for _ in range(20):
+            began = time.perf_counter()
+            await clients[0].send_audio(chunk)
+            timings.append(time.perf_counter() - began)
+        while device.received < 20 * per_chunk:
+            await asyncio.sleep(0.001)
+        elapsed = time.perf_counter() - start
+    await _close(servers, clients)
+    return {
+        "frames_per_s": 20 * per_chunk / elapsed,
+        **latency_metrics(timings, "ms"),
+        **lag.metrics(),
+    }
+
+
+@benchmark("tts_pacing", "TextToSpeechSender pacing error over 2 s")
+async def bench_tts_pacing() -> dict[str, float]:
+    class Sink:
+        audio_format = DEFAULT_FORMAT
+
+        def __init__(self) -> None:
+            self.times: list[float] = []
+
+        async def async_send_audio(self, data: bytes) -> bool:
+            self.times.append(asyncio.get_running_loop().time())
+            return True
+
+    sink = Sink()
+    async with LoopLagMonitor() as lag:
+        await TextToSpeechSender(sink).send_tts_audio(_audio(2))
+    # Past the lead, frame n is due n frames after the first one minus the lead
+    times = np.array(sink.times)
+    due = times[0] + np.arange(times.size) * DEFAULT_FORMAT.frame_seconds - AUDIO_SEND_LEAD
+    paced = due > times[0]
+    return {**latency_metrics(times[paced] - due[paced], "ms"), **lag.metrics()}
+
+
+@benchmark("e2e_live_streams", "20 real-time device streams to live-stream consumers")
+async def bench_e2e() -> dict[str, float]:
+    streams, seconds = 20, 3
+    frames = int(seconds / DEFAULT_FORMAT.frame_seconds)
+    devices = [StandInDevice(frames, paced=True) for _ in range(streams)]
+    paths = [_AudioPath() for _ in devices]
+    managers = [AudioStreamManager(path) for path in paths]
+    for path, manager in zip(paths, managers):
+        manager.start_streaming()
+        path._audio_callbacks.append(manager.on_audio_data)
+    latencies: list[float] = []
+
+    async def consume(manager: AudioStreamManager) -> None:
+        while (chunk := await manager.get_audio_chunk(timeout=1.0)) is not None:
+            latencies.append(time.perf_counter() - struct.unpack_from("<d", chunk)[0])
+
+    servers, clients = await _connect(devices, lambda index: paths[index].on_audio)
+    consumers = [asyncio.create_task(consume(manager)) for manager in managers]
+    cpu = time.process_time()
+    async with LoopLagMonitor() as lag:
+        start = time.perf_counter()
+        for client in clients:
+            await client.send_command(CMD_START_LISTEN)
+        await asyncio.gather(*consumers)
+        elapsed = time.perf_counter() - start - 1.0  # the consumers' idle timeout
+    cpu = time.process_time() - cpu
+    await _close(servers, clients)
+    return {
+        "frames_per_s": len(latencies) / elapsed,
+        **latency_metrics(latencies, "ms"),
+        "cpu_per_stream": cpu / elapsed / streams,
+        **lag.metrics(),
+    }
+
+
+def compare(
+    results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], threshold: float
+) -> list[str]:
+    """Print each metric against the baseline; return the regressions."""
+    regressions = []
+    print(f"\n{'benchmark':<22} {'metric':<20} {'baseline':>12} {'now':>12} {'change':>8}")
+    for name, metrics in results.items():
+        for metric, value in metrics.items():
+            if (old := baseline.get(name, {}).get(metric)) is None:
+                continue
+            change = (value - old) / old if old else 0.0
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = ""
+            floor = next(
+                (floor for suffix, floor in NOISE_FLOOR.items() if metric.endswith(suffix)), 0.0
+            )
+            if worse > threshold and abs(value - old) > floor:
+                flag = "  REGRESSION"
+                regressions.append(f"{name}.{metric}")
+            print(f"{name:<22} {metric:<20} {old:>12.4g} {value:>12.4g} {change:>+8.1%}{flag}")
+    return regressions
+
+
+async def run(names: list[str]) -> dict[str, dict[str, float]]:
+    """Run benchmarks and print their metrics."""
+    results = {}
+    for name in names:
+        metrics = await BENCHMARKS[name].run()
+        results[name] = metrics
+        print(f"{name:<22} " + "  ".join(f"{key}={value:.4g}" for key, value in metrics.items()))
+    return results
+
+
+def main() -> None:
+    """Run the suite."""
+    parser = argparse.ArgumentParser(description="SmartIntercom benchmark suite")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run")
+    parser.add_argument("--save", metavar="PATH", help="write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="compare with a JSON baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="relative change counted as a regression (default %(default)s)",
+    )
+    parser.add_argument("--list", action="store_true", help="list the benchmarks")
+    args = parser.parse_args()
+
+    if args.list:
+        for item in BENCHMARKS.values():
+            print(f"{item.name:<22} {item.description}")
+        return
+
+    results = asyncio.run(run(args.only or list(BENCHMARKS)))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "meta": {
+                        "python": sys.version.split()[0],
+                        "machine": platform.machine(),
+                        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    },
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+        print(f"\nSaved baseline to {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+        if regressions := compare(results, baseline, args.threshold):
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.threshold:.0%}")
+
+
+if __name__ == "__main__":
+    main()
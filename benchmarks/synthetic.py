@@ -0,0 +1,66 @@
+"""Synthetic door audio for benchmarks."""
+from __future__ import annotations
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+def _noise(rng: np.random.Generator, seconds: float, level: float = 0.003) -> np.ndarray:
+    """Return background noise."""
+    return level * rng.standard_normal(int(SAMPLE_RATE * seconds))
+
+
+def _chime(seconds: float = 0.6) -> np.ndarray:
+    """Return a two-tone doorbell chime."""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return 0.3 * np.sin(2 * np.pi * 880 * t) + 0.2 * np.sin(2 * np.pi * 1320 * t)
+
+
+def _knock(rng: np.random.Generator) -> np.ndarray:
+    """Return a short low-passed noise burst."""
+    burst = rng.standard_normal(int(SAMPLE_RATE * 0.03))
+    for _ in range(6):
+        burst = np.convolve(burst, np.ones(4) / 4, "same")
+    return 2.0 * burst * np.exp(-np.arange(burst.size) / SAMPLE_RATE * 100)
+
+
+def _glass(rng: np.random.Generator) -> np.ndarray:
+    """Return a decaying high-passed noise burst."""
+    burst = np.diff(np.diff(rng.standard_normal(int(SAMPLE_RATE * 0.2)), prepend=0), prepend=0)
+    return 0.3 * burst * np.exp(-np.arange(burst.size) / SAMPLE_RATE * 10)
+
+
+def door_scene(seed: int = 0, repeats: int = 1) -> tuple[bytes, list[tuple[float, str]]]:
+    """Return 16-bit PCM with chimes, knocks and glass breaks, plus labels."""
+    rng = np.random.default_rng(seed)
+    parts: list[np.ndarray] = []
+    labels: list[tuple[float, str]] = []
+    position = 0
+
+    def add(signal: np.ndarray, label: str | None = None) -> None:
+        nonlocal position
+        if label is not None:
+            labels.append((position / SAMPLE_RATE, label))
+        parts.append(signal + _noise(rng, signal.size / SAMPLE_RATE))
+        position += signal.size
+
+    for _ in range(repeats):
+        add(np.zeros(SAMPLE_RATE))
+        add(_chime(), "doorbell_tone")
+        add(np.zeros(SAMPLE_RATE))
+        add(_knock(rng), "knock")
+        add(np.zeros(SAMPLE_RATE // 4))
+        add(_knock(rng), "knock")
+        add(np.zeros(SAMPLE_RATE))
+        add(_glass(rng), "glass_break")
+        add(np.zeros(SAMPLE_RATE * 3))
+
+    signal = np.clip(np.concatenate(parts), -1.0, 1.0)
+    return (signal * 32767).astype("<i2").tobytes(), labels
+
+
+def tone(frequency: float, seconds: float, level: float = 0.3) -> bytes:
+    """Return a 16-bit PCM sine tone."""
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    return (level * 32767 * np.sin(2 * np.pi * frequency * t)).astype("<i2").tobytes()
@@ -1,33 +1,179 @@
 """SmartIntercom integration for Home Assistant."""
 from __future__ import annotations
 
+import asyncio
+import importlib
 import logging
-from typing import Any
+import os
+import sys
+import time
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import CONF_HOST, CONF_PORT, Platform
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import Platform
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.service import async_extract_config_entry_ids
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
+from .audio_format import AudioFormat, preferred_formats
+from .audio_stream import AudioRingBuffer
+from .display import (
+    DisplayState,
+    display_changes,
+    display_commands,
+    display_from_service,
+)
+from .icons import IconCatalogue
+from .metrics import IntercomMetrics
+from .mixer import AudioMixer
 from .const import (
+    AUDIO_BUFFER_SECONDS,
+    AUDIO_STREAM_QUEUE_FRAMES,
+    CMD_BLIT,
+    CMD_DOORBELL,
     CMD_GET_ICONS,
-    CONF_ENABLE_AUDIO,
-    CONF_SECRET_KEY,
-    CONF_USE_SSL,
-    CMD_CLEAR_FIELD,
-    CMD_SET_FIELD,
+    CMD_UPDATE_DISPLAY,
+    DISPLAY_MARQUEE_FIELDS,
+    DISPLAY_MARQUEE_INTERVAL,
     DOMAIN,
+    FEATURE_FRAMEBUFFER,
+    FEATURE_UPDATE_DISPLAY,
+    GAIN_COMMANDS,
+    ICONS_SAVE_DELAY,
+    ICONS_STORAGE_KEY,
+    ICONS_STORAGE_VERSION,
+    MANUFACTURER,
+    METRICS_TIMING_EVERY,
+    MODEL,
+    MSG_AUDIO_FORMAT,
     MSG_ICON_LIST,
     PLATFORMS,
+    PROFILE_DURATION,
+    PROFILE_INTERVAL_MS,
+    PROFILE_MAX_DURATION,
+    PROFILE_MAX_INTERVAL_MS,
+    PROFILE_MIN_INTERVAL_MS,
+    RESULT_FAILED,
+    RESULT_OK,
+    RESULT_QUEUED,
+    RESULT_TIMEOUT,
+    SERVICE_DEVICE_TIMEOUT,
+    STATE_SAVE_DELAY,
+    STATE_STORAGE_KEY,
+    STATE_STORAGE_VERSION,
     STREAM_MODE_FULL_DUPLEX,
     STREAM_MODE_IDLE,
     STREAM_MODE_LISTEN,
     STREAM_MODE_SPEAK,
+    TRIGGER_DOORBELL,
 )
+from .options import IntercomOptions, connection_settings
 from .websocket_client import SmartIntercomClient
 
+# Optional features: imported by _async_import when first used
+if TYPE_CHECKING:
+    from .oled import DisplayRenderer
+    from .player import AudioPlayer
+    from .recorder import AudioRecorder
+    from .sound_events import SoundEventManager
+
 _LOGGER = logging.getLogger(__name__)
 
+# Linear gain of clips and bridged audio, as the service selectors allow
+AUDIO_GAIN = vol.All(vol.Coerce(float), vol.Range(min=0.1, max=4.0))
+START_BRIDGE_SCHEMA = vol.Schema(
+    {
+        vol.Required("source"): cv.string,
+        vol.Required("targets"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("bidirectional", default=False): cv.boolean,
+        vol.Optional("gain", default=1.0): AUDIO_GAIN,
+    }
+)
+# Bridge and trace services: one intercom (an entry ID) or all of them
+DEVICE_SERVICE_SCHEMA = vol.Schema({vol.Optional("device"): cv.string})
+START_PROFILING_SCHEMA = vol.Schema(
+    {
+        vol.Optional("duration", default=PROFILE_DURATION): vol.All(
+            vol.Coerce(float), vol.Range(min=1, max=PROFILE_MAX_DURATION)
+        ),
+        vol.Optional("interval", default=PROFILE_INTERVAL_MS): vol.All(
+            vol.Coerce(float), vol.Range(min=PROFILE_MIN_INTERVAL_MS, max=PROFILE_MAX_INTERVAL_MS)
+        ),
+    }
+)
+STOP_PROFILING_SCHEMA = vol.Schema({})
+
+# Every key that makes a call targeted: entity, device, area, and on
+# newer Home Assistant floor and label
+TARGET_FIELDS = frozenset(str(key) for key in cv.ENTITY_SERVICE_FIELDS)
+# Display and audio services: a target, or the device field (an entry
+# ID), or neither
+TARGET_SERVICE_FIELDS = {
+    **cv.ENTITY_SERVICE_FIELDS,
+    vol.Optional("device"): cv.string,
+}
+MARQUEE_INDEX = vol.All(vol.Coerce(int), vol.Range(min=0, max=DISPLAY_MARQUEE_FIELDS - 1))
+SET_MARQUEE_FIELD_SCHEMA = vol.Schema(
+    {
+        **TARGET_SERVICE_FIELDS,
+        vol.Optional("index", default=0): MARQUEE_INDEX,
+        vol.Optional("icon", default=""): cv.string,
+        vol.Optional("text", default=""): cv.string,
+    }
+)
+CLEAR_MARQUEE_FIELD_SCHEMA = vol.Schema(
+    {
+        **TARGET_SERVICE_FIELDS,
+        vol.Optional("index", default=0): MARQUEE_INDEX,
+    }
+)
+PLAY_AUDIO_SCHEMA = vol.Schema(
+    {
+        **TARGET_SERVICE_FIELDS,
+        vol.Required("source"): cv.string,
+        vol.Optional("gain", default=1.0): AUDIO_GAIN,
+        vol.Optional("normalize", default=False): cv.boolean,
+    }
+)
+UPDATE_DISPLAY_SCHEMA = vol.Schema(
+    {
+        **TARGET_SERVICE_FIELDS,
+        vol.Optional("line1"): cv.string,
+        vol.Optional("line2"): cv.string,
+        vol.Optional("external_text"): cv.string,
+        vol.Optional("fields"): vol.All(
+            cv.ensure_list,
+            vol.Length(max=DISPLAY_MARQUEE_FIELDS),
+            [
+                vol.Any(
+                    None,
+                    {vol.Optional("icon"): cv.string, vol.Optional("text"): cv.string},
+                )
+            ],
+        ),
+    }
+)
+
+
+async def _async_import(hass: HomeAssistant, name: str) -> ModuleType:
+    """Return a submodule, imported in the executor the first time."""
+    module = f"{__name__}.{name}"
+    if module in sys.modules:
+        return sys.modules[module]
+    return await hass.async_add_executor_job(importlib.import_module, module)
+
 
 class SmartIntercomCoordinator(DataUpdateCoordinator):
     """Coordinator for SmartIntercom data."""
@@ -47,6 +193,8 @@ class SmartIntercomCoordinator(DataUpdateCoordinator):
         )
         self.client = client
         self.enable_audio = enable_audio
+        # Shared by every entity of the entry; set up with the entry
+        self.device_info: DeviceInfo | None = None
         
         # State data
         self.data = {
@@ -54,20 +202,55 @@ class SmartIntercomCoordinator(DataUpdateCoordinator):
             "streaming_mode": STREAM_MODE_IDLE,
             "mic_gain": 1.0,
             "speaker_gain": 1.0,
-            "display_line1": "",
-            "display_line2": "",
-            "external_text": "",
-            "icon_list": [],  # Available icons from ESP32
-            "marquee_fields": [  # 3 marquee field states
-                {"icon": "", "text": ""},
-                {"icon": "", "text": ""},
-                {"icon": "", "text": ""},
-            ],
+            "audio_format": client.audio_format.as_dict(),
         }
         
-        # Audio buffer for media player
-        self._audio_buffer: bytes = b""
+        # Most recent inbound audio (pre-roll for recordings)
+        self.buffer_seconds = AUDIO_BUFFER_SECONDS
+        self.audio_buffer = AudioRingBuffer(
+            client.audio_format.seconds_to_bytes(self.buffer_seconds)
+        )
+        # Frames a live audio stream may fall behind before dropping
+        self.stream_queue_frames = AUDIO_STREAM_QUEUE_FRAMES
+        self._pcm_format = client.audio_format
         self._audio_callbacks: list = []
+        self._sync_task: asyncio.Task | None = None
+
+        # OLED display: desired state, and the last one sent successfully
+        self.display = DisplayState()
+        self._display_sent: DisplayState | None = None
+        self._display_lock = asyncio.Lock()
+        self._gains_sent: dict[str, float] = {}
+        # Draws the display for firmware that blits it (render_display option)
+        self.renderer: DisplayRenderer | None = None
+        self._marquee_task: asyncio.Task | None = None
+
+        # Desired display and gains, persisted when state_store is set and
+        # replayed on every connection once known
+        self.state_store: Store | None = None
+        self._state_known = False
+
+        # Icons available on the device, persisted when icon_store is set
+        self.icons = IconCatalogue()
+        self.icon_store: Store | None = None
+
+        # Everything sent to the speaker goes through the mixer
+        self.mixer = AudioMixer(hass, self)
+
+        # Optional audio consumers (set up when audio is enabled)
+        self.sound_events: SoundEventManager | None = None
+        self.recorder: AudioRecorder | None = None
+        self.player: AudioPlayer | None = None
+
+    @property
+    def audio_format(self) -> AudioFormat:
+        """Return the audio format of the current connection."""
+        return self.client.audio_format
+
+    @property
+    def metrics(self) -> IntercomMetrics:
+        """Return the performance metrics of the device connection."""
+        return self.client.metrics
 
     def on_message(self, data: dict) -> None:
         """Handle incoming JSON messages from device."""
@@ -77,37 +260,151 @@ class SmartIntercomCoordinator(DataUpdateCoordinator):
         
         # Handle icon list response
         if msg_type == MSG_ICON_LIST:
-            icons = data.get("icons", [])
-            self.data["icon_list"] = icons
-            _LOGGER.info("Received %d icons from device", len(icons))
+            self._update_icons(data)
+        elif msg_type == MSG_AUDIO_FORMAT:
+            self._apply_audio_format(reset=False)
         
         self.async_set_updated_data(self.data)
 
     def on_audio(self, audio_data: bytes) -> None:
         """Handle incoming audio data."""
-        self._audio_buffer += audio_data
-        # Notify audio subscribers
+        self.audio_buffer.write(audio_data)
+        # Notify audio subscribers, timing them on a sample of frames
+        metrics = self.metrics
+        if metrics.frames_in % METRICS_TIMING_EVERY:
+            for callback in self._audio_callbacks:
+                callback(audio_data)
+            return
+        start = time.perf_counter()
         for callback in self._audio_callbacks:
             callback(audio_data)
+        metrics.callback_time.observe(time.perf_counter() - start)
+
+    def _apply_audio_format(self, reset: bool = True) -> None:
+        """Resize buffers and converters for a newly agreed audio format.
+
+        Unless reset, a change of framing or wire width alone (as made by
+        link tuning) leaves the buffers and analysis running.
+        """
+        audio_format = self.audio_format
+        previous = self._pcm_format
+        self.data["audio_format"] = audio_format.as_dict()
+        self._pcm_format = audio_format
+        if not reset and audio_format.same_pcm(previous):
+            return
+        self.audio_buffer = AudioRingBuffer(
+            audio_format.seconds_to_bytes(self.buffer_seconds)
+        )
+        if self.sound_events is not None:
+            self.sound_events.set_format(audio_format)
+        if self.recorder is not None:
+            self.recorder.set_format(audio_format)
+
+    async def async_apply_options(self, entry_id: str, options: IntercomOptions) -> None:
+        """Apply the options to the running client and audio consumers.
+
+        Only what changed is touched, and the connection is kept: a new
+        audio format or frame duration is negotiated on it.
+        """
+        client = self.client
+        client.reconnect_delay = options.reconnect_delay
+        client.reconnect_max_delay = options.reconnect_max_delay
+        await client.async_set_audio_formats(
+            preferred_formats(options.audio_format, options.frame_ms), options.link_tuning
+        )
+        self.stream_queue_frames = options.stream_queue_frames
+        if options.buffer_seconds != self.buffer_seconds:
+            self.buffer_seconds = options.buffer_seconds
+            # Keep the most recent audio, so a capture starting now has pre-roll
+            previous = self.audio_buffer
+            self.audio_buffer = AudioRingBuffer(
+                self._pcm_format.seconds_to_bytes(self.buffer_seconds)
+            )
+            self.audio_buffer.write(previous.read())
+        await self._async_set_audio_consumers(entry_id, options)
+        if options.render_display != (self.renderer is not None):
+            await self._async_set_renderer(options.render_display)
+        self.async_update_listeners()
+
+    async def _async_set_audio_consumers(
+        self, entry_id: str, options: IntercomOptions
+    ) -> None:
+        """Start or stop playback, sound detection and recording."""
+        hass = self.hass
+        self.enable_audio = options.enable_audio
+        if options.enable_audio and self.player is None:
+            player = await _async_import(hass, "player")
+            self.player = player.AudioPlayer(hass, self)
+        elif not options.enable_audio and self.player is not None:
+            await self.player.async_stop()
+            self.player = None
+
+        # Detect knocks, chimes and glass breaks in the incoming audio
+        detect = options.enable_audio and options.sound_detection
+        if detect and self.sound_events is None:
+            sound_events = await _async_import(hass, "sound_events")
+            self.sound_events = sound_events.SoundEventManager(hass, entry_id)
+            self.sound_events.set_format(self._pcm_format)
+            self.register_audio_callback(self.sound_events.on_audio_data)
+        elif not detect and self.sound_events is not None:
+            self.unregister_audio_callback(self.sound_events.on_audio_data)
+            self.sound_events = None
+
+        # Record door audio around doorbell, sound and voice triggers
+        record = options.enable_audio and options.enable_recording
+        if record and self.recorder is None:
+            recorder = await _async_import(hass, "recorder")
+            self.recorder = recorder.AudioRecorder(hass, self, entry_id)
+            self.recorder.set_format(self._pcm_format)
+            await self.recorder.async_start()
+            async_register_recordings_view(hass, recorder.RecordingView)
+        elif not record and self.recorder is not None:
+            await self.recorder.async_stop()
+            self.recorder = None
+
+    async def _async_set_renderer(self, render: bool) -> None:
+        """Switch between drawing the display here and sending its state."""
+        if render:
+            oled = await _async_import(self.hass, "oled")
+            self.renderer = oled.DisplayRenderer()
+        else:
+            self._stop_marquee()
+            self.renderer = None
+        # The device shows what the other mode sent: send everything anew
+        self._display_sent = None
+        if self.client.connected and self._state_known:
+            await self._async_send_display()
 
     def on_connect(self) -> None:
         """Handle successful connection."""
         self.data["connected"] = True
+        # The device may have rebooted; its display and gains are unknown
+        self._display_sent = None
+        if self.renderer is not None:
+            self.renderer.reset()
+        self._gains_sent.clear()
+        # Every connection starts in the default format
+        self._apply_audio_format()
         self.async_set_updated_data(self.data)
         
-        # Request icon list from device
-        import asyncio
-        asyncio.create_task(self._fetch_icons())
+        # Replay the desired state and request the icon list, once per connection
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+        self._sync_task = self.hass.async_create_background_task(
+            self._async_sync_device(), f"{DOMAIN} sync device"
+        )
 
     def on_disconnect(self) -> None:
         """Handle disconnection."""
         self.data["connected"] = False
         self.data["streaming_mode"] = STREAM_MODE_IDLE
+        self._stop_marquee()
         self.async_set_updated_data(self.data)
 
     def register_audio_callback(self, callback) -> None:
         """Register a callback for audio data."""
-        self._audio_callbacks.append(callback)
+        if callback not in self._audio_callbacks:
+            self._audio_callbacks.append(callback)
 
     def unregister_audio_callback(self, callback) -> None:
         """Unregister an audio callback."""
@@ -116,29 +413,207 @@ class SmartIntercomCoordinator(DataUpdateCoordinator):
 
     async def async_send_command(self, cmd: str, **kwargs: Any) -> bool:
         """Send a command to the device."""
+        if cmd == CMD_DOORBELL and self.recorder is not None:
+            self.recorder.trigger(TRIGGER_DOORBELL)
         return await self.client.send_command(cmd, **kwargs)
 
     async def async_send_audio(self, data: bytes) -> bool:
-        """Send audio data to the device."""
+        """Send audio data straight to the device (the mixer's output)."""
         return await self.client.send_audio(data)
 
+    async def async_update_display(self, display: DisplayState) -> bool:
+        """Bring the device display to a state, sending only what changed.
+
+        Updates queued behind one being sent are coalesced: each send
+        diffs the latest desired state against the last one sent.
+        """
+        self.display = display
+        self._async_save_state()
+        self.async_set_updated_data(self.data)
+        return await self._async_send_display()
+
+    async def _async_send_display(self) -> bool:
+        """Send the parts of the desired display the device lacks."""
+        async with self._display_lock:
+            if self.renderer is not None and FEATURE_FRAMEBUFFER in self.client.features:
+                return await self._async_blit_display(self.renderer)
+            display = self.display
+            changes = display_changes(self._display_sent, display)
+            if not changes:
+                return True
+            # Not queued while offline: the whole state is replayed on connect
+            if not self.client.connected:
+                return False
+            if FEATURE_UPDATE_DISPLAY in self.client.features:
+                sent = await self.async_send_command(CMD_UPDATE_DISPLAY, queue=False, **changes)
+            else:
+                sent = True
+                for cmd, kwargs in display_commands(changes, display):
+                    if not await self.async_send_command(cmd, queue=False, **kwargs):
+                        sent = False
+                        break
+            # After a failure the device state is unknown: resend everything
+            self._display_sent = display if sent else None
+        return sent
+
+    async def _async_blit_display(self, renderer: DisplayRenderer) -> bool:
+        """Draw the desired display and send the rectangles that changed."""
+        if not self.client.connected:
+            return False
+        display = self.display
+        await renderer.async_load_icons(self.hass, display, self.client.device_url)
+        pages = renderer.render(display)
+        sent = True
+        if rects := renderer.dirty_rects(pages):
+            sent = await self.async_send_command(CMD_BLIT, queue=False, rects=rects)
+        renderer.mark_sent(pages if sent else None)
+        # A later switch back to commands sends the whole state
+        self._display_sent = None
+        if sent and renderer.scrolling and self._marquee_task is None:
+            self._marquee_task = self.hass.async_create_background_task(
+                self._async_scroll_marquee(), f"{DOMAIN} marquee"
+            )
+        return sent
+
+    async def _async_scroll_marquee(self) -> None:
+        """Scroll the rendered marquee while it is wider than the screen."""
+        try:
+            while True:
+                await asyncio.sleep(DISPLAY_MARQUEE_INTERVAL)
+                renderer = self.renderer
+                if renderer is None or not renderer.scrolling or not self.client.connected:
+                    return
+                renderer.advance()
+                if not await self._async_send_display():
+                    return
+        finally:
+            if self._marquee_task is asyncio.current_task():
+                self._marquee_task = None
+
+    def _stop_marquee(self) -> None:
+        """Stop scrolling the rendered marquee."""
+        if self._marquee_task is not None:
+            self._marquee_task.cancel()
+            self._marquee_task = None
+
+    async def async_set_gain(self, key: str, value: float) -> bool:
+        """Set the microphone or speaker gain (a GAIN_COMMANDS key)."""
+        self.data[key] = value
+        self._async_save_state()
+        self.async_set_updated_data(self.data)
+        return await self._async_send_gain(key)
+
+    async def _async_send_gain(self, key: str) -> bool:
+        """Send a gain unless the device already has it."""
+        value = self.data[key]
+        if self._gains_sent.get(key) == value:
+            return True
+        if sent := await self.async_send_command(GAIN_COMMANDS[key], queue=False, value=value):
+            self._gains_sent[key] = value
+        else:
+            self._gains_sent.pop(key, None)
+        return sent
+
+    async def async_load_state(self) -> None:
+        """Restore the desired display and gains stored for this device."""
+        if self.state_store is None or not (stored := await self.state_store.async_load()):
+            return
+        self.display = DisplayState.from_dict(stored.get("display", {}))
+        for key in GAIN_COMMANDS:
+            if key in stored:
+                self.data[key] = stored[key]
+        self._state_known = True
+
+    @callback
+    def _async_save_state(self) -> None:
+        """Mark the desired state known and schedule storing it."""
+        self._state_known = True
+        if self.state_store is not None:
+            self.state_store.async_delay_save(self._state_to_store, STATE_SAVE_DELAY)
+
+    def _state_to_store(self) -> dict[str, Any]:
+        """Return the desired state for storage."""
+        return {
+            "display": self.display.as_dict(),
+            **{key: self.data[key] for key in GAIN_COMMANDS},
+        }
+
+    async def _async_sync_device(self) -> None:
+        """Bring a newly connected device to the desired state, then fetch icons.
+
+        The display goes out as one batch where the firmware allows,
+        followed by the gains, without waiting for the device in between.
+        """
+        if self._state_known:
+            await self._async_send_display()
+            for key in GAIN_COMMANDS:
+                await self._async_send_gain(key)
+        await self._fetch_icons()
+
     def set_streaming_mode(self, mode: str) -> None:
         """Update the streaming mode state."""
         self.data["streaming_mode"] = mode
+        if mode == STREAM_MODE_IDLE:
+            # Don't let a later stream pick up stale pre-roll
+            self.audio_buffer.clear()
         self.async_set_updated_data(self.data)
 
+    async def async_start_trace(self, path: str) -> None:
+        """Record every message of the connection to a trace file."""
+        if self.client.trace is not None:
+            return
+        trace = await _async_import(self.hass, "trace")
+        self.client.trace = trace.TraceWriter(path)
+        _LOGGER.info("Recording session trace to %s", path)
+
+    async def async_stop_trace(self) -> None:
+        """Stop recording the session trace."""
+        if (trace := self.client.trace) is not None:
+            self.client.trace = None
+            await trace.async_close()
+
+    async def async_stop(self) -> None:
+        """Stop the coordinator's own tasks and the session trace."""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        self._stop_marquee()
+        await self.async_stop_trace()
+
+    async def async_load_icons(self) -> None:
+        """Load the icon catalogue stored for this device."""
+        if self.icon_store is not None and (stored := await self.icon_store.async_load()):
+            self.icons = IconCatalogue.from_dict(stored)
+            _LOGGER.debug("Loaded %d stored icons, version %s", len(self.icons), self.icons.version)
+
     async def _fetch_icons(self) -> None:
-        """Fetch available icons from device."""
+        """Fetch available icons from device, unless they are unchanged."""
         _LOGGER.debug("Fetching icon list from device")
-        await self.async_send_command(CMD_GET_ICONS)
+        if self.icons.version is None:
+            await self.async_send_command(CMD_GET_ICONS)
+        else:
+            await self.async_send_command(CMD_GET_ICONS, version=self.icons.version)
+
+    def _update_icons(self, data: dict) -> None:
+        """Apply an icon list answer and store it if it changed."""
+        if data.get("unchanged"):
+            _LOGGER.debug("Icon list unchanged, version %s", data.get("version"))
+            return
+        icons = IconCatalogue(data.get("icons", []), data.get("version"))
+        if icons.version == self.icons.version:
+            return
+        self.icons = icons
+        _LOGGER.info("Received %d icons from device", len(icons))
+        if self.renderer is not None:
+            # The files behind the paths may have changed too
+            self.renderer.clear_icons()
+        if self.icon_store is not None:
+            self.icon_store.async_delay_save(icons.as_dict, ICONS_SAVE_DELAY)
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up SmartIntercom from a config entry."""
-    host = entry.data[CONF_HOST]
-    port = entry.data[CONF_PORT]
-    secret_key = entry.data[CONF_SECRET_KEY]
-    enable_audio = entry.data.get(CONF_ENABLE_AUDIO, True)
-    use_ssl = entry.data.get(CONF_USE_SSL, False)
+    host, port, secret_key, use_ssl = connection_settings(entry.data)
+    options = IntercomOptions.from_entry(entry.data, entry.options)
 
     # Create WebSocket client
     client = SmartIntercomClient(
@@ -146,10 +621,27 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         port=port,
         secret_key=secret_key,
         use_ssl=use_ssl,
+        audio_formats=preferred_formats(options.audio_format, options.frame_ms),
+        reconnect_delay=options.reconnect_delay,
+        reconnect_max_delay=options.reconnect_max_delay,
     )
 
     # Create coordinator
-    coordinator = SmartIntercomCoordinator(hass, client, enable_audio)
+    coordinator = SmartIntercomCoordinator(hass, client, options.enable_audio)
+    coordinator.device_info = DeviceInfo(
+        identifiers={(DOMAIN, entry.entry_id)},
+        name="SmartIntercom",
+        manufacturer=MANUFACTURER,
+        model=MODEL,
+    )
+    coordinator.icon_store = Store(
+        hass, ICONS_STORAGE_VERSION, ICONS_STORAGE_KEY.format(entry.entry_id)
+    )
+    coordinator.state_store = Store(
+        hass, STATE_STORAGE_VERSION, STATE_STORAGE_KEY.format(entry.entry_id)
+    )
+    await coordinator.async_load_icons()
+    await coordinator.async_load_state()
 
     # Set up callbacks
     client.on_message = coordinator.on_message
@@ -157,11 +649,13 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     client.on_connect = coordinator.on_connect
     client.on_disconnect = coordinator.on_disconnect
 
-    # Connect to device
-    if not await client.connect():
-        _LOGGER.error("Failed to connect to SmartIntercom at %s:%s", host, port)
-        # Don't fail setup - allow reconnection
-    
+    # Playback, sound detection and recording, buffers and link tuning
+    await coordinator.async_apply_options(entry.entry_id, options)
+
+    # Connect in the background, retrying while the device is unreachable:
+    # setup does not wait for the network
+    client.start()
+
     # Store coordinator
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator
@@ -175,56 +669,335 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Register frontend card
     await async_register_frontend(hass)
 
+    # Apply changed settings to the running entry rather than reloading it
+    entry.async_on_unload(entry.add_update_listener(async_update_entry))
+
     return True
 
 
+async def async_update_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed connection settings and options.
+
+    The client reconnects only if the host, port, SSL or secret key
+    changed; entities, stores and the connection are otherwise kept.
+    """
+    coordinator: SmartIntercomCoordinator = hass.data[DOMAIN][entry.entry_id]
+    start = time.perf_counter()
+    reconnect = await coordinator.client.async_set_endpoint(*connection_settings(entry.data))
+    await coordinator.async_apply_options(
+        entry.entry_id, IntercomOptions.from_entry(entry.data, entry.options)
+    )
+    elapsed = time.perf_counter() - start
+    coordinator.metrics.options_time.observe(elapsed)
+    _LOGGER.debug(
+        "Applied settings in %.1f ms%s", elapsed * 1000, ", reconnecting" if reconnect else ""
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     # Unload platforms
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
+        # Without the bridge module loaded, no bridge was ever started
+        if (bridge := sys.modules.get(f"{__name__}.bridge")) is not None:
+            await bridge.async_get_bridge_manager(hass).async_stop_device(entry.entry_id)
         coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        if coordinator.player is not None:
+            await coordinator.player.async_stop()
+        await coordinator.mixer.async_stop()
         await coordinator.client.disconnect()
+        await coordinator.async_stop()
+        if coordinator.recorder is not None:
+            await coordinator.recorder.async_stop()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored icon catalogue and state of a deleted entry."""
+    await Store(
+        hass, ICONS_STORAGE_VERSION, ICONS_STORAGE_KEY.format(entry.entry_id)
+    ).async_remove()
+    await Store(
+        hass, STATE_STORAGE_VERSION, STATE_STORAGE_KEY.format(entry.entry_id)
+    ).async_remove()
+
+
+async def _async_target_coordinators(
+    hass: HomeAssistant, call: ServiceCall
+) -> dict[str, SmartIntercomCoordinator]:
+    """Return the coordinators a device service call is for, by entry ID.
+
+    Any target (entities, devices, areas, floors, labels) selects the
+    intercoms it resolves to, possibly none; without a target, the
+    device field selects one entry; with neither, the call is for every
+    intercom.
+    """
+    coordinators: dict[str, SmartIntercomCoordinator] = hass.data[DOMAIN]
+    if not TARGET_FIELDS.isdisjoint(call.data):
+        entry_ids = await async_extract_config_entry_ids(hass, call)
+    elif (device := call.data.get("device")) is not None:
+        entry_ids = {device}
+    else:
+        return dict(coordinators)
+    return {
+        entry_id: coordinator
+        for entry_id, coordinator in coordinators.items()
+        if entry_id in entry_ids
+    }
+
+
+async def async_run_on_devices(
+    coordinators: dict[str, SmartIntercomCoordinator],
+    action: Callable[[SmartIntercomCoordinator], Awaitable[bool]],
+    timeout: float = SERVICE_DEVICE_TIMEOUT,
+) -> dict[str, str]:
+    """Run an action on every device at once; return a result per key.
+
+    Each device gets its own timeout, so an offline or stalled intercom
+    only delays (and eventually times out) itself. The action stores the
+    desired state first: a device that was offline gets it on reconnect
+    and reports queued.
+    """
+    offline = {
+        key for key, coordinator in coordinators.items() if not coordinator.client.connected
+    }
+    outcomes = await asyncio.gather(
+        *(
+            asyncio.wait_for(action(coordinator), timeout=timeout)
+            for coordinator in coordinators.values()
+        ),
+        return_exceptions=True,
+    )
+    results = {}
+    for key, outcome in zip(coordinators, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            results[key] = RESULT_TIMEOUT
+        elif outcome is True:
+            results[key] = RESULT_OK
+        elif key in offline:
+            results[key] = RESULT_QUEUED
+        else:
+            results[key] = RESULT_FAILED
+            if isinstance(outcome, BaseException):
+                _LOGGER.error("Service call on %s failed: %s", key, outcome)
+    return results
+
+
 async def async_register_services(hass: HomeAssistant) -> None:
     """Register custom services."""
-    
-    async def handle_set_marquee_field(call: ServiceCall) -> None:
+
+    async def _async_update_displays(
+        call: ServiceCall, update: Callable[[DisplayState], DisplayState]
+    ) -> ServiceResponse:
+        """Apply a display update to the targeted intercoms concurrently."""
+        coordinators = await _async_target_coordinators(hass, call)
+        # Validate against every target before anything is sent
+        displays = {
+            coordinator: update(coordinator.display) for coordinator in coordinators.values()
+        }
+        results = await async_run_on_devices(
+            coordinators,
+            lambda coordinator: coordinator.async_update_display(displays[coordinator]),
+        )
+        return {"results": results} if call.return_response else None
+
+    async def handle_set_marquee_field(call: ServiceCall) -> ServiceResponse:
         """Handle set_marquee_field service call."""
-        index = call.data.get("index", 0)
-        icon = call.data.get("icon", "")
-        text = call.data.get("text", "")
-        
-        for coordinator in hass.data[DOMAIN].values():
-            await coordinator.async_send_command(
-                CMD_SET_FIELD,
-                index=index,
-                icon=icon,
-                text=text,
-            )
+        index = call.data["index"]
+        icon = call.data["icon"]
+        text = call.data["text"]
+        return await _async_update_displays(
+            call, lambda display: display.with_field(index, icon, text)
+        )
 
-    async def handle_clear_marquee_field(call: ServiceCall) -> None:
+    async def handle_clear_marquee_field(call: ServiceCall) -> ServiceResponse:
         """Handle clear_marquee_field service call."""
-        index = call.data.get("index", 0)
-        
-        for coordinator in hass.data[DOMAIN].values():
-            await coordinator.async_send_command(CMD_CLEAR_FIELD, index=index)
+        index = call.data["index"]
+        return await _async_update_displays(
+            call, lambda display: display.with_field(index, "", "")
+        )
+
+    async def handle_update_display(call: ServiceCall) -> ServiceResponse:
+        """Handle update_display service call."""
+        return await _async_update_displays(
+            call, lambda display: display_from_service(display, call.data)
+        )
+
+    async def handle_play_audio(call: ServiceCall) -> None:
+        """Handle play_audio service call."""
+        source = call.data["source"]
+        gain = call.data["gain"]
+        normalize = call.data["normalize"]
+
+        coordinators = await _async_target_coordinators(hass, call)
+        await asyncio.gather(
+            *(
+                coordinator.player.async_play(source, gain, normalize)
+                for coordinator in coordinators.values()
+                if coordinator.player is not None
+            )
+        )
+
+    async def handle_broadcast_audio(call: ServiceCall) -> None:
+        """Handle broadcast_audio service call."""
+        source = call.data["source"]
+        gain = call.data["gain"]
+        normalize = call.data["normalize"]
+
+        players = {
+            entry_id: coordinator.player
+            for entry_id, coordinator in (await _async_target_coordinators(hass, call)).items()
+            if coordinator.player is not None
+        }
+
+        broadcast = await _async_import(hass, "broadcast")
+
+        async def _async_broadcast() -> None:
+            results = await broadcast.async_broadcast(hass, players, source, gain, normalize)
+            failed = {key: result for key, result in results.items() if result != RESULT_OK}
+            if failed:
+                _LOGGER.warning("Broadcast of %s incomplete: %s", source, failed)
+
+        hass.async_create_task(_async_broadcast())
+
+    async def handle_start_bridge(call: ServiceCall) -> None:
+        """Handle start_bridge service call."""
+        bridge = await _async_import(hass, "bridge")
+        await bridge.async_get_bridge_manager(hass).async_start_bridge(
+            call.data["source"],
+            call.data["targets"],
+            call.data["bidirectional"],
+            call.data["gain"],
+        )
+
+    async def handle_stop_bridge(call: ServiceCall) -> None:
+        """Handle stop_bridge service call."""
+        bridge = await _async_import(hass, "bridge")
+        manager = bridge.async_get_bridge_manager(hass)
+        if (device := call.data.get("device")) is not None:
+            await manager.async_stop_device(device)
+        else:
+            await manager.async_stop_all()
+
+    async def handle_start_trace(call: ServiceCall) -> None:
+        """Handle start_trace service call."""
+        device = call.data.get("device")
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        for entry_id, coordinator in hass.data[DOMAIN].items():
+            if device is None or entry_id == device:
+                await coordinator.async_start_trace(
+                    hass.config.path(DOMAIN, "traces", f"{entry_id}-{stamp}.trace")
+                )
+
+    async def handle_stop_trace(call: ServiceCall) -> None:
+        """Handle stop_trace service call."""
+        device = call.data.get("device")
+        for entry_id, coordinator in hass.data[DOMAIN].items():
+            if device is None or entry_id == device:
+                await coordinator.async_stop_trace()
+
+    async def handle_start_profiling(call: ServiceCall) -> None:
+        """Handle start_profiling service call."""
+        duration = call.data["duration"]
+        interval = call.data["interval"]
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        profiler = await _async_import(hass, "profiler")
+        if not profiler.async_start_profiling(
+            hass,
+            hass.config.path(DOMAIN, "profiles", f"{stamp}.collapsed"),
+            duration,
+            interval / 1000,
+        ):
+            _LOGGER.warning("A profile is already running; stop it first")
+
+    async def handle_stop_profiling(call: ServiceCall) -> None:
+        """Handle stop_profiling service call."""
+        profiler = await _async_import(hass, "profiler")
+        await profiler.async_stop_profiling(hass)
 
     # Register services if not already registered
     if not hass.services.has_service(DOMAIN, "set_marquee_field"):
-        hass.services.async_register(DOMAIN, "set_marquee_field", handle_set_marquee_field)
+        hass.services.async_register(
+            DOMAIN,
+            "set_marquee_field",
+            handle_set_marquee_field,
+            schema=SET_MARQUEE_FIELD_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
     
     if not hass.services.has_service(DOMAIN, "clear_marquee_field"):
-        hass.services.async_register(DOMAIN, "clear_marquee_field", handle_clear_marquee_field)
+        hass.services.async_register(
+            DOMAIN,
+            "clear_marquee_field",
+            handle_clear_marquee_field,
+            schema=CLEAR_MARQUEE_FIELD_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, "update_display"):
+        hass.services.async_register(
+            DOMAIN,
+            "update_display",
+            handle_update_display,
+            schema=UPDATE_DISPLAY_SCHEMA,
+            supports_response=SupportsResponse.OPTIONAL,
+        )
+
+    if not hass.services.has_service(DOMAIN, "play_audio"):
+        hass.services.async_register(
+            DOMAIN, "play_audio", handle_play_audio, schema=PLAY_AUDIO_SCHEMA
+        )
+
+    if not hass.services.has_service(DOMAIN, "broadcast_audio"):
+        hass.services.async_register(
+            DOMAIN, "broadcast_audio", handle_broadcast_audio, schema=PLAY_AUDIO_SCHEMA
+        )
+
+    if not hass.services.has_service(DOMAIN, "start_bridge"):
+        hass.services.async_register(
+            DOMAIN, "start_bridge", handle_start_bridge, schema=START_BRIDGE_SCHEMA
+        )
+
+    if not hass.services.has_service(DOMAIN, "stop_bridge"):
+        hass.services.async_register(
+            DOMAIN, "stop_bridge", handle_stop_bridge, schema=DEVICE_SERVICE_SCHEMA
+        )
+
+    if not hass.services.has_service(DOMAIN, "start_trace"):
+        hass.services.async_register(
+            DOMAIN, "start_trace", handle_start_trace, schema=DEVICE_SERVICE_SCHEMA
+        )
+
+    if not hass.services.has_service(DOMAIN, "stop_trace"):
+        hass.services.async_register(
+            DOMAIN, "stop_trace", handle_stop_trace, schema=DEVICE_SERVICE_SCHEMA
+        )
+
+    if not hass.services.has_service(DOMAIN, "start_profiling"):
+        hass.services.async_register(
+            DOMAIN, "start_profiling", handle_start_profiling, schema=START_PROFILING_SCHEMA
+        )
+
+    if not hass.services.has_service(DOMAIN, "stop_profiling"):
+        hass.services.async_register(
+            DOMAIN, "stop_profiling", handle_stop_profiling, schema=STOP_PROFILING_SCHEMA
+        )
+
+
+def async_register_recordings_view(hass: HomeAssistant, view: type) -> None:
+    """Register the HTTP view serving recorded audio (a RecordingView)."""
+    view_key = f"{DOMAIN}_recordings_view_registered"
+    if hass.data.get(view_key):
+        return
+    hass.http.register_view(view(hass))
+    hass.data[view_key] = True
 
 
 async def async_register_frontend(hass: HomeAssistant) -> None:
     """Register the custom Lovelace card."""
-    import os
     from homeassistant.components.http import StaticPathConfig
     
     # Check if already registered (avoid duplicate registration error)
@@ -235,7 +1008,7 @@ async def async_register_frontend(hass: HomeAssistant) -> None:
     # Get the path to our JavaScript file
     card_path = os.path.join(os.path.dirname(__file__), "www", "smart-intercom-card.js")
     
-    if not os.path.exists(card_path):
+    if not await hass.async_add_executor_job(os.path.exists, card_path):
         _LOGGER.warning("SmartIntercom card file not found at %s", card_path)
         return
 
@@ -0,0 +1,367 @@
+"""Persistent cache of device-ready announcement audio."""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+import hashlib
+import logging
+import os
+from typing import AsyncGenerator, AsyncIterable, Mapping
+import uuid
+
+import numpy as np
+from yarl import URL
+
+from homeassistant.core import HomeAssistant
+
+from .audio_stream import apply_gain
+from .const import (
+    AUDIO_CACHE_HOT_BYTES,
+    AUDIO_CACHE_HOT_CLIP_BYTES,
+    AUDIO_CACHE_MAX_BYTES,
+    AUDIO_CHANNELS,
+    AUDIO_READ_CHUNK_SIZE,
+    AUDIO_SAMPLE_RATE,
+    DOMAIN,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+CACHE_SUFFIX = ".pcm"
+CODEC = "pcm_s16le"
+NORMALIZE_PEAK = 0.89  # -1 dBFS
+
+DATA_AUDIO_CACHE = f"{DOMAIN}_audio_cache"
+
+
+def cache_key(
+    source_hash: str,
+    gain: float = 1.0,
+    normalize: bool = False,
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+    codec: str = CODEC,
+) -> str:
+    """Return the cache key for a source rendered with given settings."""
+    parts = f"{source_hash}|{sample_rate}|{AUDIO_CHANNELS}|{codec}|{gain:.4f}|{normalize}"
+    return hashlib.sha256(parts.encode()).hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """Return a hash identifying the content of an allowed local file.
+
+    Files are identified by real path, size and modification time so a
+    hit never has to read or hash the file. Must run in the executor.
+    """
+    stat = os.stat(path)
+    identity = f"{os.path.realpath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+def url_fingerprint(url: str, headers: Mapping[str, str]) -> str | None:
+    """Return a hash identifying the content of a URL response, if any.
+
+    Responses are identified by their ETag, or else their Last-Modified
+    date; without either a changed response can't be told apart, so
+    there is no fingerprint and the clip is not cached. The authSig of
+    signed Home Assistant URLs changes on every resolve and is left out.
+    """
+    validator = headers.get("ETag") or headers.get("Last-Modified")
+    if not validator:
+        return None
+    parsed = URL(url)
+    if "authSig" in parsed.query:
+        parsed = parsed.with_query(
+            [(name, value) for name, value in parsed.query.items() if name != "authSig"]
+        )
+    identity = f"{parsed}|{validator}"
+    return hashlib.sha256(identity.encode()).hexdigest()
+
+
+class AnnouncementCache:
+    """Content-addressed disk cache with LRU eviction and a hot tier.
+
+    Entries are raw device PCM files written atomically. The LRU order
+    and sizes live in memory; small clips are also kept in RAM so
+    repeated announcements don't touch the disk at all.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: str,
+        max_bytes: int = AUDIO_CACHE_MAX_BYTES,
+        hot_bytes: int = AUDIO_CACHE_HOT_BYTES,
+    ) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._hot_max_bytes = hot_bytes
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._total_bytes = 0
+        self._hot: OrderedDict[str, bytes] = OrderedDict()
+        self._hot_bytes = 0
+        self._load_task: asyncio.Task | None = None
+
+    def _path(self, key: str) -> str:
+        """Return the path of a cache entry."""
+        return os.path.join(self._directory, key + CACHE_SUFFIX)
+
+    def _scan(self) -> list[tuple[float, str, int]]:
+        """Create the directory and list entries with their mtime."""
+        os.makedirs(self._directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self._directory):
+            if entry.name.endswith(CACHE_SUFFIX):
+                stat = entry.stat()
+                found.append((stat.st_mtime, entry.name[: -len(CACHE_SUFFIX)], stat.st_size))
+            elif ".tmp-" in entry.name:
+                # Left behind by an interrupted write
+                os.remove(entry.path)
+        return sorted(found)
+
+    async def async_load(self) -> None:
+        """Load the entries already on disk once, oldest first."""
+        if self._load_task is None:
+            self._load_task = self.hass.async_create_task(self._async_load())
+        await self._load_task
+
+    async def _async_load(self) -> None:
+        """Index the entries on disk."""
+        for _, key, size in await self.hass.async_add_executor_job(self._scan):
+            self._entries[key] = size
+            self._total_bytes += size
+        _LOGGER.debug(
+            "Audio cache holds %d clips (%d bytes)", len(self._entries), self._total_bytes
+        )
+
+    def __contains__(self, key: str) -> bool:
+        """Return True if the key is cached."""
+        return key in self._entries
+
+    async def async_open(self, key: str) -> AsyncIterable[bytes] | None:
+        """Return the cached audio for a key, or None on a miss."""
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+
+        if (data := self._hot.get(key)) is not None:
+            self._hot.move_to_end(key)
+            return _iter_memory(data)
+
+        size = self._entries[key]
+        if size <= AUDIO_CACHE_HOT_CLIP_BYTES:
+            data = await self.hass.async_add_executor_job(self._read, key)
+            if data is None:
+                self._forget(key)
+                return None
+            self._remember(key, data)
+            return _iter_memory(data)
+        return self._iter_disk(key)
+
+    def _read(self, key: str) -> bytes | None:
+        """Read a whole entry and mark it recently used."""
+        try:
+            with open(self._path(key), "rb") as entry_file:
+                data = entry_file.read()
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return None
+        return data
+
+    async def _iter_disk(self, key: str) -> AsyncGenerator[bytes, None]:
+        """Stream a large entry from disk."""
+        handle = await self.hass.async_add_executor_job(open, self._path(key), "rb")
+        try:
+            while chunk := await self.hass.async_add_executor_job(
+                handle.read, AUDIO_READ_CHUNK_SIZE
+            ):
+                yield chunk
+        finally:
+            await self.hass.async_add_executor_job(handle.close)
+
+    async def async_store(
+        self, key: str, frames: AsyncIterable[bytes]
+    ) -> AsyncGenerator[bytes, None]:
+        """Pass frames through while writing them to the cache.
+
+        The entry is committed only if the stream is consumed completely;
+        a cancelled or failed stream leaves nothing behind.
+        """
+        writer = _EntryWriter(self.hass, self._path(key))
+        await writer.async_open()
+        keep: bytearray | None = bytearray()
+        committed = False
+        try:
+            async for frame in frames:
+                await writer.async_write(frame)
+                if keep is not None:
+                    keep += frame
+                    if len(keep) > AUDIO_CACHE_HOT_CLIP_BYTES:
+                        keep = None
+                yield frame
+            size = await writer.async_commit()
+            committed = True
+        finally:
+            if not committed:
+                await writer.async_abort()
+        self._add(key, size, bytes(keep) if keep is not None else None)
+
+    async def async_store_normalized(
+        self, key: str, frames: AsyncIterable[bytes], gain: float = 1.0
+    ) -> None:
+        """Write frames peak-normalized (then scaled by gain) to the cache.
+
+        Normalizing needs the peak of the whole clip, so the frames are
+        first spooled to a temporary file and rescaled in a second pass.
+        """
+        spool_path = f"{self._path(key)}.tmp-{uuid.uuid4().hex}.raw"
+        spool = _EntryWriter(self.hass, spool_path)
+        await spool.async_open()
+        peak = 0
+        try:
+            async for frame in frames:
+                samples = np.frombuffer(frame, dtype="<i2")
+                if samples.size:
+                    peak = max(peak, int(np.abs(samples.astype(np.int32)).max()))
+                await spool.async_write(frame)
+            await spool.async_commit()
+        except BaseException:
+            await spool.async_abort()
+            raise
+
+        if peak:
+            gain *= NORMALIZE_PEAK * 32767 / peak
+        try:
+            async for _ in self.async_store(
+                key, _iter_scaled(self.hass, spool_path, gain)
+            ):
+                pass
+        finally:
+            await self.hass.async_add_executor_job(_remove, spool_path)
+
+    def _add(self, key: str, size: int, data: bytes | None) -> None:
+        """Register a committed entry and evict beyond the size limit."""
+        if key in self._entries:
+            self._total_bytes -= self._entries[key]
+        self._entries[key] = size
+        self._entries.move_to_end(key)
+        self._total_bytes += size
+        if data is not None:
+            self._remember(key, data)
+
+        evicted = []
+        while self._total_bytes > self._max_bytes and len(self._entries) > 1:
+            old_key, _ = next(iter(self._entries.items()))
+            self._forget(old_key)
+            evicted.append(self._path(old_key))
+        if evicted:
+            self.hass.async_add_executor_job(_remove_all, evicted)
+
+    def discard(self, key: str) -> None:
+        """Drop an entry that must not be served again."""
+        self._forget(key)
+        self.hass.async_add_executor_job(_remove, self._path(key))
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Keep a small entry in the hot tier."""
+        if key in self._hot:
+            return
+        self._hot[key] = data
+        self._hot_bytes += len(data)
+        while self._hot_bytes > self._hot_max_bytes:
+            _, dropped = self._hot.popitem(last=False)
+            self._hot_bytes -= len(dropped)
+
+    def _forget(self, key: str) -> None:
+        """Drop an entry from the index and the hot tier."""
+        self._total_bytes -= self._entries.pop(key, 0)
+        if (data := self._hot.pop(key, None)) is not None:
+            self._hot_bytes -= len(data)
+
+
+class _EntryWriter:
+    """Write a file atomically via a temporary name in the executor."""
+
+    def __init__(self, hass: HomeAssistant, path: str) -> None:
+        """Initialize the writer."""
+        self.hass = hass
+        self._path = path
+        self._tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        self._handle = None
+        self._size = 0
+
+    async def async_open(self) -> None:
+        """Open the temporary file."""
+        self._handle = await self.hass.async_add_executor_job(open, self._tmp_path, "wb")
+
+    async def async_write(self, data: bytes) -> None:
+        """Append data."""
+        await self.hass.async_add_executor_job(self._handle.write, data)
+        self._size += len(data)
+
+    async def async_commit(self) -> int:
+        """Flush and move the file into place; return its size."""
+        await self.hass.async_add_executor_job(self._commit)
+        return self._size
+
+    def _commit(self) -> None:
+        """Flush, sync and rename the temporary file."""
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        os.replace(self._tmp_path, self._path)
+
+    async def async_abort(self) -> None:
+        """Discard the temporary file."""
+        await self.hass.async_add_executor_job(self._abort)
+
+    def _abort(self) -> None:
+        """Close and remove the temporary file."""
+        if self._handle is not None:
+            self._handle.close()
+        _remove(self._tmp_path)
+
+
+async def _iter_memory(data: bytes) -> AsyncGenerator[bytes, None]:
+    """Yield cached audio from memory without copying."""
+    view = memoryview(data)
+    for offset in range(0, len(view), AUDIO_READ_CHUNK_SIZE):
+        yield view[offset:offset + AUDIO_READ_CHUNK_SIZE]
+
+
+async def _iter_scaled(
+    hass: HomeAssistant, path: str, gain: float
+) -> AsyncGenerator[bytes, None]:
+    """Read spooled audio and apply a gain."""
+    handle = await hass.async_add_executor_job(open, path, "rb")
+    try:
+        while chunk := await hass.async_add_executor_job(
+            handle.read, AUDIO_READ_CHUNK_SIZE
+        ):
+            yield apply_gain(chunk, gain)
+    finally:
+        await hass.async_add_executor_job(handle.close)
+
+
+def _remove(path: str) -> None:
+    """Remove a file if it exists."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _remove_all(paths: list[str]) -> None:
+    """Remove several files."""
+    for path in paths:
+        _remove(path)
+
+
+async def async_get_audio_cache(hass: HomeAssistant) -> AnnouncementCache:
+    """Return the shared announcement cache, loading it on first use."""
+    if (cache := hass.data.get(DATA_AUDIO_CACHE)) is None:
+        cache = AnnouncementCache(hass, hass.config.path(DOMAIN, "cache"))
+        hass.data[DATA_AUDIO_CACHE] = cache
+    await cache.async_load()
+    return cache
@@ -0,0 +1,140 @@
+"""Audio formats negotiated with the SmartIntercom device."""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, replace
+import logging
+
+import numpy as np
+
+from .const import (
+    AUDIO_BITS,
+    AUDIO_CHANNELS,
+    AUDIO_FORMAT_MAX_FRAME_MS,
+    AUDIO_FORMAT_MIN_FRAME_MS,
+    AUDIO_FRAME_MS,
+    AUDIO_SAMPLE_RATE,
+    AUDIO_SUPPORTED_BITS,
+    AUDIO_SUPPORTED_RATES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+SAMPLE_WIDTH = 2  # audio inside Home Assistant is always 16-bit
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    """The PCM format of one device connection.
+
+    Inside Home Assistant audio is always 16-bit mono at the negotiated
+    sample rate ("device PCM"); only the websocket client converts to and
+    from the wire sample width. Frames carry frame_ms of audio.
+    """
+
+    sample_rate: int = AUDIO_SAMPLE_RATE
+    bits: int = AUDIO_BITS  # sample width on the wire
+    channels: int = AUDIO_CHANNELS
+    frame_ms: int = AUDIO_FRAME_MS
+
+    @property
+    def byte_rate(self) -> int:
+        """Return bytes per second of device PCM."""
+        return self.sample_rate * self.channels * SAMPLE_WIDTH
+
+    @property
+    def wire_byte_rate(self) -> int:
+        """Return bytes per second of audio payload on the wire."""
+        return self.sample_rate * self.channels * self.bits // 8
+
+    @property
+    def frame_samples(self) -> int:
+        """Return samples per frame (per channel)."""
+        return self.sample_rate * self.frame_ms // 1000
+
+    @property
+    def frame_bytes(self) -> int:
+        """Return bytes of device PCM per frame."""
+        return self.frame_samples * self.channels * SAMPLE_WIDTH
+
+    @property
+    def wire_frame_bytes(self) -> int:
+        """Return bytes per frame on the wire."""
+        return self.frame_samples * self.channels * self.bits // 8
+
+    @property
+    def frame_seconds(self) -> float:
+        """Return the duration of one frame."""
+        return self.frame_samples / self.sample_rate
+
+    def same_pcm(self, other: AudioFormat) -> bool:
+        """Return True if only the wire width or framing differ."""
+        return (self.sample_rate, self.channels) == (other.sample_rate, other.channels)
+
+    def seconds_to_bytes(self, seconds: float) -> int:
+        """Return the size of a duration of device PCM, sample aligned."""
+        align = self.channels * SAMPLE_WIDTH
+        return int(seconds * self.sample_rate) * align
+
+    def encode(self, pcm: bytes) -> bytes:
+        """Convert device PCM to the wire sample width."""
+        if self.bits == 16:
+            return pcm
+        samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+        return ((samples >> 8) + 128).astype(np.uint8).tobytes()
+
+    def decode(self, data: bytes) -> bytes:
+        """Convert wire audio to device PCM."""
+        if self.bits == 16:
+            return data
+        samples = np.frombuffer(data, dtype=np.uint8).astype(np.int16)
+        return ((samples - 128) << 8).astype("<i2").tobytes()
+
+    def as_dict(self) -> dict:
+        """Return the format as sent to and received from the device."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> AudioFormat | None:
+        """Parse a format announced by the device, or None if unsupported."""
+        try:
+            audio_format = cls(
+                sample_rate=int(data.get("sample_rate", AUDIO_SAMPLE_RATE)),
+                bits=int(data.get("bits", AUDIO_BITS)),
+                channels=int(data.get("channels", AUDIO_CHANNELS)),
+                frame_ms=int(data.get("frame_ms", AUDIO_FRAME_MS)),
+            )
+        except (TypeError, ValueError):
+            return None
+        if (
+            audio_format.sample_rate not in AUDIO_SUPPORTED_RATES
+            or audio_format.bits not in AUDIO_SUPPORTED_BITS
+            or audio_format.channels != 1
+            or not AUDIO_FORMAT_MIN_FRAME_MS
+            <= audio_format.frame_ms
+            <= AUDIO_FORMAT_MAX_FRAME_MS
+        ):
+            _LOGGER.warning("Ignoring unsupported audio format %s", data)
+            return None
+        return audio_format
+
+
+DEFAULT_FORMAT = AudioFormat()
+
+# Formats offered to the device, by preference; the default is always
+# offered last so every firmware can agree on something
+FORMAT_PRESETS: dict[str, AudioFormat] = {
+    "narrowband_8bit": AudioFormat(sample_rate=8000, bits=8),
+    "narrowband": AudioFormat(sample_rate=8000),
+    "wideband": DEFAULT_FORMAT,
+    "super_wideband": AudioFormat(sample_rate=32000),
+}
+
+
+def preferred_formats(preset: str, frame_ms: int = AUDIO_FRAME_MS) -> list[AudioFormat]:
+    """Return the formats to offer for a configured preset and frame duration."""
+    preferred = FORMAT_PRESETS.get(preset, DEFAULT_FORMAT)
+    formats = (preferred, DEFAULT_FORMAT)
+    if frame_ms != AUDIO_FRAME_MS:
+        # The default framing stays on offer for firmware that can't reframe
+        formats = (replace(preferred, frame_ms=frame_ms), *formats)
+    return list(dict.fromkeys(formats))
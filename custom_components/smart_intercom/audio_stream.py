@@ -2,15 +2,18 @@
 from __future__ import annotations
 
 import asyncio
+from dataclasses import dataclass
 import io
 import logging
 import struct
 import wave
-from typing import AsyncGenerator
+from typing import AsyncGenerator, AsyncIterable
 
 from aiohttp import web
+import numpy as np
 
-from .const import AUDIO_BITS, AUDIO_CHANNELS, AUDIO_CHUNK_SIZE, AUDIO_SAMPLE_RATE
+from .audio_format import DEFAULT_FORMAT, SAMPLE_WIDTH, AudioFormat
+from .const import AUDIO_SAMPLE_RATE, AUDIO_SEND_LEAD, AUDIO_STREAM_QUEUE_FRAMES
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -18,11 +21,12 @@ _LOGGER = logging.getLogger(__name__)
 class AudioStreamManager:
     """Manages audio streaming between ESP32 and Home Assistant."""
 
-    def __init__(self, coordinator) -> None:
+    def __init__(self, coordinator, max_frames: int = AUDIO_STREAM_QUEUE_FRAMES) -> None:
         """Initialize the audio stream manager."""
         self.coordinator = coordinator
-        self._audio_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=100)
+        self._audio_queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize=max_frames)
         self._streaming = False
+        self._metrics = coordinator.metrics if coordinator is not None else None
 
     def on_audio_data(self, data: bytes) -> None:
         """Handle incoming audio data from ESP32."""
@@ -31,11 +35,17 @@ class AudioStreamManager:
                 self._audio_queue.put_nowait(data)
             except asyncio.QueueFull:
                 # Drop oldest data if queue is full
+                if self._metrics is not None:
+                    self._metrics.stream_drops += 1
                 try:
                     self._audio_queue.get_nowait()
                     self._audio_queue.put_nowait(data)
                 except asyncio.QueueEmpty:
                     pass
+            if self._metrics is not None:
+                depth = self._audio_queue.qsize()
+                if depth > self._metrics.stream_queue_max:
+                    self._metrics.stream_queue_max = depth
 
     async def get_audio_chunk(self, timeout: float = 1.0) -> bytes | None:
         """Get a chunk of audio data."""
@@ -64,10 +74,68 @@ class AudioStreamManager:
         return self._streaming
 
 
-def pcm_to_wav_header(num_samples: int = 0) -> bytes:
-    """Generate a WAV header for PCM audio data."""
+class AudioRingBuffer:
+    """Fixed-size buffer keeping the most recent audio bytes."""
+
+    def __init__(self, capacity: int) -> None:
+        """Initialize the ring buffer."""
+        self._buffer = bytearray(capacity)
+        self._capacity = capacity
+        self._write_pos = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        """Return the number of buffered bytes."""
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        """Return the maximum number of buffered bytes."""
+        return self._capacity
+
+    def write(self, data: bytes) -> None:
+        """Append data, overwriting the oldest bytes when full."""
+        length = len(data)
+        if length >= self._capacity:
+            self._buffer[:] = data[length - self._capacity:]
+            self._write_pos = 0
+            self._size = self._capacity
+            return
+
+        end = self._write_pos + length
+        if end <= self._capacity:
+            self._buffer[self._write_pos:end] = data
+        else:
+            first = self._capacity - self._write_pos
+            self._buffer[self._write_pos:] = data[:first]
+            self._buffer[:length - first] = data[first:]
+        self._write_pos = end % self._capacity
+        self._size = min(self._size + length, self._capacity)
+
+    def read(self, size: int | None = None) -> bytes:
+        """Return up to size of the most recent bytes, oldest first."""
+        if size is None or size > self._size:
+            size = self._size
+        start = (self._write_pos - size) % self._capacity
+        if start + size <= self._capacity:
+            return bytes(self._buffer[start:start + size])
+        return bytes(self._buffer[start:]) + bytes(
+            self._buffer[:self._write_pos]
+        )
+
+    def clear(self) -> None:
+        """Drop all buffered audio."""
+        self._write_pos = 0
+        self._size = 0
+
+
+def pcm_to_wav_header(
+    num_samples: int = 0, audio_format: AudioFormat = DEFAULT_FORMAT
+) -> bytes:
+    """Generate a WAV header for device PCM audio data."""
+    channels = audio_format.channels
     # For streaming, we use a placeholder size or calculate based on samples
-    data_size = num_samples * AUDIO_CHANNELS * (AUDIO_BITS // 8)
+    data_size = num_samples * channels * SAMPLE_WIDTH
     
     # If streaming (unknown size), use max value
     if num_samples == 0:
@@ -84,11 +152,11 @@ def pcm_to_wav_header(num_samples: int = 0) -> bytes:
     header.write(b"fmt ")
     header.write(struct.pack("<I", 16))  # Chunk size
     header.write(struct.pack("<H", 1))   # Audio format (PCM)
-    header.write(struct.pack("<H", AUDIO_CHANNELS))
-    header.write(struct.pack("<I", AUDIO_SAMPLE_RATE))
-    header.write(struct.pack("<I", AUDIO_SAMPLE_RATE * AUDIO_CHANNELS * (AUDIO_BITS // 8)))  # Byte rate
-    header.write(struct.pack("<H", AUDIO_CHANNELS * (AUDIO_BITS // 8)))  # Block align
-    header.write(struct.pack("<H", AUDIO_BITS))
+    header.write(struct.pack("<H", channels))
+    header.write(struct.pack("<I", audio_format.sample_rate))
+    header.write(struct.pack("<I", audio_format.byte_rate))  # Byte rate
+    header.write(struct.pack("<H", channels * SAMPLE_WIDTH))  # Block align
+    header.write(struct.pack("<H", SAMPLE_WIDTH * 8))
     
     # data chunk
     header.write(b"data")
@@ -97,14 +165,14 @@ def pcm_to_wav_header(num_samples: int = 0) -> bytes:
     return header.getvalue()
 
 
-def pcm_to_wav(pcm_data: bytes) -> bytes:
-    """Convert raw PCM data to WAV format."""
+def pcm_to_wav(pcm_data: bytes, audio_format: AudioFormat = DEFAULT_FORMAT) -> bytes:
+    """Convert raw device PCM data to WAV format."""
     wav_buffer = io.BytesIO()
     
     with wave.open(wav_buffer, "wb") as wav:
-        wav.setnchannels(AUDIO_CHANNELS)
-        wav.setsampwidth(AUDIO_BITS // 8)
-        wav.setframerate(AUDIO_SAMPLE_RATE)
+        wav.setnchannels(audio_format.channels)
+        wav.setsampwidth(SAMPLE_WIDTH)
+        wav.setframerate(audio_format.sample_rate)
         wav.writeframes(pcm_data)
     
     return wav_buffer.getvalue()
@@ -116,8 +184,8 @@ async def audio_stream_handler(request: web.Request) -> web.StreamResponse:
     if not coordinator:
         return web.Response(status=503, text="Coordinator not available")
     
-    audio_manager = AudioStreamManager(coordinator)
-    coordinator.register_audio_callback(audio_manager.on_audio_data)
+    # The queue size in effect when the stream opens applies to it
+    audio_manager = AudioStreamManager(coordinator, coordinator.stream_queue_frames)
     
     response = web.StreamResponse(
         status=200,
@@ -129,9 +197,12 @@ async def audio_stream_handler(request: web.Request) -> web.StreamResponse:
     )
     await response.prepare(request)
     
+    # Subscribe only once the response exists, so every exit unsubscribes
+    coordinator.register_audio_callback(audio_manager.on_audio_data)
     try:
         # Send WAV header
-        await response.write(pcm_to_wav_header())
+        audio_format = coordinator.audio_format
+        await response.write(pcm_to_wav_header(audio_format=audio_format))
         
         audio_manager.start_streaming()
         
@@ -139,7 +210,7 @@ async def audio_stream_handler(request: web.Request) -> web.StreamResponse:
             chunk = await audio_manager.get_audio_chunk(timeout=5.0)
             if chunk is None:
                 # Send silence to keep connection alive
-                silence = bytes(AUDIO_CHUNK_SIZE)
+                silence = bytes(audio_format.frame_bytes)
                 await response.write(silence)
             else:
                 await response.write(chunk)
@@ -155,11 +226,250 @@ async def audio_stream_handler(request: web.Request) -> web.StreamResponse:
     return response
 
 
+@dataclass(frozen=True)
+class WavFormat:
+    """Sample format of a WAV stream."""
+
+    sample_rate: int
+    channels: int
+    sample_width: int  # bytes per sample
+    is_float: bool = False
+
+    @property
+    def block_align(self) -> int:
+        """Return the number of bytes per frame (all channels)."""
+        return self.channels * self.sample_width
+
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class WavStreamParser:
+    """Incremental RIFF/WAVE parser.
+
+    Feed it the file in arbitrary pieces; it returns the sample data
+    contained in each piece once the header has been read. Only the
+    header bytes are ever buffered.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the parser."""
+        self._buffer = bytearray()
+        self._state = "riff"
+        self._skip = 0
+        self._remaining: int | None = None
+        self.format: WavFormat | None = None
+
+    def feed(self, data: bytes) -> bytes:
+        """Consume bytes and return any sample data they contain."""
+        if self._state == "data":
+            return self._take_data(data)
+        if self._state == "done":
+            return b""
+
+        self._buffer += data
+        while True:
+            if self._skip:
+                skipped = min(self._skip, len(self._buffer))
+                del self._buffer[:skipped]
+                self._skip -= skipped
+                if self._skip:
+                    return b""
+
+            if self._state == "riff":
+                if len(self._buffer) < 12:
+                    return b""
+                if self._buffer[:4] != b"RIFF" or self._buffer[8:12] != b"WAVE":
+                    raise ValueError("Not a RIFF/WAVE stream")
+                del self._buffer[:12]
+                self._state = "chunk"
+                continue
+
+            if len(self._buffer) < 8:
+                return b""
+            chunk_id = bytes(self._buffer[:4])
+            (chunk_size,) = struct.unpack_from("<I", self._buffer, 4)
+
+            if chunk_id == b"fmt ":
+                if len(self._buffer) < 8 + chunk_size:
+                    return b""
+                self.format = self._parse_fmt(bytes(self._buffer[8:8 + chunk_size]))
+                del self._buffer[:8 + chunk_size]
+                self._skip = chunk_size & 1
+            elif chunk_id == b"data":
+                if self.format is None:
+                    raise ValueError("WAV data chunk before fmt chunk")
+                del self._buffer[:8]
+                # Streamed WAVs often carry a placeholder size
+                if chunk_size not in (0, 0xFFFFFFFF):
+                    self._remaining = chunk_size
+                self._state = "data"
+                pending = bytes(self._buffer)
+                self._buffer = bytearray()
+                return self._take_data(pending)
+            else:
+                del self._buffer[:8]
+                self._skip = chunk_size + (chunk_size & 1)
+
+    def _take_data(self, data: bytes) -> bytes:
+        """Return sample data, stopping at the end of the data chunk."""
+        if self._remaining is None:
+            return data
+        data = data[:self._remaining]
+        self._remaining -= len(data)
+        if not self._remaining:
+            self._state = "done"
+        return data
+
+    @staticmethod
+    def _parse_fmt(chunk: bytes) -> WavFormat:
+        """Parse a fmt chunk."""
+        if len(chunk) < 16:
+            raise ValueError("WAV fmt chunk too short")
+        tag, channels, sample_rate, _, _, bits = struct.unpack_from("<HHIIHH", chunk)
+        if tag == _WAVE_FORMAT_EXTENSIBLE and len(chunk) >= 26:
+            (tag,) = struct.unpack_from("<H", chunk, 24)
+        if tag not in (_WAVE_FORMAT_PCM, _WAVE_FORMAT_IEEE_FLOAT):
+            raise ValueError(f"Unsupported WAV encoding 0x{tag:04x}")
+        is_float = tag == _WAVE_FORMAT_IEEE_FLOAT
+        width = (bits + 7) // 8
+        if not channels or not sample_rate or width not in (
+            (4, 8) if is_float else (1, 2, 3, 4)
+        ):
+            raise ValueError(f"Unsupported WAV format: {bits}-bit, {channels} ch")
+        return WavFormat(sample_rate, channels, width, is_float)
+
+
+# Windowed-sinc low-pass applied before downsampling
+_LOWPASS_TAPS = 31
+
+
+def _lowpass(cutoff: float) -> np.ndarray:
+    """Return FIR taps for a low-pass at cutoff (fraction of Nyquist)."""
+    n = np.arange(_LOWPASS_TAPS) - (_LOWPASS_TAPS - 1) / 2
+    taps = cutoff * np.sinc(cutoff * n) * np.hamming(_LOWPASS_TAPS)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class PcmConverter:
+    """Streaming converter from any WAV format to device PCM.
+
+    Downmixes to mono, converts the sample width and resamples by linear
+    interpolation (low-passing first when downsampling). State carries
+    over between calls so chunk boundaries are seamless.
+    """
+
+    def __init__(self, source: WavFormat, target_rate: int = AUDIO_SAMPLE_RATE) -> None:
+        """Initialize the converter."""
+        self._source = source
+        self._step = source.sample_rate / target_rate
+        self._leftover = b""
+        self._tail = np.zeros(0, dtype=np.float32)
+        self._position = 0.0
+        self._taps = _lowpass(1 / self._step * 0.9) if self._step > 1 else None
+        self._history = np.zeros(_LOWPASS_TAPS - 1, dtype=np.float32)
+
+    def convert(self, data: bytes) -> bytes:
+        """Convert a piece of source audio to 16-bit mono device PCM."""
+        if self._leftover:
+            data = self._leftover + data
+        usable = len(data) - len(data) % self._source.block_align
+        self._leftover = data[usable:]
+        if not usable:
+            return b""
+
+        mono = self._decode(data[:usable])
+        if self._taps is not None:
+            padded = np.concatenate((self._history, mono))
+            self._history = padded[-(_LOWPASS_TAPS - 1):]
+            mono = np.convolve(padded, self._taps, mode="valid")
+        if self._step != 1:
+            mono = self._resample(mono)
+
+        return (np.clip(mono, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+
+    def _decode(self, data: bytes) -> np.ndarray:
+        """Decode interleaved samples to mono float32 in [-1, 1)."""
+        width = self._source.sample_width
+        if self._source.is_float:
+            samples = np.frombuffer(data, dtype="<f4" if width == 4 else "<f8")
+            samples = samples.astype(np.float32)
+        elif width == 1:
+            samples = (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128) / 128
+        elif width == 2:
+            samples = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768
+        elif width == 3:
+            raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+            value = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+            samples = (np.where(value >= 1 << 23, value - (1 << 24), value)).astype(
+                np.float32
+            ) / (1 << 23)
+        else:
+            samples = np.frombuffer(data, dtype="<i4").astype(np.float32) / (1 << 31)
+
+        channels = self._source.channels
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1)
+        return samples
+
+    def _resample(self, mono: np.ndarray) -> np.ndarray:
+        """Linearly interpolate to the target rate, continuing the last call."""
+        samples = np.concatenate((self._tail, mono)) if self._tail.size else mono
+        last = samples.size - 1
+        if last < self._position:
+            self._tail = samples[-1:]
+            self._position -= last
+            return np.zeros(0, dtype=np.float32)
+
+        count = int((last - self._position) // self._step) + 1
+        positions = self._position + self._step * np.arange(count)
+        output = np.interp(positions, np.arange(samples.size), samples)
+        self._position = self._position + count * self._step - last
+        self._tail = samples[-1:]
+        return output.astype(np.float32)
+
+
+def apply_gain(pcm: bytes, gain: float) -> bytes:
+    """Scale 16-bit PCM by a linear gain, clipping to the sample range."""
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    scaled = np.clip(samples * np.float32(gain), -32768, 32767)
+    return scaled.astype("<i2").tobytes()
+
+
+async def iter_device_pcm(
+    chunks: AsyncIterable[bytes], sample_rate: int = AUDIO_SAMPLE_RATE
+) -> AsyncGenerator[bytes, None]:
+    """Turn a stream of WAV file bytes into device PCM at a sample rate."""
+    parser = WavStreamParser()
+    converter: PcmConverter | None = None
+    async for chunk in chunks:
+        samples = parser.feed(chunk)
+        if not samples:
+            continue
+        if converter is None:
+            converter = PcmConverter(parser.format, sample_rate)
+        if pcm := converter.convert(samples):
+            yield pcm
+    if parser.format is None:
+        raise ValueError("Stream ended before the WAV header")
+
+
+async def _iter_bytes(data: bytes) -> AsyncGenerator[bytes, None]:
+    """Yield a bytes object as a single chunk."""
+    yield data
+
+
 class TextToSpeechSender:
     """Send TTS audio to ESP32 speaker."""
 
     def __init__(self, coordinator) -> None:
-        """Initialize TTS sender."""
+        """Initialize TTS sender.
+
+        The coordinator may be anything with async_send_audio() and
+        audio_format, such as a mixer source.
+        """
         self.coordinator = coordinator
 
     async def send_tts_audio(self, audio_data: bytes, sample_rate: int = 16000) -> bool:
@@ -169,22 +479,50 @@ class TextToSpeechSender:
             audio_data: Raw PCM audio data (16-bit signed, mono)
             sample_rate: Sample rate (will be resampled if not 16kHz)
         """
-        # If sample rate doesn't match, we'd need to resample
-        # For now, assume 16kHz input
-        if sample_rate != AUDIO_SAMPLE_RATE:
-            _LOGGER.warning(
-                "TTS sample rate %d doesn't match device rate %d, audio may sound distorted",
-                sample_rate,
-                AUDIO_SAMPLE_RATE,
-            )
-        
-        # Send audio in chunks
-        for i in range(0, len(audio_data), AUDIO_CHUNK_SIZE):
-            chunk = audio_data[i:i + AUDIO_CHUNK_SIZE]
-            success = await self.coordinator.async_send_audio(chunk)
-            if not success:
+        target_rate = self.coordinator.audio_format.sample_rate
+        if sample_rate != target_rate:
+            converter = PcmConverter(WavFormat(sample_rate, 1, 2), target_rate)
+            audio_data = converter.convert(audio_data)
+
+        return await self.send_stream(_iter_bytes(audio_data))
+
+    async def send_stream(self, chunks: AsyncIterable[bytes]) -> bool:
+        """Send device-format PCM from an async iterable in real time.
+
+        Chunks are re-framed to the format's frame size and sent at playback
+        speed, staying AUDIO_SEND_LEAD seconds ahead of the speaker so
+        the device buffer neither starves nor overflows.
+        """
+        loop = asyncio.get_running_loop()
+        audio_format = self.coordinator.audio_format
+        byte_rate = audio_format.byte_rate
+        frame_bytes = audio_format.frame_bytes
+        pending = bytearray()
+        start = loop.time()
+        sent = 0.0  # seconds of audio sent so far
+
+        async def send_frame(frame: bytes) -> bool:
+            nonlocal start, sent
+            now = loop.time()
+            if now > start + sent:
+                # The source fell behind: restart the clock from here
+                start = now - sent
+            delay = start + sent - AUDIO_SEND_LEAD - now
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if not await self.coordinator.async_send_audio(frame):
                 return False
-            # Small delay to prevent overwhelming the ESP32
-            await asyncio.sleep(0.01)
-        
+            sent += len(frame) / byte_rate
+            return True
+
+        async for data in chunks:
+            pending += data
+            while len(pending) >= frame_bytes:
+                frame = bytes(pending[:frame_bytes])
+                del pending[:frame_bytes]
+                if not await send_frame(frame):
+                    return False
+
+        if pending:
+            return await send_frame(bytes(pending))
         return True
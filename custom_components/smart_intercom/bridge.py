@@ -0,0 +1,315 @@
+"""Intercom-to-intercom audio bridges routed through Home Assistant."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from functools import partial
+import logging
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .audio_stream import PcmConverter, WavFormat, apply_gain
+from .const import (
+    BRIDGE_JITTER_FRAMES,
+    BRIDGE_JITTER_MAX_FRAMES,
+    CMD_START_LISTEN,
+    CMD_START_SPEAK,
+    CMD_START_STREAM,
+    CMD_STOP_LISTEN,
+    CMD_STOP_SPEAK,
+    CMD_STOP_STREAM,
+    DOMAIN,
+    MIXER_PRIORITY_VOICE,
+    STREAM_MODE_FULL_DUPLEX,
+    STREAM_MODE_IDLE,
+    STREAM_MODE_LISTEN,
+    STREAM_MODE_SPEAK,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_BRIDGES = f"{DOMAIN}_bridges"
+
+# (sends, receives) -> streaming mode and its start/stop commands
+BRIDGE_MODES = {
+    (True, True): (STREAM_MODE_FULL_DUPLEX, CMD_START_STREAM, CMD_STOP_STREAM),
+    (True, False): (STREAM_MODE_LISTEN, CMD_START_LISTEN, CMD_STOP_LISTEN),
+    (False, True): (STREAM_MODE_SPEAK, CMD_START_SPEAK, CMD_STOP_SPEAK),
+}
+
+
+@dataclass
+class HopMetrics:
+    """Counters for one direction of a bridge."""
+
+    frames_in: int = 0
+    frames_out: int = 0
+    dropped: int = 0  # jitter buffer overflow
+    send_failures: int = 0
+    underruns: int = 0
+    latency_avg: float = 0.0  # seconds from receipt to sent, EWMA
+    latency_max: float = 0.0
+
+    @property
+    def loss(self) -> float:
+        """Return the fraction of received frames that were not delivered."""
+        if not self.frames_in:
+            return 0.0
+        return (self.dropped + self.send_failures) / self.frames_in
+
+    def as_dict(self) -> dict:
+        """Return the metrics for logs and diagnostics."""
+        return {
+            "frames_in": self.frames_in,
+            "frames_out": self.frames_out,
+            "dropped": self.dropped,
+            "send_failures": self.send_failures,
+            "underruns": self.underruns,
+            "loss": round(self.loss, 4),
+            "latency_avg_ms": round(self.latency_avg * 1000, 2),
+            "latency_max_ms": round(self.latency_max * 1000, 2),
+        }
+
+
+class BridgeHop:
+    """Forward one device's microphone to another device's speaker.
+
+    Inbound frames are queued by reference (never copied) in a small
+    jitter buffer and played out at real-time pace, so bursts from the
+    network don't reach the speaker as bursts. The buffer refills after
+    an underrun and drops the oldest frames when it overflows. Audio is
+    resampled only when the two devices agreed on different rates.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        source,
+        sink,
+        transform: Callable[[bytes], bytes] | None = None,
+        jitter_frames: int = BRIDGE_JITTER_FRAMES,
+        max_frames: int = BRIDGE_JITTER_MAX_FRAMES,
+    ) -> None:
+        """Initialize the hop."""
+        self.hass = hass
+        self.source = source
+        self.sink = sink
+        self.metrics = HopMetrics()
+        self._transform = transform
+        self._jitter_frames = max(1, jitter_frames)
+        self._max_frames = max(self._jitter_frames, max_frames)
+        self._queue: deque[tuple[float, bytes]] = deque()
+        self._ready = asyncio.Event()
+        self._output = None
+        self._converter: PcmConverter | None = None
+        self._converter_rates: tuple[int, int] | None = None
+        self._task: asyncio.Task | None = None
+
+    @callback
+    def push(self, frame: bytes) -> None:
+        """Queue a frame from the source device."""
+        self.metrics.frames_in += 1
+        self._queue.append((asyncio.get_running_loop().time(), frame))
+        if len(self._queue) > self._max_frames:
+            self._queue.popleft()
+            self.metrics.dropped += 1
+        if len(self._queue) >= self._jitter_frames:
+            self._ready.set()
+
+    def start(self) -> None:
+        """Subscribe to the source and start playing out."""
+        self._output = self.sink.mixer.open_source(MIXER_PRIORITY_VOICE, "bridge")
+        self.source.register_audio_callback(self.push)
+        self._task = self.hass.async_create_background_task(
+            self._async_run(), f"{DOMAIN} bridge hop"
+        )
+
+    async def async_stop(self) -> None:
+        """Unsubscribe and stop playing out."""
+        self.source.unregister_audio_callback(self.push)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._output is not None:
+            self._output.cancel()
+            self._output = None
+        self._queue.clear()
+
+    def _transcode(self, frame: bytes) -> bytes:
+        """Resample a frame if the devices use different sample rates."""
+        rates = (
+            self.source.audio_format.sample_rate,
+            self.sink.audio_format.sample_rate,
+        )
+        if rates[0] == rates[1]:
+            return frame
+        if self._converter_rates != rates:
+            self._converter = PcmConverter(WavFormat(rates[0], 1, 2), rates[1])
+            self._converter_rates = rates
+        return self._converter.convert(frame)
+
+    async def _async_run(self) -> None:
+        """Play queued frames out to the sink in real time."""
+        loop = asyncio.get_running_loop()
+        metrics = self.metrics
+        while True:
+            await self._ready.wait()
+            due = loop.time()
+            while self._queue:
+                received, frame = self._queue.popleft()
+                due += len(frame) / self.source.audio_format.byte_rate
+                frame = self._transcode(frame)
+                if self._transform is not None:
+                    frame = self._transform(frame)
+                if await self._output.async_send_audio(frame):
+                    metrics.frames_out += 1
+                    latency = loop.time() - received
+                    metrics.latency_avg += 0.05 * (latency - metrics.latency_avg)
+                    metrics.latency_max = max(metrics.latency_max, latency)
+                else:
+                    metrics.send_failures += 1
+                if (delay := due - loop.time()) > 0:
+                    await asyncio.sleep(delay)
+            # Ran dry: wait for the buffer to refill before playing again
+            metrics.underruns += 1
+            self._ready.clear()
+
+
+class AudioBridge:
+    """A set of hops between intercoms, with the devices' streaming modes."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinators: dict[str, object],
+        source_id: str,
+        target_ids: list[str],
+        bidirectional: bool = False,
+        gain: float = 1.0,
+        jitter_frames: int = BRIDGE_JITTER_FRAMES,
+    ) -> None:
+        """Initialize the bridge between configured devices."""
+        self.hass = hass
+        self.source_id = source_id
+        self.target_ids = target_ids
+        self.bidirectional = bidirectional
+        self._coordinators = coordinators
+        self._modes_taken: dict[str, str] = {}
+
+        transform = partial(apply_gain, gain=gain) if gain != 1.0 else None
+
+        routes = [(source_id, target_id) for target_id in target_ids]
+        if bidirectional:
+            routes += [(target_id, source_id) for target_id in target_ids]
+        self.hops = {
+            route: BridgeHop(
+                hass,
+                coordinators[route[0]],
+                coordinators[route[1]],
+                transform,
+                jitter_frames,
+            )
+            for route in routes
+        }
+
+    @property
+    def devices(self) -> set[str]:
+        """Return the entry IDs taking part in the bridge."""
+        return {self.source_id, *self.target_ids}
+
+    def metrics(self) -> dict[str, dict]:
+        """Return metrics per hop, keyed "source->sink"."""
+        return {
+            f"{source}->{sink}": hop.metrics.as_dict()
+            for (source, sink), hop in self.hops.items()
+        }
+
+    async def async_start(self) -> None:
+        """Put the devices in the right streaming mode and start the hops."""
+        for entry_id in self.devices:
+            sends = any(source == entry_id for source, _ in self.hops)
+            receives = any(sink == entry_id for _, sink in self.hops)
+            mode, start_cmd, _ = BRIDGE_MODES[(sends, receives)]
+            coordinator = self._coordinators[entry_id]
+            # Leave devices alone that are already streaming for something else
+            if coordinator.data["streaming_mode"] != STREAM_MODE_IDLE:
+                continue
+            await coordinator.async_send_command(start_cmd)
+            coordinator.set_streaming_mode(mode)
+            self._modes_taken[entry_id] = mode
+
+        for hop in self.hops.values():
+            hop.start()
+
+    async def async_stop(self) -> None:
+        """Stop the hops and return the devices to idle."""
+        for hop in self.hops.values():
+            await hop.async_stop()
+
+        stop_commands = {mode: stop for mode, _, stop in BRIDGE_MODES.values()}
+        for entry_id, mode in self._modes_taken.items():
+            coordinator = self._coordinators.get(entry_id)
+            if coordinator is None or coordinator.data["streaming_mode"] != mode:
+                continue
+            await coordinator.async_send_command(stop_commands[mode])
+            coordinator.set_streaming_mode(STREAM_MODE_IDLE)
+        self._modes_taken.clear()
+        _LOGGER.debug("Bridge from %s stopped: %s", self.source_id, self.metrics())
+
+
+class BridgeManager:
+    """Track the active bridges between configured intercoms."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the manager."""
+        self.hass = hass
+        self.bridges: list[AudioBridge] = []
+
+    async def async_start_bridge(
+        self,
+        source_id: str,
+        target_ids: list[str],
+        bidirectional: bool = False,
+        gain: float = 1.0,
+    ) -> AudioBridge:
+        """Start a bridge, replacing bridges that share a device with it."""
+        coordinators = self.hass.data[DOMAIN]
+        target_ids = [target for target in dict.fromkeys(target_ids) if target != source_id]
+        if not target_ids:
+            raise HomeAssistantError("A bridge needs at least one other intercom")
+        for entry_id in (source_id, *target_ids):
+            if entry_id not in coordinators:
+                raise HomeAssistantError(f"Intercom {entry_id} is not loaded")
+
+        bridge = AudioBridge(
+            self.hass, coordinators, source_id, target_ids, bidirectional, gain
+        )
+        await self.async_stop_device(*bridge.devices)
+        await bridge.async_start()
+        self.bridges.append(bridge)
+        return bridge
+
+    async def async_stop_device(self, *entry_ids: str) -> None:
+        """Stop every bridge involving any of the devices."""
+        for bridge in [b for b in self.bridges if b.devices & set(entry_ids)]:
+            self.bridges.remove(bridge)
+            await bridge.async_stop()
+
+    async def async_stop_all(self) -> None:
+        """Stop every bridge."""
+        while self.bridges:
+            await self.bridges.pop().async_stop()
+
+
+def async_get_bridge_manager(hass: HomeAssistant) -> BridgeManager:
+    """Return the shared bridge manager."""
+    if (manager := hass.data.get(DATA_BRIDGES)) is None:
+        manager = hass.data[DATA_BRIDGES] = BridgeManager(hass)
+    return manager
@@ -0,0 +1,115 @@
+"""Synchronized announcements across several SmartIntercom devices."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import AsyncGenerator
+
+from homeassistant.core import HomeAssistant
+
+from .audio_format import AudioFormat
+from .const import (
+    AUDIO_SAMPLE_RATE,
+    BROADCAST_START_MARGIN,
+    BROADCAST_TIMEOUT_MARGIN,
+    RESULT_FAILED,
+    RESULT_NOT_CONNECTED,
+    RESULT_OK,
+    RESULT_TIMEOUT,
+)
+from .player import AudioPlayer, async_open_frames
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_load_clip(
+    hass: HomeAssistant,
+    source: str,
+    gain: float = 1.0,
+    normalize: bool = False,
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+) -> bytes:
+    """Decode and resample a clip once into device PCM."""
+    clip = bytearray()
+    frames = await async_open_frames(hass, source, gain, normalize, sample_rate)
+    async for frame in frames:
+        clip += frame
+    return bytes(clip)
+
+
+async def _iter_shared(
+    clip: memoryview, frame_bytes: int
+) -> AsyncGenerator[memoryview, None]:
+    """Yield frames of a shared clip without copying it."""
+    for offset in range(0, len(clip), frame_bytes):
+        yield clip[offset:offset + frame_bytes]
+
+
+async def async_broadcast(
+    hass: HomeAssistant,
+    players: dict[str, AudioPlayer],
+    source: str,
+    gain: float = 1.0,
+    normalize: bool = False,
+) -> dict[str, str]:
+    """Play one clip on several devices at the same time.
+
+    The clip is decoded once per audio format in use (normally just
+    once) and its frames are shared by every device in that format.
+    Each device gets its own paced sender, started early by its estimated
+    latency so the audio comes out together; a slow or dead device only
+    delays (and eventually times out) itself. Returns a result per key.
+    """
+    results = {key: RESULT_NOT_CONNECTED for key in players}
+    connected = {
+        key: player
+        for key, player in players.items()
+        if player.coordinator.client.connected
+    }
+    if not connected:
+        return results
+
+    clips: dict[AudioFormat, memoryview] = {}
+    for player in connected.values():
+        audio_format = player.coordinator.audio_format
+        if audio_format not in clips:
+            clips[audio_format] = memoryview(
+                await async_load_clip(
+                    hass, source, gain, normalize, audio_format.sample_rate
+                )
+            )
+    duration = max(
+        len(clip) / audio_format.byte_rate for audio_format, clip in clips.items()
+    )
+
+    latencies = await asyncio.gather(
+        *(player.coordinator.client.measure_latency() for player in connected.values())
+    )
+    latencies = [latency or 0.0 for latency in latencies]
+    # Speak mode is switched on before the start time, which costs a round trip
+    loop = asyncio.get_running_loop()
+    start = loop.time() + 2 * max(latencies) + BROADCAST_START_MARGIN
+
+    tasks = []
+    for player, latency in zip(connected.values(), latencies):
+        audio_format = player.coordinator.audio_format
+        frames = _iter_shared(clips[audio_format], audio_format.frame_bytes)
+        tasks.append(
+            await player.async_play_frames(frames, source, start_at=start - latency)
+        )
+    timeout = start - loop.time() + duration + BROADCAST_TIMEOUT_MARGIN
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(task, timeout=timeout) for task in tasks),
+        return_exceptions=True,
+    )
+
+    for key, outcome in zip(connected, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            results[key] = RESULT_TIMEOUT
+        elif outcome is True:
+            results[key] = RESULT_OK
+        else:
+            results[key] = RESULT_FAILED
+            if isinstance(outcome, BaseException):
+                _LOGGER.error("Broadcast to %s failed: %s", key, outcome)
+    return results
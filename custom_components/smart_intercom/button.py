@@ -7,7 +7,6 @@ from typing import Any
 from homeassistant.components.button import ButtonEntity, ButtonEntityDescription
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -23,8 +22,6 @@ from .const import (
     CMD_STOP_SPEAK,
     CMD_STOP_STREAM,
     DOMAIN,
-    MANUFACTURER,
-    MODEL,
     STREAM_MODE_FULL_DUPLEX,
     STREAM_MODE_IDLE,
     STREAM_MODE_LISTEN,
@@ -137,16 +134,7 @@ class SmartIntercomButton(CoordinatorEntity, ButtonEntity):
         self.entity_description = description
         self._attr_unique_id = f"{entry.entry_id}_{description.key}"
         self._entry = entry
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            name="SmartIntercom",
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-        )
+        self._attr_device_info = coordinator.device_info
 
     async def async_press(self) -> None:
         """Handle button press."""
@@ -0,0 +1,449 @@
+"""Encodings of the control messages on the device websocket.
+
+Every firmware speaks JSON in text frames. The client offers the
+compact codec in its auth command; firmware that answers auth_success
+with it as "codec" switches with the client from the next message on,
+and anything else keeps JSON.
+
+The compact codec is MessagePack in binary frames. Map keys and the
+command or message type names of its vocabulary are written as one
+byte (their index), so {"cmd": "set_field", "index": 0, ...} starts
+with three bytes rather than twenty, and the device dispatches on
+integers instead of comparing strings. Floats that survive single
+precision are sent as such. Since binary frames also carry audio, each
+one then starts with a kind byte: FRAME_AUDIO or FRAME_CONTROL.
+
+The vocabulary is fixed for a codec name: words are never reordered or
+removed, and adding some needs a new name. Words outside it are sent as
+strings, which the other side accepts in either codec. Since an integer
+in a key or under "cmd" or "type" is read as a word, those must be
+strings; messages nest at most _MAX_DEPTH maps and arrays deep.
+"""
+from __future__ import annotations
+
+import json
+import struct
+from typing import Any
+
+from .const import (
+    CMD_AUTH,
+    CMD_BLIT,
+    CMD_CLEAR_FIELD,
+    CMD_DOORBELL,
+    CMD_GET_ICONS,
+    CMD_SET_EXTERNAL_TEXT,
+    CMD_SET_FIELD,
+    CMD_SET_FORMAT,
+    CMD_SET_MIC_GAIN,
+    CMD_SET_SPEAKER_GAIN,
+    CMD_SET_TEXT,
+    CMD_START_ALARM,
+    CMD_START_LISTEN,
+    CMD_START_SPEAK,
+    CMD_START_STREAM,
+    CMD_STOP_ALARM,
+    CMD_STOP_LISTEN,
+    CMD_STOP_SPEAK,
+    CMD_STOP_STREAM,
+    CMD_UPDATE_DISPLAY,
+    CODEC_COMPACT,
+    CODEC_JSON,
+    MSG_AUDIO_FORMAT,
+    MSG_AUTH_FAILED,
+    MSG_AUTH_REQUIRED,
+    MSG_AUTH_SUCCESS,
+    MSG_ICON_LIST,
+)
+
+FRAME_AUDIO = 0
+FRAME_CONTROL = 1
+
+# Words written as their index; values only under these keys, which
+# take nothing but strings
+_NAME_KEYS = ("cmd", "type")
+# Maps and arrays inside each other; the protocol uses three levels
+_MAX_DEPTH = 8
+VOCABULARY = (
+    # Keys
+    "cmd",
+    "type",
+    "key",
+    "codecs",
+    "codec",
+    "features",
+    "line1",
+    "line2",
+    "external_text",
+    "text",
+    "fields",
+    "index",
+    "icon",
+    "value",
+    "formats",
+    "sample_rate",
+    "bits",
+    "channels",
+    "frame_ms",
+    "version",
+    "icons",
+    "unchanged",
+    "rects",
+    "x",
+    "page",
+    "width",
+    "pages",
+    "data",
+    # Commands
+    CMD_AUTH,
+    CMD_START_STREAM,
+    CMD_STOP_STREAM,
+    CMD_START_LISTEN,
+    CMD_STOP_LISTEN,
+    CMD_START_SPEAK,
+    CMD_STOP_SPEAK,
+    CMD_DOORBELL,
+    CMD_START_ALARM,
+    CMD_STOP_ALARM,
+    CMD_SET_MIC_GAIN,
+    CMD_SET_SPEAKER_GAIN,
+    CMD_SET_TEXT,
+    CMD_SET_EXTERNAL_TEXT,
+    CMD_SET_FIELD,
+    CMD_CLEAR_FIELD,
+    CMD_GET_ICONS,
+    CMD_SET_FORMAT,
+    CMD_UPDATE_DISPLAY,
+    CMD_BLIT,
+    # Message types
+    MSG_AUTH_REQUIRED,
+    MSG_AUTH_SUCCESS,
+    MSG_AUTH_FAILED,
+    MSG_ICON_LIST,
+    MSG_AUDIO_FORMAT,
+)
+_WORDS = {word: index for index, word in enumerate(VOCABULARY)}
+
+# json.dumps builds an encoder on every call made with options
+_encode_json = json.JSONEncoder(separators=(",", ":")).encode
+
+_FLOAT32 = struct.Struct(">f")
+_FLOAT64 = struct.Struct(">d")
+_UINT16 = struct.Struct(">H")
+_UINT32 = struct.Struct(">I")
+_UINT64 = struct.Struct(">Q")
+_INT8 = struct.Struct(">b")
+_INT16 = struct.Struct(">h")
+_INT32 = struct.Struct(">i")
+_INT64 = struct.Struct(">q")
+
+
+class CodecError(ValueError):
+    """A control message could not be encoded or decoded."""
+
+
+class JsonCodec:
+    """JSON in text frames; binary frames are audio."""
+
+    name = CODEC_JSON
+    audio_prefix = b""
+
+    def encode(self, message: dict[str, Any]) -> str:
+        """Return a message as a text frame."""
+        return _encode_json(message)
+
+    def decode(self, frame: str | bytes) -> dict[str, Any]:
+        """Return the message of a control frame."""
+        try:
+            data = json.loads(frame)
+        except ValueError as err:
+            raise CodecError(f"Invalid JSON: {err}") from err
+        if not isinstance(data, dict):
+            raise CodecError("Message is not an object")
+        return data
+
+
+class CompactCodec:
+    """MessagePack with a vocabulary, in binary frames after a kind byte."""
+
+    name = CODEC_COMPACT
+    audio_prefix = bytes((FRAME_AUDIO,))
+
+    def encode(self, message: dict[str, Any]) -> bytes:
+        """Return a message as a binary frame."""
+        out = bytearray((FRAME_CONTROL,))
+        _pack_map(message, out)
+        return bytes(out)
+
+    def decode(self, frame: str | bytes) -> dict[str, Any]:
+        """Return the message of a control frame; text frames are JSON."""
+        if isinstance(frame, str):
+            return JSON_CODEC.decode(frame)
+        if not frame or frame[0] != FRAME_CONTROL:
+            raise CodecError("Binary frame is not a control message")
+        try:
+            data, end = _unpack(frame, 1, 0)
+        except (IndexError, struct.error, UnicodeDecodeError) as err:
+            raise CodecError(f"Truncated or invalid message: {err}") from err
+        if not isinstance(data, dict) or end != len(frame):
+            raise CodecError("Message is not one map")
+        return data
+
+
+JSON_CODEC = JsonCodec()
+COMPACT_CODEC = CompactCodec()
+CODECS: dict[str, JsonCodec | CompactCodec] = {
+    codec.name: codec for codec in (JSON_CODEC, COMPACT_CODEC)
+}
+
+
+def _pack_map(message: dict[str, Any], out: bytearray) -> None:
+    """Append a map, writing vocabulary keys and names as their index."""
+    size = len(message)
+    if size < 16:
+        out.append(0x80 | size)
+    elif size < 0x10000:
+        out.append(0xDE)
+        out += _UINT16.pack(size)
+    else:
+        out.append(0xDF)
+        out += _UINT32.pack(size)
+    words = _WORDS
+    for key, value in message.items():
+        if (index := words.get(key)) is not None:
+            out.append(index)
+        elif isinstance(key, str):
+            _pack(key, out)
+        else:
+            # An integer would read back as a word
+            raise CodecError(f"Map key {key!r} is not a string")
+        if key in _NAME_KEYS:
+            # Under these keys every integer is a word
+            if not isinstance(value, str):
+                raise CodecError(f"{key} {value!r} is not a string")
+            if (index := words.get(value)) is not None:
+                out.append(index)
+                continue
+        _pack(value, out)
+
+
+def _pack(value: Any, out: bytearray) -> None:
+    """Append one value."""
+    if isinstance(value, str):
+        data = value.encode()
+        size = len(data)
+        if size < 32:
+            out.append(0xA0 | size)
+        elif size < 0x100:
+            out += bytes((0xD9, size))
+        elif size < 0x10000:
+            out.append(0xDA)
+            out += _UINT16.pack(size)
+        else:
+            out.append(0xDB)
+            out += _UINT32.pack(size)
+        out += data
+    elif value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        _pack_int(value, out)
+    elif isinstance(value, float):
+        try:
+            single = _FLOAT32.pack(value)
+        except OverflowError:
+            single = b""
+        if single and _FLOAT32.unpack(single)[0] == value:
+            out.append(0xCA)
+            out += single
+        else:
+            out.append(0xCB)
+            out += _FLOAT64.pack(value)
+    elif isinstance(value, dict):
+        _pack_map(value, out)
+    elif isinstance(value, (list, tuple)):
+        size = len(value)
+        if size < 16:
+            out.append(0x90 | size)
+        elif size < 0x10000:
+            out.append(0xDC)
+            out += _UINT16.pack(size)
+        else:
+            out.append(0xDD)
+            out += _UINT32.pack(size)
+        for item in value:
+            _pack(item, out)
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        size = len(value)
+        if size < 0x100:
+            out += bytes((0xC4, size))
+        elif size < 0x10000:
+            out.append(0xC5)
+            out += _UINT16.pack(size)
+        else:
+            out.append(0xC6)
+            out += _UINT32.pack(size)
+        out += value
+    else:
+        raise CodecError(f"Cannot encode {type(value).__name__}")
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    """Append an integer in its shortest form."""
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xFF)
+    elif value >= 0:
+        if value < 0x100:
+            out += bytes((0xCC, value))
+        elif value < 0x10000:
+            out.append(0xCD)
+            out += _UINT16.pack(value)
+        elif value < 0x100000000:
+            out.append(0xCE)
+            out += _UINT32.pack(value)
+        elif value < 0x10000000000000000:
+            out.append(0xCF)
+            out += _UINT64.pack(value)
+        else:
+            raise CodecError(f"Integer {value} out of range")
+    elif value >= -0x80:
+        out.append(0xD0)
+        out += _INT8.pack(value)
+    elif value >= -0x8000:
+        out.append(0xD1)
+        out += _INT16.pack(value)
+    elif value >= -0x80000000:
+        out.append(0xD2)
+        out += _INT32.pack(value)
+    elif value >= -0x8000000000000000:
+        out.append(0xD3)
+        out += _INT64.pack(value)
+    else:
+        raise CodecError(f"Integer {value} out of range")
+
+
+def _unpack(data: bytes, pos: int, depth: int) -> tuple[Any, int]:
+    """Return the value at pos, inside depth maps or arrays, and the position after it."""
+    byte = data[pos]
+    pos += 1
+    if byte < 0x80:
+        return byte, pos
+    if byte >= 0xE0:
+        return byte - 0x100, pos
+    if byte < 0x90:
+        return _unpack_map(data, pos, byte & 0x0F, depth)
+    if byte < 0xA0:
+        return _unpack_array(data, pos, byte & 0x0F, depth)
+    if byte < 0xC0:
+        end = pos + (byte & 0x1F)
+        if end > len(data):
+            raise IndexError("string past the end")
+        return data[pos:end].decode(), end
+    if byte == 0xC0:
+        return None, pos
+    if byte == 0xC2:
+        return False, pos
+    if byte == 0xC3:
+        return True, pos
+    if byte == 0xCA:
+        return _FLOAT32.unpack_from(data, pos)[0], pos + 4
+    if byte == 0xCB:
+        return _FLOAT64.unpack_from(data, pos)[0], pos + 8
+    if byte == 0xCC:
+        return data[pos], pos + 1
+    if byte == 0xCD:
+        return _UINT16.unpack_from(data, pos)[0], pos + 2
+    if byte == 0xCE:
+        return _UINT32.unpack_from(data, pos)[0], pos + 4
+    if byte == 0xCF:
+        return _UINT64.unpack_from(data, pos)[0], pos + 8
+    if byte == 0xD0:
+        return _INT8.unpack_from(data, pos)[0], pos + 1
+    if byte == 0xD1:
+        return _INT16.unpack_from(data, pos)[0], pos + 2
+    if byte == 0xD2:
+        return _INT32.unpack_from(data, pos)[0], pos + 4
+    if byte == 0xD3:
+        return _INT64.unpack_from(data, pos)[0], pos + 8
+    if byte in (0xD9, 0xDA, 0xDB, 0xC4, 0xC5, 0xC6):
+        if byte in (0xD9, 0xC4):
+            size, pos = data[pos], pos + 1
+        elif byte in (0xDA, 0xC5):
+            size, pos = _UINT16.unpack_from(data, pos)[0], pos + 2
+        else:
+            size, pos = _UINT32.unpack_from(data, pos)[0], pos + 4
+        end = pos + size
+        if end > len(data):
+            raise IndexError("string or binary past the end")
+        if byte >= 0xD9:
+            return data[pos:end].decode(), end
+        return bytes(data[pos:end]), end
+    if byte == 0xDC:
+        return _unpack_array(data, pos + 2, _UINT16.unpack_from(data, pos)[0], depth)
+    if byte == 0xDD:
+        return _unpack_array(data, pos + 4, _UINT32.unpack_from(data, pos)[0], depth)
+    if byte == 0xDE:
+        return _unpack_map(data, pos + 2, _UINT16.unpack_from(data, pos)[0], depth)
+    if byte == 0xDF:
+        return _unpack_map(data, pos + 4, _UINT32.unpack_from(data, pos)[0], depth)
+    raise struct.error(f"unsupported type byte 0x{byte:02x}")
+
+
+def _unpack_array(data: bytes, pos: int, size: int, depth: int) -> tuple[list[Any], int]:
+    """Return an array of size items and the position after it."""
+    if depth >= _MAX_DEPTH:
+        raise struct.error("nested too deep")
+    depth += 1
+    items = []
+    for _ in range(size):
+        item, pos = _unpack(data, pos, depth)
+        items.append(item)
+    return items, pos
+
+
+def _unpack_map(data: bytes, pos: int, size: int, depth: int) -> tuple[dict[str, Any], int]:
+    """Return a map of size entries, its vocabulary indexes as words."""
+    if depth >= _MAX_DEPTH:
+        raise struct.error("nested too deep")
+    depth += 1
+    result: dict[str, Any] = {}
+    for _ in range(size):
+        # Keys are mostly words, values often small integers or short
+        # strings: read those here rather than through _unpack
+        byte = data[pos]
+        if byte < 0x80:
+            key = _word(byte)
+            pos += 1
+        else:
+            key, pos = _unpack(data, pos, depth)
+            if not isinstance(key, str):
+                raise struct.error("map key is not a word or string")
+        byte = data[pos]
+        if byte < 0x80:
+            value = _word(byte) if key in _NAME_KEYS else byte
+            pos += 1
+        elif 0xA0 <= byte < 0xC0:
+            end = pos + 1 + (byte & 0x1F)
+            if end > len(data):
+                raise IndexError("string past the end")
+            value = data[pos + 1 : end].decode()
+            pos = end
+        else:
+            value, pos = _unpack(data, pos, depth)
+            if key in _NAME_KEYS and not isinstance(value, str):
+                if value.__class__ is not int:
+                    raise struct.error(f"{key} is not a word or string")
+                value = _word(value)
+        result[key] = value
+    return result, pos
+
+
+def _word(index: int) -> str:
+    """Return the vocabulary word of an index."""
+    if not 0 <= index < len(VOCABULARY):
+        raise struct.error(f"unknown word {index}")
+    return VOCABULARY[index]
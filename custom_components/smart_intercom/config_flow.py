@@ -1,29 +1,63 @@
 """Config flow for SmartIntercom integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 from typing import Any
 
+import aiohttp
 import voluptuous as vol
 
 from homeassistant import config_entries
+from homeassistant.components import network, zeroconf
 from homeassistant.const import CONF_HOST, CONF_PORT
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
+    AUDIO_BUFFER_MAX_SECONDS,
+    AUDIO_FORMAT_PRESETS,
+    AUDIO_STREAM_QUEUE_MAX_FRAMES,
+    AUDIO_STREAM_QUEUE_MIN_FRAMES,
+    CMD_AUTH,
+    CONF_AUDIO_FORMAT,
+    CONF_BUFFER_SECONDS,
     CONF_ENABLE_AUDIO,
+    CONF_ENABLE_RECORDING,
+    CONF_FRAME_MS,
+    CONF_LINK_TUNING,
+    CONF_RECONNECT_DELAY,
+    CONF_RECONNECT_MAX_DELAY,
+    CONF_RENDER_DISPLAY,
     CONF_SECRET_KEY,
+    CONF_SOUND_DETECTION,
+    CONF_STREAM_QUEUE_FRAMES,
     CONF_USE_SSL,
+    DEFAULT_AUDIO_FORMAT,
     DEFAULT_ENABLE_AUDIO,
+    DEFAULT_ENABLE_RECORDING,
     DEFAULT_PORT,
     DEFAULT_USE_SSL,
     DOMAIN,
+    LINK_FRAME_STEPS_MS,
+    MSG_AUTH_FAILED,
+    MSG_AUTH_REQUIRED,
+    MSG_AUTH_SUCCESS,
+    RECONNECT_LIMIT_DELAY,
+    RECONNECT_MIN_DELAY,
+    RECORDING_PRE_ROLL,
+    VALIDATE_TIMEOUT,
 )
+from .discovery import DiscoveredIntercom, async_probe, async_scan, device_url, subnet_hosts
+from .options import IntercomOptions, connection_settings
 
 _LOGGER = logging.getLogger(__name__)
 
+CONF_DEVICE = "device"
+MANUAL_ENTRY = "manual"
+
 STEP_USER_DATA_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_HOST): str,
@@ -31,64 +65,109 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Required(CONF_SECRET_KEY): str,
         vol.Optional(CONF_ENABLE_AUDIO, default=DEFAULT_ENABLE_AUDIO): bool,
         vol.Optional(CONF_USE_SSL, default=DEFAULT_USE_SSL): bool,
+        vol.Optional(CONF_ENABLE_RECORDING, default=DEFAULT_ENABLE_RECORDING): bool,
+        vol.Optional(CONF_AUDIO_FORMAT, default=DEFAULT_AUDIO_FORMAT): vol.In(
+            AUDIO_FORMAT_PRESETS
+        ),
+    }
+)
+
+# For a discovered device, whose address is known
+STEP_CREDENTIALS_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Required(CONF_SECRET_KEY): str,
+        vol.Optional(CONF_ENABLE_AUDIO, default=DEFAULT_ENABLE_AUDIO): bool,
+        vol.Optional(CONF_ENABLE_RECORDING, default=DEFAULT_ENABLE_RECORDING): bool,
+        vol.Optional(CONF_AUDIO_FORMAT, default=DEFAULT_AUDIO_FORMAT): vol.In(
+            AUDIO_FORMAT_PRESETS
+        ),
     }
 )
 
 
+def _options_schema(options: IntercomOptions) -> vol.Schema:
+    """Return the audio and link options form, filled with the current ones."""
+    return vol.Schema(
+        {
+            vol.Required(CONF_ENABLE_AUDIO, default=options.enable_audio): bool,
+            vol.Required(CONF_SOUND_DETECTION, default=options.sound_detection): bool,
+            vol.Required(CONF_ENABLE_RECORDING, default=options.enable_recording): bool,
+            vol.Required(CONF_AUDIO_FORMAT, default=options.audio_format): vol.In(
+                AUDIO_FORMAT_PRESETS
+            ),
+            vol.Required(CONF_FRAME_MS, default=options.frame_ms): vol.In(
+                LINK_FRAME_STEPS_MS
+            ),
+            vol.Required(CONF_LINK_TUNING, default=options.link_tuning): bool,
+            vol.Required(CONF_BUFFER_SECONDS, default=options.buffer_seconds): vol.All(
+                vol.Coerce(int), vol.Range(min=RECORDING_PRE_ROLL, max=AUDIO_BUFFER_MAX_SECONDS)
+            ),
+            vol.Required(
+                CONF_STREAM_QUEUE_FRAMES, default=options.stream_queue_frames
+            ): vol.All(
+                vol.Coerce(int),
+                vol.Range(min=AUDIO_STREAM_QUEUE_MIN_FRAMES, max=AUDIO_STREAM_QUEUE_MAX_FRAMES),
+            ),
+            vol.Required(CONF_RECONNECT_DELAY, default=options.reconnect_delay): vol.All(
+                vol.Coerce(float),
+                vol.Range(min=RECONNECT_MIN_DELAY, max=RECONNECT_LIMIT_DELAY),
+            ),
+            vol.Required(
+                CONF_RECONNECT_MAX_DELAY, default=options.reconnect_max_delay
+            ): vol.All(
+                vol.Coerce(float),
+                vol.Range(min=RECONNECT_MIN_DELAY, max=RECONNECT_LIMIT_DELAY),
+            ),
+            vol.Required(CONF_RENDER_DISPLAY, default=options.render_display): bool,
+        }
+    )
+
+
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
-    """Validate the user input allows us to connect."""
-    import websockets
-    
+    """Validate the user input allows us to connect.
+
+    The whole handshake shares one VALIDATE_TIMEOUT deadline.
+    """
     host = data[CONF_HOST]
-    port = data[CONF_PORT]
-    secret_key = data[CONF_SECRET_KEY]
-    use_ssl = data.get(CONF_USE_SSL, False)
-    
-    # Use wss:// for SSL/proxy connections, ws:// for local
-    protocol = "wss" if use_ssl else "ws"
-    # For SSL connections (typically port 443), don't append port
-    if use_ssl and port == 443:
-        ws_url = f"{protocol}://{host}/audio_stream"
-    else:
-        ws_url = f"{protocol}://{host}:{port}/audio_stream"
-    
+    url = device_url(
+        host, data[CONF_PORT], data.get(CONF_USE_SSL, False), "/audio_stream", websocket=True
+    )
     try:
-        async with websockets.connect(ws_url, close_timeout=5) as ws:
-            # Wait for auth_required message
-            import asyncio
-            import json
-            
-            try:
-                message = await asyncio.wait_for(ws.recv(), timeout=5.0)
-                data_msg = json.loads(message)
-                
-                if data_msg.get("type") != "auth_required":
-                    raise CannotConnect("Unexpected response from device")
-                
-                # Send authentication
-                await ws.send(json.dumps({"cmd": "auth", "key": secret_key}))
-                
-                # Wait for auth response
-                response = await asyncio.wait_for(ws.recv(), timeout=5.0)
-                resp_data = json.loads(response)
-                
-                if resp_data.get("type") == "auth_failed":
-                    raise InvalidAuth("Invalid secret key")
-                elif resp_data.get("type") != "auth_success":
-                    raise CannotConnect("Unexpected auth response")
-                    
-            except asyncio.TimeoutError:
-                raise CannotConnect("Connection timeout")
-                
-    except websockets.exceptions.InvalidURI:
-        raise CannotConnect("Invalid host address")
-    except websockets.exceptions.WebSocketException as err:
-        raise CannotConnect(f"WebSocket error: {err}")
-    except OSError as err:
-        raise CannotConnect(f"Connection failed: {err}")
-    
+        await asyncio.wait_for(
+            _async_authenticate(async_get_clientsession(hass), url, data[CONF_SECRET_KEY]),
+            VALIDATE_TIMEOUT,
+        )
+    except asyncio.TimeoutError as err:
+        raise CannotConnect("Connection timeout") from err
+    except (aiohttp.ClientError, OSError) as err:
+        raise CannotConnect(f"Connection failed: {err}") from err
+    except (TypeError, ValueError) as err:
+        # A text message that is not JSON, or a binary one
+        raise CannotConnect(f"Unexpected response from device: {err}") from err
+
     # Return info for creating entry
-    return {"title": f"SmartIntercom ({host})"}
+    return {"title": _entry_title(host)}
+
+
+def _entry_title(host: str) -> str:
+    """Return the title given to the entry of an intercom."""
+    return f"SmartIntercom ({host})"
+
+
+async def _async_authenticate(
+    session: aiohttp.ClientSession, url: str, secret_key: str
+) -> None:
+    """Run the auth handshake on the device websocket."""
+    async with session.ws_connect(url) as ws:
+        greeting = await ws.receive_json()
+        if greeting.get("type") != MSG_AUTH_REQUIRED:
+            raise CannotConnect("Unexpected response from device")
+        await ws.send_json({"cmd": CMD_AUTH, "key": secret_key})
+        response = await ws.receive_json()
+    if response.get("type") == MSG_AUTH_FAILED:
+        raise InvalidAuth("Invalid secret key")
+    if response.get("type") != MSG_AUTH_SUCCESS:
+        raise CannotConnect("Unexpected auth response")
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -96,35 +175,228 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> OptionsFlowHandler:
+        """Return the options flow."""
+        return OptionsFlowHandler(config_entry)
+
+    def __init__(self) -> None:
+        """Initialize the flow."""
+        self._discovered: dict[str, DiscoveredIntercom] = {}
+        self._device: DiscoveredIntercom | None = None
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Handle the initial step."""
+        """Handle the initial step: look for intercoms on the network."""
+        configured = {entry.data[CONF_HOST] for entry in self._async_current_entries()}
+        hosts = subnet_hosts(await network.async_get_adapters(self.hass))
+        found = await async_scan(
+            async_get_clientsession(self.hass),
+            [host for host in hosts if host not in configured],
+        )
+        self._discovered = {device.key: device for device in found}
+        if not self._discovered:
+            return await self.async_step_manual()
+        return await self.async_step_pick_device()
+
+    async def async_step_pick_device(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Let the user pick a discovered intercom or enter one."""
+        if user_input is not None:
+            if user_input[CONF_DEVICE] == MANUAL_ENTRY:
+                return await self.async_step_manual()
+            self._device = self._discovered[user_input[CONF_DEVICE]]
+            return await self.async_step_credentials()
+
+        devices = {key: key for key in self._discovered}
+        devices[MANUAL_ENTRY] = "Enter address manually"
+        return self.async_show_form(
+            step_id="pick_device",
+            data_schema=vol.Schema({vol.Required(CONF_DEVICE): vol.In(devices)}),
+        )
+
+    async def async_step_zeroconf(
+        self, discovery_info: zeroconf.ZeroconfServiceInfo
+    ) -> FlowResult:
+        """Handle an intercom announced over zeroconf."""
+        host = discovery_info.host
+        port = discovery_info.port or DEFAULT_PORT
+        await self.async_set_unique_id(host)
+        self._abort_if_unique_id_configured()
+
+        # The service type is generic: only go on if the device answers like one
+        device = await async_probe(
+            async_get_clientsession(self.hass), host, port, use_ssl=port == 443
+        )
+        if device is None:
+            return self.async_abort(reason="not_smart_intercom")
+        self._device = device
+        self.context["title_placeholders"] = {"host": host}
+        return await self.async_step_credentials()
+
+    async def async_step_credentials(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Ask for the secret key of a discovered intercom."""
+        device = self._device
         errors: dict[str, str] = {}
-        
+
         if user_input is not None:
-            try:
-                info = await validate_input(self.hass, user_input)
-            except CannotConnect:
-                errors["base"] = "cannot_connect"
-            except InvalidAuth:
-                errors["base"] = "invalid_auth"
-            except Exception:
-                _LOGGER.exception("Unexpected exception")
-                errors["base"] = "unknown"
-            else:
-                # Check if already configured
-                await self.async_set_unique_id(user_input[CONF_HOST])
-                self._abort_if_unique_id_configured()
-                
-                return self.async_create_entry(title=info["title"], data=user_input)
+            data = {
+                CONF_HOST: device.host,
+                CONF_PORT: device.port,
+                CONF_USE_SSL: device.use_ssl,
+                **user_input,
+            }
+            if (result := await self._async_create_validated_entry(data, errors)) is not None:
+                return result
 
         return self.async_show_form(
-            step_id="user",
+            step_id="credentials",
+            data_schema=STEP_CREDENTIALS_DATA_SCHEMA,
+            errors=errors,
+            description_placeholders={"host": device.host, "port": str(device.port)},
+        )
+
+    async def async_step_manual(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Handle an intercom entered by address."""
+        errors: dict[str, str] = {}
+
+        if user_input is not None:
+            if (
+                result := await self._async_create_validated_entry(user_input, errors)
+            ) is not None:
+                return result
+
+        return self.async_show_form(
+            step_id="manual",
             data_schema=STEP_USER_DATA_SCHEMA,
             errors=errors,
         )
 
+    async def _async_create_validated_entry(
+        self, data: dict[str, Any], errors: dict[str, str]
+    ) -> FlowResult | None:
+        """Create the entry if the device accepts the key; else fill errors."""
+        try:
+            info = await validate_input(self.hass, data)
+        except CannotConnect:
+            errors["base"] = "cannot_connect"
+        except InvalidAuth:
+            errors["base"] = "invalid_auth"
+        except Exception:
+            _LOGGER.exception("Unexpected exception")
+            errors["base"] = "unknown"
+        else:
+            # Check if already configured
+            await self.async_set_unique_id(data[CONF_HOST])
+            self._abort_if_unique_id_configured()
+
+            return self.async_create_entry(title=info["title"], data=data)
+        return None
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Change the settings of a running intercom.
+
+    Saving reconfigures the running entry (see async_update_entry in
+    __init__.py): only a new host, port, SSL setting or key reconnects.
+    """
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Let the user pick the settings to change."""
+        return self.async_show_menu(step_id="init", menu_options=["audio", "connection"])
+
+    async def async_step_audio(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Change the audio and link options, applied without reconnecting."""
+        errors: dict[str, str] = {}
+        options = IntercomOptions.from_entry(self._entry.data, self._entry.options)
+
+        if user_input is not None:
+            if user_input[CONF_RECONNECT_MAX_DELAY] < user_input[CONF_RECONNECT_DELAY]:
+                errors[CONF_RECONNECT_MAX_DELAY] = "max_below_delay"
+            else:
+                return self.async_create_entry(
+                    title="", data={**options.as_dict(), **user_input}
+                )
+            options = IntercomOptions.from_entry(self._entry.data, user_input)
+
+        return self.async_show_form(
+            step_id="audio", data_schema=_options_schema(options), errors=errors
+        )
+
+    async def async_step_connection(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Change the address or key; the intercom is reached before saving."""
+        errors: dict[str, str] = {}
+        data = self._entry.data
+
+        if user_input is not None:
+            # An empty key keeps the current one
+            new_data = {
+                **data,
+                **user_input,
+                CONF_SECRET_KEY: user_input.get(CONF_SECRET_KEY) or data[CONF_SECRET_KEY],
+            }
+            if connection_settings(new_data) == connection_settings(data):
+                return self.async_create_entry(title="", data=dict(self._entry.options))
+            if new_data[CONF_HOST] != data[CONF_HOST] and any(
+                entry.data[CONF_HOST] == new_data[CONF_HOST]
+                for entry in self.hass.config_entries.async_entries(DOMAIN)
+            ):
+                errors["base"] = "already_configured"
+            else:
+                try:
+                    await validate_input(self.hass, new_data)
+                except CannotConnect:
+                    errors["base"] = "cannot_connect"
+                except InvalidAuth:
+                    errors["base"] = "invalid_auth"
+                except Exception:
+                    _LOGGER.exception("Unexpected exception")
+                    errors["base"] = "unknown"
+                else:
+                    # A title the user did not change follows the host
+                    title = self._entry.title
+                    if title == _entry_title(data[CONF_HOST]):
+                        title = _entry_title(new_data[CONF_HOST])
+                    # The update listener reconnects the running client
+                    self.hass.config_entries.async_update_entry(
+                        self._entry, data=new_data, title=title, unique_id=new_data[CONF_HOST]
+                    )
+                    return self.async_create_entry(title="", data=dict(self._entry.options))
+
+        return self.async_show_form(
+            step_id="connection",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_HOST, default=data[CONF_HOST]): str,
+                    vol.Required(CONF_PORT, default=data[CONF_PORT]): int,
+                    vol.Optional(CONF_SECRET_KEY): str,
+                    vol.Required(
+                        CONF_USE_SSL, default=data.get(CONF_USE_SSL, DEFAULT_USE_SSL)
+                    ): bool,
+                }
+            ),
+            errors=errors,
+        )
+
 
 class CannotConnect(HomeAssistantError):
     """Error to indicate we cannot connect."""
@@ -10,16 +10,116 @@ CONF_PORT = "port"
 CONF_SECRET_KEY = "secret_key"
 CONF_ENABLE_AUDIO = "enable_audio"
 CONF_USE_SSL = "use_ssl"
+CONF_ENABLE_RECORDING = "enable_recording"
+CONF_AUDIO_FORMAT = "audio_format"
+
+# Options, applied without reconnecting (see options.py)
+CONF_SOUND_DETECTION = "sound_detection"
+CONF_FRAME_MS = "frame_ms"
+CONF_LINK_TUNING = "link_tuning"
+CONF_BUFFER_SECONDS = "buffer_seconds"
+CONF_STREAM_QUEUE_FRAMES = "stream_queue_frames"
+CONF_RECONNECT_DELAY = "reconnect_delay"
+CONF_RECONNECT_MAX_DELAY = "reconnect_max_delay"
+CONF_RENDER_DISPLAY = "render_display"
 
 DEFAULT_PORT = 80
 DEFAULT_ENABLE_AUDIO = True
 DEFAULT_USE_SSL = False
+DEFAULT_ENABLE_RECORDING = False
+DEFAULT_AUDIO_FORMAT = "wideband"
+
+# Discovery: zeroconf, then a probe of the local subnets
+DISCOVERY_CONCURRENCY = 64  # hosts probed at once
+DISCOVERY_CONNECT_TIMEOUT = 0.5  # seconds; absent hosts never answer
+DISCOVERY_PROBE_TIMEOUT = 2.0  # seconds to fingerprint a host that answered
+DISCOVERY_MIN_PREFIX = 24  # larger networks are probed as the /24 around HA
+DISCOVERY_STATUS_KEYS = ("streaming", "audio", "display")  # in GET /status
+VALIDATE_TIMEOUT = 5.0  # seconds for the whole handshake when adding a device
 
-# Audio parameters (must match ESP32 config)
+# Default audio format (used until the device agrees on another one)
 AUDIO_SAMPLE_RATE = 16000
 AUDIO_BITS = 16
 AUDIO_CHANNELS = 1
+AUDIO_FRAME_MS = 32
 AUDIO_CHUNK_SIZE = 1024  # bytes per WebSocket message
+AUDIO_SUPPORTED_RATES = (8000, 16000, 24000, 32000)
+AUDIO_SUPPORTED_BITS = (8, 16)
+AUDIO_FORMAT_MIN_FRAME_MS = 10
+AUDIO_FORMAT_MAX_FRAME_MS = 60
+AUDIO_FORMAT_PRESETS = ["narrowband_8bit", "narrowband", "wideband", "super_wideband"]
+AUDIO_BUFFER_SECONDS = 10  # recent inbound audio kept in memory
+AUDIO_BUFFER_MAX_SECONDS = 60
+AUDIO_STREAM_QUEUE_FRAMES = 100  # frames an audio stream listener may lag
+AUDIO_STREAM_QUEUE_MIN_FRAMES = 10
+AUDIO_STREAM_QUEUE_MAX_FRAMES = 1000
+AUDIO_SEND_LEAD = 0.1  # seconds of outbound audio sent ahead of playback
+AUDIO_READ_CHUNK_SIZE = 4096  # bytes read at a time from audio files
+
+# WebSocket transport
+TRANSPORT_MAX_MESSAGE_BYTES = 256 * 1024  # largest message accepted (icon lists)
+TRANSPORT_QUEUE_SECONDS = 0.5  # inbound audio queued before pushing back
+TRANSPORT_WRITE_SECONDS = 0.25  # outbound audio buffered before send() waits
+
+# Reconnection backoff
+RECONNECT_DELAY = 5  # seconds before the first reconnect attempt
+RECONNECT_MAX_DELAY = 60
+RECONNECT_MIN_DELAY = 1
+RECONNECT_LIMIT_DELAY = 3600  # highest delay the options accept
+
+# Diagnostics
+METRICS_TIME_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+)  # seconds
+METRICS_TIMING_EVERY = 16  # inbound frames per timed audio callback run
+METRICS_SENSOR_INTERVAL = 30  # seconds between diagnostic sensor updates
+
+# Session traces
+TRACE_FLUSH_BYTES = 256 * 1024  # buffered trace data written at a time
+
+# Profiling
+PROFILE_DURATION = 60  # seconds profiled unless stopped earlier
+PROFILE_MAX_DURATION = 600
+PROFILE_INTERVAL_MS = 10  # between stack samples
+PROFILE_MIN_INTERVAL_MS = 1
+PROFILE_MAX_INTERVAL_MS = 100
+
+# Link tuning: frame duration follows the measured round trip and loss
+LINK_PROBE_INTERVAL = 10  # seconds between latency probes
+LINK_PROBE_TIMEOUT = 1.0  # a probe without answer counts as lost
+LINK_PROBE_WINDOW = 12  # probes the estimates are based on
+LINK_FRAME_STEPS_MS = (10, 20, 32, 60)
+LINK_LOSS_STEP_UP = 0.02  # loss at which frames grow one step
+LINK_LOSS_MAX_FRAME = 0.1  # loss at which the longest frames are used
+LINK_TUNE_CONFIRM = 2  # probes that must agree before the frame changes
+
+# Broadcast
+BROADCAST_START_MARGIN = 0.15  # seconds allowed for every device to get ready
+BROADCAST_TIMEOUT_MARGIN = 5.0  # seconds beyond the clip length per device
+
+# Per-device results of broadcasts and device services
+RESULT_OK = "ok"
+RESULT_QUEUED = "queued"  # offline; the state is sent when it reconnects
+RESULT_FAILED = "failed"
+RESULT_TIMEOUT = "timeout"
+RESULT_NOT_CONNECTED = "not_connected"
+SERVICE_DEVICE_TIMEOUT = 5.0  # seconds a device service may take per device
+
+# Outbound mixer
+MIXER_MAX_SOURCES = 8
+MIXER_DUCK_GAIN = 0.25  # -12 dB for sources below the loudest priority
+MIXER_SOURCE_MAX_SECONDS = 2  # audio a source may queue ahead of playback
+MIXER_PRIORITY_ANNOUNCEMENT = 1
+MIXER_PRIORITY_VOICE = 2
+
+# Intercom-to-intercom bridges
+BRIDGE_JITTER_FRAMES = 3  # frames buffered before playing out (~100 ms)
+BRIDGE_JITTER_MAX_FRAMES = 16  # oldest frames dropped beyond this
+
+# Announcement cache
+AUDIO_CACHE_MAX_BYTES = 200 * 1024 * 1024
+AUDIO_CACHE_HOT_BYTES = 8 * 1024 * 1024  # small clips kept in memory
+AUDIO_CACHE_HOT_CLIP_BYTES = 1024 * 1024
 
 # WebSocket commands
 CMD_AUTH = "auth"
@@ -39,12 +139,52 @@ CMD_SET_EXTERNAL_TEXT = "set_external_text"
 CMD_SET_FIELD = "set_field"
 CMD_CLEAR_FIELD = "clear_field"
 CMD_GET_ICONS = "get_icons"
+CMD_SET_FORMAT = "set_format"
+CMD_UPDATE_DISPLAY = "update_display"
+CMD_BLIT = "blit"
+
+# Firmware features advertised in auth_success
+FEATURE_UPDATE_DISPLAY = "update_display"
+FEATURE_FRAMEBUFFER = "framebuffer"  # blits rectangles rendered by HA
+
+# Control message codecs; the client offers the compact one in auth
+CODEC_JSON = "json"
+CODEC_COMPACT = "msgpack-v1"
 
 # WebSocket message types
 MSG_AUTH_REQUIRED = "auth_required"
 MSG_AUTH_SUCCESS = "auth_success"
 MSG_AUTH_FAILED = "auth_failed"
 MSG_ICON_LIST = "icon_list"
+MSG_AUDIO_FORMAT = "audio_format"
+
+# Commands queued while a device is offline
+OUTBOX_MAX_COMMANDS = 32
+OUTBOX_DOORBELL_TTL = 30  # seconds
+OUTBOX_ALARM_TTL = 300  # start_alarm; stop_alarm never expires
+
+# OLED display
+DISPLAY_MARQUEE_FIELDS = 3
+DISPLAY_WIDTH = 128
+DISPLAY_HEIGHT = 64
+# Rendered in Home Assistant (render_display option)
+DISPLAY_MARQUEE_INTERVAL = 0.1  # seconds between scroll steps
+DISPLAY_MARQUEE_STEP = 4  # columns per scroll step
+DISPLAY_MARQUEE_GAP = 12  # columns between marquee fields
+DISPLAY_ICON_TIMEOUT = 5  # seconds to download an icon from the device
+
+# Marquee icons
+ICON_DEFAULT_DIR = "/icons/10x10/"
+ICON_EXTENSION = ".xbm"
+ICON_OPTION_NONE = "none"  # select option clearing the icon
+ICONS_STORAGE_VERSION = 1
+ICONS_STORAGE_KEY = f"{DOMAIN}.icons.{{}}"  # per config entry
+ICONS_SAVE_DELAY = 1  # seconds
+
+# Desired device state (display, gains), restored and replayed on connect
+STATE_STORAGE_VERSION = 1
+STATE_STORAGE_KEY = f"{DOMAIN}.state.{{}}"  # per config entry
+STATE_SAVE_DELAY = 5  # seconds
 
 # Streaming modes
 STREAM_MODE_IDLE = "idle"
@@ -58,6 +198,45 @@ ENTITY_STREAMING_MODE = "streaming_mode"
 ENTITY_MIC_GAIN = "mic_gain"
 ENTITY_SPEAKER_GAIN = "speaker_gain"
 
+# Gain entity key -> command setting it on the device
+GAIN_COMMANDS = {
+    ENTITY_MIC_GAIN: CMD_SET_MIC_GAIN,
+    ENTITY_SPEAKER_GAIN: CMD_SET_SPEAKER_GAIN,
+}
+
+# Sound event detection
+EVENT_SOUND_DETECTED = f"{DOMAIN}_sound_event"
+SIGNAL_SOUND_EVENT = f"{DOMAIN}_sound_event_{{}}"
+SOUND_EVENT_KNOCK = "knock"
+SOUND_EVENT_DOORBELL_TONE = "doorbell_tone"
+SOUND_EVENT_GLASS_BREAK = "glass_break"
+SOUND_EVENT_TYPES = [
+    SOUND_EVENT_KNOCK,
+    SOUND_EVENT_DOORBELL_TONE,
+    SOUND_EVENT_GLASS_BREAK,
+]
+SOUND_BLOCK_MS = 100  # audio accumulated before running the detectors
+
+# Recording
+RECORDING_DIR = f"{DOMAIN}/recordings"
+RECORDING_PRE_ROLL = 5  # seconds captured before a trigger
+RECORDING_POST_ROLL = 30  # seconds captured after the last trigger
+RECORDING_SEGMENT_SECONDS = 60
+RECORDING_MAX_BYTES = 500 * 1024 * 1024
+RECORDING_MAX_AGE_DAYS = 7
+RECORDING_VAD_THRESHOLD_DB = -35.0  # dBFS
+TRIGGER_DOORBELL = "doorbell"
+TRIGGER_VAD = "vad"
+TRIGGER_SOUND_EVENT = "sound_event"
+
 # Platforms to setup
-PLATFORMS = ["button", "sensor", "number", "text", "select"]
+PLATFORMS = [
+    "button",
+    "sensor",
+    "number",
+    "text",
+    "select",
+    "event",
+    "media_player",
+]
 
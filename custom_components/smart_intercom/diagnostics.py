@@ -0,0 +1,51 @@
+"""Diagnostics support for SmartIntercom."""
+from __future__ import annotations
+
+import sys
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import SmartIntercomCoordinator
+from .const import CONF_SECRET_KEY, DOMAIN
+
+TO_REDACT = {CONF_SECRET_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: SmartIntercomCoordinator = hass.data[DOMAIN][entry.entry_id]
+    client = coordinator.client
+    # Without the bridge module loaded, no bridge was ever started
+    bridges = []
+    if (bridge_module := sys.modules.get(f"{__package__}.bridge")) is not None:
+        bridges = [
+            bridge.metrics()
+            for bridge in bridge_module.async_get_bridge_manager(hass).bridges
+            if entry.entry_id in bridge.devices
+        ]
+    state = dict(coordinator.data)
+    state["icon_count"] = len(coordinator.icons)
+    state["icon_version"] = coordinator.icons.version
+    state["display"] = coordinator.display.as_dict()
+
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "state": state,
+        "connection": {
+            "connected": client.connected,
+            "audio_format": client.audio_format.as_dict(),
+            "codec": client.codec.name,
+            "latency_ms": None if client.latency is None else round(client.latency * 1000, 2),
+            "rtt_ms": None if client.tuner.rtt is None else round(client.tuner.rtt * 1000, 2),
+            "probe_loss": round(client.tuner.loss, 4),
+        },
+        "metrics": coordinator.metrics.as_dict(),
+        "outbox": client.outbox.as_dict(),
+        "audio_callbacks": len(coordinator._audio_callbacks),
+        "bridges": bridges,
+    }
@@ -0,0 +1,169 @@
+"""Find SmartIntercom devices on the local network.
+
+Devices announced over zeroconf are checked with a single probe. When
+none are announced, the config flow probes every address of the local
+IPv4 subnets (at most a /24 each) with bounded concurrency: a host that
+does not accept a TCP connection within DISCOVERY_CONNECT_TIMEOUT is
+skipped, so a /24 takes a few waves of that timeout.
+
+A host that answers is fingerprinted by its GET /status document, or
+failing that by the auth_required greeting on /audio_stream, which every
+firmware sends before anything else. Both go through Home Assistant's
+shared aiohttp session.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import ipaddress
+import json
+import logging
+from typing import Any, Iterable
+
+import aiohttp
+
+from .const import (
+    DEFAULT_PORT,
+    DISCOVERY_CONCURRENCY,
+    DISCOVERY_CONNECT_TIMEOUT,
+    DISCOVERY_MIN_PREFIX,
+    DISCOVERY_PROBE_TIMEOUT,
+    DISCOVERY_STATUS_KEYS,
+    MSG_AUTH_REQUIRED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+FINGERPRINT_STATUS = "status"
+FINGERPRINT_GREETING = "greeting"
+
+
+@dataclass(frozen=True)
+class DiscoveredIntercom:
+    """Where a device answered and how it was recognised."""
+
+    host: str
+    port: int = DEFAULT_PORT
+    use_ssl: bool = False
+    fingerprint: str = FINGERPRINT_STATUS
+
+    @property
+    def key(self) -> str:
+        """Return a key identifying the endpoint in the flow."""
+        return f"{self.host}:{self.port}"
+
+
+def device_url(host: str, port: int, use_ssl: bool, path: str, websocket: bool = False) -> str:
+    """Return the URL of a device path (the port is left out for SSL on 443)."""
+    if websocket:
+        scheme = "wss" if use_ssl else "ws"
+    else:
+        scheme = "https" if use_ssl else "http"
+    if use_ssl and port == 443:
+        return f"{scheme}://{host}{path}"
+    return f"{scheme}://{host}:{port}{path}"
+
+
+def subnet_hosts(adapters: Iterable[dict[str, Any]]) -> list[str]:
+    """Return the addresses to probe on the enabled adapters' IPv4 subnets.
+
+    Networks larger than DISCOVERY_MIN_PREFIX are narrowed to the block
+    around Home Assistant's own address, which is left out.
+    """
+    hosts: dict[str, None] = {}
+    for adapter in adapters:
+        if not adapter.get("enabled"):
+            continue
+        for ipv4 in adapter.get("ipv4", ()):
+            address = ipaddress.IPv4Address(ipv4["address"])
+            if address.is_loopback or address.is_link_local:
+                continue
+            prefix = max(ipv4["network_prefix"], DISCOVERY_MIN_PREFIX)
+            network = ipaddress.IPv4Network(f"{address}/{prefix}", strict=False)
+            for host in network.hosts():
+                if host != address:
+                    hosts[str(host)] = None
+    return list(hosts)
+
+
+def _is_status(data: Any) -> bool:
+    """Return True if a /status document comes from the firmware."""
+    return isinstance(data, dict) and all(key in data for key in DISCOVERY_STATUS_KEYS)
+
+
+async def async_probe(
+    session: aiohttp.ClientSession,
+    host: str,
+    port: int = DEFAULT_PORT,
+    use_ssl: bool = False,
+    connect_timeout: float = DISCOVERY_CONNECT_TIMEOUT,
+    timeout: float = DISCOVERY_PROBE_TIMEOUT,
+) -> DiscoveredIntercom | None:
+    """Return the device at host:port, or None if it is not an intercom.
+
+    Certificates are not checked: this only recognises devices, the
+    secret key is never sent.
+    """
+    client_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=connect_timeout)
+    try:
+        async with session.get(
+            device_url(host, port, use_ssl, "/status"),
+            timeout=client_timeout,
+            ssl=False,
+            allow_redirects=False,
+        ) as response:
+            if response.status == 200 and _is_status(
+                json.loads(await response.text())
+            ):
+                return DiscoveredIntercom(host, port, use_ssl, FINGERPRINT_STATUS)
+    except (aiohttp.ClientConnectorError, asyncio.TimeoutError):
+        # Nothing listening: no point trying the websocket
+        return None
+    except (aiohttp.ClientError, ValueError):
+        pass
+
+    # Firmware without /status (or a proxy that hides it) still greets
+    try:
+        greeting = await asyncio.wait_for(
+            _async_greeting(
+                session, device_url(host, port, use_ssl, "/audio_stream", websocket=True)
+            ),
+            timeout,
+        )
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        return None
+    if isinstance(greeting, dict) and greeting.get("type") == MSG_AUTH_REQUIRED:
+        return DiscoveredIntercom(host, port, use_ssl, FINGERPRINT_GREETING)
+    return None
+
+
+async def _async_greeting(session: aiohttp.ClientSession, url: str) -> Any:
+    """Return the first message a websocket sends, decoded."""
+    async with session.ws_connect(url, ssl=False, autoping=False) as ws:
+        message = await ws.receive()
+    if message.type != aiohttp.WSMsgType.TEXT:
+        return None
+    return json.loads(message.data)
+
+
+async def async_scan(
+    session: aiohttp.ClientSession,
+    hosts: Iterable[str],
+    ports: Iterable[int] = (DEFAULT_PORT,),
+    concurrency: int = DISCOVERY_CONCURRENCY,
+    connect_timeout: float = DISCOVERY_CONNECT_TIMEOUT,
+) -> list[DiscoveredIntercom]:
+    """Probe every host on every port, a bounded number at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _probe(host: str, port: int) -> DiscoveredIntercom | None:
+        async with semaphore:
+            return await async_probe(session, host, port, connect_timeout=connect_timeout)
+
+    ports = tuple(ports)
+    results = await asyncio.gather(
+        *(_probe(host, port) for host in hosts for port in ports)
+    )
+    found = [device for device in results if device is not None]
+    _LOGGER.debug("Discovered %d intercoms: %s", len(found), found)
+    return found
@@ -0,0 +1,134 @@
+"""OLED display state and the commands that bring a device to it.
+
+The display shows two text lines, an external text and three marquee
+fields of icon and text. The coordinator keeps the desired state and
+the state last sent successfully, and sends only the differences:
+in one update_display message to firmware that advertises it, as the
+fewest set_text, set_external_text and set_field/clear_field commands
+otherwise. Each message makes the device redraw once. With the
+render_display option, firmware advertising framebuffer is sent the
+changed pixels instead (see oled).
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Mapping
+
+from .const import (
+    CMD_CLEAR_FIELD,
+    CMD_SET_EXTERNAL_TEXT,
+    CMD_SET_FIELD,
+    CMD_SET_TEXT,
+    DISPLAY_MARQUEE_FIELDS,
+)
+
+
+@dataclass(frozen=True)
+class MarqueeField:
+    """Icon path and text of one marquee field."""
+
+    icon: str = ""
+    text: str = ""
+
+
+@dataclass(frozen=True)
+class DisplayState:
+    """Everything the device display shows."""
+
+    line1: str = ""
+    line2: str = ""
+    external_text: str = ""
+    fields: tuple[MarqueeField, ...] = (MarqueeField(),) * DISPLAY_MARQUEE_FIELDS
+
+    def with_field(
+        self, index: int, icon: str | None = None, text: str | None = None
+    ) -> DisplayState:
+        """Return the state with one marquee field changed (None keeps a part)."""
+        if not 0 <= index < len(self.fields):
+            raise ValueError(f"Marquee field index {index} out of range")
+        field = self.fields[index]
+        field = MarqueeField(
+            field.icon if icon is None else icon,
+            field.text if text is None else text,
+        )
+        return replace(self, fields=(*self.fields[:index], field, *self.fields[index + 1:]))
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state as plain data."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> DisplayState:
+        """Return a state from plain data, as stored."""
+        fields = [MarqueeField(**field) for field in data.get("fields", ())]
+        fields += [MarqueeField()] * (DISPLAY_MARQUEE_FIELDS - len(fields))
+        return cls(
+            data.get("line1", ""),
+            data.get("line2", ""),
+            data.get("external_text", ""),
+            tuple(fields[:DISPLAY_MARQUEE_FIELDS]),
+        )
+
+
+def display_from_service(current: DisplayState, data: Mapping[str, Any]) -> DisplayState:
+    """Return the state with the parts given in update_display service data.
+
+    Omitted lines and texts are kept. Each entry of fields replaces the
+    field at its position (a missing icon or text clears it); null
+    entries and fields beyond the list are kept.
+    """
+    display = replace(
+        current,
+        **{
+            key: str(data[key])
+            for key in ("line1", "line2", "external_text")
+            if data.get(key) is not None
+        },
+    )
+    for index, field in enumerate(data.get("fields") or ()):
+        if field is not None:
+            display = display.with_field(
+                index, str(field.get("icon", "")), str(field.get("text", ""))
+            )
+    return display
+
+
+def display_changes(sent: DisplayState | None, desired: DisplayState) -> dict[str, Any]:
+    """Return the parts of desired that differ from sent, as update_display data.
+
+    Without a sent state (nothing known about the device) every part
+    differs.
+    """
+    changes: dict[str, Any] = {}
+    if sent is None or sent.line1 != desired.line1:
+        changes["line1"] = desired.line1
+    if sent is None or sent.line2 != desired.line2:
+        changes["line2"] = desired.line2
+    if sent is None or sent.external_text != desired.external_text:
+        changes["external_text"] = desired.external_text
+    fields = [
+        {"index": index, "icon": field.icon, "text": field.text}
+        for index, field in enumerate(desired.fields)
+        if sent is None or sent.fields[index] != field
+    ]
+    if fields:
+        changes["fields"] = fields
+    return changes
+
+
+def display_commands(
+    changes: dict[str, Any], desired: DisplayState
+) -> list[tuple[str, dict[str, Any]]]:
+    """Return the single commands applying the changes on older firmware."""
+    commands: list[tuple[str, dict[str, Any]]] = []
+    if "line1" in changes or "line2" in changes:
+        # set_text always carries both lines
+        commands.append((CMD_SET_TEXT, {"line1": desired.line1, "line2": desired.line2}))
+    if "external_text" in changes:
+        commands.append((CMD_SET_EXTERNAL_TEXT, {"text": desired.external_text}))
+    for field in changes.get("fields", ()):
+        if field["icon"] or field["text"]:
+            commands.append((CMD_SET_FIELD, field))
+        else:
+            commands.append((CMD_CLEAR_FIELD, {"index": field["index"]}))
+    return commands
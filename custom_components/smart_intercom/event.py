@@ -0,0 +1,87 @@
+"""Event entities for SmartIntercom (detected sounds)."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from homeassistant.components.event import EventEntity, EventEntityDescription
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import SmartIntercomCoordinator
+from .const import (
+    DOMAIN,
+    SIGNAL_SOUND_EVENT,
+    SOUND_EVENT_TYPES,
+)
+
+# Loaded with sound detection, by the coordinator
+if TYPE_CHECKING:
+    from .sound_events import SoundEvent
+
+SOUND_EVENT_DESCRIPTION = EventEntityDescription(
+    key="sound_event",
+    name="Sound Event",
+    icon="mdi:waveform",
+    event_types=SOUND_EVENT_TYPES,
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up SmartIntercom event entities."""
+    coordinator: SmartIntercomCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    # Added even with sound detection off: the options turn it on live
+    async_add_entities(
+        [SmartIntercomSoundEvent(coordinator, entry, SOUND_EVENT_DESCRIPTION)]
+    )
+
+
+class SmartIntercomSoundEvent(CoordinatorEntity, EventEntity):
+    """An event entity fired for sounds detected at the door."""
+
+    _attr_has_entity_name = True
+
+    def __init__(
+        self,
+        coordinator: SmartIntercomCoordinator,
+        entry: ConfigEntry,
+        description: EventEntityDescription,
+    ) -> None:
+        """Initialize the event entity."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._entry = entry
+        self._attr_device_info = coordinator.device_info
+
+    @property
+    def available(self) -> bool:
+        """Return True while sound detection runs."""
+        return super().available and self.coordinator.sound_events is not None
+
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to sound events."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_SOUND_EVENT.format(self._entry.entry_id),
+                self._handle_sound_event,
+            )
+        )
+
+    @callback
+    def _handle_sound_event(self, event: SoundEvent) -> None:
+        """Record a detected sound."""
+        self._trigger_event(
+            event.event_type,
+            {"score": round(event.score, 3), "level_db": round(event.level_db, 1)},
+        )
+        self.async_write_ha_state()
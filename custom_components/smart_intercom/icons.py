@@ -0,0 +1,75 @@
+"""Catalogue of the icons a device offers for the marquee fields.
+
+The device lists the XBM files on its filesystem in answer to
+get_icons. The list is persisted per config entry, so entities have
+their options right after a restart, and get_icons carries the version
+already known: firmware that versions its icons answers "unchanged"
+instead of listing its filesystem again. Older firmware always sends
+the full list; its version is then a digest of the paths, and the
+stored catalogue is only rewritten when that changes.
+
+Lookups both ways are dictionaries and the select options are built
+once per catalogue, so entity state costs the same with any number of
+icons.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Iterable
+
+from .const import ICON_DEFAULT_DIR, ICON_EXTENSION, ICON_OPTION_NONE
+
+
+def icon_display_name(path: str) -> str:
+    """Return the display name of an icon path (/icons/10x10/home.xbm -> home)."""
+    if not path:
+        return ICON_OPTION_NONE
+    filename = path.rsplit("/", 1)[-1]
+    return filename.replace(ICON_EXTENSION, "")
+
+
+class IconCatalogue:
+    """Immutable list of icon paths indexed by display name."""
+
+    __slots__ = ("paths", "version", "options", "_names", "_paths")
+
+    def __init__(self, paths: Iterable[str] = (), version: str | None = None) -> None:
+        """Index the paths; without a device version, digest them."""
+        self.paths = tuple(paths)
+        if version is None and self.paths:
+            version = hashlib.sha1("\n".join(self.paths).encode()).hexdigest()[:16]
+        self.version = version
+        self._names = {path: icon_display_name(path) for path in self.paths}
+        # The first path wins when two directories hold the same name
+        self._paths: dict[str, str] = {}
+        for path, name in self._names.items():
+            self._paths.setdefault(name, path)
+        # Shared by every select entity; never modified
+        self.options = [ICON_OPTION_NONE, *self._paths]
+
+    def __len__(self) -> int:
+        """Return the number of icons."""
+        return len(self.paths)
+
+    def display_name(self, path: str) -> str:
+        """Return the display name of a path, listed or not."""
+        if (name := self._names.get(path)) is not None:
+            return name
+        return icon_display_name(path)
+
+    def path(self, name: str) -> str:
+        """Return the path of a display name ("" for none)."""
+        if name == ICON_OPTION_NONE:
+            return ""
+        if (path := self._paths.get(name)) is not None:
+            return path
+        return f"{ICON_DEFAULT_DIR}{name}{ICON_EXTENSION}"
+
+    def as_dict(self) -> dict:
+        """Return the catalogue for storage."""
+        return {"version": self.version, "icons": list(self.paths)}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> IconCatalogue:
+        """Return a stored catalogue."""
+        return cls(data.get("icons", []), data.get("version"))
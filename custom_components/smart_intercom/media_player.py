@@ -0,0 +1,111 @@
+"""Media player entity for SmartIntercom (speaker playback)."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components import media_source
+from homeassistant.components.media_player import (
+    BrowseMedia,
+    MediaPlayerEntity,
+    MediaPlayerEntityDescription,
+    MediaPlayerEntityFeature,
+    MediaPlayerState,
+    MediaType,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from . import SmartIntercomCoordinator
+from .const import DOMAIN
+
+MEDIA_PLAYER_DESCRIPTION = MediaPlayerEntityDescription(
+    key="audio_stream",
+    name="Audio Stream",
+    icon="mdi:speaker",
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up SmartIntercom media player entities."""
+    coordinator: SmartIntercomCoordinator = hass.data[DOMAIN][entry.entry_id]
+
+    # Added even with audio off: the options turn it on live
+    async_add_entities(
+        [SmartIntercomMediaPlayer(coordinator, entry, MEDIA_PLAYER_DESCRIPTION)]
+    )
+
+
+class SmartIntercomMediaPlayer(CoordinatorEntity, MediaPlayerEntity):
+    """A media player playing WAV clips on the intercom speaker."""
+
+    _attr_has_entity_name = True
+    _attr_media_content_type = MediaType.MUSIC
+    _attr_supported_features = (
+        MediaPlayerEntityFeature.PLAY_MEDIA
+        | MediaPlayerEntityFeature.STOP
+        | MediaPlayerEntityFeature.BROWSE_MEDIA
+    )
+
+    def __init__(
+        self,
+        coordinator: SmartIntercomCoordinator,
+        entry: ConfigEntry,
+        description: MediaPlayerEntityDescription,
+    ) -> None:
+        """Initialize the media player."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._entry = entry
+        self._attr_device_info = coordinator.device_info
+
+    @property
+    def available(self) -> bool:
+        """Return True while audio is enabled."""
+        return super().available and self.coordinator.player is not None
+
+    @property
+    def state(self) -> MediaPlayerState:
+        """Return the playback state."""
+        if (player := self.coordinator.player) is not None and player.playing:
+            return MediaPlayerState.PLAYING
+        return MediaPlayerState.IDLE
+
+    @property
+    def media_content_id(self) -> str | None:
+        """Return the clip being played."""
+        if (player := self.coordinator.player) is None:
+            return None
+        return player.media_id
+
+    async def async_play_media(
+        self, media_type: str, media_id: str, **kwargs: Any
+    ) -> None:
+        """Play a WAV file, URL or media source item."""
+        if (player := self.coordinator.player) is None:
+            raise HomeAssistantError("Audio is disabled in the SmartIntercom options")
+        await player.async_play(media_id)
+
+    async def async_media_stop(self) -> None:
+        """Stop playback."""
+        if (player := self.coordinator.player) is not None:
+            await player.async_stop()
+
+    async def async_browse_media(
+        self,
+        media_content_type: str | None = None,
+        media_content_id: str | None = None,
+    ) -> BrowseMedia:
+        """Browse audio from media sources."""
+        return await media_source.async_browse_media(
+            self.hass,
+            media_content_id,
+            content_filter=lambda item: item.media_content_type.startswith("audio/"),
+        )
@@ -0,0 +1,126 @@
+"""Performance counters and histograms for one intercom connection.
+
+Everything runs on the event loop, so counters are plain integers
+bumped in place and histograms have fixed buckets: recording a value
+costs a bisect and a few additions, with no locks and no allocation.
+Per-frame timings are sampled to keep the audio path cheap.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+
+from .const import METRICS_TIME_BUCKETS
+
+
+class Histogram:
+    """Count observations in fixed buckets (upper bounds, inclusive)."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        """Initialize the histogram; one extra bucket holds larger values."""
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding quantile q."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return self.bounds[index] if index < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self, scale: float = 1.0) -> dict:
+        """Return the summary and buckets, values multiplied by scale."""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count * scale, 3) if self.count else 0.0,
+            "p50": round(self.quantile(0.5) * scale, 3),
+            "p95": round(self.quantile(0.95) * scale, 3),
+            "p99": round(self.quantile(0.99) * scale, 3),
+            "max": round(self.max * scale, 3),
+            "buckets": {
+                f"le_{bound * scale:g}": count
+                for bound, count in zip(self.bounds, self.counts)
+            }
+            | {"inf": self.counts[-1]},
+        }
+
+
+class IntercomMetrics:
+    """Counters and histograms of one device connection."""
+
+    __slots__ = (
+        "frames_in",
+        "bytes_in",
+        "messages_in",
+        "frames_out",
+        "bytes_out",
+        "send_failures",
+        "commands",
+        "command_failures",
+        "stream_drops",
+        "connects",
+        "reconnects",
+        "command_time",
+        "callback_time",
+        "stream_queue_max",
+        "options_time",
+    )
+
+    def __init__(self) -> None:
+        """Initialize all metrics at zero."""
+        self.frames_in = 0
+        self.bytes_in = 0
+        self.messages_in = 0  # JSON
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.send_failures = 0
+        self.commands = 0
+        self.command_failures = 0
+        self.stream_drops = 0  # frames dropped by full audio stream queues
+        self.connects = 0
+        self.reconnects = 0
+        # Seconds a command took to hand to the socket
+        self.command_time = Histogram(METRICS_TIME_BUCKETS)
+        # Seconds spent in the audio callbacks per inbound frame (sampled)
+        self.callback_time = Histogram(METRICS_TIME_BUCKETS)
+        # Most frames ever waiting in an audio stream queue
+        self.stream_queue_max = 0
+        # Seconds it took to apply changed settings of the entry
+        self.options_time = Histogram(METRICS_TIME_BUCKETS)
+
+    def as_dict(self) -> dict:
+        """Return the metrics for diagnostics, times in milliseconds."""
+        return {
+            "frames_in": self.frames_in,
+            "bytes_in": self.bytes_in,
+            "messages_in": self.messages_in,
+            "frames_out": self.frames_out,
+            "bytes_out": self.bytes_out,
+            "send_failures": self.send_failures,
+            "commands": self.commands,
+            "command_failures": self.command_failures,
+            "stream_drops": self.stream_drops,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "command_time_ms": self.command_time.as_dict(1000),
+            "callback_time_ms": self.callback_time.as_dict(1000),
+            "stream_queue_max": self.stream_queue_max,
+            "options_time_ms": self.options_time.as_dict(1000),
+        }
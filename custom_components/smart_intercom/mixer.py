@@ -0,0 +1,254 @@
+"""Outbound audio mixer: one paced stream to the speaker from many sources."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import numpy as np
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .audio_format import AudioFormat
+from .const import (
+    AUDIO_SEND_LEAD,
+    DOMAIN,
+    MIXER_DUCK_GAIN,
+    MIXER_MAX_SOURCES,
+    MIXER_SOURCE_MAX_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+UNITY = 1 << 15  # source gains are Q15
+LIMITER_UNITY = 1 << 12  # the limiter is Q12 so the summed mix can't overflow
+LIMITER_RELEASE_SECONDS = 0.25  # time to recover unity gain after limiting
+
+
+class MixerSource:
+    """One writer to a device's speaker, such as a clip or a live voice.
+
+    Has the same async_send_audio() interface as the coordinator, so any
+    sender can write to the mixer instead of the device.
+    """
+
+    def __init__(self, mixer: AudioMixer, priority: int, name: str, gain: float) -> None:
+        """Initialize the source."""
+        self.priority = priority
+        self.name = name
+        self.gain = min(max(gain, 0.0), 1.0)
+        self.closed = False
+        self._mixer = mixer
+        self._buffer = bytearray()
+        self._drained = asyncio.Event()
+
+    @property
+    def audio_format(self) -> AudioFormat:
+        """Return the format the source must be written in."""
+        return self._mixer.audio_format
+
+    @property
+    def ready(self) -> bool:
+        """Return True if the source can contribute to the next frame."""
+        return len(self._buffer) >= self._mixer.audio_format.frame_bytes or (
+            self.closed and bool(self._buffer)
+        )
+
+    async def async_send_audio(self, data: bytes) -> bool:
+        """Queue device PCM for mixing."""
+        if self.closed:
+            return False
+        self._buffer += data
+        max_bytes = self.audio_format.seconds_to_bytes(MIXER_SOURCE_MAX_SECONDS)
+        if (overflow := len(self._buffer) - max_bytes) > 0:
+            # A writer running far ahead of real time: keep the newest audio
+            del self._buffer[: overflow + (overflow & 1)]
+        self._mixer.wake()
+        return self._mixer.connected
+
+    def read_into(self, row: np.ndarray) -> None:
+        """Move up to one frame of audio into a mix row, padding with silence."""
+        size = min(len(self._buffer), row.size * 2) & ~1
+        samples = np.frombuffer(self._buffer, dtype="<i2", count=size // 2)
+        row[: samples.size] = samples
+        row[samples.size :] = 0
+        del samples  # release the view so the buffer can shrink
+        del self._buffer[:size]
+
+    @callback
+    def close(self) -> None:
+        """Stop writing; audio already queued still plays."""
+        self.closed = True
+        self._mixer.wake()
+
+    @callback
+    def cancel(self) -> None:
+        """Stop writing and drop the audio not played yet."""
+        self._buffer.clear()
+        self.close()
+
+    async def async_wait_drained(self) -> None:
+        """Wait until the mixer has played everything queued."""
+        await self._drained.wait()
+
+    def _release(self) -> None:
+        """Mark the source as finished by the mixer."""
+        self._drained.set()
+
+
+class AudioMixer:
+    """Mix prioritized sources for one device into a single paced stream.
+
+    Sources occupy fixed slots and every frame is mixed over all slots in
+    int32 fixed point, so the cost per frame doesn't depend on how many
+    sources are active. Lower-priority sources are ducked while a higher
+    one is playing, gain changes are ramped over a frame to avoid clicks,
+    and a limiter keeps the sum from clipping.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, coordinator, max_sources: int = MIXER_MAX_SOURCES
+    ) -> None:
+        """Initialize the mixer."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._slots: list[MixerSource | None] = [None] * max_sources
+        self._format: AudioFormat | None = None
+        self._rows = np.zeros((max_sources, 0), dtype=np.int32)
+        self._ramp = np.zeros(0, dtype=np.int32)
+        self._gains = np.zeros(max_sources, dtype=np.int32)
+        self._targets = np.zeros(max_sources, dtype=np.int32)
+        self._limiter = LIMITER_UNITY
+        self._limiter_release = LIMITER_UNITY
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def audio_format(self) -> AudioFormat:
+        """Return the device's current audio format."""
+        return self.coordinator.audio_format
+
+    def _configure(self, audio_format: AudioFormat) -> None:
+        """Size the mix buffers for a frame of the given format."""
+        samples = audio_format.frame_samples
+        self._format = audio_format
+        self._rows = np.zeros((len(self._slots), samples), dtype=np.int32)
+        # Per-sample position within a frame, for gain ramps (Q15)
+        self._ramp = (np.arange(samples, dtype=np.int32) << 15) // samples
+        self._gains[:] = 0
+        frames = max(1, round(LIMITER_RELEASE_SECONDS / audio_format.frame_seconds))
+        self._limiter_release = max(1, LIMITER_UNITY // frames)
+
+    @property
+    def connected(self) -> bool:
+        """Return True if the device can receive audio."""
+        return self.coordinator.client.connected
+
+    @property
+    def sources(self) -> list[MixerSource]:
+        """Return the sources currently attached."""
+        return [source for source in self._slots if source is not None]
+
+    @callback
+    def open_source(self, priority: int, name: str = "", gain: float = 1.0) -> MixerSource:
+        """Attach a new source to the mix."""
+        for slot, existing in enumerate(self._slots):
+            if existing is None:
+                source = MixerSource(self, priority, name, gain)
+                self._slots[slot] = source
+                return source
+        raise HomeAssistantError(
+            f"Too many audio sources for one intercom (max {len(self._slots)})"
+        )
+
+    @callback
+    def wake(self) -> None:
+        """Start or nudge the mixing loop after a source changed."""
+        self._wake.set()
+        if self._task is None or self._task.done():
+            self._task = self.hass.async_create_background_task(
+                self._async_run(), f"{DOMAIN} audio mixer"
+            )
+
+    def mix(self) -> bytes:
+        """Mix the next frame from every ready source."""
+        if self._format != self.audio_format:
+            self._configure(self.audio_format)
+        rows, targets = self._rows, self._targets
+        top = max(
+            (source.priority for source in self._slots if source is not None and source.ready),
+            default=None,
+        )
+        for slot, source in enumerate(self._slots):
+            if source is None or not source.ready:
+                rows[slot] = 0
+                targets[slot] = 0
+            else:
+                source.read_into(rows[slot])
+                gain = source.gain * (MIXER_DUCK_GAIN if source.priority < top else 1.0)
+                targets[slot] = int(gain * UNITY)
+
+        # Ramp each source's gain from the last frame's to this frame's
+        ramp = self._gains[:, None] + (((targets - self._gains)[:, None] * self._ramp) >> 15)
+        mixed = ((rows * ramp) >> 15).sum(axis=0, dtype=np.int32)
+        self._gains[:] = targets
+
+        peak = int(np.abs(mixed).max())
+        if peak * self._limiter > 32767 * LIMITER_UNITY:
+            self._limiter = 32767 * LIMITER_UNITY // peak
+        else:
+            self._limiter = min(LIMITER_UNITY, self._limiter + self._limiter_release)
+        if self._limiter < LIMITER_UNITY:
+            mixed = (mixed * self._limiter) >> 12
+        np.clip(mixed, -32768, 32767, out=mixed)
+        return mixed.astype("<i2").tobytes()
+
+    def _reap(self) -> None:
+        """Detach closed sources that have nothing left to play."""
+        for slot, source in enumerate(self._slots):
+            if source is not None and source.closed and not source.ready:
+                self._slots[slot] = None
+                source._release()
+
+    async def async_stop(self) -> None:
+        """Drop every source and stop mixing."""
+        for source in self.sources:
+            source.cancel()
+            source._release()
+        self._slots = [None] * len(self._slots)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _async_run(self) -> None:
+        """Send mixed frames in real time while sources are attached."""
+        loop = asyncio.get_running_loop()
+        # Let the writer that woke us queue its first burst
+        await asyncio.sleep(0)
+        start = loop.time()
+        sent = 0.0  # seconds of audio sent so far
+
+        while True:
+            self._reap()
+            if not self.sources:
+                return
+            if not any(source.ready for source in self.sources):
+                # Nothing to play yet: wait instead of sending silence
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            now = loop.time()
+            if now > start + sent:
+                # The sources fell behind: restart the clock from here
+                start = now - sent
+            if (delay := start + sent - AUDIO_SEND_LEAD - now) > 0:
+                await asyncio.sleep(delay)
+
+            if not await self.coordinator.async_send_audio(self.mix()):
+                _LOGGER.debug("Mixed frame dropped: device not connected")
+            sent += self._format.frame_seconds
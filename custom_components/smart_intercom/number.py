@@ -11,25 +11,17 @@ from homeassistant.components.number import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import SmartIntercomCoordinator
-from .const import (
-    CMD_SET_MIC_GAIN,
-    CMD_SET_SPEAKER_GAIN,
-    DOMAIN,
-    MANUFACTURER,
-    MODEL,
-)
+from .const import DOMAIN, ENTITY_MIC_GAIN, ENTITY_SPEAKER_GAIN
 
 
 @dataclass(frozen=True)
 class SmartIntercomNumberDescription(NumberEntityDescription):
     """Describe a SmartIntercom number entity."""
 
-    command: str = ""
     data_key: str = ""
 
 
@@ -42,8 +34,7 @@ NUMBER_DESCRIPTIONS: tuple[SmartIntercomNumberDescription, ...] = (
         native_max_value=5.0,
         native_step=0.1,
         mode=NumberMode.SLIDER,
-        command=CMD_SET_MIC_GAIN,
-        data_key="mic_gain",
+        data_key=ENTITY_MIC_GAIN,
     ),
     SmartIntercomNumberDescription(
         key="speaker_gain",
@@ -53,8 +44,7 @@ NUMBER_DESCRIPTIONS: tuple[SmartIntercomNumberDescription, ...] = (
         native_max_value=3.0,
         native_step=0.1,
         mode=NumberMode.SLIDER,
-        command=CMD_SET_SPEAKER_GAIN,
-        data_key="speaker_gain",
+        data_key=ENTITY_SPEAKER_GAIN,
     ),
 )
 
@@ -92,16 +82,7 @@ class SmartIntercomNumber(CoordinatorEntity, NumberEntity):
         self.entity_description = description
         self._attr_unique_id = f"{entry.entry_id}_{description.key}"
         self._entry = entry
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            name="SmartIntercom",
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-        )
+        self._attr_device_info = coordinator.device_info
 
     @property
     def native_value(self) -> float:
@@ -110,10 +91,4 @@ class SmartIntercomNumber(CoordinatorEntity, NumberEntity):
 
     async def async_set_native_value(self, value: float) -> None:
         """Set new value."""
-        await self.coordinator.async_send_command(
-            self.entity_description.command,
-            value=value,
-        )
-        # Update local state
-        self.coordinator.data[self.entity_description.data_key] = value
-        self.coordinator.async_set_updated_data(self.coordinator.data)
+        await self.coordinator.async_set_gain(self.entity_description.data_key, value)
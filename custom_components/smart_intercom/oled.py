@@ -0,0 +1,315 @@
+"""Render the device display in Home Assistant and send only what changed.
+
+In this mode the firmware draws nothing itself: it blits the rectangles
+it is sent into its framebuffer. The framebuffer is kept here in the
+SSD1306 layout the device uses, 8 pages of 8 pixel rows, one byte per
+column and page with the top row in the low bit, so a rectangle is sent
+as its page bytes exactly as the device writes them.
+
+Layout of the 128x64 screen:
+
+- page 0: line 1, page 1: line 2, page 7: the external text, each 21
+  characters of a 5x7 font
+- pages 3-4: the marquee band, the fields one after another, each a
+  10x10 XBM icon and its text; scrolling when wider than the screen
+
+Text rows are gathered from a glyph atlas built once. The marquee is
+drawn once per change into a strip of page bytes, and each scroll frame
+is a window cut from that strip. Frames are compared with the one the
+device last got, and only the changed column spans of each page are
+sent (neighbouring pages merged when that is shorter), in one blit
+command per frame.
+"""
+from __future__ import annotations
+
+import base64
+from functools import lru_cache
+import logging
+import re
+import unicodedata
+from typing import Any, Callable
+
+import aiohttp
+import numpy as np
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import (
+    DISPLAY_HEIGHT,
+    DISPLAY_ICON_TIMEOUT,
+    DISPLAY_MARQUEE_GAP,
+    DISPLAY_MARQUEE_STEP,
+    DISPLAY_WIDTH,
+)
+from .display import DisplayState
+
+_LOGGER = logging.getLogger(__name__)
+
+PAGE_HEIGHT = 8
+PAGES = DISPLAY_HEIGHT // PAGE_HEIGHT
+GLYPH_WIDTH = 6  # 5 columns and one of spacing
+LINE1_PAGE = 0
+LINE2_PAGE = 1
+EXTERNAL_TEXT_PAGE = 7
+MARQUEE_PAGE = 3
+MARQUEE_PAGES = 2
+MARQUEE_ICON_ROW = 3  # rows from the top of the band
+MARQUEE_TEXT_ROW = 4
+ICON_TEXT_GAP = 2  # columns between an icon and its text
+# JSON a rectangle costs beyond its data; cheaper spans are merged
+RECT_OVERHEAD = len('{"x": 000, "page": 0, "width": 000, "pages": 0, "data": ""}, ')
+
+# 5x7 font for ASCII 32-126, five column bytes per glyph, top row in bit 0
+_FONT = bytes.fromhex(
+    "0000000000" "00005f0000" "0007000700" "147f147f14" "242a7f2a12"
+    "2313086462" "3649552250" "0005030000" "001c224100" "0041221c00"
+    "082a1c2a08" "08083e0808" "0050300000" "0808080808" "0060600000"
+    "2010080402" "3e5149453e" "00427f4000" "4261514946" "2141454b31"
+    "1814127f10" "2745454539" "3c4a494930" "0171090503" "3649494936"
+    "064949291e" "0036360000" "0056360000" "0814224100" "1414141414"
+    "0041221408" "0201510906" "324979413e" "7e1111117e" "7f49494936"
+    "3e41414122" "7f4141221c" "7f49494941" "7f09090101" "3e41415132"
+    "7f0808087f" "00417f4100" "2040413f01" "7f08142241" "7f40404040"
+    "7f0204027f" "7f0408107f" "3e4141413e" "7f09090906" "3e4151215e"
+    "7f09192946" "4649494931" "01017f0101" "3f4040403f" "1f2040201f"
+    "7f2018207f" "6314081463" "0304780403" "6151494543" "007f414100"
+    "0204081020" "0041417f00" "0402010204" "4040404040" "0001020400"
+    "2054545478" "7f48444438" "3844444420" "384444487f" "3854545418"
+    "087e090102" "0814545434" "7f08040478" "00447d4000" "2040443d00"
+    "007f102844" "00417f4000" "7c04180478" "7c08040478" "3844444438"
+    "7c14141408" "081414187c" "7c08040408" "4854545420" "043f444020"
+    "3c4040207c" "1c2040201c" "3c4030403c" "4428102844" "0c5050503c"
+    "4464544c44" "0008364100" "00007f0000" "0041360800" "0804080408"
+)
+_FIRST_CHAR = 32
+_UNKNOWN_CHAR = "?"
+
+_XBM_SIZE = re.compile(rb"#define\s+\w*?_(width|height)\s+(\d+)")
+_XBM_BYTES = re.compile(rb"0x([0-9a-fA-F]{1,2})")
+
+
+@lru_cache(maxsize=1)
+def glyph_atlas() -> np.ndarray:
+    """Return the page bytes of every glyph, shape (95, GLYPH_WIDTH)."""
+    atlas = np.zeros((len(_FONT) // 5, GLYPH_WIDTH), np.uint8)
+    atlas[:, :5] = np.frombuffer(_FONT, np.uint8).reshape(-1, 5)
+    atlas.setflags(write=False)
+    return atlas
+
+
+def glyph_codes(text: str) -> np.ndarray:
+    """Return atlas indexes for text; accents are dropped, other characters
+    outside ASCII show as a question mark."""
+    text = unicodedata.normalize("NFKD", text)
+    codes = np.frombuffer(
+        "".join(char for char in text if not unicodedata.combining(char))
+        .encode("ascii", "replace"),
+        np.uint8,
+    ).astype(np.intp) - _FIRST_CHAR
+    codes[(codes < 0) | (codes >= len(glyph_atlas()))] = ord(_UNKNOWN_CHAR) - _FIRST_CHAR
+    return codes
+
+
+def text_page(text: str, width: int = DISPLAY_WIDTH) -> np.ndarray:
+    """Return one page row of text, clipped to width columns."""
+    row = glyph_atlas()[glyph_codes(text[: -(-width // GLYPH_WIDTH)])].reshape(-1)
+    page = np.zeros(width, np.uint8)
+    page[: min(row.size, width)] = row[:width]
+    return page
+
+
+def text_pixels(text: str) -> np.ndarray:
+    """Return the pixels of text, shape (PAGE_HEIGHT, columns), as booleans."""
+    row = glyph_atlas()[glyph_codes(text)].reshape(-1)
+    return np.unpackbits(row[np.newaxis], axis=0, bitorder="little").astype(bool)
+
+
+def parse_xbm(data: bytes) -> np.ndarray | None:
+    """Return the pixels of an XBM image as booleans, or None if malformed."""
+    sizes = {name.decode(): int(value) for name, value in _XBM_SIZE.findall(data)}
+    if "width" not in sizes or "height" not in sizes:
+        return None
+    width, height = sizes["width"], sizes["height"]
+    # Only the bits array holds hex bytes after the defines
+    values = _XBM_BYTES.findall(data[data.find(b"{"):])
+    row_bytes = -(-width // 8)
+    if len(values) < row_bytes * height or not 0 < width <= DISPLAY_WIDTH:
+        return None
+    raw = np.array([int(value, 16) for value in values[: row_bytes * height]], np.uint8)
+    bits = np.unpackbits(raw.reshape(height, row_bytes), axis=1, bitorder="little")
+    return bits[:, :width].astype(bool)
+
+
+def pack_pages(pixels: np.ndarray) -> np.ndarray:
+    """Pack boolean pixels (rows a multiple of 8) into page bytes."""
+    rows, columns = pixels.shape
+    return np.packbits(
+        pixels.reshape(rows // PAGE_HEIGHT, PAGE_HEIGHT, columns), axis=1, bitorder="little"
+    ).reshape(rows // PAGE_HEIGHT, columns)
+
+
+def blit(pages: np.ndarray, rects: list[dict[str, Any]]) -> None:
+    """Write blit rectangles into a framebuffer of page bytes, as the device does."""
+    for rect in rects:
+        x, page, width, count = rect["x"], rect["page"], rect["width"], rect["pages"]
+        data = np.frombuffer(base64.b64decode(rect["data"]), np.uint8)
+        pages[page : page + count, x : x + width] = data.reshape(count, width)
+
+
+async def async_fetch_xbm(hass: HomeAssistant, url: str) -> np.ndarray | None:
+    """Download an XBM icon from the device; None if it can't be had."""
+    try:
+        async with async_get_clientsession(hass).get(
+            url, timeout=aiohttp.ClientTimeout(total=DISPLAY_ICON_TIMEOUT)
+        ) as response:
+            if response.status != 200:
+                _LOGGER.warning("Icon %s not available: HTTP %s", url, response.status)
+                return None
+            data = await response.read()
+    except (aiohttp.ClientError, TimeoutError) as err:
+        _LOGGER.warning("Failed to fetch icon %s: %s", url, err)
+        return None
+    if (bitmap := parse_xbm(data)) is None:
+        _LOGGER.warning("Icon %s is not a valid XBM image", url)
+    return bitmap
+
+
+class DisplayRenderer:
+    """Framebuffer of one device, and what of it the device already has."""
+
+    def __init__(self) -> None:
+        """Initialize with nothing sent."""
+        # Icon path -> pixels; None for icons that could not be loaded
+        self.icons: dict[str, np.ndarray | None] = {}
+        self._sent: np.ndarray | None = None
+        self._marquee_key: tuple | None = None
+        self._strip = np.zeros((MARQUEE_PAGES, DISPLAY_WIDTH), np.uint8)
+        self._offset = 0
+
+    @property
+    def scrolling(self) -> bool:
+        """Return True if the marquee is wider than the screen."""
+        return self._strip.shape[1] > DISPLAY_WIDTH
+
+    def missing_icons(self, display: DisplayState) -> list[str]:
+        """Return the icon paths of the display not loaded yet."""
+        return [
+            field.icon for field in display.fields if field.icon and field.icon not in self.icons
+        ]
+
+    async def async_load_icons(
+        self, hass: HomeAssistant, display: DisplayState, url: Callable[[str], str]
+    ) -> None:
+        """Download the icons of the display not loaded yet (url: of a path)."""
+        for path in self.missing_icons(display):
+            self.icons[path] = await async_fetch_xbm(hass, url(path))
+
+    def clear_icons(self) -> None:
+        """Forget the loaded icons, e.g. when the device's icons changed."""
+        self.icons.clear()
+        self._marquee_key = None
+
+    def reset(self) -> None:
+        """Forget what the device shows, so the next frame is sent whole.
+
+        Icons that failed to download are tried again.
+        """
+        self._sent = None
+        self.icons = {path: icon for path, icon in self.icons.items() if icon is not None}
+
+    def advance(self) -> None:
+        """Scroll the marquee one step."""
+        if self.scrolling:
+            self._offset = (self._offset + DISPLAY_MARQUEE_STEP) % self._strip.shape[1]
+
+    def render(self, display: DisplayState) -> np.ndarray:
+        """Return the framebuffer for a display state, as page bytes."""
+        pages = np.zeros((PAGES, DISPLAY_WIDTH), np.uint8)
+        pages[LINE1_PAGE] = text_page(display.line1)
+        pages[LINE2_PAGE] = text_page(display.line2)
+        pages[EXTERNAL_TEXT_PAGE] = text_page(display.external_text)
+        pages[MARQUEE_PAGE : MARQUEE_PAGE + MARQUEE_PAGES] = self._marquee_frame(display)
+        return pages
+
+    def dirty_rects(self, pages: np.ndarray) -> list[dict[str, Any]]:
+        """Return the blit rectangles bringing the device to pages."""
+        if self._sent is None:
+            return [_rect(pages, 0, PAGES, 0, DISPLAY_WIDTH)]
+        changed = pages != self._sent
+        spans: list[tuple[int, int, int, int]] = []  # first page, pages, x, end x
+        for page in np.flatnonzero(changed.any(axis=1)):
+            columns = np.flatnonzero(changed[page])
+            x, end = int(columns[0]), int(columns[-1]) + 1
+            if spans:
+                first, count, span_x, span_end = spans[-1]
+                merged_x, merged_end = min(x, span_x), max(end, span_end)
+                extra = (count + 1) * (merged_end - merged_x) - count * (span_end - span_x)
+                # Merge with the span of the page above if the padding
+                # costs less than a rectangle of its own
+                if first + count == page and (extra - (end - x)) * 4 / 3 < RECT_OVERHEAD:
+                    spans[-1] = (first, count + 1, merged_x, merged_end)
+                    continue
+            spans.append((int(page), 1, x, end))
+        return [_rect(pages, first, count, x, end) for first, count, x, end in spans]
+
+    def mark_sent(self, pages: np.ndarray | None) -> None:
+        """Record the framebuffer the device now shows (None: unknown)."""
+        self._sent = pages
+
+    def _marquee_frame(self, display: DisplayState) -> np.ndarray:
+        """Return the visible window of the marquee strip."""
+        loaded = tuple(self.icons.get(field.icon) is not None for field in display.fields)
+        key = (display.fields, loaded)
+        if key != self._marquee_key:
+            self._marquee_key = key
+            self._strip = self._draw_strip(display)
+            self._offset = 0
+        width = self._strip.shape[1]
+        if width <= DISPLAY_WIDTH:
+            return self._strip
+        columns = (self._offset + np.arange(DISPLAY_WIDTH)) % width
+        return self._strip[:, columns]
+
+    def _draw_strip(self, display: DisplayState) -> np.ndarray:
+        """Draw every marquee field into one strip of page bytes."""
+        height = MARQUEE_PAGES * PAGE_HEIGHT
+        parts: list[np.ndarray] = []
+        for field in display.fields:
+            if not field.icon and not field.text:
+                continue
+            if parts:
+                parts.append(np.zeros((height, DISPLAY_MARQUEE_GAP), bool))
+            if field.icon and (icon := self.icons.get(field.icon)) is not None:
+                part = np.zeros((height, icon.shape[1]), bool)
+                rows = min(icon.shape[0], height - MARQUEE_ICON_ROW)
+                part[MARQUEE_ICON_ROW : MARQUEE_ICON_ROW + rows] = icon[:rows]
+                parts.append(part)
+                if field.text:
+                    parts.append(np.zeros((height, ICON_TEXT_GAP), bool))
+            if field.text:
+                text = text_pixels(field.text)
+                part = np.zeros((height, text.shape[1]), bool)
+                part[MARQUEE_TEXT_ROW : MARQUEE_TEXT_ROW + PAGE_HEIGHT] = text
+                parts.append(part)
+        if not parts:
+            return np.zeros((MARQUEE_PAGES, DISPLAY_WIDTH), np.uint8)
+        strip = np.concatenate(parts, axis=1)
+        if strip.shape[1] <= DISPLAY_WIDTH:
+            strip = np.pad(strip, ((0, 0), (0, DISPLAY_WIDTH - strip.shape[1])))
+        else:
+            # Leave a gap before the start comes round again
+            strip = np.pad(strip, ((0, 0), (0, DISPLAY_MARQUEE_GAP)))
+        return pack_pages(strip)
+
+
+def _rect(pages: np.ndarray, page: int, count: int, x: int, end: int) -> dict[str, Any]:
+    """Return a blit rectangle of the framebuffer."""
+    data = np.ascontiguousarray(pages[page : page + count, x:end]).tobytes()
+    return {
+        "x": x,
+        "page": page,
+        "width": end - x,
+        "pages": count,
+        "data": base64.b64encode(data).decode(),
+    }
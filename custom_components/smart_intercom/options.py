@@ -0,0 +1,70 @@
+"""Settings of a config entry that can change while it is running.
+
+The connection settings (host, port, SSL, secret key) live in the entry
+data; a change to them reconnects the client. Everything else is an
+option applied to the running client and coordinator without dropping
+the connection. Entries created before the options flow keep their
+audio settings in the entry data; options, once saved, take precedence.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, Mapping
+
+from .const import (
+    AUDIO_BUFFER_SECONDS,
+    AUDIO_FRAME_MS,
+    AUDIO_STREAM_QUEUE_FRAMES,
+    CONF_HOST,
+    CONF_PORT,
+    CONF_SECRET_KEY,
+    CONF_USE_SSL,
+    DEFAULT_AUDIO_FORMAT,
+    DEFAULT_ENABLE_AUDIO,
+    DEFAULT_ENABLE_RECORDING,
+    DEFAULT_USE_SSL,
+    RECONNECT_DELAY,
+    RECONNECT_MAX_DELAY,
+)
+
+
+@dataclass(frozen=True)
+class IntercomOptions:
+    """Runtime options of one intercom, named as the option keys."""
+
+    enable_audio: bool = DEFAULT_ENABLE_AUDIO
+    enable_recording: bool = DEFAULT_ENABLE_RECORDING
+    sound_detection: bool = True
+    audio_format: str = DEFAULT_AUDIO_FORMAT
+    frame_ms: int = AUDIO_FRAME_MS
+    link_tuning: bool = True
+    buffer_seconds: int = AUDIO_BUFFER_SECONDS
+    stream_queue_frames: int = AUDIO_STREAM_QUEUE_FRAMES
+    reconnect_delay: float = RECONNECT_DELAY
+    reconnect_max_delay: float = RECONNECT_MAX_DELAY
+    render_display: bool = False
+
+    @classmethod
+    def from_entry(
+        cls, data: Mapping[str, Any], options: Mapping[str, Any]
+    ) -> IntercomOptions:
+        """Return the options of an entry from its data and options."""
+        merged = {**data, **options}
+        return cls(
+            **{field.name: merged[field.name] for field in fields(cls) if field.name in merged}
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the options as stored in the entry."""
+        return {field.name: getattr(self, field.name) for field in fields(self)}
+
+
+def connection_settings(data: Mapping[str, Any]) -> tuple[str, int, str, bool]:
+    """Return host, port, secret key and SSL: a change needs a new connection."""
+    return (
+        data[CONF_HOST],
+        data[CONF_PORT],
+        data[CONF_SECRET_KEY],
+        data.get(CONF_USE_SSL, DEFAULT_USE_SSL),
+    )
+
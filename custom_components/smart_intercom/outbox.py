@@ -0,0 +1,155 @@
+"""Store-and-forward queue for commands sent while a device is offline.
+
+Only commands with a policy are queued: the doorbell and the alarm.
+Streaming, link and protocol commands fail at once as before, since
+they mean nothing once the moment has passed. Display and gain
+commands are never queued either: the coordinator keeps the desired
+display and gains and replays whatever differs on every connection.
+A policy gives:
+
+- a key: a queued command replaces the one with the same key, so the
+  latest alarm command wins
+- a time to live, after which the command is dropped unsent
+- protection: protected commands are never evicted to make room
+
+The queue is bounded; when full, the oldest unprotected command makes
+room. Commands are sent in order, in one burst, after authentication.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import time
+from typing import Any, Callable, Hashable
+
+from .const import (
+    CMD_DOORBELL,
+    CMD_START_ALARM,
+    CMD_STOP_ALARM,
+    OUTBOX_ALARM_TTL,
+    OUTBOX_DOORBELL_TTL,
+    OUTBOX_MAX_COMMANDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class OutboxPolicy:
+    """How a command is queued while the device is offline."""
+
+    key: Callable[[dict[str, Any]], Hashable]
+    ttl: float | None  # seconds; None keeps the command until sent
+    protected: bool = False
+
+
+def _by_command(message: dict[str, Any]) -> Hashable:
+    return message["cmd"]
+
+
+def _alarm(message: dict[str, Any]) -> Hashable:
+    return "alarm"
+
+
+COMMAND_POLICIES: dict[str, OutboxPolicy] = {
+    # A ring is only worth playing shortly after it was asked for
+    CMD_DOORBELL: OutboxPolicy(_by_command, OUTBOX_DOORBELL_TTL),
+    # An alarm raised during an outage still sounds if the device is
+    # back soon; a stop replaces it and is kept until delivered
+    CMD_START_ALARM: OutboxPolicy(_alarm, OUTBOX_ALARM_TTL, protected=True),
+    CMD_STOP_ALARM: OutboxPolicy(_alarm, None, protected=True),
+}
+
+
+class CommandOutbox:
+    """Bounded, deduplicated queue of commands waiting for a connection."""
+
+    def __init__(
+        self,
+        max_commands: int = OUTBOX_MAX_COMMANDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize an empty outbox."""
+        self._max_commands = max_commands
+        self._clock = clock
+        # key -> (message, expiry or None, protected)
+        self._entries: OrderedDict[Hashable, tuple[dict[str, Any], float | None, bool]] = (
+            OrderedDict()
+        )
+        self.queued = 0
+        self.replaced = 0
+        self.expired = 0
+        self.evicted = 0
+        self.sent = 0
+
+    def __len__(self) -> int:
+        """Return the number of commands waiting."""
+        return len(self._entries)
+
+    def put(self, message: dict[str, Any]) -> bool:
+        """Queue a command; False if its command is never queued."""
+        if (policy := COMMAND_POLICIES.get(message["cmd"])) is None:
+            return False
+        key = policy.key(message)
+        expiry = None if policy.ttl is None else self._clock() + policy.ttl
+        if self._entries.pop(key, None) is not None:
+            self.replaced += 1
+        elif len(self._entries) >= self._max_commands and not self._evict():
+            _LOGGER.warning("Outbox full of protected commands, dropping %s", message["cmd"])
+            return False
+        self._entries[key] = (message, expiry, policy.protected)
+        self.queued += 1
+        return True
+
+    def discard(self, message: dict[str, Any]) -> None:
+        """Forget a queued command superseded by one sent directly."""
+        if self._entries and (policy := COMMAND_POLICIES.get(message["cmd"])) is not None:
+            self._entries.pop(policy.key(message), None)
+
+    def expire(self) -> None:
+        """Drop the commands whose time to live has passed."""
+        now = self._clock()
+        for key, (message, expiry, _) in list(self._entries.items()):
+            if expiry is not None and expiry <= now:
+                del self._entries[key]
+                self.expired += 1
+                _LOGGER.debug("Dropped expired %s", message["cmd"])
+
+    def first(self) -> dict[str, Any] | None:
+        """Return the oldest command waiting, if any."""
+        for message, _, _ in self._entries.values():
+            return message
+        return None
+
+    def remove_sent(self, message: dict[str, Any]) -> None:
+        """Remove a command once it was sent, unless replaced meanwhile."""
+        key = COMMAND_POLICIES[message["cmd"]].key(message)
+        if (entry := self._entries.get(key)) is not None and entry[0] is message:
+            del self._entries[key]
+        self.sent += 1
+
+    def clear(self) -> None:
+        """Drop every command waiting."""
+        self._entries.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the queue state for diagnostics."""
+        return {
+            "waiting": [message["cmd"] for message, _, _ in self._entries.values()],
+            "queued": self.queued,
+            "replaced": self.replaced,
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "sent": self.sent,
+        }
+
+    def _evict(self) -> bool:
+        """Make room by dropping the oldest unprotected command."""
+        for key, (message, _, protected) in self._entries.items():
+            if not protected:
+                del self._entries[key]
+                self.evicted += 1
+                _LOGGER.debug("Outbox full, dropped %s", message["cmd"])
+                return True
+        return False
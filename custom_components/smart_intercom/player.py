@@ -0,0 +1,246 @@
+"""WAV playback on the SmartIntercom speaker."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import AsyncGenerator, AsyncIterable
+import uuid
+
+from aiohttp import ClientError, ClientResponse
+
+from homeassistant.components import media_source
+from homeassistant.components.media_player.browse_media import (
+    async_process_play_media_url,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .audio_cache import (
+    async_get_audio_cache,
+    cache_key,
+    file_fingerprint,
+    url_fingerprint,
+)
+from .audio_stream import TextToSpeechSender, apply_gain, iter_device_pcm
+from .const import (
+    AUDIO_READ_CHUNK_SIZE,
+    AUDIO_SAMPLE_RATE,
+    CMD_START_SPEAK,
+    CMD_STOP_SPEAK,
+    MIXER_PRIORITY_ANNOUNCEMENT,
+    STREAM_MODE_IDLE,
+    STREAM_MODE_SPEAK,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_iter_file(
+    hass: HomeAssistant, path: str
+) -> AsyncGenerator[bytes, None]:
+    """Read a local file in small pieces from the executor."""
+    handle = await hass.async_add_executor_job(open, path, "rb")
+    try:
+        while chunk := await hass.async_add_executor_job(
+            handle.read, AUDIO_READ_CHUNK_SIZE
+        ):
+            yield chunk
+    finally:
+        await hass.async_add_executor_job(handle.close)
+
+
+async def async_open_url(hass: HomeAssistant, url: str) -> ClientResponse:
+    """Start downloading a URL; its body is left to read."""
+    response = await async_get_clientsession(hass).get(url)
+    try:
+        response.raise_for_status()
+    except ClientError:
+        response.release()
+        raise
+    return response
+
+
+async def async_iter_response(response: ClientResponse) -> AsyncGenerator[bytes, None]:
+    """Read a response body in small pieces, then release it."""
+    try:
+        async for chunk in response.content.iter_chunked(AUDIO_READ_CHUNK_SIZE):
+            yield chunk
+    finally:
+        response.release()
+
+
+async def async_resolve_source(hass: HomeAssistant, source: str) -> str:
+    """Return the URL or allowed local path of a media-source ID, URL or path."""
+    if media_source.is_media_source_id(source):
+        play_item = await media_source.async_resolve_media(hass, source, None)
+        source = async_process_play_media_url(hass, play_item.url)
+
+    if source.startswith(("http://", "https://")):
+        return source
+
+    if not hass.config.is_allowed_path(source):
+        raise HomeAssistantError(f"Path {source} is not in allowlist_external_dirs")
+    if not await hass.async_add_executor_job(os.path.isfile, source):
+        raise HomeAssistantError(f"File {source} not found")
+    return source
+
+
+async def _iter_gain(
+    frames: AsyncIterable[bytes], gain: float
+) -> AsyncGenerator[bytes, None]:
+    """Apply a gain to device PCM frames."""
+    async for frame in frames:
+        yield apply_gain(frame, gain)
+
+
+async def async_open_frames(
+    hass: HomeAssistant,
+    source: str,
+    gain: float = 1.0,
+    normalize: bool = False,
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+) -> AsyncIterable[bytes]:
+    """Return device PCM frames for a clip at a sample rate.
+
+    The source is resolved and checked against the allowlist first.
+    Clips are then served from the announcement cache when possible;
+    otherwise they are decoded while playing and cached on the way.
+    Local files are keyed by their stat, URLs by the validator of the
+    response, whose body is only read on a miss. URLs without one are
+    not cached.
+    """
+    cache = await async_get_audio_cache(hass)
+    source = await async_resolve_source(hass, source)
+    response = None
+    if source.startswith(("http://", "https://")):
+        response = await async_open_url(hass, source)
+        fingerprint = url_fingerprint(source, response.headers)
+    else:
+        fingerprint = await hass.async_add_executor_job(file_fingerprint, source)
+
+    keep = fingerprint is not None
+    # An uncacheable clip still needs an entry to be normalized in
+    key = cache_key(fingerprint if keep else uuid.uuid4().hex, gain, normalize, sample_rate)
+    if keep and (frames := await cache.async_open(key)) is not None:
+        if response is not None:
+            response.release()
+        return frames
+
+    if response is not None:
+        chunks = async_iter_response(response)
+    else:
+        chunks = async_iter_file(hass, source)
+    frames = iter_device_pcm(chunks, sample_rate)
+    if normalize:
+        return _async_normalized(cache, key, frames, gain, keep)
+    if gain != 1.0:
+        frames = _iter_gain(frames, gain)
+    return cache.async_store(key, frames) if keep else frames
+
+
+async def _async_normalized(
+    cache, key: str, frames: AsyncIterable[bytes], gain: float, keep: bool = True
+) -> AsyncGenerator[bytes, None]:
+    """Normalize a clip into the cache, then stream it from there."""
+    try:
+        await cache.async_store_normalized(key, frames, gain)
+        if (cached := await cache.async_open(key)) is not None:
+            async for frame in cached:
+                yield frame
+    finally:
+        if not keep:
+            cache.discard(key)
+
+
+class AudioPlayer:
+    """Stream WAV clips to one device's speaker, one at a time."""
+
+    def __init__(self, hass: HomeAssistant, coordinator) -> None:
+        """Initialize the player."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.media_id: str | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def playing(self) -> bool:
+        """Return True while a clip is playing."""
+        return self._task is not None and not self._task.done()
+
+    async def async_play(
+        self, source: str, gain: float = 1.0, normalize: bool = False
+    ) -> None:
+        """Start playing a clip, replacing any clip already playing."""
+        await self.async_stop()
+        frames = await async_open_frames(
+            self.hass,
+            source,
+            gain,
+            normalize,
+            self.coordinator.audio_format.sample_rate,
+        )
+        await self.async_play_frames(frames, source)
+
+    async def async_play_frames(
+        self,
+        frames: AsyncIterable[bytes],
+        media_id: str,
+        start_at: float | None = None,
+    ) -> asyncio.Task:
+        """Start streaming device PCM frames, replacing any clip already playing.
+
+        When start_at (event loop time) is given, the first frame is held
+        back until then. Returns the playback task, which results in True
+        if the whole clip was sent.
+        """
+        await self.async_stop()
+        self.media_id = media_id
+        self._task = self.hass.async_create_task(self._async_run(frames, start_at))
+        self.coordinator.async_update_listeners()
+        return self._task
+
+    async def async_stop(self) -> None:
+        """Stop the current clip."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _async_run(
+        self, frames: AsyncIterable[bytes], start_at: float | None = None
+    ) -> bool:
+        """Put the device in speak mode and stream the clip."""
+        # Only switch modes if nothing else is using the speaker
+        take_speaker = self.coordinator.data["streaming_mode"] == STREAM_MODE_IDLE
+        if take_speaker:
+            await self.coordinator.async_send_command(CMD_START_SPEAK)
+            self.coordinator.set_streaming_mode(STREAM_MODE_SPEAK)
+        source = self.coordinator.mixer.open_source(
+            MIXER_PRIORITY_ANNOUNCEMENT, self.media_id
+        )
+        try:
+            if start_at is not None:
+                await asyncio.sleep(max(0.0, start_at - asyncio.get_running_loop().time()))
+            sender = TextToSpeechSender(source)
+            if not await sender.send_stream(frames):
+                _LOGGER.warning("Playback of %s stopped: device not connected", self.media_id)
+                return False
+            source.close()
+            await source.async_wait_drained()
+        except (ClientError, OSError, ValueError) as err:
+            _LOGGER.error("Failed to play %s: %s", self.media_id, err)
+            return False
+        finally:
+            source.cancel()
+            if take_speaker:
+                await self.coordinator.async_send_command(CMD_STOP_SPEAK)
+                self.coordinator.set_streaming_mode(STREAM_MODE_IDLE)
+            self.media_id = None
+            self.coordinator.async_update_listeners()
+        return True
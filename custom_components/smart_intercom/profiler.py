@@ -0,0 +1,172 @@
+"""Sampling profiler scoped to the integration's own code.
+
+A CPU-time interval timer (SIGPROF) fires at a fixed rate of CPU
+consumed by the whole process, and Python runs the signal handler on
+the event loop thread, whichever thread used the CPU. So the handler
+weighs the stack it interrupted by the CPU time of the loop thread
+since the previous sample (time.thread_time()), and drops samples in
+which the loop used none: those are executor and other threads' CPU,
+which would otherwise be charged to the next loop stack. A stack is
+kept if it runs code of this package (the listen loop, audio
+callbacks, senders, the mixer...), starting at the outermost frame of
+the package, so the asyncio machinery above it is left out and
+everything below it (numpy, websockets, aiohttp) is kept. The loop's
+CPU in other code is only totalled.
+
+Sampling from a separate thread would not work: it only gets the GIL
+when the loop releases it, which is mostly while waiting in select().
+
+The report is written as collapsed stacks, one "frame;frame;... weight"
+line per distinct stack, the weight in microseconds of loop CPU, which
+flamegraph.pl, speedscope and inferno read directly. A sample costs a
+stack walk of a few microseconds. An idle loop is still interrupted
+while other threads are busy, but those samples are dropped.
+"""
+from __future__ import annotations
+
+from collections import Counter
+import logging
+import os
+import signal
+import time
+from types import CodeType, FrameType
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_call_later
+
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_PROFILER = f"{DOMAIN}_profiler"
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__)) + os.sep
+
+
+def _label(code: CodeType) -> str:
+    """Return the collapsed-stack name of a frame."""
+    path = code.co_filename
+    if path.startswith(PACKAGE_DIR):
+        path = path[len(PACKAGE_DIR):]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_qualname} ({path}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Sample the main thread's stack every interval of process CPU time.
+
+    Must be started and stopped from the main thread, which runs the
+    Home Assistant event loop.
+    """
+
+    def __init__(self, interval: float) -> None:
+        """Initialize the profiler; interval is in seconds of process CPU time."""
+        self.interval = interval
+        self.samples = 0  # stacks in the integration
+        self.other = 0  # samples of the loop running other code
+        self.skipped = 0  # samples of other threads' CPU
+        self.cpu = 0.0  # loop CPU seconds in the integration
+        self.other_cpu = 0.0  # and in other code
+        self.started = 0.0
+        self.elapsed = 0.0
+        self._counts: Counter[tuple[CodeType, ...]] = Counter()  # microseconds
+        self._thread_time = 0.0
+        self._previous_handler = None
+
+    @property
+    def running(self) -> bool:
+        """Return True while sampling."""
+        return self._previous_handler is not None
+
+    def start(self) -> None:
+        """Install the signal handler and start the timer."""
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        self.started = time.monotonic()
+        self._thread_time = time.thread_time()
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        """Stop the timer and restore the previous signal handler."""
+        if not self.running:
+            return
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler)
+        self._previous_handler = None
+        self.elapsed = time.monotonic() - self.started
+
+    def _sample(self, signum: int, frame: FrameType | None) -> None:
+        """Record the interrupted stack, weighted by the loop's CPU since the last."""
+        now = time.thread_time()
+        cpu = now - self._thread_time
+        self._thread_time = now
+        if (weight := round(cpu * 1e6)) <= 0:
+            self.skipped += 1
+            return
+        stack = []  # innermost first
+        while frame is not None:
+            stack.append(frame.f_code)
+            frame = frame.f_back
+        for index in range(len(stack) - 1, -1, -1):
+            if stack[index].co_filename.startswith(PACKAGE_DIR):
+                self._counts[tuple(stack[index::-1])] += weight
+                self.samples += 1
+                self.cpu += cpu
+                return
+        self.other += 1
+        self.other_cpu += cpu
+
+    def write(self, path: str) -> None:
+        """Write the collapsed stacks, most frequent first (blocking)."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as file:
+            for stack, count in self._counts.most_common():
+                file.write(f"{';'.join(map(_label, stack))} {count}\n")
+
+
+def async_start_profiling(
+    hass: HomeAssistant, path: str, duration: float, interval: float
+) -> bool:
+    """Profile the event loop for up to duration seconds into path.
+
+    Returns False if a profile is already running.
+    """
+    if DATA_PROFILER in hass.data:
+        return False
+    profiler = SamplingProfiler(interval)
+    profiler.start()
+
+    async def _async_window_ended(_now) -> None:
+        await async_stop_profiling(hass)
+
+    hass.data[DATA_PROFILER] = (
+        profiler,
+        path,
+        async_call_later(hass, duration, _async_window_ended),
+    )
+    _LOGGER.info("Profiling for up to %.0f s to %s", duration, path)
+    return True
+
+
+async def async_stop_profiling(hass: HomeAssistant) -> None:
+    """Stop the running profile and write its report."""
+    if (running := hass.data.pop(DATA_PROFILER, None)) is None:
+        return
+    profiler, path, cancel_window = running
+    cancel_window()
+    profiler.stop()
+    try:
+        await hass.async_add_executor_job(profiler.write, path)
+    except OSError as err:
+        _LOGGER.error("Could not write profile to %s: %s", path, err)
+        return
+    _LOGGER.info(
+        "Wrote profile to %s: %.2f s of event loop CPU in the integration, %.2f s"
+        " elsewhere over %.1f s (%d samples, %d of other threads dropped)",
+        path,
+        profiler.cpu,
+        profiler.other_cpu,
+        profiler.elapsed,
+        profiler.samples + profiler.other,
+        profiler.skipped,
+    )
@@ -0,0 +1,552 @@
+"""Segmented on-disk recording of SmartIntercom door audio."""
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from datetime import timedelta
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import NamedTuple
+
+from aiohttp import web
+import numpy as np
+
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_time_interval
+
+from .audio_format import DEFAULT_FORMAT, SAMPLE_WIDTH, AudioFormat
+from .audio_stream import PcmConverter, WavFormat, pcm_to_wav_header
+from .const import (
+    DOMAIN,
+    RECORDING_DIR,
+    RECORDING_MAX_AGE_DAYS,
+    RECORDING_MAX_BYTES,
+    RECORDING_POST_ROLL,
+    RECORDING_PRE_ROLL,
+    RECORDING_SEGMENT_SECONDS,
+    RECORDING_VAD_THRESHOLD_DB,
+    SIGNAL_SOUND_EVENT,
+    TRIGGER_DOORBELL,
+    TRIGGER_SOUND_EVENT,
+    TRIGGER_VAD,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Recordings are always stored in the default format, whatever the link uses
+STORE_FORMAT = DEFAULT_FORMAT
+BYTE_RATE = STORE_FORMAT.byte_rate
+FLUSH_BYTES = BYTE_RATE  # hand audio to the executor once per second
+MAX_PENDING_BYTES = BYTE_RATE * 10  # cap if the disk falls behind
+READ_CHUNK_BYTES = 64 * 1024
+VAD_MIN_CHUNKS = 3  # consecutive loud chunks needed to trigger
+MAX_OPEN_MAPS = 4
+
+INDEX_FILE = "index.bin"
+SEGMENT_PATTERN = "seg_{:08d}.pcm"
+
+# Index record: wall-clock timestamp, segment, byte offset, length, flags
+_INDEX_RECORD = struct.Struct("<dIIIB")
+
+FLAG_CLIP_START = 0x01
+_TRIGGER_FLAGS = {
+    TRIGGER_DOORBELL: 0x02,
+    TRIGGER_VAD: 0x04,
+    TRIGGER_SOUND_EVENT: 0x08,
+}
+
+
+class IndexEntry(NamedTuple):
+    """A contiguous run of audio written in one flush."""
+
+    timestamp: float
+    segment: int
+    offset: int
+    length: int
+    flags: int
+
+    @property
+    def end(self) -> float:
+        """Return the wall-clock time the run ends."""
+        return self.timestamp + self.length / BYTE_RATE
+
+
+class RecordingStore:
+    """Rotating PCM segment files plus a small binary index.
+
+    All methods do blocking file I/O and must run in the executor. A lock
+    serializes writers, retention and readers from different threads.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = RECORDING_SEGMENT_SECONDS * BYTE_RATE,
+        max_bytes: int = RECORDING_MAX_BYTES,
+        max_age: float = RECORDING_MAX_AGE_DAYS * 86400,
+    ) -> None:
+        """Initialize the store."""
+        self._directory = directory
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: list[IndexEntry] = []
+        self._times: list[float] = []
+        self._segment_sizes: dict[int, int] = {}
+        self._segment = 0
+        self._segment_file = None
+        self._index_file = None
+        self._maps: OrderedDict[int, mmap.mmap] = OrderedDict()
+
+    def _segment_path(self, segment: int) -> str:
+        """Return the path of a segment file."""
+        return os.path.join(self._directory, SEGMENT_PATTERN.format(segment))
+
+    def load(self) -> None:
+        """Create the directory and read the existing index."""
+        os.makedirs(self._directory, exist_ok=True)
+        index_path = os.path.join(self._directory, INDEX_FILE)
+        with self._lock:
+            self._entries.clear()
+            if os.path.exists(index_path):
+                with open(index_path, "rb") as index_file:
+                    raw = index_file.read()
+                usable = len(raw) - len(raw) % _INDEX_RECORD.size
+                self._entries.extend(
+                    IndexEntry(*record)
+                    for record in _INDEX_RECORD.iter_unpack(raw[:usable])
+                )
+            self._times = [entry.timestamp for entry in self._entries]
+
+            for name in os.listdir(self._directory):
+                if name.startswith("seg_") and name.endswith(".pcm"):
+                    segment = int(name[4:-4])
+                    self._segment_sizes[segment] = os.path.getsize(
+                        self._segment_path(segment)
+                    )
+            self._segment = max(self._segment_sizes, default=0)
+            self._index_file = open(index_path, "ab")
+
+    def close(self) -> None:
+        """Close open files and mappings."""
+        with self._lock:
+            self._close_maps()
+            for handle in (self._segment_file, self._index_file):
+                if handle is not None:
+                    handle.close()
+            self._segment_file = None
+            self._index_file = None
+
+    def write(self, data: bytes, timestamp: float, flags: int) -> None:
+        """Append audio to the current segment and index it."""
+        with self._lock:
+            if self._index_file is None:
+                return
+            size = self._segment_sizes.get(self._segment, 0)
+            if self._segment_file is None or size >= self._segment_bytes:
+                self._rotate()
+                self._apply_retention(timestamp)
+                size = 0
+
+            self._segment_file.write(data)
+            self._segment_file.flush()
+            self._segment_sizes[self._segment] = size + len(data)
+
+            entry = IndexEntry(timestamp, self._segment, size, len(data), flags)
+            self._index_file.write(_INDEX_RECORD.pack(*entry))
+            self._index_file.flush()
+            self._entries.append(entry)
+            self._times.append(timestamp)
+
+    def _rotate(self) -> None:
+        """Start a new segment file."""
+        if self._segment_file is not None:
+            self._segment_file.close()
+        if self._segment_sizes.get(self._segment, 0) > 0:
+            self._segment += 1
+        self._segment_file = open(self._segment_path(self._segment), "ab")
+        self._segment_sizes.setdefault(self._segment, 0)
+
+    def enforce_retention(self, now: float) -> int:
+        """Delete the oldest segments beyond the size or age limits.
+
+        Returns the number of deleted segments.
+        """
+        with self._lock:
+            return self._apply_retention(now)
+
+    def _apply_retention(self, now: float) -> int:
+        """Delete expired segments; the lock must be held."""
+        last_seen: dict[int, float] = {}
+        for entry in self._entries:
+            last_seen[entry.segment] = entry.end
+
+        total = sum(self._segment_sizes.values())
+        expired: set[int] = set()
+        for segment in sorted(self._segment_sizes):
+            if segment == self._segment:
+                break
+            too_old = last_seen.get(segment, 0.0) < now - self._max_age
+            if not too_old and total <= self._max_bytes:
+                break
+            expired.add(segment)
+            total -= self._segment_sizes[segment]
+
+        if not expired:
+            return 0
+
+        for segment in expired:
+            if (mapped := self._maps.pop(segment, None)) is not None:
+                mapped.close()
+            del self._segment_sizes[segment]
+            try:
+                os.remove(self._segment_path(segment))
+            except FileNotFoundError:
+                pass
+
+        self._entries = [e for e in self._entries if e.segment not in expired]
+        self._times = [entry.timestamp for entry in self._entries]
+        self._rewrite_index()
+        return len(expired)
+
+    def _rewrite_index(self) -> None:
+        """Atomically replace the index file with the in-memory entries."""
+        index_path = os.path.join(self._directory, INDEX_FILE)
+        tmp_path = f"{index_path}.tmp"
+        with open(tmp_path, "wb") as tmp_file:
+            for entry in self._entries:
+                tmp_file.write(_INDEX_RECORD.pack(*entry))
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        if self._index_file is not None:
+            self._index_file.close()
+        os.replace(tmp_path, index_path)
+        self._index_file = open(index_path, "ab")
+
+    def clips(self) -> list[dict]:
+        """Return the recorded clips, oldest first."""
+        with self._lock:
+            clips: list[dict] = []
+            flags: list[int] = []
+            for entry in self._entries:
+                if entry.flags & FLAG_CLIP_START or not clips:
+                    clips.append({"start": entry.timestamp, "end": entry.end})
+                    flags.append(entry.flags)
+                else:
+                    clips[-1]["end"] = entry.end
+                    flags[-1] |= entry.flags
+            for clip, clip_flags in zip(clips, flags):
+                clip["triggers"] = [
+                    trigger
+                    for trigger, flag in _TRIGGER_FLAGS.items()
+                    if clip_flags & flag
+                ]
+            return clips
+
+    def find_spans(self, start: float, end: float) -> list[tuple[int, int, int]]:
+        """Return (segment, offset, length) spans covering a time range.
+
+        Adjacent runs in the same segment are merged, and the first and
+        last runs are trimmed to the requested range.
+        """
+        with self._lock:
+            first = max(bisect_right(self._times, start) - 1, 0)
+            last = bisect_left(self._times, end)
+            spans: list[list[int]] = []
+            for entry in self._entries[first:last]:
+                if entry.end <= start:
+                    continue
+                offset, length = entry.offset, entry.length
+                if entry.timestamp < start:
+                    skip = int((start - entry.timestamp) * BYTE_RATE) & ~1
+                    offset, length = offset + skip, length - skip
+                if entry.end > end:
+                    length -= int((entry.end - end) * BYTE_RATE) & ~1
+                if length <= 0:
+                    continue
+                if spans and spans[-1][0] == entry.segment and (
+                    spans[-1][1] + spans[-1][2] == offset
+                ):
+                    spans[-1][2] += length
+                else:
+                    spans.append([entry.segment, offset, length])
+            return [tuple(span) for span in spans]
+
+    def read(self, segment: int, offset: int, length: int) -> bytes:
+        """Read bytes from a segment through a memory map."""
+        with self._lock:
+            mapped = self._maps.get(segment)
+            if mapped is None or len(mapped) < offset + length:
+                if mapped is not None:
+                    mapped.close()
+                with open(self._segment_path(segment), "rb") as segment_file:
+                    mapped = mmap.mmap(
+                        segment_file.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+                self._maps[segment] = mapped
+                while len(self._maps) > MAX_OPEN_MAPS:
+                    self._maps.popitem(last=False)[1].close()
+            self._maps.move_to_end(segment)
+            return mapped[offset:offset + length]
+
+    def _close_maps(self) -> None:
+        """Close all memory maps."""
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+
+
+class _Run(NamedTuple):
+    """Contiguous audio waiting to be written."""
+
+    timestamp: float
+    flags: int
+    data: bytes
+
+
+class AudioRecorder:
+    """Capture door audio around doorbell, sound and voice triggers.
+
+    Audio is collected into runs of about a second and written by a
+    single executor job at a time, so memory stays bounded however long
+    a capture lasts.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinator, entry_id: str) -> None:
+        """Initialize the recorder."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self._entry_id = entry_id
+        self.store = RecordingStore(hass.config.path(RECORDING_DIR, entry_id))
+        self._capture_until = 0.0
+        self._start_clip = False
+        self._trigger_flags = 0
+        self._run_time = 0.0
+        self._run_flags = 0
+        self._run_data = bytearray()
+        self._queue: deque[_Run] = deque()
+        self._queued_bytes = 0
+        self._dropped_bytes = 0
+        self._write_failing = False
+        self._loud_chunks = 0
+        self._converter: PcmConverter | None = None
+        self._flush_task: asyncio.Task | None = None
+        self._unsubs: list = []
+
+    @property
+    def capturing(self) -> bool:
+        """Return True while a capture is in progress."""
+        return time.monotonic() < self._capture_until
+
+    async def async_start(self) -> None:
+        """Load the index and start listening for triggers and audio."""
+        await self.hass.async_add_executor_job(self.store.load)
+        self.coordinator.register_audio_callback(self.on_audio_data)
+        self._unsubs.append(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_SOUND_EVENT.format(self._entry_id),
+                self._handle_sound_event,
+            )
+        )
+        self._unsubs.append(
+            async_track_time_interval(
+                self.hass, self._async_enforce_retention, timedelta(hours=1)
+            )
+        )
+
+    async def async_stop(self) -> None:
+        """Stop capturing, flush buffered audio and close the store."""
+        self.coordinator.unregister_audio_callback(self.on_audio_data)
+        while self._unsubs:
+            self._unsubs.pop()()
+        self._capture_until = 0.0
+        self._close_run()
+        if self._flush_task is not None:
+            await self._flush_task
+        await self.hass.async_add_executor_job(self.store.close)
+
+    @callback
+    def trigger(self, reason: str) -> None:
+        """Start or extend a capture.
+
+        A new capture begins with the pre-roll held in the coordinator's
+        audio buffer when the next audio chunk arrives.
+        """
+        now = time.monotonic()
+        if now >= self._capture_until:
+            _LOGGER.debug("Recording started by %s", reason)
+            self._start_clip = True
+        self._trigger_flags |= _TRIGGER_FLAGS.get(reason, 0)
+        self._capture_until = now + RECORDING_POST_ROLL
+
+    @callback
+    def set_format(self, audio_format: AudioFormat) -> None:
+        """Convert incoming audio of a newly agreed format for the store."""
+        self._close_run()
+        self._converter = None
+        if audio_format.sample_rate != STORE_FORMAT.sample_rate:
+            self._converter = PcmConverter(
+                WavFormat(audio_format.sample_rate, audio_format.channels, SAMPLE_WIDTH),
+                STORE_FORMAT.sample_rate,
+            )
+
+    @callback
+    def _handle_sound_event(self, event) -> None:
+        """Start a capture when a sound is detected."""
+        self.trigger(TRIGGER_SOUND_EVENT)
+
+    @callback
+    def on_audio_data(self, data: bytes) -> None:
+        """Handle incoming audio data from the device."""
+        self._detect_voice(data)
+
+        if not self.capturing:
+            self._close_run()
+            return
+
+        if self._start_clip:
+            # The buffer already holds this chunk, preceded by the pre-roll
+            self._start_clip = False
+            self._close_run()
+            data = self.coordinator.audio_buffer.read(
+                self.coordinator.audio_format.seconds_to_bytes(RECORDING_PRE_ROLL)
+            )
+            self._run_flags = FLAG_CLIP_START
+        elif self._queued_bytes + len(self._run_data) + len(data) > MAX_PENDING_BYTES:
+            self._dropped_bytes += len(data)
+            return
+
+        if self._converter is not None:
+            data = self._converter.convert(data)
+
+        if not self._run_data:
+            self._run_time = time.time() - len(data) / BYTE_RATE
+        self._run_data += data
+        self._run_flags |= self._trigger_flags
+        self._trigger_flags = 0
+        if len(self._run_data) >= FLUSH_BYTES:
+            self._close_run()
+
+    def _detect_voice(self, data: bytes) -> None:
+        """Trigger a capture after several consecutive loud chunks."""
+        samples = np.frombuffer(data, dtype="<i2", count=len(data) // 2)
+        if not samples.size:
+            return
+        power = float(np.dot(samples, samples.astype(np.float64))) / samples.size
+        if 10 * np.log10(power / 32768.0**2 + 1e-12) < RECORDING_VAD_THRESHOLD_DB:
+            self._loud_chunks = 0
+            return
+        self._loud_chunks += 1
+        if self._loud_chunks >= VAD_MIN_CHUNKS:
+            self.trigger(TRIGGER_VAD)
+
+    @callback
+    def _close_run(self) -> None:
+        """Queue the current run for writing."""
+        if not self._run_data:
+            return
+        run = _Run(self._run_time, self._run_flags, bytes(self._run_data))
+        self._run_data.clear()
+        self._run_flags = 0
+        self._queue.append(run)
+        self._queued_bytes += len(run.data)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self.hass.async_create_task(self._async_flush())
+
+    async def _async_flush(self) -> None:
+        """Write queued runs in the executor, one at a time."""
+        while self._queue:
+            run = self._queue.popleft()
+            try:
+                await self.hass.async_add_executor_job(
+                    self.store.write, run.data, run.timestamp, run.flags
+                )
+            except OSError as err:
+                # The run is lost; later ones may still fit (e.g. after retention)
+                _LOGGER.log(
+                    logging.DEBUG if self._write_failing else logging.ERROR,
+                    "Could not write recording: %s",
+                    err,
+                )
+                self._write_failing = True
+            else:
+                self._write_failing = False
+            finally:
+                self._queued_bytes -= len(run.data)
+        if self._dropped_bytes:
+            _LOGGER.warning(
+                "Recording fell behind, dropped %d bytes of audio",
+                self._dropped_bytes,
+            )
+            self._dropped_bytes = 0
+
+    async def _async_enforce_retention(self, _now=None) -> None:
+        """Delete recordings beyond the size and age limits."""
+        deleted = await self.hass.async_add_executor_job(
+            self.store.enforce_retention, time.time()
+        )
+        if deleted:
+            _LOGGER.debug("Deleted %d old recording segments", deleted)
+
+
+class RecordingView(HomeAssistantView):
+    """List recorded clips or stream a time range as WAV."""
+
+    url = "/api/smart_intercom/recordings/{entry_id}"
+    name = "api:smart_intercom:recordings"
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the view."""
+        self.hass = hass
+
+    async def get(self, request: web.Request, entry_id: str) -> web.StreamResponse:
+        """Handle a recordings request."""
+        coordinator = self.hass.data.get(DOMAIN, {}).get(entry_id)
+        recorder = getattr(coordinator, "recorder", None)
+        if recorder is None:
+            return web.Response(status=404, text="No recordings for this device")
+
+        store = recorder.store
+        if "start" not in request.query:
+            return self.json(await self.hass.async_add_executor_job(store.clips))
+
+        try:
+            start = float(request.query["start"])
+            end = float(request.query.get("end", time.time()))
+        except ValueError:
+            return web.Response(status=400, text="Invalid start or end")
+
+        spans = await self.hass.async_add_executor_job(store.find_spans, start, end)
+        total = sum(length for _, _, length in spans)
+        if not total:
+            return web.Response(status=404, text="No audio in this range")
+
+        header = pcm_to_wav_header(
+            total // (STORE_FORMAT.channels * SAMPLE_WIDTH), STORE_FORMAT
+        )
+        response = web.StreamResponse(
+            headers={
+                "Content-Type": "audio/wav",
+                "Content-Length": str(len(header) + total),
+            }
+        )
+        await response.prepare(request)
+        await response.write(header)
+        for segment, offset, length in spans:
+            for pos in range(offset, offset + length, READ_CHUNK_BYTES):
+                size = min(READ_CHUNK_BYTES, offset + length - pos)
+                chunk = await self.hass.async_add_executor_job(
+                    store.read, segment, pos, size
+                )
+                await response.write(chunk)
+        await response.write_eof()
+        return response
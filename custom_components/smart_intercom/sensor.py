@@ -1,29 +1,35 @@
 """Sensor entities for SmartIntercom."""
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
+from datetime import timedelta
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
     SensorEntity,
     SensorEntityDescription,
+    SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import SmartIntercomCoordinator
 from .const import (
     DOMAIN,
-    MANUFACTURER,
-    MODEL,
+    METRICS_SENSOR_INTERVAL,
     STREAM_MODE_FULL_DUPLEX,
     STREAM_MODE_IDLE,
     STREAM_MODE_LISTEN,
     STREAM_MODE_SPEAK,
 )
+from .metrics import IntercomMetrics
+
+# Diagnostic sensors are polled, so per-frame counters never flood the state machine
+SCAN_INTERVAL = timedelta(seconds=METRICS_SENSOR_INTERVAL)
 
 
 @dataclass(frozen=True)
@@ -70,6 +76,63 @@ SENSOR_DESCRIPTIONS: tuple[SmartIntercomSensorDescription, ...] = (
 )
 
 
+@dataclass(frozen=True)
+class SmartIntercomMetricDescription(SensorEntityDescription):
+    """Describe a SmartIntercom performance sensor."""
+
+    value_fn: Callable[[IntercomMetrics], float | int] = lambda metrics: 0
+
+
+METRIC_DESCRIPTIONS: tuple[SmartIntercomMetricDescription, ...] = (
+    SmartIntercomMetricDescription(
+        key="frames_received",
+        name="Audio Frames Received",
+        icon="mdi:download-network",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.frames_in,
+    ),
+    SmartIntercomMetricDescription(
+        key="frames_sent",
+        name="Audio Frames Sent",
+        icon="mdi:upload-network",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.frames_out,
+    ),
+    SmartIntercomMetricDescription(
+        key="audio_drops",
+        name="Audio Frames Dropped",
+        icon="mdi:waveform",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.stream_drops + metrics.send_failures,
+    ),
+    SmartIntercomMetricDescription(
+        key="reconnects",
+        name="Reconnects",
+        icon="mdi:connection",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.reconnects,
+    ),
+    SmartIntercomMetricDescription(
+        key="command_time_p95",
+        name="Command Send Time (p95)",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: round(metrics.command_time.quantile(0.95) * 1000, 3),
+    ),
+    SmartIntercomMetricDescription(
+        key="callback_time_p95",
+        name="Audio Callback Time (p95)",
+        icon="mdi:timer-outline",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: round(metrics.callback_time.quantile(0.95) * 1000, 3),
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: ConfigEntry,
@@ -82,6 +145,10 @@ async def async_setup_entry(
         SmartIntercomSensor(coordinator, entry, description)
         for description in SENSOR_DESCRIPTIONS
     ]
+    entities.extend(
+        SmartIntercomMetricSensor(coordinator, entry, description)
+        for description in METRIC_DESCRIPTIONS
+    )
 
     async_add_entities(entities)
 
@@ -103,16 +170,7 @@ class SmartIntercomSensor(CoordinatorEntity, SensorEntity):
         self.entity_description = description
         self._attr_unique_id = f"{entry.entry_id}_{description.key}"
         self._entry = entry
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            name="SmartIntercom",
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-        )
+        self._attr_device_info = coordinator.device_info
 
     @property
     def native_value(self):
@@ -124,3 +182,30 @@ class SmartIntercomSensor(CoordinatorEntity, SensorEntity):
             return "Connected" if value else "Disconnected"
         
         return value
+
+
+class SmartIntercomMetricSensor(SensorEntity):
+    """A performance sensor, disabled by default and polled."""
+
+    entity_description: SmartIntercomMetricDescription
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+
+    def __init__(
+        self,
+        coordinator: SmartIntercomCoordinator,
+        entry: ConfigEntry,
+        description: SmartIntercomMetricDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._metrics = coordinator.metrics
+        self._entry = entry
+        self._attr_device_info = coordinator.device_info
+
+    @property
+    def native_value(self) -> float | int:
+        """Return the current value of the metric."""
+        return self.entity_description.value_fn(self._metrics)
@@ -0,0 +1,476 @@
+"""Sound event detection on the SmartIntercom audio stream."""
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from functools import lru_cache
+import logging
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .audio_format import SAMPLE_WIDTH, AudioFormat
+from .audio_stream import PcmConverter, WavFormat
+from .const import (
+    AUDIO_SAMPLE_RATE,
+    EVENT_SOUND_DETECTED,
+    SIGNAL_SOUND_EVENT,
+    SOUND_BLOCK_MS,
+    SOUND_EVENT_DOORBELL_TONE,
+    SOUND_EVENT_GLASS_BREAK,
+    SOUND_EVENT_KNOCK,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Analysis parameters: 25 ms frames every 10 ms, 40 mel bands
+FRAME_LENGTH = 400
+HOP_LENGTH = 160
+N_FFT = 512
+N_MELS = 40
+MEL_FMIN = 60.0
+
+_EPS = 1e-10
+_INT16_SCALE = np.float32(1.0 / 32768.0)
+
+
+def _hz_to_mel(freq: np.ndarray | float) -> np.ndarray:
+    """Convert Hz to the HTK mel scale."""
+    return 2595.0 * np.log10(1.0 + np.asarray(freq) / 700.0)
+
+
+def _mel_to_hz(mel: np.ndarray | float) -> np.ndarray:
+    """Convert HTK mel back to Hz."""
+    return 700.0 * (10.0 ** (np.asarray(mel) / 2595.0) - 1.0)
+
+
+@lru_cache(maxsize=8)
+def mel_filterbank(
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+    n_fft: int = N_FFT,
+    n_mels: int = N_MELS,
+    fmin: float = MEL_FMIN,
+    fmax: float | None = None,
+) -> np.ndarray:
+    """Return a (n_fft // 2 + 1, n_mels) triangular mel filterbank.
+
+    The matrix is cached and shared (read-only) by every extractor.
+    """
+    fmax = fmax or sample_rate / 2
+    bin_freqs = np.linspace(0.0, sample_rate / 2, n_fft // 2 + 1)
+    mel_points = np.linspace(_hz_to_mel(fmin), _hz_to_mel(fmax), n_mels + 2)
+    hz_points = _mel_to_hz(mel_points)
+
+    bank = np.zeros((bin_freqs.size, n_mels), dtype=np.float32)
+    for band in range(n_mels):
+        lower, center, upper = hz_points[band:band + 3]
+        rising = (bin_freqs - lower) / (center - lower)
+        falling = (upper - bin_freqs) / (upper - center)
+        bank[:, band] = np.maximum(0.0, np.minimum(rising, falling))
+    bank.flags.writeable = False
+    return bank
+
+
+@lru_cache(maxsize=8)
+def mel_band_centers(
+    sample_rate: int = AUDIO_SAMPLE_RATE,
+    n_mels: int = N_MELS,
+    fmin: float = MEL_FMIN,
+) -> np.ndarray:
+    """Return the center frequency in Hz of each mel band."""
+    mel_points = np.linspace(
+        _hz_to_mel(fmin), _hz_to_mel(sample_rate / 2), n_mels + 2
+    )
+    return _mel_to_hz(mel_points[1:-1])
+
+
+@lru_cache(maxsize=4)
+def _hann(length: int) -> np.ndarray:
+    """Return a cached periodic Hann window."""
+    window = np.hanning(length + 1)[:-1].astype(np.float32)
+    window.flags.writeable = False
+    return window
+
+
+@dataclass(frozen=True)
+class FeatureBlock:
+    """Features for a batch of consecutive analysis frames."""
+
+    start_time: float  # stream time of the first frame, in seconds
+    frame_period: float  # seconds between frames
+    log_mel: np.ndarray  # (frames, n_mels)
+    energy_db: np.ndarray  # (frames,)
+    onset_db: np.ndarray  # (frames,) energy above the tracked noise floor
+    flatness: np.ndarray  # (frames,) spectral flatness, 0 = tonal, 1 = noise
+
+    @property
+    def num_frames(self) -> int:
+        """Return the number of frames in the block."""
+        return self.energy_db.shape[0]
+
+
+class LogMelExtractor:
+    """Incremental log-mel feature extractor for 16-bit mono PCM.
+
+    Samples that do not fill a whole hop are carried over to the next
+    call, so the output is identical however the input is chunked.
+    """
+
+    def __init__(self, sample_rate: int = AUDIO_SAMPLE_RATE) -> None:
+        """Initialize the extractor."""
+        self._sample_rate = sample_rate
+        self._window = _hann(FRAME_LENGTH)
+        self._mel = mel_filterbank(sample_rate)
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._frame_count = 0
+        self._noise_floor: float | None = None
+
+    @property
+    def frame_period(self) -> float:
+        """Return the time between analysis frames in seconds."""
+        return HOP_LENGTH / self._sample_rate
+
+    def reset(self) -> None:
+        """Drop buffered samples and the noise floor estimate."""
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._frame_count = 0
+        self._noise_floor = None
+
+    def process(self, pcm: bytes) -> FeatureBlock | None:
+        """Consume PCM bytes and return features for every complete frame."""
+        usable = len(pcm) & ~1
+        samples = np.frombuffer(pcm, dtype="<i2", count=usable // 2)
+        samples = samples.astype(np.float32) * _INT16_SCALE
+        if self._pending.size:
+            samples = np.concatenate((self._pending, samples))
+
+        if samples.size < FRAME_LENGTH:
+            self._pending = samples
+            return None
+
+        num_frames = 1 + (samples.size - FRAME_LENGTH) // HOP_LENGTH
+        frames = sliding_window_view(samples, FRAME_LENGTH)[::HOP_LENGTH][:num_frames]
+        self._pending = samples[num_frames * HOP_LENGTH:].copy()
+
+        spectrum = np.fft.rfft(frames * self._window, n=N_FFT)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+
+        log_mel = np.log(power @ self._mel + _EPS)
+        mean_power = power.mean(axis=1) + _EPS
+        energy_db = 10.0 * np.log10(mean_power)
+        flatness = np.exp(np.log(power + _EPS).mean(axis=1)) / mean_power
+
+        # Track the background level: drop instantly, rise slowly
+        quietest = float(energy_db.min())
+        if self._noise_floor is None or quietest < self._noise_floor:
+            self._noise_floor = quietest
+        else:
+            self._noise_floor += 0.05 * (quietest - self._noise_floor)
+
+        start_time = self._frame_count * self.frame_period
+        self._frame_count += num_frames
+
+        return FeatureBlock(
+            start_time=start_time,
+            frame_period=self.frame_period,
+            log_mel=log_mel,
+            energy_db=energy_db,
+            onset_db=energy_db - self._noise_floor,
+            flatness=flatness,
+        )
+
+
+@dataclass(frozen=True)
+class SoundEvent:
+    """A detected sound event."""
+
+    event_type: str
+    timestamp: float  # stream time in seconds
+    score: float
+    level_db: float
+
+
+class SoundEventDetector(ABC):
+    """Base class for detectors fed with shared features.
+
+    Detectors exposing a ``template`` get a per-frame similarity column
+    computed in one batched matrix product by the pipeline; others get
+    ``None`` and work from the feature block alone.
+    """
+
+    event_type: str = ""
+    template: np.ndarray | None = None
+
+    @abstractmethod
+    def process(
+        self, block: FeatureBlock, similarity: np.ndarray | None
+    ) -> SoundEvent | None:
+        """Process a block of features and return an event, if any."""
+
+    def reset(self) -> None:
+        """Reset any per-stream state."""
+
+
+class TemplateDetector(SoundEventDetector):
+    """Fire when frames match a spectral template for long enough.
+
+    By default the detector fires once ``min_frames`` consecutive frames
+    match. With ``max_frames`` set it instead segments the stream by
+    energy above the noise floor and fires for segments no longer than
+    ``max_frames`` that contain a match, which separates impulsive sounds
+    (knocks) from the edges of sustained ones in the same bands.
+    """
+
+    def __init__(
+        self,
+        event_type: str,
+        template: np.ndarray,
+        threshold: float,
+        min_frames: int = 1,
+        max_frames: int | None = None,
+        min_onset_db: float = 0.0,
+        max_flatness: float = 1.0,
+        cooldown: float = 1.0,
+    ) -> None:
+        """Initialize the detector."""
+        self.event_type = event_type
+        self.template = template
+        self._threshold = threshold
+        self._min_frames = min_frames
+        self._max_frames = max_frames
+        self._min_onset_db = min_onset_db
+        self._max_flatness = max_flatness
+        self._cooldown = cooldown
+        self._run = 0
+        self._run_start = 0.0
+        self._run_score = 0.0
+        self._run_level = 0.0
+        self._last_fired = -cooldown
+
+    def reset(self) -> None:
+        """Reset the detector state."""
+        self._run = 0
+        self._last_fired = -self._cooldown
+
+    def process(
+        self, block: FeatureBlock, similarity: np.ndarray | None
+    ) -> SoundEvent | None:
+        """Return an event once a matching run satisfies the constraints."""
+        active = (block.onset_db >= self._min_onset_db) & (
+            block.flatness <= self._max_flatness
+        )
+        if self._run == 0 and not active.any():
+            return None
+        hits = active & (similarity >= self._threshold)
+        segments = hits if self._max_frames is None else active
+
+        event = None
+        for index, in_segment in enumerate(segments):
+            if in_segment:
+                if self._run == 0:
+                    self._run_start = block.start_time + index * block.frame_period
+                    self._run_score = 0.0
+                    self._run_level = -np.inf
+                self._run += 1
+                self._run_level = max(self._run_level, float(block.energy_db[index]))
+                if hits[index]:
+                    self._run_score = max(self._run_score, float(similarity[index]))
+                if self._max_frames is None and self._run == self._min_frames:
+                    event = event or self._fire()
+                continue
+
+            if (
+                self._max_frames is not None
+                and self._run_score > 0.0
+                and self._min_frames <= self._run <= self._max_frames
+            ):
+                event = event or self._fire()
+            self._run = 0
+        return event
+
+    def _fire(self) -> SoundEvent | None:
+        """Build an event for the current run unless cooling down."""
+        if self._run_start - self._last_fired < self._cooldown:
+            return None
+        self._last_fired = self._run_start
+        return SoundEvent(
+            event_type=self.event_type,
+            timestamp=self._run_start,
+            score=self._run_score,
+            level_db=self._run_level,
+        )
+
+
+def band_template(low_hz: float, high_hz: float) -> np.ndarray:
+    """Build a template emphasising mel bands between low_hz and high_hz."""
+    centers = mel_band_centers()
+    template = np.where((centers >= low_hz) & (centers <= high_hz), 1.0, -1.0)
+    return template.astype(np.float32)
+
+
+def default_detectors() -> list[SoundEventDetector]:
+    """Return a fresh set of the built-in detectors."""
+    return [
+        # Short, loud, low-frequency transient
+        TemplateDetector(
+            SOUND_EVENT_KNOCK,
+            band_template(80.0, 1200.0),
+            threshold=0.5,
+            min_frames=1,
+            max_frames=6,
+            min_onset_db=18.0,
+            cooldown=0.15,
+        ),
+        # Sustained tonal energy in the chime range
+        TemplateDetector(
+            SOUND_EVENT_DOORBELL_TONE,
+            band_template(400.0, 2500.0),
+            threshold=0.35,
+            min_frames=15,
+            min_onset_db=10.0,
+            max_flatness=0.1,
+            cooldown=3.0,
+        ),
+        # Loud, noisy, high-frequency burst
+        TemplateDetector(
+            SOUND_EVENT_GLASS_BREAK,
+            band_template(3000.0, 8000.0),
+            threshold=0.55,
+            min_frames=3,
+            min_onset_db=20.0,
+            cooldown=2.0,
+        ),
+    ]
+
+
+class SoundEventPipeline:
+    """Run one feature extractor and many detectors over a single stream."""
+
+    def __init__(
+        self,
+        detectors: list[SoundEventDetector] | None = None,
+        sample_rate: int = AUDIO_SAMPLE_RATE,
+    ) -> None:
+        """Initialize the pipeline."""
+        self._extractor = LogMelExtractor(sample_rate)
+        self._detectors = detectors if detectors is not None else default_detectors()
+
+        # Stack all templates once so matching is a single matrix product
+        self._template_columns: list[int | None] = []
+        templates = []
+        for detector in self._detectors:
+            if detector.template is None:
+                self._template_columns.append(None)
+                continue
+            self._template_columns.append(len(templates))
+            templates.append(_normalize(np.asarray(detector.template, np.float32)))
+        self._templates = np.stack(templates, axis=1) if templates else None
+
+    @property
+    def detectors(self) -> list[SoundEventDetector]:
+        """Return the detectors in this pipeline."""
+        return self._detectors
+
+    def reset(self) -> None:
+        """Reset the extractor and all detectors."""
+        self._extractor.reset()
+        for detector in self._detectors:
+            detector.reset()
+
+    def process(self, pcm: bytes) -> list[SoundEvent]:
+        """Process PCM bytes and return any detected events."""
+        block = self._extractor.process(pcm)
+        if block is None:
+            return []
+
+        similarity = None
+        if self._templates is not None:
+            centered = block.log_mel - block.log_mel.mean(axis=1, keepdims=True)
+            similarity = _normalize(centered) @ self._templates
+
+        events = []
+        for detector, column in zip(self._detectors, self._template_columns):
+            event = detector.process(
+                block, similarity[:, column] if column is not None else None
+            )
+            if event is not None:
+                events.append(event)
+        return events
+
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    """Scale vectors (along the last axis) to unit length."""
+    norm = np.linalg.norm(values, axis=-1, keepdims=True)
+    return values / (norm + _EPS)
+
+
+class SoundEventManager:
+    """Feed device audio through a detection pipeline and publish events."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        detectors: list[SoundEventDetector] | None = None,
+    ) -> None:
+        """Initialize the manager."""
+        self.hass = hass
+        self._entry_id = entry_id
+        self._pipeline = SoundEventPipeline(detectors)
+        self._block_bytes = AUDIO_SAMPLE_RATE * 2 * SOUND_BLOCK_MS // 1000
+        self._buffer = bytearray()
+        self._converter: PcmConverter | None = None
+
+    @property
+    def pipeline(self) -> SoundEventPipeline:
+        """Return the detection pipeline."""
+        return self._pipeline
+
+    def reset(self) -> None:
+        """Reset detection state, e.g. after the stream restarts."""
+        self._buffer.clear()
+        self._pipeline.reset()
+
+    @callback
+    def set_format(self, audio_format: AudioFormat) -> None:
+        """Resample audio of a newly agreed format to the analysis rate."""
+        self.reset()
+        self._converter = None
+        if audio_format.sample_rate != AUDIO_SAMPLE_RATE:
+            self._converter = PcmConverter(
+                WavFormat(audio_format.sample_rate, audio_format.channels, SAMPLE_WIDTH),
+                AUDIO_SAMPLE_RATE,
+            )
+
+    @callback
+    def on_audio_data(self, data: bytes) -> None:
+        """Handle incoming audio data from the device."""
+        if self._converter is not None:
+            data = self._converter.convert(data)
+        self._buffer += data
+        if len(self._buffer) < self._block_bytes:
+            return
+
+        events = self._pipeline.process(bytes(self._buffer))
+        self._buffer.clear()
+        for event in events:
+            self._fire(event)
+
+    def _fire(self, event: SoundEvent) -> None:
+        """Publish a detected event on the bus and to the event entity."""
+        _LOGGER.debug("Detected %s (score %.2f)", event.event_type, event.score)
+        self.hass.bus.async_fire(
+            EVENT_SOUND_DETECTED,
+            {
+                "entry_id": self._entry_id,
+                "type": event.event_type,
+                "score": round(event.score, 3),
+                "level_db": round(event.level_db, 1),
+            },
+        )
+        async_dispatcher_send(
+            self.hass, SIGNAL_SOUND_EVENT.format(self._entry_id), event
+        )
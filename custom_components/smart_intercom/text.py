@@ -1,32 +1,22 @@
 """Text entities for SmartIntercom (display control)."""
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import dataclass, replace
 
 from homeassistant.components.text import TextEntity, TextEntityDescription
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import SmartIntercomCoordinator
-from .const import (
-    CMD_SET_EXTERNAL_TEXT,
-    CMD_SET_FIELD,
-    CMD_SET_TEXT,
-    DOMAIN,
-    MANUFACTURER,
-    MODEL,
-)
+from .const import DOMAIN
 
 
 @dataclass(frozen=True)
 class SmartIntercomTextDescription(TextEntityDescription):
     """Describe a SmartIntercom text entity."""
 
-    data_key: str = ""
     is_display_line: bool = False
     is_marquee_field: bool = False
     line_number: int = 0
@@ -38,7 +28,6 @@ TEXT_DESCRIPTIONS: tuple[SmartIntercomTextDescription, ...] = (
         key="display_line1",
         name="Display Line 1",
         icon="mdi:format-text",
-        data_key="display_line1",
         is_display_line=True,
         line_number=1,
     ),
@@ -46,7 +35,6 @@ TEXT_DESCRIPTIONS: tuple[SmartIntercomTextDescription, ...] = (
         key="display_line2",
         name="Display Line 2",
         icon="mdi:format-text",
-        data_key="display_line2",
         is_display_line=True,
         line_number=2,
     ),
@@ -54,7 +42,6 @@ TEXT_DESCRIPTIONS: tuple[SmartIntercomTextDescription, ...] = (
         key="external_text",
         name="External Text",
         icon="mdi:text-box-outline",
-        data_key="external_text",
         is_display_line=False,
     ),
     # Marquee field texts - ordered after their corresponding icon selects
@@ -62,7 +49,6 @@ TEXT_DESCRIPTIONS: tuple[SmartIntercomTextDescription, ...] = (
         key="marquee_text_1",
         name="Marquee Text 1",
         icon="mdi:text",
-        data_key="marquee_text_0",
         is_marquee_field=True,
         field_index=0,
     ),
@@ -70,7 +56,6 @@ TEXT_DESCRIPTIONS: tuple[SmartIntercomTextDescription, ...] = (
         key="marquee_text_2",
         name="Marquee Text 2",
         icon="mdi:text",
-        data_key="marquee_text_1",
         is_marquee_field=True,
         field_index=1,
     ),
@@ -78,7 +63,6 @@ TEXT_DESCRIPTIONS: tuple[SmartIntercomTextDescription, ...] = (
         key="marquee_text_3",
         name="Marquee Text 3",
         icon="mdi:text",
-        data_key="marquee_text_2",
         is_marquee_field=True,
         field_index=2,
     ),
@@ -119,69 +103,29 @@ class SmartIntercomText(CoordinatorEntity, TextEntity):
         self.entity_description = description
         self._attr_unique_id = f"{entry.entry_id}_{description.key}"
         self._entry = entry
-
-    @property
-    def device_info(self) -> DeviceInfo:
-        """Return device info."""
-        return DeviceInfo(
-            identifiers={(DOMAIN, self._entry.entry_id)},
-            name="SmartIntercom",
-            manufacturer=MANUFACTURER,
-            model=MODEL,
-        )
+        self._attr_device_info = coordinator.device_info
 
     @property
     def native_value(self) -> str:
         """Return the current text value."""
-        return self.coordinator.data.get(self.entity_description.data_key, "")
+        display = self.coordinator.display
+        if self.entity_description.is_marquee_field:
+            return display.fields[self.entity_description.field_index].text
+        if self.entity_description.is_display_line:
+            return display.line1 if self.entity_description.line_number == 1 else display.line2
+        return display.external_text
 
     async def async_set_value(self, value: str) -> None:
         """Set new text value."""
+        display = self.coordinator.display
         if self.entity_description.is_marquee_field:
-            # For marquee fields, send set_field with current icon + new text
-            field_index = self.entity_description.field_index
-            marquee_data = self.coordinator.data.get("marquee_fields", [{}, {}, {}])
-            current_icon = ""
-            if field_index < len(marquee_data):
-                current_icon = marquee_data[field_index].get("icon", "")
-            
-            await self.coordinator.async_send_command(
-                CMD_SET_FIELD,
-                index=field_index,
-                icon=current_icon,
-                text=value,
-            )
-            
-            # Update local state
-            if field_index < len(marquee_data):
-                marquee_data[field_index]["text"] = value
-            self.coordinator.data["marquee_fields"] = marquee_data
-            
+            # Keeps the field's icon
+            display = display.with_field(self.entity_description.field_index, text=value)
         elif self.entity_description.is_display_line:
-            # For display lines, we need to send both lines together
-            line1 = self.coordinator.data.get("display_line1", "")
-            line2 = self.coordinator.data.get("display_line2", "")
-            
             if self.entity_description.line_number == 1:
-                line1 = value
+                display = replace(display, line1=value)
             else:
-                line2 = value
-            
-            await self.coordinator.async_send_command(
-                CMD_SET_TEXT,
-                line1=line1,
-                line2=line2,
-            )
-            # Update local state
-            self.coordinator.data[self.entity_description.data_key] = value
+                display = replace(display, line2=value)
         else:
-            # External text
-            await self.coordinator.async_send_command(
-                CMD_SET_EXTERNAL_TEXT,
-                text=value,
-            )
-            # Update local state
-            self.coordinator.data[self.entity_description.data_key] = value
-        
-        self.coordinator.async_set_updated_data(self.coordinator.data)
-
+            display = replace(display, external_text=value)
+        await self.coordinator.async_update_display(display)
@@ -0,0 +1,203 @@
+"""Session traces: record a device connection and replay it later.
+
+A trace file is a header followed by append-only records, one per
+websocket message in either direction:
+
+    header: magic (8 bytes), wall-clock start (float64)
+    record: nanoseconds since start (uint64), flags (uint8),
+            payload length (uint32), payload
+
+Flags mark outbound messages and binary payloads. Inbound messages are
+written as received: text payloads are UTF-8 JSON, binary payloads
+audio, or with the compact codec audio and control messages after
+their kind byte (see codec). Outbound commands are always written as
+JSON. Authentication keys are never written.
+"""
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import json
+import logging
+import os
+import struct
+import time
+from typing import BinaryIO, Iterable, Iterator
+
+from .const import CMD_AUTH, TRACE_FLUSH_BYTES
+
+_LOGGER = logging.getLogger(__name__)
+
+TRACE_MAGIC = b"SITRACE1"
+_HEADER = struct.Struct("<8sd")
+_RECORD = struct.Struct("<QBI")
+
+FLAG_OUTBOUND = 1
+FLAG_BINARY = 2
+
+
+@dataclass(frozen=True)
+class TraceRecord:
+    """One websocket message of a recorded session."""
+
+    time: float  # seconds since the trace started
+    outbound: bool
+    payload: str | bytes
+
+
+class TraceWriter:
+    """Append websocket messages to a trace file without blocking the loop.
+
+    Records are packed into a memory buffer; full buffers are written
+    by a single worker thread, so they reach the file in order.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Initialize the writer; the file is created by the worker."""
+        self.path = path
+        self.records = 0
+        self._start = time.monotonic_ns()
+        self._buffer = bytearray(_HEADER.pack(TRACE_MAGIC, time.time()))
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="smart_intercom_trace")
+        self._file: BinaryIO | None = None
+        self._closed = False
+
+    def record(self, outbound: bool, message: str | bytes) -> None:
+        """Add one message."""
+        if self._closed:
+            return
+        if isinstance(message, str):
+            payload = message.encode()
+            flags = 0
+        else:
+            payload = message
+            flags = FLAG_BINARY
+        if outbound:
+            flags |= FLAG_OUTBOUND
+        self._buffer += _RECORD.pack(time.monotonic_ns() - self._start, flags, len(payload))
+        self._buffer += payload
+        self.records += 1
+        if len(self._buffer) >= TRACE_FLUSH_BYTES:
+            self._flush()
+
+    def record_command(self, message: dict) -> None:
+        """Add an outbound command, leaving out any secret."""
+        if message.get("cmd") == CMD_AUTH:
+            message = {**message, "key": "<redacted>"}
+        self.record(True, json.dumps(message))
+
+    def _flush(self) -> asyncio.Future:
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return asyncio.get_running_loop().run_in_executor(self._executor, self._write, chunk)
+
+    def _write(self, chunk: bytes) -> None:
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "ab")  # noqa: SIM115
+        self._file.write(chunk)
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+    async def async_close(self) -> None:
+        """Write what is buffered and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        await self._flush()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._close_file)
+        self._executor.shutdown(wait=False)
+        _LOGGER.debug("Wrote %d records to %s", self.records, self.path)
+
+
+def read_trace(path: str) -> Iterator[TraceRecord]:
+    """Yield the records of a trace file (blocking I/O)."""
+    with open(path, "rb") as file:
+        magic, _ = _HEADER.unpack(file.read(_HEADER.size))
+        if magic != TRACE_MAGIC:
+            raise ValueError(f"{path} is not a SmartIntercom trace")
+        while header := file.read(_RECORD.size):
+            if len(header) < _RECORD.size:
+                break  # cut short while recording
+            offset, flags, length = _RECORD.unpack(header)
+            payload = file.read(length)
+            if len(payload) < length:
+                break
+            yield TraceRecord(
+                offset / 1e9,
+                bool(flags & FLAG_OUTBOUND),
+                payload if flags & FLAG_BINARY else payload.decode(),
+            )
+
+
+@dataclass
+class ReplayStats:
+    """What a replay did."""
+
+    messages: int = 0
+    audio_bytes: int = 0
+    replies: int = 0  # messages the client tried to send back
+    trace_seconds: float = 0.0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+
+    @property
+    def cpu_per_hour(self) -> float:
+        """Return the processing cost per recorded hour, in CPU seconds."""
+        if not self.trace_seconds:
+            return 0.0
+        return self.cpu_seconds * 3600 / self.trace_seconds
+
+
+class _ReplaySocket:
+    """Stands in for the device: swallows whatever the client sends."""
+
+    def __init__(self, stats: ReplayStats) -> None:
+        self._stats = stats
+
+    async def send(self, message: str | bytes) -> None:
+        self._stats.replies += 1
+
+    async def ping(self) -> asyncio.Future:
+        pong = asyncio.get_running_loop().create_future()
+        pong.set_result(None)
+        return pong
+
+    async def close(self) -> None:
+        pass
+
+
+async def async_replay(
+    client, records: Iterable[TraceRecord], speed: float = 1.0
+) -> ReplayStats:
+    """Feed the inbound messages of a trace through a client.
+
+    The client's callbacks (usually the coordinator's) see the messages
+    as if the device had sent them; what the client sends back goes
+    nowhere. speed 1 replays in real time, N at N times real time and
+    0 as fast as possible.
+    """
+    stats = ReplayStats()
+    client._ws = _ReplaySocket(stats)
+    client._connected = True
+    client._should_reconnect = False
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    cpu = time.process_time()
+    for record in records:
+        stats.trace_seconds = record.time
+        if record.outbound:
+            continue
+        if speed > 0 and (delay := start + record.time / speed - loop.time()) > 0:
+            await asyncio.sleep(delay)
+        stats.messages += 1
+        if isinstance(record.payload, bytes):
+            stats.audio_bytes += len(record.payload)
+        await client._handle_message(record.payload)
+    client._stop_probing()
+    stats.wall_seconds = loop.time() - start
+    stats.cpu_seconds = time.process_time() - cpu
+    return stats
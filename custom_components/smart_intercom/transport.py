@@ -0,0 +1,134 @@
+"""WebSocket transport settings and link tuning for SmartIntercom devices."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+import logging
+from typing import Any
+
+from .const import (
+    AUDIO_FORMAT_MIN_FRAME_MS,
+    AUDIO_SUPPORTED_RATES,
+    LINK_FRAME_STEPS_MS,
+    LINK_LOSS_MAX_FRAME,
+    LINK_LOSS_STEP_UP,
+    LINK_PROBE_WINDOW,
+    LINK_TUNE_CONFIRM,
+    TRANSPORT_MAX_MESSAGE_BYTES,
+    TRANSPORT_QUEUE_SECONDS,
+    TRANSPORT_WRITE_SECONDS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Highest rate of device PCM any format can carry, in bytes per second
+_MAX_BYTE_RATE = max(AUDIO_SUPPORTED_RATES) * 2
+
+
+@dataclass(frozen=True)
+class TransportProfile:
+    """Options for the websocket connection to a device.
+
+    PCM doesn't compress, so permessage-deflate only costs CPU on both
+    ends; the control messages are too small to gain from it either.
+    Queues are sized in audio time rather than left at the library
+    defaults, which are tuned for large messages.
+    """
+
+    compression: str | None = None
+    max_size: int = TRANSPORT_MAX_MESSAGE_BYTES
+    # Inbound messages held before the device is pushed back
+    max_queue: int = int(TRANSPORT_QUEUE_SECONDS * 1000 / AUDIO_FORMAT_MIN_FRAME_MS)
+    # Outbound bytes buffered before send() waits for the network
+    write_limit: int = int(TRANSPORT_WRITE_SECONDS * _MAX_BYTE_RATE)
+
+    def connect_kwargs(self) -> dict[str, Any]:
+        """Return the keyword arguments for websockets.connect()."""
+        return {
+            "compression": self.compression,
+            "max_size": self.max_size,
+            "max_queue": self.max_queue,
+            "write_limit": self.write_limit,
+        }
+
+
+DEFAULT_TRANSPORT = TransportProfile()
+
+
+class LinkTuner:
+    """Pick a frame duration from the measured round trip and loss.
+
+    Short frames cut latency but each one carries fixed header and
+    wake-up costs, so frames are kept at least as long as the worst
+    recent round trip (shorter frames wouldn't lower the latency the
+    link adds anyway). Lost probes make frames longer: fewer messages
+    contend for a congested link. A new duration is only recommended
+    once several probes agree, so the format doesn't flap.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the tuner."""
+        self._probes: deque[float | None] = deque(maxlen=LINK_PROBE_WINDOW)
+        self._candidate: int | None = None
+        self._agreeing = 0
+
+    @property
+    def loss(self) -> float:
+        """Return the share of recent probes that got no answer."""
+        if not self._probes:
+            return 0.0
+        return sum(rtt is None for rtt in self._probes) / len(self._probes)
+
+    @property
+    def rtt(self) -> float | None:
+        """Return the worst recent round trip in seconds."""
+        return max((rtt for rtt in self._probes if rtt is not None), default=None)
+
+    def reset(self) -> None:
+        """Forget the measurements of a previous connection."""
+        self._probes.clear()
+        self._candidate = None
+        self._agreeing = 0
+
+    def record(self, rtt: float | None) -> None:
+        """Add a probe round trip in seconds, or None if it was lost."""
+        self._probes.append(rtt)
+
+    def best_frame_ms(self) -> int | None:
+        """Return the frame duration the measurements call for."""
+        if (rtt := self.rtt) is None:
+            return None
+        index = next(
+            (i for i, step in enumerate(LINK_FRAME_STEPS_MS) if step >= rtt * 1000),
+            len(LINK_FRAME_STEPS_MS) - 1,
+        )
+        loss = self.loss
+        if loss >= LINK_LOSS_MAX_FRAME:
+            index = len(LINK_FRAME_STEPS_MS) - 1
+        elif loss >= LINK_LOSS_STEP_UP:
+            index = min(index + 1, len(LINK_FRAME_STEPS_MS) - 1)
+        return LINK_FRAME_STEPS_MS[index]
+
+    def recommend(self, current_ms: int) -> int | None:
+        """Return a new frame duration once probes agree on one, else None."""
+        best = self.best_frame_ms()
+        if best is None or best == current_ms:
+            self._candidate = None
+            self._agreeing = 0
+            return None
+        if best != self._candidate:
+            self._candidate = best
+            self._agreeing = 0
+        self._agreeing += 1
+        if self._agreeing < LINK_TUNE_CONFIRM:
+            return None
+        _LOGGER.debug(
+            "Link rtt %.1f ms, loss %.0f%%: frames %d -> %d ms",
+            (self.rtt or 0) * 1000,
+            self.loss * 100,
+            current_ms,
+            best,
+        )
+        self._candidate = None
+        self._agreeing = 0
+        return best
@@ -2,22 +2,62 @@
 from __future__ import annotations
 
 import asyncio
+from dataclasses import replace
 import logging
-from typing import Any, Callable
-
-import websockets
-from websockets.client import WebSocketClientProtocol
+import time
+from types import ModuleType
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 
+from .audio_format import DEFAULT_FORMAT, AudioFormat
+from .codec import CODECS, FRAME_AUDIO, JSON_CODEC, CodecError
 from .const import (
-    AUDIO_CHUNK_SIZE,
     CMD_AUTH,
+    CMD_SET_FORMAT,
+    CODEC_COMPACT,
+    CODEC_JSON,
+    LINK_PROBE_INTERVAL,
+    LINK_PROBE_TIMEOUT,
+    MSG_AUDIO_FORMAT,
     MSG_AUTH_FAILED,
     MSG_AUTH_REQUIRED,
     MSG_AUTH_SUCCESS,
+    RECONNECT_DELAY,
+    RECONNECT_MAX_DELAY,
 )
+from .discovery import device_url
+from .metrics import IntercomMetrics
+from .outbox import CommandOutbox
+from .transport import DEFAULT_TRANSPORT, LinkTuner, TransportProfile
+
+if TYPE_CHECKING:
+    from websockets.client import WebSocketClientProtocol
+
+    from .trace import TraceWriter
 
 _LOGGER = logging.getLogger(__name__)
 
+# Imported in the executor on the first connection: it takes longer to
+# import than the rest of the integration, and setup does not wait for it
+websockets: ModuleType | None = None
+
+
+def _import_websockets() -> ModuleType:
+    """Import websockets with the submodules it loads on first use (blocking)."""
+    import websockets as module
+
+    # Resolve the lazily imported names here rather than on the event loop
+    module.connect, module.ConnectionClosed  # noqa: B018
+    return module
+
+
+async def _async_import_websockets() -> None:
+    """Import websockets once, without blocking the event loop."""
+    global websockets
+    if websockets is None:
+        websockets = await asyncio.get_running_loop().run_in_executor(
+            None, _import_websockets
+        )
+
 
 class SmartIntercomClient:
     """WebSocket client for SmartIntercom ESP32 device."""
@@ -32,8 +72,18 @@ class SmartIntercomClient:
         on_audio: Callable[[bytes], None] | None = None,
         on_disconnect: Callable[[], None] | None = None,
         on_connect: Callable[[], None] | None = None,
+        audio_formats: list[AudioFormat] | None = None,
+        transport: TransportProfile = DEFAULT_TRANSPORT,
+        reconnect_delay: float = RECONNECT_DELAY,
+        reconnect_max_delay: float = RECONNECT_MAX_DELAY,
     ) -> None:
-        """Initialize the WebSocket client."""
+        """Initialize the WebSocket client.
+
+        audio_formats are offered to the device after authentication, by
+        preference; until it answers, the default format is used. If the
+        device negotiates formats, the frame duration is then tuned to
+        the link unless link_tuning is turned off.
+        """
         self._host = host
         self._port = port
         self._secret_key = secret_key
@@ -43,7 +93,42 @@ class SmartIntercomClient:
         self._authenticated = False
         self._listen_task: asyncio.Task | None = None
         self._reconnect_task: asyncio.Task | None = None
+        self._probe_task: asyncio.Task | None = None
         self._should_reconnect = True
+        self._transport = transport
+
+        # Backoff between reconnection attempts, in seconds
+        self.reconnect_delay = reconnect_delay
+        self.reconnect_max_delay = reconnect_max_delay
+
+        # One-way latency estimate in seconds (half the ping round trip)
+        self.latency: float | None = None
+        self.tuner = LinkTuner()
+        self.link_tuning = True
+        self.metrics = IntercomMetrics()
+
+        self._audio_formats = audio_formats or [DEFAULT_FORMAT]
+        self.audio_format = DEFAULT_FORMAT
+        self._negotiated = False  # the device answered a set_format
+        # Optional commands the firmware advertised on authentication
+        self.features: frozenset[str] = frozenset()
+        # Control message codecs offered on authentication, and the one in use
+        self.codecs: tuple[str, ...] = (CODEC_COMPACT,)
+        self.codec = JSON_CODEC
+
+        # Message type -> handler; other messages go to on_message
+        self._handlers: dict[str, Callable[[dict], Awaitable[None]]] = {
+            MSG_AUTH_REQUIRED: self._on_auth_required,
+            MSG_AUTH_SUCCESS: self._on_auth_success,
+            MSG_AUTH_FAILED: self._on_auth_failed,
+            MSG_AUDIO_FORMAT: self._on_audio_format,
+        }
+
+        # Commands waiting for the device to come back
+        self.outbox = CommandOutbox()
+
+        # Session trace being recorded, if any
+        self.trace: TraceWriter | None = None
         
         # Callbacks
         self.on_message = on_message
@@ -65,17 +150,85 @@ class SmartIntercomClient:
             return f"{protocol}://{self._host}/audio_stream"
         return f"{protocol}://{self._host}:{self._port}/audio_stream"
 
+    def device_url(self, path: str) -> str:
+        """Return the HTTP URL of a file on the device."""
+        return device_url(self._host, self._port, self._use_ssl, path)
+
+    async def async_set_audio_formats(
+        self, audio_formats: list[AudioFormat], link_tuning: bool = True
+    ) -> None:
+        """Offer other formats and turn link tuning on or off, live.
+
+        The formats are offered at once if the device is connected.
+        Turning tuning off offers them again, so the device goes back to
+        the configured frame duration.
+        """
+        retune = self.link_tuning and not link_tuning and self._negotiated
+        self.link_tuning = link_tuning
+        if audio_formats == self._audio_formats and not retune:
+            return
+        self._audio_formats = audio_formats
+        # Firmware that never negotiated only speaks the default format
+        if self.connected and (self._negotiated or audio_formats != [DEFAULT_FORMAT]):
+            await self.send_command(
+                CMD_SET_FORMAT,
+                formats=[audio_format.as_dict() for audio_format in audio_formats],
+            )
+
+    async def async_set_endpoint(
+        self, host: str, port: int, secret_key: str, use_ssl: bool
+    ) -> bool:
+        """Connect to another address or with another key.
+
+        Returns False, keeping the connection, if nothing changed.
+        Commands queued for the device are kept for the new connection.
+        """
+        if (host, port, secret_key, use_ssl) == (
+            self._host,
+            self._port,
+            self._secret_key,
+            self._use_ssl,
+        ):
+            return False
+        self._should_reconnect = False
+        await self._async_close()
+        self._host = host
+        self._port = port
+        self._secret_key = secret_key
+        self._use_ssl = use_ssl
+        self.start()
+        return True
+
+    def start(self) -> None:
+        """Connect in the background, retrying until disconnect()."""
+        self._should_reconnect = True
+        self._reconnect_task = asyncio.create_task(self._connect_or_retry())
+
+    async def _connect_or_retry(self) -> None:
+        """Connect, falling back to the reconnection backoff."""
+        if not await self.connect():
+            await self._reconnect()
+
     async def connect(self) -> bool:
         """Connect to the WebSocket server."""
         try:
+            await _async_import_websockets()
             _LOGGER.debug("Connecting to %s", self.ws_url)
             self._ws = await websockets.connect(
                 self.ws_url,
                 ping_interval=20,
                 ping_timeout=10,
                 close_timeout=5,
+                **self._transport.connect_kwargs(),
             )
             self._connected = True
+            self._should_reconnect = True
+            self.metrics.connects += 1
+            self.audio_format = DEFAULT_FORMAT
+            self._negotiated = False
+            self.features = frozenset()
+            self.codec = JSON_CODEC
+            self.tuner.reset()
             _LOGGER.info("Connected to SmartIntercom at %s", self.ws_url)
             
             # Start listening for messages
@@ -90,7 +243,12 @@ class SmartIntercomClient:
     async def disconnect(self) -> None:
         """Disconnect from the WebSocket server."""
         self._should_reconnect = False
-        
+        self.outbox.clear()
+        await self._async_close()
+        _LOGGER.info("Disconnected from SmartIntercom")
+
+    async def _async_close(self) -> None:
+        """Stop the tasks of the connection and close it."""
         if self._listen_task:
             self._listen_task.cancel()
             try:
@@ -98,6 +256,8 @@ class SmartIntercomClient:
             except asyncio.CancelledError:
                 pass
             self._listen_task = None
+
+        self._stop_probing()
         
         if self._reconnect_task:
             self._reconnect_task.cancel()
@@ -113,21 +273,38 @@ class SmartIntercomClient:
         
         self._connected = False
         self._authenticated = False
-        _LOGGER.info("Disconnected from SmartIntercom")
 
-    async def send_command(self, cmd: str, **kwargs: Any) -> bool:
-        """Send a JSON command to the device."""
+    async def send_command(self, cmd: str, queue: bool = True, **kwargs: Any) -> bool:
+        """Send a JSON command to the device.
+
+        While disconnected, commands with an outbox policy are queued
+        (unless queue is False) and sent after the next authentication;
+        True then means queued.
+        """
+        message = {"cmd": cmd, **kwargs}
         if not self._ws or not self.connected:
+            if queue and self.outbox.put(message):
+                _LOGGER.debug("Not connected, queued command: %s", cmd)
+                return True
             _LOGGER.warning("Cannot send command: not connected")
             return False
-        
+        self.outbox.discard(message)
+        return await self._send_message(message)
+
+    async def _send_message(self, message: dict[str, Any]) -> bool:
+        """Send one JSON command on the open connection."""
+        metrics = self.metrics
+        metrics.commands += 1
+        start = time.perf_counter()
         try:
-            import json
-            message = {"cmd": cmd, **kwargs}
-            await self._ws.send(json.dumps(message))
+            await self._ws.send(self.codec.encode(message))
+            metrics.command_time.observe(time.perf_counter() - start)
+            if self.trace:
+                self.trace.record_command(message)
             _LOGGER.debug("Sent command: %s", message)
             return True
         except Exception as err:
+            metrics.command_failures += 1
             _LOGGER.error("Failed to send command: %s", err)
             return False
 
@@ -137,33 +314,58 @@ class SmartIntercomClient:
             return False
         
         try:
-            # Send in chunks if necessary
-            for i in range(0, len(data), AUDIO_CHUNK_SIZE):
-                chunk = data[i:i + AUDIO_CHUNK_SIZE]
+            # Send in frames of the negotiated size and sample width
+            data = self.audio_format.encode(data)
+            frame_bytes = self.audio_format.wire_frame_bytes
+            # Binary frames start with their kind if the codec needs it
+            prefix = self.codec.audio_prefix
+            metrics = self.metrics
+            for i in range(0, len(data), frame_bytes):
+                chunk = prefix + data[i:i + frame_bytes] if prefix else data[i:i + frame_bytes]
                 await self._ws.send(chunk)
+                metrics.frames_out += 1
+                metrics.bytes_out += len(chunk)
+                if self.trace:
+                    self.trace.record(True, chunk)
             return True
         except Exception as err:
+            self.metrics.send_failures += 1
             _LOGGER.error("Failed to send audio: %s", err)
             return False
 
+    async def measure_latency(self, timeout: float = 1.0) -> float | None:
+        """Ping the device and update the one-way latency estimate."""
+        if not self._ws or not self.connected:
+            return None
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            pong_waiter = await self._ws.ping()
+            await asyncio.wait_for(pong_waiter, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.tuner.record(None)
+            return None
+        except websockets.ConnectionClosed:
+            return None
+
+        rtt = loop.time() - start
+        self.tuner.record(rtt)
+        one_way = rtt / 2
+        if self.latency is None:
+            self.latency = one_way
+        else:
+            self.latency += 0.5 * (one_way - self.latency)
+        return self.latency
+
     async def _listen_loop(self) -> None:
         """Listen for incoming WebSocket messages."""
-        import json
-        
         try:
             async for message in self._ws:
-                if isinstance(message, str):
-                    # JSON text message
-                    try:
-                        data = json.loads(message)
-                        await self._handle_json_message(data)
-                    except json.JSONDecodeError:
-                        _LOGGER.warning("Received invalid JSON: %s", message)
-                elif isinstance(message, bytes):
-                    # Binary audio data
-                    if self.on_audio:
-                        self.on_audio(message)
-                        
+                if self.trace:
+                    self.trace.record(False, message)
+                await self._handle_message(message)
+
         except websockets.ConnectionClosed:
             _LOGGER.warning("WebSocket connection closed")
         except Exception as err:
@@ -171,6 +373,7 @@ class SmartIntercomClient:
         finally:
             self._connected = False
             self._authenticated = False
+            self._stop_probing()
             if self.on_disconnect:
                 self.on_disconnect()
             
@@ -178,44 +381,138 @@ class SmartIntercomClient:
             if self._should_reconnect:
                 self._reconnect_task = asyncio.create_task(self._reconnect())
 
-    async def _handle_json_message(self, data: dict) -> None:
-        """Handle incoming JSON messages."""
-        msg_type = data.get("type", "")
-        
-        if msg_type == MSG_AUTH_REQUIRED:
-            _LOGGER.debug("Authentication required, sending key")
-            await self._authenticate()
-        elif msg_type == MSG_AUTH_SUCCESS:
-            _LOGGER.info("Authentication successful")
-            self._authenticated = True
-            if self.on_connect:
-                self.on_connect()
-        elif msg_type == MSG_AUTH_FAILED:
-            _LOGGER.error("Authentication failed")
-            self._authenticated = False
-            await self.disconnect()
-        else:
+    async def _handle_message(self, message: str | bytes) -> None:
+        """Handle one incoming WebSocket message."""
+        codec = self.codec
+        if isinstance(message, bytes):
+            # Binary audio data, after its kind byte if the codec has one
+            if not codec.audio_prefix:
+                audio = message
+            elif message and message[0] == FRAME_AUDIO:
+                audio = message[1:]
+            else:
+                audio = None
+            if audio is not None:
+                metrics = self.metrics
+                metrics.frames_in += 1
+                metrics.bytes_in += len(audio)
+                if self.on_audio:
+                    self.on_audio(self.audio_format.decode(audio))
+                return
+
+        self.metrics.messages_in += 1
+        try:
+            data = codec.decode(message)
+        except CodecError as err:
+            _LOGGER.warning("Received invalid message: %s", err)
+            return
+        if (handler := self._handlers.get(data.get("type", ""))) is not None:
+            await handler(data)
+        elif self.on_message:
             # Forward other messages to callback
+            self.on_message(data)
+
+    async def _on_auth_required(self, data: dict) -> None:
+        """Send the key when the device asks for it."""
+        _LOGGER.debug("Authentication required, sending key")
+        await self._authenticate()
+
+    async def _on_auth_success(self, data: dict) -> None:
+        """Switch to the agreed codec and set the connection up."""
+        _LOGGER.info("Authentication successful")
+        self._authenticated = True
+        self.features = frozenset(data.get("features", ()))
+        name = data.get("codec", CODEC_JSON)
+        if name in self.codecs and name in CODECS:
+            self.codec = CODECS[name]
+            _LOGGER.debug("Using the %s codec", name)
+        elif name != CODEC_JSON:
+            _LOGGER.warning("Device chose codec %s, which was not offered; using JSON", name)
+        if self._audio_formats != [DEFAULT_FORMAT]:
+            await self.send_command(
+                CMD_SET_FORMAT,
+                formats=[audio_format.as_dict() for audio_format in self._audio_formats],
+            )
+        self._probe_task = asyncio.create_task(self._probe_loop())
+        await self._flush_outbox()
+        if self.on_connect:
+            self.on_connect()
+
+    async def _on_auth_failed(self, data: dict) -> None:
+        """Give up on a device that refused the key."""
+        _LOGGER.error("Authentication failed")
+        self._authenticated = False
+        await self.disconnect()
+
+    async def _on_audio_format(self, data: dict) -> None:
+        """Use the audio format the device agreed to."""
+        if (audio_format := AudioFormat.from_dict(data)) is not None:
+            _LOGGER.debug("Using audio format %s", audio_format)
+            self.audio_format = audio_format
+            self._negotiated = True
             if self.on_message:
                 self.on_message(data)
 
+    async def _flush_outbox(self) -> None:
+        """Send the commands queued while offline, oldest first."""
+        outbox = self.outbox
+        outbox.expire()
+        if not outbox:
+            return
+        _LOGGER.info("Sending %d commands queued while offline", len(outbox))
+        while (message := outbox.first()) is not None:
+            if not await self._send_message(message):
+                return
+            outbox.remove_sent(message)
+
+    async def _probe_loop(self) -> None:
+        """Measure the link now and then and retune the frame duration."""
+        ws = self._ws
+        # Before Python 3.12, wait_for() can swallow the cancellation from
+        # _stop_probing(); never outlive the connection the loop was for
+        while True:
+            await asyncio.sleep(LINK_PROBE_INTERVAL)
+            if self._ws is not ws:
+                return
+            await self.measure_latency(LINK_PROBE_TIMEOUT)
+            if not self._negotiated or not self.link_tuning:
+                # Older firmware only speaks the default format
+                continue
+            if frame_ms := self.tuner.recommend(self.audio_format.frame_ms):
+                await self.send_command(
+                    CMD_SET_FORMAT,
+                    formats=[replace(self.audio_format, frame_ms=frame_ms).as_dict()],
+                )
+
+    def _stop_probing(self) -> None:
+        """Stop the link probes of the current connection."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
+
     async def _authenticate(self) -> None:
         """Send authentication message."""
         if self._ws and self._secret_key:
-            import json
             auth_msg = {"cmd": CMD_AUTH, "key": self._secret_key}
-            await self._ws.send(json.dumps(auth_msg))
+            if self.codecs:
+                auth_msg["codecs"] = list(self.codecs)
+            # Always JSON: the codec is agreed in the answer
+            await self._ws.send(JSON_CODEC.encode(auth_msg))
+            if self.trace:
+                self.trace.record_command(auth_msg)
 
     async def _reconnect(self) -> None:
         """Attempt to reconnect after disconnection."""
-        retry_delay = 5
-        max_delay = 60
+        retry_delay = self.reconnect_delay
         
         while self._should_reconnect and not self._connected:
+            # The limit may have been lowered since the last attempt
+            retry_delay = min(retry_delay, self.reconnect_max_delay)
             _LOGGER.info("Attempting to reconnect in %d seconds...", retry_delay)
             await asyncio.sleep(retry_delay)
             
             if await self.connect():
+                self.metrics.reconnects += 1
                 break
             
-            retry_delay = min(retry_delay * 2, max_delay)
+            retry_delay = min(retry_delay * 2, self.reconnect_max_delay)
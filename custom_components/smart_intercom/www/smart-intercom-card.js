@@ -22,6 +22,7 @@ class SmartIntercomCard extends HTMLElement {
         this._streamMode = 'idle';
         this._authenticated = false;
         this._nextPlayTime = 0;
+        this._format = { sample_rate: 16000, bits: 16, frame_ms: 32 };
         this._statusInterval = null;
         this._espState = {
             full_duplex: false,
@@ -572,6 +573,7 @@ class SmartIntercomCard extends HTMLElement {
             this._ws.binaryType = 'arraybuffer';
 
             this._ws.onopen = () => {
+                this._format = { sample_rate: 16000, bits: 16, frame_ms: 32 };
                 this._ws.send(JSON.stringify({ cmd: 'auth', key: this._config.secret_key }));
             };
 
@@ -584,6 +586,13 @@ class SmartIntercomCard extends HTMLElement {
                         this._fetchStatus(); // Get current state after auth
                     } else if (data.type === 'auth_failed') {
                         this._showError('Authentication failed');
+                    } else if (data.type === 'audio_format') {
+                        // The device switched this connection to another format
+                        this._format = {
+                            sample_rate: data.sample_rate || 16000,
+                            bits: data.bits || 16,
+                            frame_ms: data.frame_ms || 32,
+                        };
                     }
                 } else if (this._isStreaming && this._enablePlayback) {
                     this._playAudio(e.data);
@@ -617,22 +626,30 @@ class SmartIntercomCard extends HTMLElement {
         }
 
         try {
-            this._audioContext = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: 16000 });
+            const rate = this._format.sample_rate;
+            this._audioContext = new (window.AudioContext || window.webkitAudioContext)({ sampleRate: rate });
             this._nextPlayTime = this._audioContext.currentTime;
 
             if (mic) {
                 this._mediaStream = await navigator.mediaDevices.getUserMedia({
-                    audio: { sampleRate: 16000, channelCount: 1 }
+                    audio: { sampleRate: rate, channelCount: 1 }
                 });
                 const source = this._audioContext.createMediaStreamSource(this._mediaStream);
-                const processor = this._audioContext.createScriptProcessor(1024, 1, 1);
+                // ScriptProcessor sizes are powers of two: pick the one nearest a frame
+                const frameSamples = rate * this._format.frame_ms / 1000;
+                const bufferSize = Math.min(16384, Math.max(256,
+                    2 ** Math.round(Math.log2(frameSamples))));
+                const processor = this._audioContext.createScriptProcessor(bufferSize, 1, 1);
 
                 processor.onaudioprocess = (e) => {
                     if (this._isStreaming && this._ws.readyState === 1) {
                         const input = e.inputBuffer.getChannelData(0);
-                        const pcm = new Int16Array(input.length);
+                        const pcm = this._format.bits === 8
+                            ? new Uint8Array(input.length)
+                            : new Int16Array(input.length);
                         for (let i = 0; i < input.length; i++) {
-                            pcm[i] = input[i] < 0 ? input[i] * 0x8000 : input[i] * 0x7FFF;
+                            const sample = input[i] < 0 ? input[i] * 0x8000 : input[i] * 0x7FFF;
+                            pcm[i] = this._format.bits === 8 ? (sample >> 8) + 128 : sample;
                         }
                         this._ws.send(pcm.buffer);
                     }
@@ -684,13 +701,22 @@ class SmartIntercomCard extends HTMLElement {
     _playAudio(data) {
         if (!this._audioContext) return;
 
-        const int16 = new Int16Array(data);
-        const float32 = new Float32Array(int16.length);
-        for (let i = 0; i < int16.length; i++) {
-            float32[i] = int16[i] / 32768.0;
+        let float32;
+        if (this._format.bits === 8) {
+            const uint8 = new Uint8Array(data);
+            float32 = new Float32Array(uint8.length);
+            for (let i = 0; i < uint8.length; i++) {
+                float32[i] = (uint8[i] - 128) / 128.0;
+            }
+        } else {
+            const int16 = new Int16Array(data);
+            float32 = new Float32Array(int16.length);
+            for (let i = 0; i < int16.length; i++) {
+                float32[i] = int16[i] / 32768.0;
+            }
         }
 
-        const buffer = this._audioContext.createBuffer(1, float32.length, 16000);
+        const buffer = this._audioContext.createBuffer(1, float32.length, this._format.sample_rate);
         buffer.getChannelData(0).set(float32);
 
         const source = this._audioContext.createBufferSource();